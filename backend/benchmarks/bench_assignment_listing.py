@@ -0,0 +1,149 @@
+"""
+Benchmark del listado de asignaciones: carga completa frente a paginación por clave.
+
+Uso (desde backend/, contra una base de datos PostgreSQL de pruebas):
+
+    DATABASE_URL=postgresql://.../autograder_bench python benchmarks/bench_assignment_listing.py --rows 10000
+
+Crea (una sola vez) un profesor de benchmark con ``--rows`` asignaciones con
+contenido, análisis, soluciones y rúbrica de tamaño realista, y compara:
+
+- legacy: ``.all()`` + serialización completa (el listado anterior)
+- page:   primera página de resumen (lo que pide la lista)
+- walk:   recorrer todas las páginas de resumen con el cursor
+- count:  endpoint de conteo
+
+Con ``--cleanup`` se borran los datos sembrados al terminar.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+BENCH_EMAIL = "bench-listing@autograder.local"
+
+
+def _blob(exercises: int = 8):
+    exercise_list = [
+        {"number": n, "statement": "Resolver y justificar el siguiente problema. " * 12, "type": "calculation", "points": 10}
+        for n in range(1, exercises + 1)
+    ]
+    solutions = [
+        {"exercise_number": n, "expected_answer": "Respuesta esperada " * 20,
+         "solution_steps": ["Paso detallado " * 5] * 4, "explanation": "Explicación " * 40}
+        for n in range(1, exercises + 1)
+    ]
+    rubric = {"criteria": [
+        {"name": f"Criterio {n}", "description": "Descripción " * 10, "weight": 0.25,
+         "levels": [{"name": level, "description": "Nivel " * 8, "points": points}
+                    for level, points in (("Excelente", 10), ("Bueno", 7), ("Regular", 4), ("Insuficiente", 1))]}
+        for n in range(4)
+    ], "total_points": 100}
+    content = {"title": "Actividad", "instructions": "Instrucciones " * 30, "exercises": exercise_list,
+               "total_points": 10 * exercises}
+    return content, {"solutions": solutions, "rubric": rubric}, solutions, rubric
+
+
+def seed(db, Assignment, AssignmentStatus, User, rows: int):
+    from sqlalchemy import insert
+
+    teacher = db.session.query(User).filter_by(email=BENCH_EMAIL).first()
+    if teacher is None:
+        teacher = User(email=BENCH_EMAIL, username="bench-listing", password_hash="x",
+                       first_name="Bench", last_name="Listing")
+        db.session.add(teacher)
+        db.session.commit()
+
+    existing = db.session.query(Assignment).filter_by(teacher_id=teacher.id).count()
+    missing = rows - existing
+    if missing > 0:
+        content, analysis, solutions, rubric = _blob()
+        start = datetime.now(timezone.utc) - timedelta(days=365)
+        batch = []
+        for i in range(missing):
+            batch.append({
+                "id": uuid.uuid4(), "title": f"Asignación {existing + i}", "description": "Práctica de benchmark",
+                "total_points": 80.0, "teacher_id": teacher.id, "extracted_content": content,
+                "ai_analysis": analysis, "final_solutions": solutions, "final_rubric": rubric,
+                "status": AssignmentStatus.READY_FOR_EDITING, "created_at": start + timedelta(minutes=existing + i)
+            })
+            if len(batch) == 1000:
+                db.session.execute(insert(Assignment), batch)
+                db.session.commit()
+                batch = []
+        if batch:
+            db.session.execute(insert(Assignment), batch)
+            db.session.commit()
+    return str(teacher.id)
+
+
+def timed(fn, repeat: int):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--cleanup', action='store_true')
+    args = parser.parse_args()
+
+    from src.main import create_app
+    from src.database.database import db
+    from src.database.models import Assignment, AssignmentStatus, User
+    from src.services.assignment_service import AssignmentService, MAX_PAGE_SIZE
+
+    app = create_app(start_job_workers=False)
+    with app.app_context():
+        teacher_id = seed(db, Assignment, AssignmentStatus, User, args.rows)
+        service = AssignmentService()
+
+        def legacy():
+            assignments = db.session.query(Assignment).filter(
+                Assignment.teacher_id == teacher_id
+            ).order_by(Assignment.created_at.desc()).all()
+            body = json.dumps([service._assignment_to_dict(a) for a in assignments])
+            db.session.expunge_all()
+            return body
+
+        def first_page():
+            return json.dumps(service.list_teacher_assignments(teacher_id))
+
+        def walk():
+            cursor, total, size = None, 0, 0
+            while True:
+                page = service.list_teacher_assignments(teacher_id, limit=MAX_PAGE_SIZE, cursor=cursor)
+                total += len(page["items"])
+                size += len(json.dumps(page))
+                cursor = page["next_cursor"]
+                if not cursor:
+                    return total, size
+
+        def count():
+            return json.dumps(service.count_teacher_assignments(teacher_id))
+
+        print(f"{'modo':<8} {'segundos':>10} {'bytes':>14}")
+        for name, fn in (("legacy", legacy), ("page", first_page), ("count", count)):
+            elapsed, body = timed(fn, args.repeat)
+            print(f"{name:<8} {elapsed:>10.4f} {len(body):>14,}")
+        elapsed, (total, size) = timed(walk, args.repeat)
+        print(f"{'walk':<8} {elapsed:>10.4f} {size:>14,}  ({total} filas)")
+
+        if args.cleanup:
+            db.session.query(Assignment).filter(Assignment.teacher_id == teacher_id).delete()
+            db.session.query(User).filter(User.id == teacher_id).delete()
+            db.session.commit()
+
+
+if __name__ == '__main__':
+    main()
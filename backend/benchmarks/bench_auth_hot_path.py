@@ -0,0 +1,101 @@
+"""
+Benchmark del camino caliente de autorización: ``GET /api/assignments/<id>``.
+
+Uso (desde backend/, contra una base de datos PostgreSQL de pruebas):
+
+    DATABASE_URL=postgresql://.../autograder_bench python benchmarks/bench_auth_hot_path.py --requests 2000
+
+Crea (una sola vez) un profesor de benchmark con una asignación y mide
+peticiones por segundo y consultas SQL por petición con el cliente de pruebas
+de Flask en dos modos:
+
+- sin caché: ``IDENTITY_CACHE_TTL=0``, el usuario se consulta en cada decorador
+- con caché: identidad en la caché en memoria, cero consultas de autorización
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+BENCH_EMAIL = "bench-auth@autograder.local"
+
+
+def seed(db, Assignment, User, UserRole):
+    teacher = db.session.query(User).filter_by(email=BENCH_EMAIL).first()
+    if teacher is None:
+        teacher = User(email=BENCH_EMAIL, username="bench-auth", password_hash="x",
+                       first_name="Bench", last_name="Auth", role=UserRole.TEACHER)
+        db.session.add(teacher)
+        db.session.commit()
+
+    assignment = db.session.query(Assignment).filter_by(teacher_id=teacher.id).first()
+    if assignment is None:
+        assignment = Assignment(title="Asignación de benchmark", description="Autorización",
+                                total_points=10.0, teacher_id=teacher.id)
+        db.session.add(assignment)
+        db.session.commit()
+    return teacher, str(assignment.id)
+
+
+def run(client, url, headers, requests, counter):
+    # Calentamiento (y primera carga de la caché)
+    for _ in range(20):
+        client.get(url, headers=headers)
+
+    counter["queries"] = 0
+    start = time.perf_counter()
+    for _ in range(requests):
+        response = client.get(url, headers=headers)
+        if response.status_code != 200:
+            raise RuntimeError(f"Respuesta inesperada {response.status_code}: {response.get_data(as_text=True)}")
+    elapsed = time.perf_counter() - start
+    return requests / elapsed, counter["queries"] / requests
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--cleanup', action='store_true')
+    args = parser.parse_args()
+
+    from sqlalchemy import event
+    from src.main import create_app
+    from src.config.settings import config
+    from src.database.database import db
+    from src.database.models import Assignment, User, UserRole
+    from src.auth import identity_cache
+    from flask_jwt_extended import create_access_token
+    from src.auth.jwt_manager import identity_claims
+
+    app = create_app(start_job_workers=False)
+    counter = {"queries": 0}
+
+    with app.app_context():
+        @event.listens_for(db.engine, "before_cursor_execute")
+        def count_queries(*_):
+            counter["queries"] += 1
+
+        teacher, assignment_id = seed(db, Assignment, User, UserRole)
+        # Mismo token que emite el login
+        token = create_access_token(identity=str(teacher.id), additional_claims=identity_claims(teacher))
+        headers = {"Authorization": f"Bearer {token}"}
+        url = f"/api/assignments/{assignment_id}"
+        client = app.test_client()
+
+        print(f"{'modo':<12} {'peticiones/s':>14} {'consultas/petición':>20}")
+        for name, ttl in (("sin caché", 0), ("con caché", 30)):
+            config.IDENTITY_CACHE_TTL = ttl
+            identity_cache._cache = None
+            rps, queries = run(client, url, headers, args.requests, counter)
+            print(f"{name:<12} {rps:>14.1f} {queries:>20.2f}")
+
+        if args.cleanup:
+            db.session.query(Assignment).filter(Assignment.teacher_id == teacher.id).delete()
+            db.session.query(User).filter(User.id == teacher.id).delete()
+            db.session.commit()
+
+
+if __name__ == '__main__':
+    main()
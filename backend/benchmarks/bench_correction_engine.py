@@ -0,0 +1,85 @@
+"""
+Benchmark del motor de corrección frente al ProcessPoolExecutor por llamada.
+
+Uso (desde backend/):
+
+    python benchmarks/bench_correction_engine.py --sizes 30 300 3000 --latency 0.05
+
+Las peticiones van a un servidor local que imita la API de Ollama, por lo que
+solo se mide el coste del pipeline y de la concurrencia, no el del modelo.
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.append(os.path.abspath(os.path.dirname(__file__)))
+
+from stub_model_server import start_stub_server
+
+
+def _legacy_task(content: str):
+    """Réplica del process_task anterior: un CorrectionService nuevo por tarea."""
+    from src.services.correction_service import CorrectionService
+    return CorrectionService("ollama").correct_assignment(None, content, "español")
+
+
+def run_legacy(assignments):
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+        return list(executor.map(_legacy_task, assignments))
+
+
+def run_engine(engine, assignments):
+    return engine.correct_batch(None, assignments, "español")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[30, 300, 3000])
+    parser.add_argument('--latency', type=float, default=0.05, help="Latencia simulada del modelo (s)")
+    parser.add_argument('--concurrency', type=int, default=32, help="Concurrencia del motor")
+    parser.add_argument('--legacy', action='store_true', help="Medir también el ProcessPoolExecutor por llamada")
+    args = parser.parse_args()
+
+    server, base_url = start_stub_server(latency=args.latency)
+    # La configuración lee OLLAMA_HOST al importarse
+    os.environ['OLLAMA_HOST'] = base_url
+    os.environ['OLLAMA_MAX_CONCURRENCY'] = str(args.concurrency)
+
+    from src.services.correction_engine import get_correction_engine, shutdown_correction_engines
+    from src.services.concurrency_limiter import get_ollama_limiter
+    from src.services.llm_transport import transport_metrics
+
+    engine = get_correction_engine("ollama")
+    print(f"Servidor stub en {base_url}, latencia {args.latency * 1000:.0f} ms, concurrencia {engine.max_concurrency}")
+    print(f"{'modo':<10} {'tareas':>8} {'segundos':>10} {'tareas/s':>10}")
+
+    for size in args.sizes:
+        assignments = [f"Respuesta del estudiante {i}: la derivada de x^2 es 2x." for i in range(size)]
+
+        modes = [("engine", lambda: run_engine(engine, assignments))]
+        if args.legacy:
+            modes.append(("legacy", lambda: run_legacy(assignments)))
+
+        for name, run in modes:
+            start = time.perf_counter()
+            results = run()
+            elapsed = time.perf_counter() - start
+            assert len(results) == size
+            print(f"{name:<10} {size:>8} {elapsed:>10.2f} {size / elapsed:>10.1f}")
+
+    limiter = get_ollama_limiter().snapshot()
+    print(f"límite adaptativo final {limiter['limit']} (máx. {limiter['max_limit']}), "
+          f"p50 {limiter['latency_p50'] or 0:.3f}s, p95 {limiter['latency_p95'] or 0:.3f}s")
+    for host, stats in transport_metrics.snapshot().items():
+        print(f"{host}: {stats['requests']} peticiones, {stats['connections_opened']} conexiones, "
+              f"reutilización {stats['reuse_ratio']:.1%}")
+
+    shutdown_correction_engines()
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+"""
+Benchmark de la extracción de ejercicios: patrones anteriores frente a la pasada única.
+
+Uso (desde backend/; no necesita base de datos):
+
+    python benchmarks/bench_exercise_extraction.py --exercises 100 1000 5000
+
+Genera enunciados con ``N`` ejercicios ("Ejercicio N:" con apartados numerados,
+decimales y puntuación) ya normalizados como los deja ``FileProcessor`` y mide:
+
+- legacy: los tres ``re.finditer`` con ``.*?`` y el análisis posterior de
+  puntos y tipo de cada enunciado (implementación anterior, copiada aquí)
+- single: ``extract_exercises`` (una sola pasada con patrones precompilados)
+
+junto con el número de ejercicios devueltos por cada uno (la implementación
+anterior devuelve duplicados por los apartados y por el solapamiento entre
+patrones). Con ``--ocr-digits`` mide además un enunciado con una tira de
+cifras sin separar, como las que deja el OCR de una tabla escaneada.
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.utils.exercise_parser import extract_exercises
+
+STATEMENTS = [
+    "Calcular el área del triángulo de lados 3.5, 4.25 y 5 metros",
+    "Explicar la diferencia entre velocidad media e instantánea",
+    "Indicar si es verdadero o falso que toda función continua es derivable",
+    "Seleccionar la opción correcta entre las tres propuestas",
+    "Completar la tabla con los valores de la función para x entre 0 y 10",
+]
+
+
+def legacy_points(statement: str) -> int:
+    for pattern in [r'(\d+)\s*puntos?', r'puntos?[:\s]*(\d+)', r'\((\d+)\s*p\)', r'\[(\d+)\s*p\]']:
+        match = re.search(pattern, statement, re.IGNORECASE)
+        if match:
+            return int(match.group(1))
+    return 10
+
+
+def legacy_type(statement: str) -> str:
+    statement_lower = statement.lower()
+    if any(word in statement_lower for word in ['calcular', 'resolver', 'hallar', 'encontrar']):
+        return 'calculation'
+    elif any(word in statement_lower for word in ['explicar', 'describir', 'analizar', 'comentar']):
+        return 'open_question'
+    elif any(word in statement_lower for word in ['verdadero', 'falso', 'v/f']):
+        return 'true_false'
+    elif any(word in statement_lower for word in ['seleccionar', 'elegir', 'marcar']):
+        return 'multiple_choice'
+    elif any(word in statement_lower for word in ['completar', 'llenar', 'rellenar']):
+        return 'fill_blank'
+    return 'mixed'
+
+
+def legacy_extract_exercises(content: str):
+    exercises = []
+    for pattern in [r'(\d+)\.\s*(.*?)(?=\d+\.|$)',
+                    r'ejercicio\s*(\d+)[:\s]*(.*?)(?=ejercicio\s*\d+|$)',
+                    r'pregunta\s*(\d+)[:\s]*(.*?)(?=pregunta\s*\d+|$)']:
+        for match in re.finditer(pattern, content, re.IGNORECASE | re.DOTALL):
+            statement = match.group(2).strip()
+            if len(statement) > 10:
+                exercises.append({
+                    "number": int(match.group(1)),
+                    "statement": statement[:1000],
+                    "type": legacy_type(statement),
+                    "points": legacy_points(statement)
+                })
+    return exercises
+
+
+def generate(exercises: int, seed: int = 42) -> str:
+    rng = random.Random(seed)
+    parts = ["EXAMEN DE MATEMÁTICAS Instrucciones: responder de forma razonada."]
+    for number in range(1, exercises + 1):
+        parts.append(f"Ejercicio {number}: {rng.choice(STATEMENTS)}.")
+        for item in range(1, 4):
+            parts.append(f"{item}. {rng.choice(STATEMENTS).lower()}.")
+        parts.append(f"({rng.randint(1, 5)} puntos)")
+    return " ".join(parts)
+
+
+def timed(function, content: str):
+    start = time.perf_counter()
+    result = function(content)
+    return time.perf_counter() - start, len(result)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--exercises', type=int, nargs='+', default=[100, 1000, 5000])
+    parser.add_argument('--ocr-digits', type=int, nargs='*', default=[5000, 20000])
+    args = parser.parse_args()
+
+    print(f"{'ejercicios':>10} {'caracteres':>11} {'legacy':>9} {'single':>9} {'speedup':>8} "
+          f"{'n legacy':>9} {'n single':>9}")
+    for exercises in args.exercises:
+        content = generate(exercises)
+        legacy, legacy_count = timed(legacy_extract_exercises, content)
+        single, single_count = timed(extract_exercises, content)
+        print(f"{exercises:>10} {len(content):>11} {legacy:>8.3f}s {single:>8.3f}s {legacy / single:>7.1f}x "
+              f"{legacy_count:>9} {single_count:>9}")
+
+    for digits in args.ocr_digits:
+        content = f"1. Completar la tabla escaneada: {'7' * digits} (2 puntos) 2. Explicar el resultado obtenido"
+        legacy, legacy_count = timed(legacy_extract_exercises, content)
+        single, single_count = timed(extract_exercises, content)
+        print(f"{'ocr':>10} {len(content):>11} {legacy:>8.3f}s {single:>8.3f}s {legacy / single:>7.1f}x "
+              f"{legacy_count:>9} {single_count:>9}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""
+Benchmark de la detección de plagio: comparación por parejas frente a MinHash + LSH.
+
+Uso (desde backend/; no necesita base de datos):
+
+    python benchmarks/bench_similarity.py --sizes 1000 10000
+
+Genera entregas sintéticas (ensayos de ~300 palabras) en las que un 5 % son
+copias retocadas de otra entrega, y mide:
+
+- pairwise: ``SequenceMatcher`` sobre todas las parejas, estimado a partir de
+  una muestra de parejas (hacerlo entero llevaría horas)
+- minhash:  firmas MinHash de todas las entregas
+- lsh:      índice LSH y pares candidatos
+- exact:    alineación exacta solo sobre los candidatos
+
+junto con los candidatos obtenidos y el porcentaje de copias encontradas.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from difflib import SequenceMatcher
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.services.similarity_service import find_similar_pairs
+from src.utils.similarity import LSHIndex, MinHasher
+
+VOCABULARY = [f"palabra{i}" for i in range(2000)]
+
+
+def generate(size: int, copy_ratio: float, seed: int = 42):
+    rng = random.Random(seed)
+    texts, planted = [], set()
+    originals = int(size * (1 - copy_ratio))
+    for _ in range(originals):
+        texts.append(" ".join(rng.choice(VOCABULARY) for _ in range(300)))
+    while len(texts) < size:
+        source = rng.randrange(originals)
+        words = texts[source].split()
+        for i in range(len(words)):
+            if rng.random() < 0.05:
+                words[i] = rng.choice(VOCABULARY)
+        planted.add((source, len(texts)))
+        texts.append(" ".join(words))
+    return texts, planted
+
+
+def run(size: int, threshold: float, sample_pairs: int):
+    texts, planted = generate(size, 0.05)
+    rng = random.Random(1)
+
+    start = time.perf_counter()
+    for _ in range(sample_pairs):
+        i, j = rng.sample(range(size), 2)
+        SequenceMatcher(None, texts[i], texts[j]).ratio()
+    per_pair = (time.perf_counter() - start) / sample_pairs
+    pairwise = per_pair * size * (size - 1) / 2
+
+    hasher = MinHasher()
+    start = time.perf_counter()
+    signatures = [hasher.signature_for_text(text) for text in texts]
+    minhash = time.perf_counter() - start
+
+    start = time.perf_counter()
+    index = LSHIndex(hasher.num_perm, threshold)
+    for key, signature in enumerate(signatures):
+        index.insert(key, signature)
+    candidates = index.candidate_pairs()
+    lsh = time.perf_counter() - start
+
+    start = time.perf_counter()
+    pairs = find_similar_pairs(dict(enumerate(texts)), index, threshold)
+    exact = time.perf_counter() - start
+
+    found = {tuple(sorted(int(key) for key in pair["submissions"])) for pair in pairs}
+    recall = len(found & planted) / len(planted) * 100
+    return pairwise, minhash, lsh, exact, len(candidates), len(pairs), recall
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000])
+    parser.add_argument('--threshold', type=float, default=0.5)
+    parser.add_argument('--sample-pairs', type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'entregas':>9} {'pairwise(est)':>14} {'minhash':>9} {'lsh':>8} {'exact':>8} "
+          f"{'candidatos':>11} {'pares':>7} {'recall':>8}")
+    for size in args.sizes:
+        pairwise, minhash, lsh, exact, candidates, pairs, recall = run(size, args.threshold, args.sample_pairs)
+        print(f"{size:>9} {pairwise:>13.1f}s {minhash:>8.2f}s {lsh:>7.2f}s {exact:>7.2f}s "
+              f"{candidates:>11} {pairs:>7} {recall:>7.1f}%")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,150 @@
+"""
+Benchmark de la ingesta masiva de entregas (sin el tiempo del modelo).
+
+Uso (desde backend/):
+
+    python benchmarks/bench_submission_ingestion.py --submissions 500 --workers 4
+    DATABASE_URL=postgresql://.../autograder_bench python benchmarks/bench_submission_ingestion.py --database
+
+Genera un ZIP con ``N`` entregas (mitad PDF de 3 páginas, mitad Word) en una
+carpeta por estudiante y mide ``SubmissionIngestionService.ingest_archive``
+con la caché de extracción vacía: copia, extracción en el pool de procesos,
+INSERT por lotes y encolado de las correcciones (en una cola en memoria; los
+trabajos no se ejecutan).
+
+Sin ``--database`` no se escribe en la base de datos. Con ``--database`` se
+crean un profesor y una asignación de benchmark, se insertan las correcciones
+de verdad y se compara con un ``add`` + ``commit`` por corrección (lo que
+haría el patrón de ``AssignmentService``). Los datos sembrados se borran al
+terminar.
+"""
+import argparse
+import io
+import os
+import sys
+import tempfile
+import time
+import uuid
+import zipfile
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from docx import Document
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfgen import canvas
+
+from src.config.settings import config
+
+BENCH_EMAIL = "bench-submissions@autograder.local"
+LINE = "Para resolver la ecuación se aplica la fórmula general y se comprueban ambas raíces."
+
+
+def _pdf(student: int) -> bytes:
+    buffer = io.BytesIO()
+    pdf = canvas.Canvas(buffer, pagesize=A4)
+    for page in range(3):
+        text = pdf.beginText(40, 800)
+        text.textLine(f"Ejercicio {page + 1}: respuesta del estudiante {student}")
+        for _ in range(40):
+            text.textLine(LINE)
+        pdf.drawText(text)
+        pdf.showPage()
+    pdf.save()
+    return buffer.getvalue()
+
+
+def _docx(student: int) -> bytes:
+    buffer = io.BytesIO()
+    document = Document()
+    for exercise in range(1, 4):
+        document.add_paragraph(f"Ejercicio {exercise}: respuesta del estudiante {student}")
+        for _ in range(10):
+            document.add_paragraph(LINE)
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+def generate(path: str, submissions: int) -> None:
+    with zipfile.ZipFile(path, 'w', compression=zipfile.ZIP_DEFLATED) as bundle:
+        for student in range(submissions):
+            if student % 2:
+                bundle.writestr(f"entregas/Estudiante {student:04d}/tarea.pdf", _pdf(student))
+            else:
+                bundle.writestr(f"entregas/Estudiante {student:04d}/tarea.docx", _docx(student))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--submissions', type=int, default=500)
+    parser.add_argument('--workers', type=int, default=0, help="procesos de extracción (0 = uno por CPU)")
+    parser.add_argument('--batch-size', type=int, default=200)
+    parser.add_argument('--database', action='store_true')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        # También en el entorno: los procesos del pool (spawn) vuelven a leer la configuración
+        os.environ['UPLOAD_FOLDER'] = config.UPLOAD_FOLDER = directory
+        os.environ['EXTRACTION_CACHE_FOLDER'] = config.EXTRACTION_CACHE_FOLDER = os.path.join(directory, 'extraction_cache')
+        config.SUBMISSION_EXTRACTION_WORKERS = args.workers
+        config.SUBMISSION_INSERT_BATCH_SIZE = args.batch_size
+        config.SUBMISSION_MAX_FILES = max(config.SUBMISSION_MAX_FILES, args.submissions)
+
+        archive = os.path.join(directory, 'entregas.zip')
+        start = time.perf_counter()
+        generate(archive, args.submissions)
+        print(f"ZIP con {args.submissions} entregas generado en {time.perf_counter() - start:.1f}s "
+              f"({os.path.getsize(archive) / 1e6:.1f} MB)")
+
+        from src.jobs.brokers import MemoryJobBroker
+        from src.jobs.queue import JobQueue
+        from src.services import submission_service as submission_module
+
+        queue = JobQueue(MemoryJobBroker())
+        submission_module.get_job_queue = lambda: queue
+
+        if not args.database:
+            service = submission_module.SubmissionIngestionService()
+            service._owns_assignment = lambda assignment_id, teacher_id: True
+            service._insert_corrections = lambda rows: None
+            with open(archive, 'rb') as f:
+                result = service.ingest_archive(str(uuid.uuid4()), str(uuid.uuid4()), f)
+            print(f"ingesta: {result['created']} correcciones, {len(result['skipped'])} descartadas, "
+                  f"{queue.broker.depth()} trabajos en cola, {result['elapsed']:.2f}s")
+            return
+
+        from src.main import create_app
+        from src.database.database import db
+        from src.database.models import Assignment, Correction, User
+
+        app = create_app(start_job_workers=False)
+        with app.app_context():
+            teacher = User(email=BENCH_EMAIL, username="bench-submissions", password_hash="x",
+                           first_name="Bench", last_name="Submissions")
+            db.session.add(teacher)
+            db.session.commit()
+            assignment = Assignment(title="Entregas de benchmark", teacher_id=teacher.id, total_points=10.0)
+            db.session.add(assignment)
+            db.session.commit()
+            try:
+                service = submission_module.SubmissionIngestionService()
+                with open(archive, 'rb') as f:
+                    result = service.ingest_archive(str(assignment.id), str(teacher.id), f)
+                print(f"ingesta: {result['created']} correcciones, {len(result['skipped'])} descartadas, "
+                      f"{queue.broker.depth()} trabajos en cola, {result['elapsed']:.2f}s")
+
+                start = time.perf_counter()
+                for student in range(args.submissions):
+                    db.session.add(Correction(assignment_id=assignment.id, teacher_id=teacher.id,
+                                              student_name=f"Estudiante {student:04d}"))
+                    db.session.commit()
+                print(f"add + commit por corrección (solo las filas): {time.perf_counter() - start:.2f}s")
+            finally:
+                db.session.rollback()
+                db.session.query(Correction).filter(Correction.assignment_id == assignment.id).delete()
+                db.session.query(Assignment).filter(Assignment.id == assignment.id).delete()
+                db.session.query(User).filter(User.id == teacher.id).delete()
+                db.session.commit()
+
+
+if __name__ == '__main__':
+    main()
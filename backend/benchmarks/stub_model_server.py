@@ -0,0 +1,120 @@
+"""
+Servidor HTTP local que imita las APIs de chat de Ollama y OpenAI.
+
+Responde siempre con una corrección JSON válida tras una latencia fija, lo que
+permite medir el rendimiento del pipeline sin depender de un modelo real. Con
+``"stream": true`` envía la respuesta a trozos (seguida de texto sobrante, como
+hacen muchos modelos) con ``token_delay`` segundos entre trozos.
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+GRADE_RESPONSE = {
+    "grade": 7.5,
+    "comments": "Respuesta correcta con algunos errores menores.",
+    "strengths": ["Buena estructura"],
+    "areas_of_improvement": ["Justificar los pasos intermedios"],
+    "ai_generated_percentage": 12.0,
+}
+
+TRAILING_CHATTER = "\n\nEspero que esta evaluación sea de ayuda. " * 20
+
+
+def _pieces(text: str, size: int = 8):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    latency = 0.05
+    token_delay = 0.0
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, body: dict) -> None:
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_stream(self, lines) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        try:
+            for line in lines:
+                data = (line + "\n").encode("utf-8")
+                self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+                self.wfile.flush()
+                time.sleep(self.token_delay)
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            # El cliente dejó de leer (parada anticipada)
+            self.close_connection = True
+
+    def _stream_ollama(self, content: str):
+        for piece in _pieces(content):
+            yield json.dumps({"message": {"role": "assistant", "content": piece}, "done": False})
+        yield json.dumps({"message": {"role": "assistant", "content": ""}, "done": True})
+
+    def _stream_openai(self, content: str):
+        for piece in _pieces(content):
+            yield "data: " + json.dumps({"choices": [{"index": 0, "delta": {"content": piece}}]})
+        yield "data: " + json.dumps({"choices": [], "usage": {"prompt_tokens": 100, "completion_tokens": 50, "total_tokens": 150}})
+        yield "data: [DONE]"
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        time.sleep(self.latency)
+
+        content = json.dumps(GRADE_RESPONSE)
+        if request.get("stream"):
+            content += TRAILING_CHATTER
+            if self.path.startswith("/api/chat"):
+                self._send_stream(self._stream_ollama(content))
+            else:
+                self._send_stream(self._stream_openai(content))
+            return
+
+        if self.path.startswith("/api/chat"):
+            self._send_json({
+                "model": "llama3.2",
+                "message": {"role": "assistant", "content": content},
+                "done": True,
+            })
+        elif self.path.startswith("/v1/chat/completions"):
+            self._send_json({
+                "id": "stub",
+                "object": "chat.completion",
+                "model": "stub",
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": 100, "completion_tokens": 50, "total_tokens": 150},
+            })
+        else:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+
+def start_stub_server(latency: float = 0.05, port: int = 0, token_delay: float = 0.0):
+    """
+    Arranca el servidor en un hilo daemon
+
+    :param latency: Segundos que tarda cada respuesta
+    :param port: Puerto (0 para uno libre)
+    :param token_delay: Segundos entre trozos en las respuestas en streaming
+    :return: (servidor, url base)
+    """
+    handler = type("StubHandler", (_StubHandler,), {"latency": latency, "token_delay": token_delay})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address
+    return server, f"http://{host}:{port}"
@@ -0,0 +1,67 @@
+"""
+Entorno de Alembic para las migraciones de la base de datos
+
+Uso (desde backend/):
+
+    alembic upgrade head                      # aplica las migraciones pendientes
+    alembic stamp 0001                        # base creada antes con db.create_all()
+    alembic revision --autogenerate -m "..."  # nueva migración a partir de los modelos
+
+La URL es la de la aplicación (``DATABASE_URL``). Los tests pueden pasar una
+conexión ya abierta en ``config.attributes['connection']``.
+"""
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy import engine_from_config, pool
+
+from src.config.settings import config as app_config
+from src.database import models  # noqa: F401  (registra las tablas en los metadatos)
+from src.database.database import db
+
+config = context.config
+if config.config_file_name is not None and config.attributes.get('configure_logger', True):
+    fileConfig(config.config_file_name)
+
+config.set_main_option('sqlalchemy.url', app_config.SQLALCHEMY_DATABASE_URI.replace('%', '%%'))
+target_metadata = db.metadata
+
+
+def run_migrations_offline() -> None:
+    """Genera el SQL de las migraciones sin conectarse (``alembic upgrade head --sql``)"""
+    context.configure(
+        url=config.get_main_option('sqlalchemy.url'),
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+        compare_type=True
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def _run_with_connection(connection) -> None:
+    context.configure(connection=connection, target_metadata=target_metadata, compare_type=True)
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    connection = config.attributes.get('connection')
+    if connection is not None:
+        _run_with_connection(connection)
+        return
+
+    connectable = engine_from_config(
+        config.get_section(config.config_ini_section, {}),
+        prefix='sqlalchemy.',
+        poolclass=pool.NullPool
+    )
+    with connectable.connect() as connection:
+        _run_with_connection(connection)
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
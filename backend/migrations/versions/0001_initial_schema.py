@@ -0,0 +1,155 @@
+"""Esquema inicial (el que crea db.create_all() antes de las migraciones)
+
+Las bases de datos creadas con ``db.create_all()`` ya tienen este esquema:
+márcalas con ``alembic stamp 0001`` y aplica después ``alembic upgrade head``.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# Identificadores de la revisión, usados por Alembic
+revision: str = '0001'
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+USER_ROLE = sa.Enum('TEACHER', 'COORDINATOR', 'ADMIN', name='userrole')
+ASSIGNMENT_STATUS = sa.Enum('UPLOADED', 'PROCESSING', 'AI_ANALYZED', 'READY_FOR_EDITING', 'FINALIZED', 'ERROR',
+                            name='assignmentstatus')
+JOB_STATUS = sa.Enum('QUEUED', 'RUNNING', 'SUCCEEDED', 'FAILED', name='jobstatus')
+
+
+def upgrade() -> None:
+    op.create_table(
+        'users',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('email', sa.String(length=255), nullable=False),
+        sa.Column('username', sa.String(length=100), nullable=False),
+        sa.Column('password_hash', sa.String(length=255), nullable=False),
+        sa.Column('first_name', sa.String(length=100), nullable=False),
+        sa.Column('last_name', sa.String(length=100), nullable=False),
+        sa.Column('role', USER_ROLE, nullable=False),
+        sa.Column('is_active', sa.Boolean(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('email'),
+        sa.UniqueConstraint('username')
+    )
+    op.create_table(
+        'assignments',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('title', sa.String(length=255), nullable=False),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('total_points', sa.Float(), nullable=False),
+        sa.Column('teacher_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('extracted_content', postgresql.JSON(), nullable=True),
+        sa.Column('ai_analysis', postgresql.JSON(), nullable=True),
+        sa.Column('final_solutions', postgresql.JSON(), nullable=True),
+        sa.Column('final_rubric', postgresql.JSON(), nullable=True),
+        sa.Column('status', ASSIGNMENT_STATUS, nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['teacher_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table(
+        'rubrics',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('title', sa.String(length=255), nullable=False),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('subject', sa.String(length=100), nullable=True),
+        sa.Column('grade_level', sa.String(length=50), nullable=True),
+        sa.Column('total_points', sa.Float(), nullable=False),
+        sa.Column('teacher_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('criteria', postgresql.JSON(), nullable=False),
+        sa.Column('is_template', sa.Boolean(), nullable=False),
+        sa.Column('is_public', sa.Boolean(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['teacher_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table(
+        'corrections',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('assignment_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('rubric_id', postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column('teacher_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('student_name', sa.String(length=255), nullable=False),
+        sa.Column('student_file_path', sa.String(length=500), nullable=True),
+        sa.Column('total_score', sa.Float(), nullable=False),
+        sa.Column('max_score', sa.Float(), nullable=False),
+        sa.Column('percentage', sa.Float(), nullable=False),
+        sa.Column('correction_details', postgresql.JSON(), nullable=True),
+        sa.Column('feedback', sa.Text(), nullable=True),
+        sa.Column('suggestions', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['assignment_id'], ['assignments.id']),
+        sa.ForeignKeyConstraint(['rubric_id'], ['rubrics.id']),
+        sa.ForeignKeyConstraint(['teacher_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table(
+        'jobs',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('job_type', sa.String(length=100), nullable=False),
+        sa.Column('payload', postgresql.JSON(), nullable=False),
+        sa.Column('status', JOB_STATUS, nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('max_attempts', sa.Integer(), nullable=False),
+        sa.Column('run_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('result', postgresql.JSON(), nullable=True),
+        sa.Column('locked_by', sa.String(length=255), nullable=True),
+        sa.Column('locked_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table(
+        'analysis_cache',
+        sa.Column('key', sa.String(length=64), nullable=False),
+        sa.Column('model', sa.String(length=100), nullable=False),
+        sa.Column('prompt_version', sa.String(length=20), nullable=False),
+        sa.Column('analysis', postgresql.JSON(), nullable=False),
+        sa.Column('hit_count', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('last_accessed_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('key')
+    )
+    op.create_table(
+        'submission_signatures',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('assignment_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('submission_key', sa.String(length=255), nullable=False),
+        sa.Column('signature', sa.LargeBinary(), nullable=False),
+        sa.Column('num_perm', sa.Integer(), nullable=False),
+        sa.Column('content', sa.Text(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['assignment_id'], ['assignments.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('assignment_id', 'submission_key', name='uq_submission_signature')
+    )
+    op.create_index('ix_submission_signatures_assignment_id', 'submission_signatures', ['assignment_id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_submission_signatures_assignment_id', table_name='submission_signatures')
+    op.drop_table('submission_signatures')
+    op.drop_table('analysis_cache')
+    op.drop_table('jobs')
+    op.drop_table('corrections')
+    op.drop_table('rubrics')
+    op.drop_table('assignments')
+    op.drop_table('users')
+    for enum in (JOB_STATUS, ASSIGNMENT_STATUS, USER_ROLE):
+        enum.drop(op.get_bind(), checkfirst=True)
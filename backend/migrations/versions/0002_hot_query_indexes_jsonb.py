@@ -0,0 +1,80 @@
+"""Índices de las consultas frecuentes y columnas JSON a JSONB
+
+- JSON → JSONB: PostgreSQL guarda el documento ya analizado en lugar del
+  texto, así que leerlo o extraer una clave (``extracted_content->'exercises'``
+  en el listado) no vuelve a interpretar el JSON en cada fila. Cambiar el tipo
+  reescribe las tablas con un bloqueo exclusivo.
+- Índices compuestos y parciales para el listado paginado de asignaciones,
+  el conteo por estado, las asignaciones atascadas, las rúbricas propias o
+  públicas, las correcciones de una asignación, el siguiente trabajo de la
+  cola y la caducidad de la caché de análisis. Se crean con ``CONCURRENTLY``
+  (fuera de la transacción) para no bloquear las escrituras.
+
+No se añaden índices GIN: ninguna consulta filtra todavía por el contenido de
+una columna JSONB (solo se leen o proyectan), y un GIN encarece cada escritura
+de análisis y rúbricas sin ningún lector que lo aproveche.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 09:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# Identificadores de la revisión, usados por Alembic
+revision: str = '0002'
+down_revision: Union[str, Sequence[str], None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (tabla, columna, admite NULL)
+JSON_COLUMNS = [
+    ('assignments', 'extracted_content', True),
+    ('assignments', 'ai_analysis', True),
+    ('assignments', 'final_solutions', True),
+    ('assignments', 'final_rubric', True),
+    ('rubrics', 'criteria', False),
+    ('corrections', 'correction_details', True),
+    ('jobs', 'payload', False),
+    ('jobs', 'result', True),
+    ('analysis_cache', 'analysis', False),
+]
+
+# (nombre, tabla, columnas, condición del índice parcial)
+INDEXES = [
+    ('ix_assignments_teacher_created', 'assignments', ['teacher_id', sa.text('created_at DESC'), sa.text('id DESC')], None),
+    ('ix_assignments_teacher_status', 'assignments', ['teacher_id', 'status'], None),
+    ('ix_assignments_processing_updated', 'assignments', ['updated_at'], "status = 'PROCESSING'"),
+    ('ix_rubrics_teacher_created', 'rubrics', ['teacher_id', sa.text('created_at DESC')], None),
+    ('ix_rubrics_public_created', 'rubrics', [sa.text('created_at DESC')], 'is_public'),
+    ('ix_corrections_assignment_student', 'corrections', ['assignment_id', 'student_name', 'id'], None),
+    ('ix_jobs_queued_run_at', 'jobs', ['run_at'], "status = 'QUEUED'"),
+    ('ix_analysis_cache_created', 'analysis_cache', ['created_at'], None),
+    ('ix_analysis_cache_last_accessed', 'analysis_cache', ['last_accessed_at'], None),
+]
+
+
+def upgrade() -> None:
+    for table, column, nullable in JSON_COLUMNS:
+        op.alter_column(table, column, type_=postgresql.JSONB(), existing_type=postgresql.JSON(),
+                        existing_nullable=nullable, postgresql_using=f'{column}::jsonb')
+
+    # CREATE INDEX CONCURRENTLY no puede ejecutarse dentro de una transacción
+    with op.get_context().autocommit_block():
+        for name, table, columns, where in INDEXES:
+            op.create_index(name, table, columns, postgresql_concurrently=True,
+                            postgresql_where=sa.text(where) if where else None)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
+
+    for table, column, nullable in JSON_COLUMNS:
+        op.alter_column(table, column, type_=postgresql.JSON(), existing_type=postgresql.JSONB(),
+                        existing_nullable=nullable, postgresql_using=f'{column}::json')
@@ -0,0 +1,56 @@
+"""Alquiler de los trabajos en ejecución
+
+- ``jobs.lease_expires_at``: hasta cuándo es válido el alquiler del worker que
+  ejecuta el trabajo. Los trabajos que ya estaban en ejecución reciben una hora
+  a partir de ``locked_at`` para que el planificador los recupere si su worker
+  ya no existe.
+- Índice parcial sobre los alquileres de los trabajos en ejecución, para la
+  recuperación periódica.
+- Índice parcial por ``payload ->> 'assignment_id'`` de los trabajos en cola o
+  en ejecución: la recuperación de asignaciones atascadas comprueba si cada una
+  tiene aún un análisis activo. Es un B-tree sobre la expresión y no un GIN
+  sobre todo el payload porque solo se consulta esa clave, y solo de los
+  trabajos vivos.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# Identificadores de la revisión, usados por Alembic
+revision: str = '0003'
+down_revision: Union[str, Sequence[str], None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (nombre, columnas, condición del índice parcial)
+INDEXES = [
+    ('ix_jobs_running_lease', ['lease_expires_at'], "status = 'RUNNING'"),
+    ('ix_jobs_active_assignment', [sa.text("(payload ->> 'assignment_id')")], "status IN ('QUEUED', 'RUNNING')"),
+]
+
+
+def upgrade() -> None:
+    op.add_column('jobs', sa.Column('lease_expires_at', sa.DateTime(timezone=True), nullable=True))
+    op.execute(
+        "UPDATE jobs SET lease_expires_at = COALESCE(locked_at, now()) + interval '1 hour' "
+        "WHERE status = 'RUNNING'"
+    )
+
+    # CREATE INDEX CONCURRENTLY no puede ejecutarse dentro de una transacción
+    with op.get_context().autocommit_block():
+        for name, columns, where in INDEXES:
+            op.create_index(name, 'jobs', columns, postgresql_concurrently=True, postgresql_where=sa.text(where))
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name='jobs', postgresql_concurrently=True)
+
+    op.drop_column('jobs', 'lease_expires_at')
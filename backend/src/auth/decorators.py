@@ -4,32 +4,46 @@ Decoradores para autenticación y autorización
 from functools import wraps
 from flask import request, jsonify
 from flask_jwt_extended import jwt_required as flask_jwt_required, get_jwt_identity, get_jwt
-from src.database.models import User, UserRole
+from src.auth.identity_cache import get_request_identity
+from src.database.models import UserRole
 import logging
 
 def jwt_required(f):
     """
     Decorador para requerir token JWT válido
+    
+    La identidad se obtiene de la caché de identidades (sin consultar la base de
+    datos en el caso habitual) y se contrasta con el rol y el estado que lleva
+    el token como claims.
     """
     @wraps(f)
     @flask_jwt_required()
     def decorated(*args, **kwargs):
         try:
-            current_user_id = get_jwt_identity()
-            current_user = User.query.filter_by(id=current_user_id).first()
+            current_user_id = str(get_jwt_identity())
+            identity = get_request_identity(current_user_id)
+            claims = get_jwt()
             
-            if not current_user or not current_user.is_active:
+            if not identity or not identity['is_active'] or claims.get('is_active') is False:
                 return jsonify({"message": "Usuario no válido o inactivo"}), 401
             
+            # Un token emitido antes de un cambio de rol ya no es válido
+            if 'role' in claims and claims['role'] != identity['role']:
+                return jsonify({
+                    "message": "Los permisos del usuario han cambiado, inicia sesión de nuevo",
+                    "error": "stale_token"
+                }), 401
+            
             # Agregar usuario actual a request para acceso fácil
-            request.current_user = {
-                'id': str(current_user.id),
-                'email': current_user.email,
-                'username': current_user.username,
-                'role': current_user.role,
-                'first_name': current_user.first_name,
-                'last_name': current_user.last_name
-            }
+            if getattr(request, 'current_user', {}).get('id') != current_user_id:
+                request.current_user = {
+                    'id': identity['id'],
+                    'email': identity['email'],
+                    'username': identity['username'],
+                    'role': UserRole(identity['role']),
+                    'first_name': identity['first_name'],
+                    'last_name': identity['last_name']
+                }
             
             return f(*args, **kwargs)
             
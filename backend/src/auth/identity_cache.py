@@ -0,0 +1,193 @@
+"""
+Caché de identidades de usuario para la autorización de peticiones.
+
+Los decoradores de autenticación necesitan saber si el usuario del token sigue
+activo y cuál es su rol. En lugar de consultar la tabla ``users`` en cada
+petición, la identidad se guarda unos segundos en memoria (o en Redis, para
+compartirla entre procesos) y se invalida explícitamente cuando cambian el rol
+o el estado del usuario.
+"""
+import json
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from flask import g
+
+from ..config.settings import config
+
+logger = logging.getLogger(__name__)
+
+
+class IdentityCache(ABC):
+    """Interfaz común de las cachés de identidades"""
+
+    @abstractmethod
+    def get(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """Identidad cacheada o None si no está o ha caducado"""
+
+    @abstractmethod
+    def set(self, user_id: str, identity: Dict[str, Any]) -> None:
+        """Guarda la identidad durante el TTL de la caché"""
+
+    @abstractmethod
+    def invalidate(self, user_id: str) -> None:
+        """Descarta la identidad de un usuario"""
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Descarta todas las identidades"""
+
+
+class MemoryIdentityCache(IdentityCache):
+    """Caché LRU en memoria del proceso con expiración por TTL"""
+
+    def __init__(self, ttl: float, max_entries: int = 10000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            expires_at, identity = entry
+            if expires_at <= time.monotonic():
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return identity
+
+    def set(self, user_id: str, identity: Dict[str, Any]) -> None:
+        with self._lock:
+            self._entries[user_id] = (time.monotonic() + self.ttl, identity)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: str) -> None:
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class RedisIdentityCache(IdentityCache):
+    """Caché compartida en Redis: la invalidación llega a todos los procesos"""
+
+    def __init__(self, redis_url: str, ttl: float, prefix: str = 'autograder:identity'):
+        import redis
+
+        self.redis = redis.Redis.from_url(redis_url)
+        self.ttl = max(int(ttl), 1)
+        self.prefix = prefix
+
+    def _key(self, user_id: str) -> str:
+        return f"{self.prefix}:{user_id}"
+
+    def get(self, user_id: str) -> Optional[Dict[str, Any]]:
+        raw = self.redis.get(self._key(user_id))
+        return json.loads(raw) if raw else None
+
+    def set(self, user_id: str, identity: Dict[str, Any]) -> None:
+        self.redis.setex(self._key(user_id), self.ttl, json.dumps(identity))
+
+    def invalidate(self, user_id: str) -> None:
+        self.redis.delete(self._key(user_id))
+
+    def clear(self) -> None:
+        for key in self.redis.scan_iter(f"{self.prefix}:*"):
+            self.redis.delete(key)
+
+
+def identity_from_user(user) -> Dict[str, Any]:
+    """Datos de un ``User`` que se guardan en caché (serializables a JSON)"""
+    return {
+        'id': str(user.id),
+        'email': user.email,
+        'username': user.username,
+        'role': user.role.value,
+        'first_name': user.first_name,
+        'last_name': user.last_name,
+        'is_active': user.is_active
+    }
+
+
+_cache: Optional[IdentityCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_identity_cache() -> Optional[IdentityCache]:
+    """Caché de identidades del proceso, o None si IDENTITY_CACHE_TTL es 0"""
+    global _cache
+    if config.IDENTITY_CACHE_TTL <= 0:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            if config.IDENTITY_CACHE_BACKEND == 'redis':
+                _cache = RedisIdentityCache(config.REDIS_URL, config.IDENTITY_CACHE_TTL)
+            else:
+                _cache = MemoryIdentityCache(config.IDENTITY_CACHE_TTL, config.IDENTITY_CACHE_MAX_ENTRIES)
+            logger.info(f"Caché de identidades '{config.IDENTITY_CACHE_BACKEND}' con TTL {config.IDENTITY_CACHE_TTL}s")
+        return _cache
+
+
+def load_identity(user_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Identidad del usuario, desde la caché o, si no está, desde la base de datos
+
+    :return: Diccionario de ``identity_from_user`` o None si el usuario no existe
+    """
+    cache = get_identity_cache()
+    if cache is not None:
+        try:
+            identity = cache.get(user_id)
+            if identity is not None:
+                return identity
+        except Exception as e:
+            # Si la caché falla se sigue con la base de datos
+            logger.warning(f"Error leyendo la caché de identidades: {e}")
+
+    from ..database.models import User
+
+    user = User.query.filter_by(id=user_id).first()
+    if user is None:
+        return None
+
+    identity = identity_from_user(user)
+    if cache is not None:
+        try:
+            cache.set(user_id, identity)
+        except Exception as e:
+            logger.warning(f"Error guardando en la caché de identidades: {e}")
+    return identity
+
+
+def invalidate_identity(user_id: str) -> None:
+    """Descarta la identidad cacheada tras cambiar el rol o el estado del usuario"""
+    cache = get_identity_cache()
+    if cache is not None:
+        cache.invalidate(str(user_id))
+
+
+def get_request_identity(user_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Identidad del usuario resuelta una sola vez por petición
+
+    Los decoradores apilados (``jwt_required`` + ``require_roles``) y el
+    ``user_lookup_loader`` de JWT comparten el mismo resultado.
+    """
+    identity = g.get('_auth_identity')
+    if identity is not None and identity['id'] == user_id:
+        return identity
+    identity = load_identity(user_id)
+    if identity is not None:
+        g._auth_identity = identity
+    return identity
@@ -25,10 +25,9 @@ def init_jwt(app):
         
         @jwt.user_lookup_loader
         def user_lookup_callback(_jwt_header, jwt_data):
-            """Callback para buscar el usuario por identidad"""
-            from src.database.models import User
-            identity = jwt_data["sub"]
-            return User.query.filter_by(id=identity).one_or_none()
+            """Callback para buscar el usuario por identidad (vía caché de identidades)"""
+            from src.auth.identity_cache import get_request_identity
+            return get_request_identity(str(jwt_data["sub"]))
         
         @jwt.expired_token_loader
         def expired_token_callback(jwt_header, jwt_payload):
@@ -51,6 +50,19 @@ def init_jwt(app):
         logging.error(f"Error inicializando JWT Manager: {e}")
         raise
 
+def identity_claims(user) -> dict:
+    """
+    Claims de autorización que viajan en el token de acceso
+    
+    Los decoradores los contrastan con la caché de identidades para detectar
+    tokens emitidos antes de un cambio de rol o de una desactivación.
+    """
+    return {
+        "role": user.role.value,
+        "is_active": user.is_active,
+        "username": user.username
+    }
+
 def create_tokens(user):
     """
     Crear tokens de acceso y refresh para un usuario
@@ -63,10 +75,7 @@ def create_tokens(user):
         access_token = create_access_token(
             identity=user,
             expires_delta=timedelta(hours=1),
-            additional_claims={
-                "role": user.role.value,
-                "username": user.username
-            }
+            additional_claims=identity_claims(user)
         )
         
         # Crear token de refresh (válido por 30 días)
@@ -5,6 +5,8 @@ from flask_jwt_extended import create_access_token, create_refresh_token
 
 from ..database.database import db
 from ..database.models import User, UserRole
+from .identity_cache import invalidate_identity
+from .jwt_manager import identity_claims
 
 logger = logging.getLogger(__name__)
 
@@ -100,7 +102,8 @@ class AuthService:
             # Crear tokens
             access_token = create_access_token(
                 identity=str(user.id),
-                expires_delta=timedelta(hours=1)
+                expires_delta=timedelta(hours=1),
+                additional_claims=identity_claims(user)
             )
             
             refresh_token = create_refresh_token(
@@ -165,3 +168,68 @@ class AuthService:
         except Exception as e:
             logger.error(f"Error obteniendo usuario: {str(e)}")
             raise
+    
+    @staticmethod
+    def update_user_role(user_id: str, role: str) -> dict:
+        """
+        Cambia el rol de un usuario
+        
+        Los tokens emitidos con el rol anterior dejan de ser válidos.
+        
+        Args:
+            user_id: ID del usuario
+            role: Nuevo rol (valor de UserRole)
+            
+        Returns:
+            Dict con información del usuario
+        """
+        try:
+            try:
+                new_role = UserRole(role)
+            except ValueError:
+                raise ValueError(f"Rol no válido: {role}")
+            
+            user = db.session.query(User).filter(User.id == user_id).first()
+            if not user:
+                raise ValueError("Usuario no encontrado")
+            
+            user.role = new_role
+            db.session.commit()
+            invalidate_identity(user_id)
+            
+            logger.info(f"Rol de {user.email} cambiado a {new_role.value}")
+            return AuthService.get_user_by_id(user_id)
+            
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Error cambiando rol de usuario: {str(e)}")
+            raise
+    
+    @staticmethod
+    def set_user_active(user_id: str, is_active: bool) -> dict:
+        """
+        Activa o desactiva un usuario
+        
+        Args:
+            user_id: ID del usuario
+            is_active: Nuevo estado
+            
+        Returns:
+            Dict con información del usuario
+        """
+        try:
+            user = db.session.query(User).filter(User.id == user_id).first()
+            if not user:
+                raise ValueError("Usuario no encontrado")
+            
+            user.is_active = bool(is_active)
+            db.session.commit()
+            invalidate_identity(user_id)
+            
+            logger.info(f"Usuario {user.email} {'activado' if user.is_active else 'desactivado'}")
+            return AuthService.get_user_by_id(user_id)
+            
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Error cambiando estado de usuario: {str(e)}")
+            raise
@@ -0,0 +1,130 @@
+"""
+Comandos de mantenimiento de la aplicación.
+
+Uso (desde backend/):
+
+    python -m src.cli init-db              # aplica las migraciones (alembic upgrade head)
+    python -m src.cli init-db --stamp      # base creada antes con db.create_all(): la marca como 0001 y migra
+    python -m src.cli importtime --top 20  # qué módulos cuestan más al arrancar un worker
+
+``create_app`` ya no crea las tablas: el esquema se aplica con ``init-db`` una
+vez por despliegue, antes de arrancar los workers.
+"""
+import argparse
+import logging
+import os
+import re
+import subprocess
+import sys
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, List
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Lo que hace cada worker al arrancar (sin hilos de la cola ni del planificador)
+BOOT_SNIPPET = "from src.main import create_app; create_app(start_job_workers=False)"
+
+_IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$')
+
+
+@dataclass
+class ImportTiming:
+    """Una línea de ``python -X importtime`` (tiempos en microsegundos)"""
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+def parse_importtime(lines: Iterable[str]) -> List[ImportTiming]:
+    """
+    Interpreta la salida de ``-X importtime`` (stderr); ignora el resto de líneas
+
+    :return: Módulos en el orden en que terminaron de importarse
+    """
+    timings = []
+    for line in lines:
+        match = _IMPORTTIME_LINE.match(line.rstrip('\n'))
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            timings.append(ImportTiming(module, int(self_us), int(cumulative_us), (len(indent) - 1) // 2))
+    return timings
+
+
+def summarize_importtime(timings: List[ImportTiming], top: int = 20) -> Dict[str, List]:
+    """
+    Resumen del perfil de imports
+
+    :return: ``packages``: tiempo propio sumado por paquete de primer nivel;
+        ``modules``: módulos con más tiempo acumulado entre los importados
+        directamente por el código perfilado y sus imports inmediatos
+    """
+    packages: Dict[str, int] = {}
+    for timing in timings:
+        package = timing.module.split('.')[0]
+        packages[package] = packages.get(package, 0) + timing.self_us
+
+    roots = [timing for timing in timings if timing.depth <= 1]
+    return {
+        "packages": sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top],
+        "modules": sorted(((t.module, t.cumulative_us) for t in roots), key=lambda item: item[1], reverse=True)[:top],
+    }
+
+
+def _init_db(args) -> None:
+    from alembic import command
+    from alembic.config import Config
+
+    alembic_config = Config(os.path.join(BACKEND_DIR, 'alembic.ini'))
+    alembic_config.set_main_option('script_location', os.path.join(BACKEND_DIR, 'migrations'))
+    if args.stamp:
+        command.stamp(alembic_config, '0001')
+    command.upgrade(alembic_config, 'head')
+    print("Esquema de la base de datos actualizado")
+
+
+def _importtime(args) -> None:
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', args.code],
+        cwd=BACKEND_DIR, capture_output=True, text=True
+    )
+    elapsed = time.perf_counter() - start
+    if result.returncode != 0:
+        sys.stderr.write(result.stderr)
+        sys.exit(result.returncode)
+
+    timings = parse_importtime(result.stderr.splitlines())
+    summary = summarize_importtime(timings, args.top)
+    total_us = sum(timing.self_us for timing in timings)
+
+    print(f"Arranque: {elapsed:.2f}s en total, {total_us / 1e6:.2f}s importando {len(timings)} módulos")
+    print("\nPor paquete (tiempo propio):")
+    for package, self_us in summary["packages"]:
+        print(f"  {self_us / 1000:9.1f} ms  {package}")
+    print("\nImports más costosos (tiempo acumulado):")
+    for module, cumulative_us in summary["modules"]:
+        print(f"  {cumulative_us / 1000:9.1f} ms  {module}")
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+    init_db = commands.add_parser('init-db', help="Aplica las migraciones pendientes")
+    init_db.add_argument('--stamp', action='store_true',
+                         help="Marcar antes como 0001 una base creada con db.create_all()")
+    importtime = commands.add_parser('importtime', help="Perfil de imports del arranque de un worker")
+    importtime.add_argument('--top', type=int, default=20)
+    importtime.add_argument('--code', default=BOOT_SNIPPET, help="Código a perfilar")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    if args.command == 'init-db':
+        _init_db(args)
+    elif args.command == 'importtime':
+        _importtime(args)
+
+
+if __name__ == '__main__':
+    main()
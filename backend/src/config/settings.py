@@ -23,20 +23,113 @@ class Config:
     # Redis
     REDIS_URL: str = field(default_factory=lambda: os.getenv('REDIS_URL', 'redis://localhost:6379/0'))
     
+    # Cola de trabajos en segundo plano ('database', 'memory' o 'redis')
+    JOB_BROKER: str = field(default_factory=lambda: os.getenv('JOB_BROKER', 'database'))
+    JOB_MAX_ATTEMPTS: int = field(default_factory=lambda: int(os.getenv('JOB_MAX_ATTEMPTS', '3')))
+    JOB_RETRY_BASE_DELAY: float = field(default_factory=lambda: float(os.getenv('JOB_RETRY_BASE_DELAY', '5')))
+    JOB_RETRY_MAX_DELAY: float = field(default_factory=lambda: float(os.getenv('JOB_RETRY_MAX_DELAY', '300')))
+    JOB_POLL_INTERVAL: float = field(default_factory=lambda: float(os.getenv('JOB_POLL_INTERVAL', '1.0')))
+    JOB_WORKER_PROCESSES: int = field(default_factory=lambda: int(os.getenv('JOB_WORKER_PROCESSES', '2')))
+    JOB_IN_PROCESS_WORKERS: int = field(default_factory=lambda: int(os.getenv('JOB_IN_PROCESS_WORKERS', '0')))
+    # Alquiler de los trabajos en ejecución: el worker lo renueva cada JOB_HEARTBEAT_INTERVAL y, si deja
+    # de hacerlo durante JOB_LEASE_SECONDS, el planificador devuelve el trabajo a la cola (segundos).
+    # Con JOB_HEARTBEAT_INTERVAL=0 no hay latidos: un trabajo que dure más que el alquiler se reintenta
+    JOB_LEASE_SECONDS: float = field(default_factory=lambda: float(os.getenv('JOB_LEASE_SECONDS', '60')))
+    JOB_HEARTBEAT_INTERVAL: float = field(default_factory=lambda: float(os.getenv('JOB_HEARTBEAT_INTERVAL', '15')))
+    JOB_RECLAIM_INTERVAL: float = field(default_factory=lambda: float(os.getenv('JOB_RECLAIM_INTERVAL', '30')))
+    JOB_RECLAIM_BATCH_SIZE: int = field(default_factory=lambda: int(os.getenv('JOB_RECLAIM_BATCH_SIZE', '500')))
+    
+    # Tareas periódicas (recuperación de trabajos y asignaciones atascadas, limpieza de subidas)
+    SCHEDULER_ENABLED: bool = field(default_factory=lambda: os.getenv('SCHEDULER_ENABLED', 'true').lower() == 'true')
+    # Asignaciones en PROCESSING sin trabajo activo durante más de este tiempo se vuelven a encolar (segundos)
+    ASSIGNMENT_STUCK_TIMEOUT: float = field(default_factory=lambda: float(os.getenv('ASSIGNMENT_STUCK_TIMEOUT', '3600')))
+    ASSIGNMENT_STUCK_CHECK_INTERVAL: float = field(default_factory=lambda: float(os.getenv('ASSIGNMENT_STUCK_CHECK_INTERVAL', '300')))
+    
+    # Métricas en formato Prometheus en /metrics (con METRICS_TOKEN, el scraper debe enviarlo como Bearer)
+    METRICS_ENABLED: bool = field(default_factory=lambda: os.getenv('METRICS_ENABLED', 'true').lower() == 'true')
+    METRICS_TOKEN: str = field(default_factory=lambda: os.getenv('METRICS_TOKEN', ''))
+    
+    # Trazas por etapas: exportador ('' = ninguno, 'file' = OTLP/JSON en TRACING_FILE, 'otlp' = colector OTLP/HTTP)
+    TRACING_EXPORTER: str = field(default_factory=lambda: os.getenv('TRACING_EXPORTER', ''))
+    TRACING_FILE: str = field(default_factory=lambda: os.getenv('TRACING_FILE', 'logs/traces.jsonl'))
+    TRACING_OTLP_ENDPOINT: str = field(default_factory=lambda: os.getenv('TRACING_OTLP_ENDPOINT', 'http://localhost:4318'))
+    TRACING_SERVICE_NAME: str = field(default_factory=lambda: os.getenv('TRACING_SERVICE_NAME', 'autograder-backend'))
+    # Fracción de trazas nuevas que se exportan (las de los trabajos siguen la decisión de quien los encoló)
+    TRACING_SAMPLE_RATIO: float = field(default_factory=lambda: float(os.getenv('TRACING_SAMPLE_RATIO', '1.0')))
+    
     # Configuraciones de Ollama
     OLLAMA_MODEL: str = field(default_factory=lambda: os.getenv('OLLAMA_MODEL', 'llama3.2'))
     OLLAMA_HOST: str = field(default_factory=lambda: os.getenv('OLLAMA_HOST', 'localhost'))
     OLLAMA_PORT: int = field(default_factory=lambda: int(os.getenv('OLLAMA_PORT', '11434')))
+    OLLAMA_NUM_CTX: int = field(default_factory=lambda: int(os.getenv('OLLAMA_NUM_CTX', '8192')))  # Ventana de contexto solicitada (tokens)
+    # Límites del control adaptativo de concurrencia (espera en cola en segundos, 0 = sin límite)
+    OLLAMA_MIN_CONCURRENCY: int = field(default_factory=lambda: int(os.getenv('OLLAMA_MIN_CONCURRENCY', '1')))
+    OLLAMA_INITIAL_CONCURRENCY: int = field(default_factory=lambda: int(os.getenv('OLLAMA_INITIAL_CONCURRENCY', '2')))
+    OLLAMA_MAX_CONCURRENCY: int = field(default_factory=lambda: int(os.getenv('OLLAMA_MAX_CONCURRENCY', '8')))
+    OLLAMA_QUEUE_MAX: int = field(default_factory=lambda: int(os.getenv('OLLAMA_QUEUE_MAX', '256')))
+    OLLAMA_QUEUE_TIMEOUT: float = field(default_factory=lambda: float(os.getenv('OLLAMA_QUEUE_TIMEOUT', '600')))
     
     # Configuraciones de OpenAI
     OPENAI_API_KEY: str = field(default_factory=lambda: os.getenv('OPENAI_API_KEY', ''))
     OPENAI_MODEL: str = field(default_factory=lambda: os.getenv('OPENAI_MODEL', 'gpt-4'))
+    OPENAI_MAX_CONCURRENCY: int = field(default_factory=lambda: int(os.getenv('OPENAI_MAX_CONCURRENCY', '16')))
+    OPENAI_BASE_URL: str = field(default_factory=lambda: os.getenv('OPENAI_BASE_URL', 'https://api.openai.com/v1'))
+    OPENAI_CONTEXT_TOKENS: int = field(default_factory=lambda: int(os.getenv('OPENAI_CONTEXT_TOKENS', '8192')))
+    
+    # Transporte HTTP compartido por los backends de LLM (timeouts en segundos)
+    LLM_MAX_CONNECTIONS_PER_HOST: int = field(default_factory=lambda: int(os.getenv('LLM_MAX_CONNECTIONS_PER_HOST', '32')))
+    LLM_MAX_KEEPALIVE_CONNECTIONS: int = field(default_factory=lambda: int(os.getenv('LLM_MAX_KEEPALIVE_CONNECTIONS', '16')))
+    LLM_KEEPALIVE_EXPIRY: float = field(default_factory=lambda: float(os.getenv('LLM_KEEPALIVE_EXPIRY', '60')))
+    LLM_CONNECT_TIMEOUT: float = field(default_factory=lambda: float(os.getenv('LLM_CONNECT_TIMEOUT', '5')))
+    LLM_READ_TIMEOUT: float = field(default_factory=lambda: float(os.getenv('LLM_READ_TIMEOUT', '300')))
+    # Leer las respuestas en streaming y cortar la generación al completar el JSON
+    LLM_STREAM_RESPONSES: bool = field(default_factory=lambda: os.getenv('LLM_STREAM_RESPONSES', 'true').lower() == 'true')
+    
+    # Corrección: nota y detección de IA en una sola llamada al modelo
+    CORRECTION_FUSED_MODE: bool = field(default_factory=lambda: os.getenv('CORRECTION_FUSED_MODE', 'true').lower() == 'true')
+    # Entregas largas: tokens reservados para la respuesta y fragmentos corregidos a la vez
+    CORRECTION_RESPONSE_TOKENS: int = field(default_factory=lambda: int(os.getenv('CORRECTION_RESPONSE_TOKENS', '1024')))
+    CORRECTION_CHUNK_CONCURRENCY: int = field(default_factory=lambda: int(os.getenv('CORRECTION_CHUNK_CONCURRENCY', '4')))
+    
+    # Caché de análisis de IA (TTL en segundos)
+    ANALYSIS_CACHE_ENABLED: bool = field(default_factory=lambda: os.getenv('ANALYSIS_CACHE_ENABLED', 'true').lower() == 'true')
+    ANALYSIS_CACHE_TTL: int = field(default_factory=lambda: int(os.getenv('ANALYSIS_CACHE_TTL', str(30 * 24 * 3600))))
+    ANALYSIS_CACHE_MAX_ENTRIES: int = field(default_factory=lambda: int(os.getenv('ANALYSIS_CACHE_MAX_ENTRIES', '5000')))
+    
+    # Caché en disco de los PDF de rúbrica y soluciones (bajo UPLOAD_FOLDER)
+    PDF_CACHE_ENABLED: bool = field(default_factory=lambda: os.getenv('PDF_CACHE_ENABLED', 'true').lower() == 'true')
+    PDF_CACHE_MAX_BYTES: int = field(default_factory=lambda: int(os.getenv('PDF_CACHE_MAX_BYTES', str(256 * 1024 * 1024))))
+    # Caché de extracción de archivos por SHA-256 (por defecto en UPLOAD_FOLDER/extraction_cache)
+    EXTRACTION_CACHE_ENABLED: bool = field(default_factory=lambda: os.getenv('EXTRACTION_CACHE_ENABLED', 'true').lower() == 'true')
+    EXTRACTION_CACHE_FOLDER: str = field(default_factory=lambda: os.getenv('EXTRACTION_CACHE_FOLDER', ''))
+    EXTRACTION_CACHE_MAX_BYTES: int = field(default_factory=lambda: int(os.getenv('EXTRACTION_CACHE_MAX_BYTES', str(512 * 1024 * 1024))))
+    # Extracción de PDF grandes por páginas en paralelo (0 workers = hasta 4 según CPU)
+    PDF_EXTRACTION_WORKERS: int = field(default_factory=lambda: int(os.getenv('PDF_EXTRACTION_WORKERS', '0')))
+    PDF_PARALLEL_MIN_PAGES: int = field(default_factory=lambda: int(os.getenv('PDF_PARALLEL_MIN_PAGES', '16')))
+    PDF_PAGE_TIMEOUT: float = field(default_factory=lambda: float(os.getenv('PDF_PAGE_TIMEOUT', '20')))
+    # Ingesta masiva de entregas: máximo de archivos por envío, filas por INSERT y procesos de extracción (0 = uno por CPU)
+    SUBMISSION_MAX_FILES: int = field(default_factory=lambda: int(os.getenv('SUBMISSION_MAX_FILES', '1000')))
+    SUBMISSION_INSERT_BATCH_SIZE: int = field(default_factory=lambda: int(os.getenv('SUBMISSION_INSERT_BATCH_SIZE', '200')))
+    SUBMISSION_EXTRACTION_WORKERS: int = field(default_factory=lambda: int(os.getenv('SUBMISSION_EXTRACTION_WORKERS', '0')))
+    # Exportación masiva de correcciones (0 = un proceso por CPU)
+    EXPORT_PROCESS_WORKERS: int = field(default_factory=lambda: int(os.getenv('EXPORT_PROCESS_WORKERS', '0')))
+    # Segundos que se conservan los ZIP de exportación una vez terminados
+    EXPORT_RETENTION: int = field(default_factory=lambda: int(os.getenv('EXPORT_RETENTION', '86400')))
+    
+    # Detección de plagio: permutaciones MinHash y similitud de Jaccard mínima (0-1)
+    SIMILARITY_NUM_PERM: int = field(default_factory=lambda: int(os.getenv('SIMILARITY_NUM_PERM', '128')))
+    SIMILARITY_THRESHOLD: float = field(default_factory=lambda: float(os.getenv('SIMILARITY_THRESHOLD', '0.5')))
     
     # JWT
     JWT_SECRET_KEY: str = field(default_factory=lambda: os.getenv('JWT_SECRET_KEY', 'your-jwt-secret-key-change-in-production'))
     JWT_ACCESS_TOKEN_EXPIRES: int = field(default_factory=lambda: int(os.getenv('JWT_ACCESS_TOKEN_EXPIRES', '3600')))
     JWT_REFRESH_TOKEN_EXPIRES: int = field(default_factory=lambda: int(os.getenv('JWT_REFRESH_TOKEN_EXPIRES', '2592000')))
     
+    # Caché de identidades para la autorización ('memory' o 'redis'; TTL 0 la desactiva)
+    IDENTITY_CACHE_BACKEND: str = field(default_factory=lambda: os.getenv('IDENTITY_CACHE_BACKEND', 'memory'))
+    IDENTITY_CACHE_TTL: float = field(default_factory=lambda: float(os.getenv('IDENTITY_CACHE_TTL', '30')))
+    IDENTITY_CACHE_MAX_ENTRIES: int = field(default_factory=lambda: int(os.getenv('IDENTITY_CACHE_MAX_ENTRIES', '10000')))
+    
     # Directorios
     UPLOAD_FOLDER: str = field(default_factory=lambda: os.getenv('UPLOAD_FOLDER', os.path.join(os.getcwd(), 'uploads')))
     TEMP_FOLDER: str = field(default_factory=lambda: os.getenv('TEMP_FOLDER', os.path.join(os.getcwd(), 'temp')))
@@ -44,6 +137,12 @@ class Config:
     
     # Límites de archivo
     MAX_CONTENT_LENGTH: int = field(default_factory=lambda: int(os.getenv('MAX_CONTENT_LENGTH', '16777216')))  # 16MB
+    # Tamaño hasta el que una subida se mantiene en memoria antes de pasar a disco
+    UPLOAD_SPOOL_MAX_BYTES: int = field(default_factory=lambda: int(os.getenv('UPLOAD_SPOOL_MAX_BYTES', str(2 * 1024 * 1024))))
+    # Subidas reanudables por partes: tamaño máximo de cada parte y del archivo, y caducidad (segundos)
+    UPLOAD_CHUNK_MAX_BYTES: int = field(default_factory=lambda: int(os.getenv('UPLOAD_CHUNK_MAX_BYTES', str(8 * 1024 * 1024))))
+    UPLOAD_SESSION_MAX_BYTES: int = field(default_factory=lambda: int(os.getenv('UPLOAD_SESSION_MAX_BYTES', str(1024 * 1024 * 1024))))
+    UPLOAD_SESSION_TTL: int = field(default_factory=lambda: int(os.getenv('UPLOAD_SESSION_TTL', '86400')))
     
     # Extensiones permitidas
     ALLOWED_EXTENSIONS: List[str] = field(default_factory=lambda: ['txt', 'pdf', 'docx', 'md', 'json'])
@@ -61,16 +160,17 @@ class Config:
     
     def __post_init__(self):
         """
-        Crear directorios necesarios y validar configuraciones
+        Validar configuraciones (sin tocar el disco: importar la configuración no crea directorios)
         """
-        # Crear directorios
-        os.makedirs(self.UPLOAD_FOLDER, exist_ok=True)
-        os.makedirs(self.TEMP_FOLDER, exist_ok=True)
-        os.makedirs(self.LOG_FOLDER, exist_ok=True)
-        
-        # Validaciones
         self._validate_configuration()
     
+    def ensure_directories(self):
+        """
+        Crear los directorios de trabajo (lo hace ``create_app`` al arrancar)
+        """
+        for folder in (self.UPLOAD_FOLDER, self.TEMP_FOLDER, self.LOG_FOLDER):
+            os.makedirs(folder, exist_ok=True)
+    
     def _validate_configuration(self):
         """
         Validar configuraciones críticas
@@ -79,10 +179,28 @@ class Config:
         if not (0 < self.OLLAMA_PORT < 65536):
             raise ValueError(f"Puerto de Ollama inválido: {self.OLLAMA_PORT}")
         
+        # Validar límites de concurrencia de Ollama
+        if not (1 <= self.OLLAMA_MIN_CONCURRENCY <= self.OLLAMA_MAX_CONCURRENCY):
+            raise ValueError("Se requiere 1 <= OLLAMA_MIN_CONCURRENCY <= OLLAMA_MAX_CONCURRENCY")
+        
         # Validar longitud máxima de archivo
         if self.MAX_CONTENT_LENGTH <= 0:
             raise ValueError(f"Longitud máxima de archivo inválida: {self.MAX_CONTENT_LENGTH}")
         
+        # Validar broker de trabajos
+        if self.JOB_BROKER not in ('database', 'memory', 'redis'):
+            raise ValueError(f"Broker de trabajos inválido: {self.JOB_BROKER}")
+        
+        # Los latidos deben llegar antes de que caduque el alquiler (0 = sin latidos)
+        if not (0 <= self.JOB_HEARTBEAT_INTERVAL < self.JOB_LEASE_SECONDS):
+            raise ValueError("Se requiere 0 <= JOB_HEARTBEAT_INTERVAL < JOB_LEASE_SECONDS")
+        
+        # Validar exportador de trazas
+        if self.TRACING_EXPORTER not in ('', 'file', 'otlp'):
+            raise ValueError(f"Exportador de trazas inválido: {self.TRACING_EXPORTER}")
+        if not (0 <= self.TRACING_SAMPLE_RATIO <= 1):
+            raise ValueError("Se requiere 0 <= TRACING_SAMPLE_RATIO <= 1")
+        
         # Validar extensiones
         if not self.ALLOWED_EXTENSIONS:
             raise ValueError("Debe haber al menos una extensión de archivo permitida")
@@ -94,6 +212,17 @@ class Config:
             if self.JWT_SECRET_KEY == 'your-jwt-secret-key-change-in-production':
                 raise ValueError("JWT_SECRET_KEY debe cambiarse en producción")
     
+    @property
+    def ollama_base_url(self) -> str:
+        """
+        URL base de Ollama a partir de OLLAMA_HOST y OLLAMA_PORT
+        
+        OLLAMA_HOST puede ser solo el host ('localhost') o una URL completa.
+        """
+        if self.OLLAMA_HOST.startswith(('http://', 'https://')):
+            return self.OLLAMA_HOST.rstrip('/')
+        return f"http://{self.OLLAMA_HOST}:{self.OLLAMA_PORT}"
+    
     def validate_file_extension(self, filename: str) -> bool:
         """
         Validar extensión de archivo
@@ -1,7 +1,7 @@
 """
 Módulo de base de datos para AutoGrader
 """
-from .database import db, init_db, migrate
-from .models import User, Assignment, Correction, Rubric, Base
+from .database import db, init_db
+from .models import User, Assignment, Correction, Rubric, Job, Base
 
-__all__ = ['db', 'init_db', 'migrate', 'User', 'Assignment', 'Correction', 'Rubric', 'Base']
+__all__ = ['db', 'init_db', 'User', 'Assignment', 'Correction', 'Rubric', 'Job', 'Base']
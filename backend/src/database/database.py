@@ -1,17 +1,42 @@
+import time
+
 from flask_sqlalchemy import SQLAlchemy
-from flask_migrate import Migrate
 from contextlib import contextmanager
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from ..utils.tracing import current_span, record_span
 
 # Inicializar SQLAlchemy
 db = SQLAlchemy()
 
-# Inicializar Migrate
-migrate = Migrate()
+# Cada commit dentro de una traza queda como span ``db.commit`` (flush incluido)
+_COMMIT_START = 'trace_commit_start'
+
+@event.listens_for(Session, 'before_commit')
+def _trace_commit_start(session):
+    if current_span() is not None:
+        session.info[_COMMIT_START] = time.time_ns()
+
+@event.listens_for(Session, 'after_commit')
+def _trace_commit_end(session):
+    start = session.info.pop(_COMMIT_START, None)
+    if start is not None:
+        record_span('db.commit', start)
+
+@event.listens_for(Session, 'after_rollback')
+def _trace_commit_failed(session):
+    start = session.info.pop(_COMMIT_START, None)
+    if start is not None:
+        record_span('db.commit', start, error="commit fallido (rollback)")
 
 def init_db(app):
-    """Inicializa la base de datos"""
+    """Inicializa la base de datos y los comandos ``flask db`` de Flask-Migrate"""
+    # Flask-Migrate importa alembic: solo se carga si se piden sus comandos
+    from flask_migrate import Migrate
+    
     db.init_app(app)
-    migrate.init_app(app, db)
+    Migrate(app, db)
     return db
 
 @contextmanager
@@ -1,5 +1,5 @@
-from sqlalchemy import Column, String, Text, DateTime, Boolean, ForeignKey, Integer, Float, Enum as SQLEnum
-from sqlalchemy.dialects.postgresql import UUID, JSON
+from sqlalchemy import Column, String, Text, DateTime, Boolean, ForeignKey, Index, Integer, Float, LargeBinary, UniqueConstraint, Enum as SQLEnum, text
+from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import uuid
@@ -20,6 +20,12 @@ class AssignmentStatus(enum.Enum):
     FINALIZED = "finalized"
     ERROR = "error"
 
+class JobStatus(enum.Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
 class User(db.Model):
     __tablename__ = 'users'
     
@@ -41,6 +47,13 @@ class User(db.Model):
 
 class Assignment(db.Model):
     __tablename__ = 'assignments'
+    __table_args__ = (
+        # Listado paginado por (created_at, id) y conteo por estado de cada profesor
+        Index('ix_assignments_teacher_created', 'teacher_id', text('created_at DESC'), text('id DESC')),
+        Index('ix_assignments_teacher_status', 'teacher_id', 'status'),
+        # Asignaciones atascadas: solo las que están procesándose
+        Index('ix_assignments_processing_updated', 'updated_at', postgresql_where=text("status = 'PROCESSING'")),
+    )
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     title = Column(String(255), nullable=False)
@@ -49,14 +62,14 @@ class Assignment(db.Model):
     teacher_id = Column(UUID(as_uuid=True), ForeignKey('users.id'), nullable=False)
     
     # Contenido extraído del archivo
-    extracted_content = Column(JSON)
+    extracted_content = Column(JSONB)
     
     # Análisis de IA
-    ai_analysis = Column(JSON)
+    ai_analysis = Column(JSONB)
     
     # Soluciones y rúbrica finales (editables)
-    final_solutions = Column(JSON)
-    final_rubric = Column(JSON)
+    final_solutions = Column(JSONB)
+    final_rubric = Column(JSONB)
     
     # Estado del flujo
     status = Column(SQLEnum(AssignmentStatus), default=AssignmentStatus.UPLOADED, nullable=False)
@@ -71,6 +84,11 @@ class Assignment(db.Model):
 
 class Rubric(db.Model):
     __tablename__ = 'rubrics'
+    __table_args__ = (
+        # ``teacher_id = X OR is_public`` se resuelve combinando los dos índices (BitmapOr)
+        Index('ix_rubrics_teacher_created', 'teacher_id', text('created_at DESC')),
+        Index('ix_rubrics_public_created', text('created_at DESC'), postgresql_where=text('is_public')),
+    )
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     title = Column(String(255), nullable=False)
@@ -81,7 +99,7 @@ class Rubric(db.Model):
     teacher_id = Column(UUID(as_uuid=True), ForeignKey('users.id'), nullable=False)
     
     # Estructura de la rúbrica
-    criteria = Column(JSON, nullable=False)  # Array de criterios con niveles de desempeño
+    criteria = Column(JSONB, nullable=False)  # Array de criterios con niveles de desempeño
     
     # Metadatos
     is_template = Column(Boolean, default=False, nullable=False)  # Si es una plantilla reutilizable
@@ -95,6 +113,10 @@ class Rubric(db.Model):
 
 class Correction(db.Model):
     __tablename__ = 'corrections'
+    __table_args__ = (
+        # Correcciones de una asignación en el orden de la exportación
+        Index('ix_corrections_assignment_student', 'assignment_id', 'student_name', 'id'),
+    )
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     assignment_id = Column(UUID(as_uuid=True), ForeignKey('assignments.id'), nullable=False)
@@ -111,7 +133,7 @@ class Correction(db.Model):
     percentage = Column(Float, nullable=False, default=0.0)
     
     # Detalles de la corrección
-    correction_details = Column(JSON)  # Detalles por ejercicio/criterio
+    correction_details = Column(JSONB)  # Detalles por ejercicio/criterio
     feedback = Column(Text)            # Comentarios generales
     suggestions = Column(Text)         # Sugerencias de mejora
     
@@ -124,5 +146,74 @@ class Correction(db.Model):
     rubric = relationship("Rubric", back_populates="corrections")
     teacher = relationship("User", back_populates="corrections")
 
+class Job(db.Model):
+    __tablename__ = 'jobs'
+    __table_args__ = (
+        # Siguiente trabajo a reclamar: solo los que están en cola
+        Index('ix_jobs_queued_run_at', 'run_at', postgresql_where=text("status = 'QUEUED'")),
+        # Alquileres caducados que recupera el planificador
+        Index('ix_jobs_running_lease', 'lease_expires_at', postgresql_where=text("status = 'RUNNING'")),
+        # ¿Tiene la asignación un análisis pendiente o en curso? (recuperación de asignaciones atascadas)
+        Index('ix_jobs_active_assignment', text("(payload ->> 'assignment_id')"),
+              postgresql_where=text("status IN ('QUEUED', 'RUNNING')")),
+    )
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    job_type = Column(String(100), nullable=False)
+    payload = Column(JSONB, nullable=False, default=dict)
+    
+    # Estado y reintentos
+    status = Column(SQLEnum(JobStatus), default=JobStatus.QUEUED, nullable=False)
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=3)
+    run_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)  # No se ejecuta antes de esta fecha
+    last_error = Column(Text)
+    result = Column(JSONB)
+    
+    # Worker que tiene el trabajo reclamado
+    locked_by = Column(String(255))
+    locked_at = Column(DateTime(timezone=True))
+    lease_expires_at = Column(DateTime(timezone=True))  # Se renueva con cada latido del worker
+    
+    # Metadatos
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+class AnalysisCacheEntry(db.Model):
+    __tablename__ = 'analysis_cache'
+    __table_args__ = (
+        # Caducidad por TTL y desalojo LRU
+        Index('ix_analysis_cache_created', 'created_at'),
+        Index('ix_analysis_cache_last_accessed', 'last_accessed_at'),
+    )
+    
+    # Hash SHA-256 del contenido normalizado, modelo y versión del prompt
+    key = Column(String(64), primary_key=True)
+    model = Column(String(100), nullable=False)
+    prompt_version = Column(String(20), nullable=False)
+    analysis = Column(JSONB, nullable=False)
+    
+    # Metadatos para TTL y desalojo LRU
+    hit_count = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    last_accessed_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class SubmissionSignature(db.Model):
+    __tablename__ = 'submission_signatures'
+    __table_args__ = (
+        UniqueConstraint('assignment_id', 'submission_key', name='uq_submission_signature'),
+    )
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    assignment_id = Column(UUID(as_uuid=True), ForeignKey('assignments.id', ondelete='CASCADE'), nullable=False, index=True)
+    submission_key = Column(String(255), nullable=False)  # ID de la corrección, nombre del estudiante...
+    
+    # Firma MinHash (num_perm enteros de 32 bits) y texto para la alineación exacta
+    signature = Column(LargeBinary, nullable=False)
+    num_perm = Column(Integer, nullable=False)
+    content = Column(Text, nullable=False)
+    
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
 # Crear la instancia Base para Alembic
 Base = db.Model
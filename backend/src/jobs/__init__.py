@@ -0,0 +1,14 @@
+"""
+Cola de trabajos en segundo plano para AutoGrader
+"""
+from .brokers import JobBroker, JobRecord, MemoryJobBroker, DatabaseJobBroker, RedisJobBroker, create_broker
+from .queue import JobQueue, get_job_queue
+from .scheduler import PeriodicScheduler, get_scheduler, start_scheduler
+from .worker import JobWorker, start_in_process_workers, run_worker_pool
+
+__all__ = [
+    'JobBroker', 'JobRecord', 'MemoryJobBroker', 'DatabaseJobBroker', 'RedisJobBroker', 'create_broker',
+    'JobQueue', 'get_job_queue',
+    'PeriodicScheduler', 'get_scheduler', 'start_scheduler',
+    'JobWorker', 'start_in_process_workers', 'run_worker_pool'
+]
@@ -0,0 +1,14 @@
+import argparse
+import logging
+
+from ..config.settings import config
+from .worker import run_worker_pool
+
+logging.basicConfig(level=logging.INFO)
+
+parser = argparse.ArgumentParser(description="Pool de workers de la cola de trabajos")
+parser.add_argument('--processes', type=int, default=config.JOB_WORKER_PROCESSES,
+                    help="Número de procesos worker")
+args = parser.parse_args()
+
+run_worker_pool(args.processes)
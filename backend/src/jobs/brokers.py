@@ -0,0 +1,537 @@
+"""
+Brokers de la cola de trabajos.
+
+Cada broker guarda los trabajos pendientes y permite a los workers reclamarlos
+de forma exclusiva. El broker por defecto usa la tabla ``jobs`` de la base de
+datos, de modo que no hace falta Redis para ejecutar trabajos en segundo plano.
+
+Un trabajo reclamado queda "alquilado" al worker durante ``lease_seconds``; el
+worker renueva el alquiler con latidos mientras lo ejecuta. Si el worker muere,
+el alquiler caduca y ``reclaim_expired`` devuelve el trabajo a la cola (o lo da
+por fallido si ya agotó sus intentos). Las operaciones que cierran un trabajo
+reciben el ``worker_id`` y no hacen nada si el alquiler ya no es suyo.
+"""
+import heapq
+import itertools
+import json
+import logging
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import case, cast, func, insert, literal, select, update
+
+from ..database.database import db
+from ..database.models import Job, JobStatus
+
+logger = logging.getLogger(__name__)
+
+# Error que se guarda en los trabajos recuperados de un worker que dejó de dar señales
+LEASE_EXPIRED_ERROR = "El worker dejó de renovar el alquiler del trabajo"
+DEFAULT_LEASE_SECONDS = 60.0
+
+
+@dataclass
+class JobRecord:
+    """Trabajo reclamado por un worker"""
+    id: str
+    job_type: str
+    payload: Dict[str, Any] = field(default_factory=dict)
+    attempts: int = 0
+    max_attempts: int = 3
+    locked_by: Optional[str] = None
+
+    @property
+    def is_last_attempt(self) -> bool:
+        return self.attempts >= self.max_attempts
+
+
+class JobBroker(ABC):
+    """Interfaz común de todos los brokers"""
+
+    def __init__(self, lease_seconds: float = DEFAULT_LEASE_SECONDS):
+        """
+        :param lease_seconds: Duración del alquiler de un trabajo reclamado sin latidos
+        """
+        self.lease_seconds = lease_seconds
+
+    @abstractmethod
+    def enqueue(self, job_type: str, payload: Dict[str, Any], max_attempts: int, delay: float = 0) -> str:
+        """Añade un trabajo a la cola y devuelve su ID"""
+
+    def enqueue_many(self, job_type: str, payloads: List[Dict[str, Any]], max_attempts: int) -> List[str]:
+        """Añade varios trabajos del mismo tipo y devuelve sus IDs (los brokers lo agrupan si pueden)"""
+        return [self.enqueue(job_type, payload, max_attempts) for payload in payloads]
+
+    @abstractmethod
+    def claim(self, worker_id: str) -> Optional[JobRecord]:
+        """Reclama el siguiente trabajo disponible incrementando su contador de intentos"""
+
+    @abstractmethod
+    def heartbeat(self, job_id: str, worker_id: str) -> bool:
+        """Renueva el alquiler de un trabajo; False si el worker ya no lo tiene"""
+
+    @abstractmethod
+    def complete(self, job_id: str, result: Optional[Dict[str, Any]] = None, worker_id: Optional[str] = None) -> bool:
+        """Marca un trabajo como completado; False si ``worker_id`` ya no tiene el alquiler"""
+
+    @abstractmethod
+    def retry(self, job_id: str, error: str, delay: float, worker_id: Optional[str] = None) -> bool:
+        """Devuelve un trabajo a la cola para reintentarlo tras ``delay`` segundos"""
+
+    @abstractmethod
+    def fail(self, job_id: str, error: str, worker_id: Optional[str] = None) -> bool:
+        """Marca un trabajo como fallido definitivamente"""
+
+    @abstractmethod
+    def reclaim_expired(self, limit: int = 500) -> List[JobRecord]:
+        """
+        Recupera los trabajos cuyo alquiler ha caducado
+
+        Los que aún tienen intentos vuelven a la cola y los demás quedan fallidos
+        (``is_last_attempt``). Cada trabajo lo recupera un solo llamador aunque
+        haya varias instancias haciéndolo a la vez.
+        """
+
+    @abstractmethod
+    def depth(self) -> int:
+        """Número de trabajos pendientes"""
+
+
+class MemoryJobBroker(JobBroker):
+    """Broker en memoria para ejecutar trabajos dentro del propio proceso"""
+
+    def __init__(self, lease_seconds: float = DEFAULT_LEASE_SECONDS):
+        super().__init__(lease_seconds)
+        self._lock = threading.Lock()
+        self._heap: List[tuple] = []
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._leases: Dict[str, float] = {}
+        self._sequence = itertools.count()
+
+    def enqueue(self, job_type: str, payload: Dict[str, Any], max_attempts: int, delay: float = 0) -> str:
+        job_id = str(uuid.uuid4())
+        with self._lock:
+            self._jobs[job_id] = {
+                "job_type": job_type,
+                "payload": payload,
+                "attempts": 0,
+                "max_attempts": max_attempts,
+                "status": "queued",
+            }
+            heapq.heappush(self._heap, (time.monotonic() + delay, next(self._sequence), job_id))
+        return job_id
+
+    def claim(self, worker_id: str) -> Optional[JobRecord]:
+        with self._lock:
+            if not self._heap or self._heap[0][0] > time.monotonic():
+                return None
+
+            _, _, job_id = heapq.heappop(self._heap)
+            job = self._jobs[job_id]
+            job["status"] = "running"
+            job["attempts"] += 1
+            job["locked_by"] = worker_id
+            self._leases[job_id] = time.monotonic() + self.lease_seconds
+            return JobRecord(job_id, job["job_type"], job["payload"], job["attempts"], job["max_attempts"], worker_id)
+
+    def heartbeat(self, job_id: str, worker_id: str) -> bool:
+        with self._lock:
+            if not self._holds(job_id, worker_id):
+                return False
+            self._leases[job_id] = time.monotonic() + self.lease_seconds
+            return True
+
+    def complete(self, job_id: str, result: Optional[Dict[str, Any]] = None, worker_id: Optional[str] = None) -> bool:
+        with self._lock:
+            if not self._holds(job_id, worker_id):
+                return False
+            self._leases.pop(job_id, None)
+            self._jobs.pop(job_id, None)
+            return True
+
+    def retry(self, job_id: str, error: str, delay: float, worker_id: Optional[str] = None) -> bool:
+        with self._lock:
+            if not self._holds(job_id, worker_id):
+                return False
+            self._requeue(job_id, error, time.monotonic() + delay)
+            return True
+
+    def fail(self, job_id: str, error: str, worker_id: Optional[str] = None) -> bool:
+        with self._lock:
+            if not self._holds(job_id, worker_id):
+                return False
+            self._leases.pop(job_id, None)
+            self._jobs.pop(job_id, None)
+            return True
+
+    def reclaim_expired(self, limit: int = 500) -> List[JobRecord]:
+        now = time.monotonic()
+        reclaimed = []
+        with self._lock:
+            expired = [job_id for job_id, expires_at in self._leases.items() if expires_at <= now][:limit]
+            for job_id in expired:
+                job = self._jobs[job_id]
+                reclaimed.append(JobRecord(job_id, job["job_type"], job["payload"], job["attempts"], job["max_attempts"]))
+                if job["attempts"] >= job["max_attempts"]:
+                    del self._leases[job_id]
+                    del self._jobs[job_id]
+                else:
+                    self._requeue(job_id, LEASE_EXPIRED_ERROR, now)
+        return reclaimed
+
+    def _holds(self, job_id: str, worker_id: Optional[str]) -> bool:
+        """El trabajo está en ejecución y (si se indica) alquilado por ``worker_id``"""
+        job = self._jobs.get(job_id)
+        return (job is not None and job["status"] == "running"
+                and (worker_id is None or job.get("locked_by") == worker_id))
+
+    def _requeue(self, job_id: str, error: str, run_at: float) -> None:
+        job = self._jobs[job_id]
+        job["status"] = "queued"
+        job["last_error"] = error
+        job["locked_by"] = None
+        self._leases.pop(job_id, None)
+        heapq.heappush(self._heap, (run_at, next(self._sequence), job_id))
+
+    def depth(self) -> int:
+        with self._lock:
+            return len(self._heap)
+
+
+class DatabaseJobBroker(JobBroker):
+    """
+    Broker respaldado por la tabla ``jobs``.
+
+    En PostgreSQL los trabajos se reclaman con ``FOR UPDATE SKIP LOCKED`` para que
+    varios workers puedan consumir la cola sin bloquearse entre sí. Requiere un
+    contexto de aplicación Flask activo.
+    """
+
+    def enqueue(self, job_type: str, payload: Dict[str, Any], max_attempts: int, delay: float = 0) -> str:
+        job = Job(
+            job_type=job_type,
+            payload=payload,
+            status=JobStatus.QUEUED,
+            max_attempts=max_attempts
+        )
+        if delay:
+            job.run_at = func.now() + timedelta(seconds=delay)
+
+        db.session.add(job)
+        db.session.commit()
+        return str(job.id)
+
+    def enqueue_many(self, job_type: str, payloads: List[Dict[str, Any]], max_attempts: int) -> List[str]:
+        # Un solo INSERT con varias filas y un solo commit
+        if not payloads:
+            return []
+        job_ids = [uuid.uuid4() for _ in payloads]
+        try:
+            db.session.execute(insert(Job), [
+                {"id": job_id, "job_type": job_type, "payload": payload,
+                 "status": JobStatus.QUEUED, "attempts": 0, "max_attempts": max_attempts}
+                for job_id, payload in zip(job_ids, payloads)
+            ])
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        return [str(job_id) for job_id in job_ids]
+
+    def claim(self, worker_id: str) -> Optional[JobRecord]:
+        try:
+            job = db.session.query(Job).filter(
+                Job.status == JobStatus.QUEUED,
+                Job.run_at <= func.now()
+            ).order_by(Job.run_at).with_for_update(skip_locked=True).first()
+
+            if not job:
+                db.session.rollback()
+                return None
+
+            record = JobRecord(str(job.id), job.job_type, dict(job.payload or {}), job.attempts + 1, job.max_attempts,
+                               worker_id)
+
+            job.status = JobStatus.RUNNING
+            job.attempts = record.attempts
+            job.locked_by = worker_id
+            job.locked_at = func.now()
+            job.lease_expires_at = func.now() + timedelta(seconds=self.lease_seconds)
+            db.session.commit()
+
+            return record
+
+        except Exception:
+            db.session.rollback()
+            raise
+
+    def heartbeat(self, job_id: str, worker_id: str) -> bool:
+        return self._update(job_id, worker_id, lease_expires_at=func.now() + timedelta(seconds=self.lease_seconds))
+
+    def complete(self, job_id: str, result: Optional[Dict[str, Any]] = None, worker_id: Optional[str] = None) -> bool:
+        return self._update(job_id, worker_id, status=JobStatus.SUCCEEDED, result=result, locked_by=None,
+                            lease_expires_at=None)
+
+    def retry(self, job_id: str, error: str, delay: float, worker_id: Optional[str] = None) -> bool:
+        return self._update(
+            job_id,
+            worker_id,
+            status=JobStatus.QUEUED,
+            last_error=error,
+            locked_by=None,
+            lease_expires_at=None,
+            run_at=func.now() + timedelta(seconds=delay)
+        )
+
+    def fail(self, job_id: str, error: str, worker_id: Optional[str] = None) -> bool:
+        return self._update(job_id, worker_id, status=JobStatus.FAILED, last_error=error, locked_by=None,
+                            lease_expires_at=None)
+
+    def reclaim_expired(self, limit: int = 500) -> List[JobRecord]:
+        # Un solo UPDATE ... RETURNING; SKIP LOCKED reparte los trabajos caducados
+        # entre las instancias que recuperan a la vez sin que dos tomen el mismo
+        expired = select(Job.id).where(
+            Job.status == JobStatus.RUNNING,
+            Job.lease_expires_at < func.now()
+        ).order_by(Job.lease_expires_at).limit(limit).with_for_update(skip_locked=True).scalar_subquery()
+
+        # Sin el CAST, PostgreSQL tipa el CASE como texto y no lo asigna al enum
+        status = case(
+            (Job.attempts >= Job.max_attempts, cast(literal(JobStatus.FAILED, Job.status.type), Job.status.type)),
+            else_=cast(literal(JobStatus.QUEUED, Job.status.type), Job.status.type)
+        )
+        statement = update(Job).where(Job.id.in_(expired)).values(
+            status=status,
+            last_error=LEASE_EXPIRED_ERROR,
+            locked_by=None,
+            lease_expires_at=None,
+            run_at=func.now()
+        ).returning(Job.id, Job.job_type, Job.payload, Job.attempts, Job.max_attempts)
+
+        try:
+            rows = db.session.execute(statement, execution_options={"synchronize_session": False}).all()
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        return [JobRecord(str(row.id), row.job_type, dict(row.payload or {}), row.attempts, row.max_attempts)
+                for row in rows]
+
+    def depth(self) -> int:
+        return db.session.query(func.count(Job.id)).filter(Job.status == JobStatus.QUEUED).scalar() or 0
+
+    def _update(self, job_id: str, worker_id: Optional[str] = None, **values) -> bool:
+        try:
+            query = db.session.query(Job).filter(Job.id == job_id)
+            if worker_id is not None:
+                # El alquiler pudo caducar y el trabajo estar ya en otras manos
+                query = query.filter(Job.status == JobStatus.RUNNING, Job.locked_by == worker_id)
+            updated = query.update(values, synchronize_session=False)
+            db.session.commit()
+            return updated > 0
+        except Exception:
+            db.session.rollback()
+            raise
+
+
+class RedisJobBroker(JobBroker):
+    """
+    Broker opcional sobre Redis.
+
+    Los IDs pendientes se guardan en un sorted set puntuado por la hora de
+    ejecución, los que están en ejecución en otro puntuado por la caducidad de
+    su alquiler y los datos de cada trabajo en un hash.
+    """
+
+    # Pasa atómicamente el primer trabajo cuya hora de ejecución ya ha llegado
+    # de la cola a los alquilados
+    _CLAIM_SCRIPT = """
+    local ids = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, 1)
+    if #ids == 0 then
+        return nil
+    end
+    redis.call('ZREM', KEYS[1], ids[1])
+    redis.call('ZADD', KEYS[2], ARGV[2], ids[1])
+    return ids[1]
+    """
+
+    # Renueva el alquiler si sigue siendo del worker
+    _HEARTBEAT_SCRIPT = """
+    if redis.call('HGET', KEYS[2], 'locked_by') ~= ARGV[1] or not redis.call('ZSCORE', KEYS[1], ARGV[2]) then
+        return 0
+    end
+    redis.call('ZADD', KEYS[1], ARGV[3], ARGV[2])
+    return 1
+    """
+
+    # Suelta el alquiler (1) o indica que ya no es del worker (0)
+    _RELEASE_SCRIPT = """
+    if ARGV[2] ~= '' and redis.call('HGET', KEYS[2], 'locked_by') ~= ARGV[2] then
+        return 0
+    end
+    return redis.call('ZREM', KEYS[1], ARGV[1])
+    """
+
+    # Devuelve a la cola (o da por fallidos) los trabajos con el alquiler caducado
+    _RECLAIM_SCRIPT = """
+    local ids = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, ARGV[2])
+    for _, id in ipairs(ids) do
+        redis.call('ZREM', KEYS[1], id)
+        local key = ARGV[3] .. ':' .. id
+        local attempts = tonumber(redis.call('HGET', key, 'attempts') or '0')
+        local max_attempts = tonumber(redis.call('HGET', key, 'max_attempts') or '1')
+        redis.call('HSET', key, 'locked_by', '', 'last_error', ARGV[4])
+        if attempts >= max_attempts then
+            redis.call('HSET', key, 'status', 'failed')
+        else
+            redis.call('HSET', key, 'status', 'queued')
+            redis.call('ZADD', KEYS[2], ARGV[1], id)
+        end
+    end
+    return ids
+    """
+
+    def __init__(self, redis_url: str, prefix: str = 'autograder:jobs', lease_seconds: float = DEFAULT_LEASE_SECONDS):
+        import redis
+
+        super().__init__(lease_seconds)
+        self.redis = redis.Redis.from_url(redis_url)
+        self.queue_key = f"{prefix}:queue"
+        self.running_key = f"{prefix}:running"
+        self.data_prefix = f"{prefix}:data"
+        self._claim = self.redis.register_script(self._CLAIM_SCRIPT)
+        self._heartbeat = self.redis.register_script(self._HEARTBEAT_SCRIPT)
+        self._release = self.redis.register_script(self._RELEASE_SCRIPT)
+        self._reclaim = self.redis.register_script(self._RECLAIM_SCRIPT)
+
+    def _data_key(self, job_id: str) -> str:
+        return f"{self.data_prefix}:{job_id}"
+
+    def enqueue(self, job_type: str, payload: Dict[str, Any], max_attempts: int, delay: float = 0) -> str:
+        job_id = str(uuid.uuid4())
+        pipe = self.redis.pipeline()
+        pipe.hset(self._data_key(job_id), mapping={
+            "job_type": job_type,
+            "payload": json.dumps(payload),
+            "attempts": 0,
+            "max_attempts": max_attempts,
+            "status": "queued",
+        })
+        pipe.zadd(self.queue_key, {job_id: time.time() + delay})
+        pipe.execute()
+        return job_id
+
+    def enqueue_many(self, job_type: str, payloads: List[Dict[str, Any]], max_attempts: int) -> List[str]:
+        # Todos los trabajos en una sola ida y vuelta a Redis
+        if not payloads:
+            return []
+        job_ids = [str(uuid.uuid4()) for _ in payloads]
+        pipe = self.redis.pipeline()
+        now = time.time()
+        for job_id, payload in zip(job_ids, payloads):
+            pipe.hset(self._data_key(job_id), mapping={
+                "job_type": job_type,
+                "payload": json.dumps(payload),
+                "attempts": 0,
+                "max_attempts": max_attempts,
+                "status": "queued",
+            })
+        pipe.zadd(self.queue_key, {job_id: now for job_id in job_ids})
+        pipe.execute()
+        return job_ids
+
+    def claim(self, worker_id: str) -> Optional[JobRecord]:
+        now = time.time()
+        job_id = self._claim(keys=[self.queue_key, self.running_key], args=[now, now + self.lease_seconds])
+        if job_id is None:
+            return None
+
+        job_id = job_id.decode() if isinstance(job_id, bytes) else job_id
+        key = self._data_key(job_id)
+        self.redis.hincrby(key, "attempts", 1)
+        self.redis.hset(key, mapping={"status": "running", "locked_by": worker_id})
+        data = {k.decode(): v.decode() for k, v in self.redis.hgetall(key).items()}
+
+        return self._record(job_id, data, worker_id)
+
+    def heartbeat(self, job_id: str, worker_id: str) -> bool:
+        renewed = self._heartbeat(keys=[self.running_key, self._data_key(job_id)],
+                                  args=[worker_id, job_id, time.time() + self.lease_seconds])
+        return bool(renewed)
+
+    def complete(self, job_id: str, result: Optional[Dict[str, Any]] = None, worker_id: Optional[str] = None) -> bool:
+        if not self._release_lease(job_id, worker_id):
+            return False
+        self.redis.delete(self._data_key(job_id))
+        return True
+
+    def retry(self, job_id: str, error: str, delay: float, worker_id: Optional[str] = None) -> bool:
+        if not self._release_lease(job_id, worker_id):
+            return False
+        pipe = self.redis.pipeline()
+        pipe.hset(self._data_key(job_id), mapping={"status": "queued", "last_error": error, "locked_by": ""})
+        pipe.zadd(self.queue_key, {job_id: time.time() + delay})
+        pipe.execute()
+        return True
+
+    def fail(self, job_id: str, error: str, worker_id: Optional[str] = None) -> bool:
+        if not self._release_lease(job_id, worker_id):
+            return False
+        # Se conserva el hash con el error para poder inspeccionarlo
+        self.redis.hset(self._data_key(job_id), mapping={"status": "failed", "last_error": error, "locked_by": ""})
+        return True
+
+    def reclaim_expired(self, limit: int = 500) -> List[JobRecord]:
+        job_ids = self._reclaim(keys=[self.running_key, self.queue_key],
+                                args=[time.time(), limit, self.data_prefix, LEASE_EXPIRED_ERROR])
+        if not job_ids:
+            return []
+
+        job_ids = [job_id.decode() if isinstance(job_id, bytes) else job_id for job_id in job_ids]
+        pipe = self.redis.pipeline()
+        for job_id in job_ids:
+            pipe.hgetall(self._data_key(job_id))
+        return [
+            self._record(job_id, {k.decode(): v.decode() for k, v in data.items()})
+            for job_id, data in zip(job_ids, pipe.execute())
+            if data
+        ]
+
+    def _release_lease(self, job_id: str, worker_id: Optional[str]) -> bool:
+        return bool(self._release(keys=[self.running_key, self._data_key(job_id)], args=[job_id, worker_id or '']))
+
+    def _record(self, job_id: str, data: Dict[str, str], worker_id: Optional[str] = None) -> JobRecord:
+        return JobRecord(
+            job_id,
+            data["job_type"],
+            json.loads(data.get("payload", "{}")),
+            int(data.get("attempts", 0)),
+            int(data.get("max_attempts", 1)),
+            worker_id
+        )
+
+    def depth(self) -> int:
+        return self.redis.zcard(self.queue_key)
+
+
+def create_broker(kind: str, redis_url: Optional[str] = None, lease_seconds: float = DEFAULT_LEASE_SECONDS) -> JobBroker:
+    """
+    Crea el broker configurado
+
+    :param kind: Tipo de broker ('database', 'memory' o 'redis')
+    :param redis_url: URL de Redis, requerida para el broker 'redis'
+    :param lease_seconds: Duración del alquiler de los trabajos reclamados
+    :return: Instancia del broker
+    """
+    if kind == 'memory':
+        return MemoryJobBroker(lease_seconds)
+    if kind == 'redis':
+        return RedisJobBroker(redis_url, lease_seconds=lease_seconds)
+    if kind == 'database':
+        return DatabaseJobBroker(lease_seconds)
+    raise ValueError(f"Broker de trabajos desconocido: {kind}")
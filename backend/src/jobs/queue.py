@@ -0,0 +1,192 @@
+"""
+Cola de trabajos en segundo plano
+"""
+import logging
+import random
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+from ..config.settings import config
+from ..utils.metrics import SLOW_BUCKETS, CallbackMetric, Histogram
+from ..utils.tracing import extract, inject, start_span
+from .brokers import LEASE_EXPIRED_ERROR, JobBroker, JobRecord, create_broker
+
+logger = logging.getLogger(__name__)
+
+JobHandler = Callable[[Dict[str, Any]], Optional[Dict[str, Any]]]
+FailureHandler = Callable[[Dict[str, Any], str], None]
+
+JOB_DURATION = Histogram(
+    'job_duration_seconds', "Duración de cada ejecución de un trabajo por tipo y resultado",
+    ['job_type', 'outcome'], buckets=SLOW_BUCKETS
+)
+
+
+@dataclass
+class _Registration:
+    handler: JobHandler
+    on_failure: Optional[FailureHandler] = None
+
+
+class JobQueue:
+    """Registro de manejadores y punto de entrada para encolar y ejecutar trabajos"""
+
+    def __init__(self,
+                 broker: JobBroker,
+                 max_attempts: int = 3,
+                 retry_base_delay: float = 5.0,
+                 retry_max_delay: float = 300.0):
+        """
+        :param broker: Broker donde se guardan los trabajos
+        :param max_attempts: Intentos por defecto de cada trabajo
+        :param retry_base_delay: Espera base (segundos) antes del primer reintento
+        :param retry_max_delay: Espera máxima entre reintentos
+        """
+        self.broker = broker
+        self.max_attempts = max_attempts
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self._handlers: Dict[str, _Registration] = {}
+
+    def register(self, job_type: str, handler: JobHandler, on_failure: Optional[FailureHandler] = None) -> None:
+        """
+        Registra el manejador de un tipo de trabajo
+
+        :param job_type: Tipo de trabajo
+        :param handler: Función que recibe el payload; si lanza una excepción el trabajo se reintenta
+        :param on_failure: Función llamada con (payload, error) cuando se agotan los intentos
+        """
+        self._handlers[job_type] = _Registration(handler, on_failure)
+
+    def enqueue(self, job_type: str, payload: Dict[str, Any], max_attempts: Optional[int] = None, delay: float = 0) -> str:
+        """
+        Encola un trabajo
+
+        :param job_type: Tipo de trabajo registrado
+        :param payload: Datos serializables en JSON que recibirá el manejador
+        :param max_attempts: Intentos máximos (por defecto, los de la cola)
+        :param delay: Segundos a esperar antes de que el trabajo esté disponible
+        :return: ID del trabajo
+        """
+        # El trabajo continúa la traza de quien lo encola
+        payload = inject(payload)
+        job_id = self.broker.enqueue(job_type, payload, max_attempts or self.max_attempts, delay)
+        logger.info(f"Trabajo {job_type} encolado: {job_id}")
+        return job_id
+
+    def enqueue_many(self, job_type: str, payloads: List[Dict[str, Any]], max_attempts: Optional[int] = None) -> List[str]:
+        """
+        Encola varios trabajos del mismo tipo de una vez (p. ej. una corrección por entrega)
+
+        :return: IDs de los trabajos, en el orden de ``payloads``
+        """
+        payloads = [inject(payload) for payload in payloads]
+        job_ids = self.broker.enqueue_many(job_type, payloads, max_attempts or self.max_attempts)
+        logger.info(f"{len(job_ids)} trabajos {job_type} encolados")
+        return job_ids
+
+    def backoff_delay(self, attempts: int) -> float:
+        """Espera exponencial con jitter antes del siguiente intento"""
+        delay = min(self.retry_max_delay, self.retry_base_delay * (2 ** max(attempts - 1, 0)))
+        return delay * random.uniform(0.8, 1.2)
+
+    def execute(self, job: JobRecord) -> bool:
+        """
+        Ejecuta un trabajo reclamado y lo completa, reintenta o marca como fallido
+
+        :param job: Trabajo reclamado del broker
+        :return: True si el trabajo terminó correctamente
+        """
+        registration = self._handlers.get(job.job_type)
+        if registration is None:
+            logger.error(f"No hay manejador registrado para el trabajo {job.job_type}")
+            self.broker.fail(job.id, f"Tipo de trabajo desconocido: {job.job_type}", worker_id=job.locked_by)
+            return False
+
+        start = time.perf_counter()
+        try:
+            with start_span(f"job {job.job_type}", {"job.id": job.id, "job.attempt": job.attempts},
+                            kind='consumer', parent=extract(job.payload)):
+                result = registration.handler(job.payload)
+            JOB_DURATION.labels(job.job_type, 'succeeded').observe(time.perf_counter() - start)
+            if not self.broker.complete(job.id, result, worker_id=job.locked_by):
+                # Otro worker lo recuperó al caducar el alquiler; su resultado es el que vale
+                logger.warning(f"Trabajo {job.job_type} {job.id} terminado tras perder el alquiler")
+            return True
+
+        except Exception as e:
+            error = str(e) or e.__class__.__name__
+            JOB_DURATION.labels(job.job_type, 'failed' if job.is_last_attempt else 'retried').observe(
+                time.perf_counter() - start
+            )
+
+            if not job.is_last_attempt:
+                delay = self.backoff_delay(job.attempts)
+                logger.warning(
+                    f"Trabajo {job.job_type} {job.id} falló (intento {job.attempts}/{job.max_attempts}), "
+                    f"reintentando en {delay:.1f}s: {error}"
+                )
+                self.broker.retry(job.id, error, delay, worker_id=job.locked_by)
+                return False
+
+            logger.error(f"Trabajo {job.job_type} {job.id} falló definitivamente: {error}")
+            if self.broker.fail(job.id, error, worker_id=job.locked_by):
+                self._notify_failure(job, error)
+            return False
+
+    def reclaim_expired(self, limit: int = 500) -> int:
+        """
+        Recupera los trabajos de workers que dejaron de renovar su alquiler
+
+        Los que aún tienen intentos vuelven a la cola; para los que los agotaron
+        se llama a su ``on_failure``, como si hubieran fallado en el worker.
+
+        :param limit: Máximo de trabajos a recuperar en esta llamada
+        :return: Número de trabajos recuperados
+        """
+        reclaimed = self.broker.reclaim_expired(limit)
+        for job in reclaimed:
+            if job.is_last_attempt:
+                logger.error(f"Trabajo {job.job_type} {job.id} abandonado en su último intento; se da por fallido")
+                self._notify_failure(job, LEASE_EXPIRED_ERROR)
+            else:
+                logger.warning(f"Trabajo {job.job_type} {job.id} recuperado tras caducar su alquiler "
+                               f"(intento {job.attempts}/{job.max_attempts})")
+        return len(reclaimed)
+
+    def _notify_failure(self, job: JobRecord, error: str) -> None:
+        registration = self._handlers.get(job.job_type)
+        if registration is None or registration.on_failure is None:
+            return
+        try:
+            registration.on_failure(job.payload, error)
+        except Exception as hook_error:
+            logger.error(f"Error en el manejador de fallo de {job.job_type}: {hook_error}")
+
+
+# Cola compartida por el proceso (se crea al primer uso)
+job_queue: Optional[JobQueue] = None
+
+
+def get_job_queue() -> JobQueue:
+    """Obtiene la cola de trabajos del proceso, creándola con la configuración actual"""
+    global job_queue
+    if job_queue is None:
+        job_queue = JobQueue(
+            create_broker(config.JOB_BROKER, config.REDIS_URL, config.JOB_LEASE_SECONDS),
+            max_attempts=config.JOB_MAX_ATTEMPTS,
+            retry_base_delay=config.JOB_RETRY_BASE_DELAY,
+            retry_max_delay=config.JOB_RETRY_MAX_DELAY
+        )
+        logger.info(f"Cola de trabajos inicializada con broker '{config.JOB_BROKER}'")
+    return job_queue
+
+
+def _queue_depth():
+    # Solo si la cola ya existe: leer las métricas no debe crearla
+    if job_queue is not None:
+        yield (), job_queue.broker.depth()
+
+
+CallbackMetric('job_queue_depth', "Trabajos pendientes en la cola", [], _queue_depth)
@@ -0,0 +1,123 @@
+"""
+Tareas periódicas de mantenimiento (recuperar trabajos abandonados, etc.)
+
+Cada instancia de la aplicación puede ejecutar su propio planificador: las
+tareas registradas deben ser idempotentes y seguras en paralelo (sentencias
+sobre conjuntos con ``FOR UPDATE SKIP LOCKED`` en lugar de leer y escribir
+fila a fila), así que no hace falta elegir un líder entre instancias.
+"""
+import logging
+import threading
+import time
+from contextlib import nullcontext
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+from flask import has_app_context
+
+from ..config.settings import config
+from ..database.database import db
+from .queue import get_job_queue
+
+logger = logging.getLogger(__name__)
+
+# Tarea que devuelve a la cola los trabajos con el alquiler caducado
+RECLAIM_EXPIRED_JOBS_TASK = 'jobs.reclaim_expired'
+
+
+@dataclass
+class _PeriodicTask:
+    func: Callable[[], Any]
+    interval: float
+    next_run: float = 0.0
+
+
+class PeriodicScheduler:
+    """Ejecuta funciones registradas cada cierto intervalo en un hilo de fondo"""
+
+    def __init__(self, tick: float = 1.0):
+        """
+        :param tick: Segundos entre comprobaciones de tareas pendientes
+        """
+        self.tick = tick
+        self._lock = threading.Lock()
+        self._tasks: Dict[str, _PeriodicTask] = {}
+
+    def register(self, name: str, func: Callable[[], Any], interval: float) -> None:
+        """
+        Registra (o sustituye) una tarea periódica
+
+        :param name: Nombre único de la tarea
+        :param func: Función sin argumentos; sus excepciones se registran y no detienen al planificador
+        :param interval: Segundos entre ejecuciones (la primera es inmediata)
+        """
+        with self._lock:
+            self._tasks[name] = _PeriodicTask(func, interval)
+
+    def run_pending(self, now: Optional[float] = None) -> List[str]:
+        """
+        Ejecuta las tareas cuyo intervalo ha vencido
+
+        :param now: Instante de referencia (``time.monotonic()`` por defecto)
+        :return: Nombres de las tareas ejecutadas
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            due = [(name, task) for name, task in self._tasks.items() if task.next_run <= now]
+            for _, task in due:
+                task.next_run = now + task.interval
+
+        for name, task in due:
+            try:
+                result = task.func()
+                if result:
+                    logger.info(f"Tarea periódica {name}: {result}")
+            except Exception as e:
+                logger.error(f"Error en la tarea periódica {name}: {e}")
+            finally:
+                # Cada tarea empieza con una sesión limpia
+                if has_app_context():
+                    db.session.remove()
+        return [name for name, _ in due]
+
+    def run_forever(self, stop_event: threading.Event) -> None:
+        """Ejecuta las tareas pendientes hasta que se active ``stop_event``"""
+        logger.info(f"Planificador de tareas iniciado ({', '.join(sorted(self._tasks))})")
+        while not stop_event.is_set():
+            self.run_pending()
+            stop_event.wait(self.tick)
+        logger.info("Planificador de tareas detenido")
+
+
+# Planificador compartido por el proceso (se crea al primer uso)
+scheduler: Optional[PeriodicScheduler] = None
+
+
+def get_scheduler() -> PeriodicScheduler:
+    """Obtiene el planificador del proceso, con la recuperación de trabajos ya registrada"""
+    global scheduler
+    if scheduler is None:
+        scheduler = PeriodicScheduler()
+        scheduler.register(
+            RECLAIM_EXPIRED_JOBS_TASK,
+            lambda: get_job_queue().reclaim_expired(config.JOB_RECLAIM_BATCH_SIZE),
+            config.JOB_RECLAIM_INTERVAL
+        )
+    return scheduler
+
+
+def start_scheduler(app=None) -> threading.Event:
+    """
+    Arranca el planificador del proceso en un hilo de fondo
+
+    :param app: Aplicación Flask cuyo contexto usarán las tareas
+    :return: Evento para detener el planificador
+    """
+    stop_event = threading.Event()
+
+    def _run():
+        with app.app_context() if app is not None else nullcontext():
+            get_scheduler().run_forever(stop_event)
+
+    threading.Thread(target=_run, name="job-scheduler", daemon=True).start()
+    return stop_event
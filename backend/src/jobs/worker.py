@@ -0,0 +1,182 @@
+"""
+Workers que consumen la cola de trabajos.
+
+Uso como pool de procesos independiente del servidor web:
+
+    python -m src.jobs --processes 4
+"""
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import threading
+from contextlib import nullcontext
+from typing import List, Optional
+
+from flask import current_app, has_app_context
+
+from ..config.settings import config
+from ..database.database import db
+from .brokers import JobRecord
+from .queue import JobQueue, get_job_queue
+from .scheduler import start_scheduler
+
+logger = logging.getLogger(__name__)
+
+
+class JobWorker:
+    """Bucle que reclama y ejecuta trabajos de la cola"""
+
+    def __init__(self, queue: JobQueue, worker_id: Optional[str] = None, poll_interval: float = 1.0,
+                 heartbeat_interval: Optional[float] = None):
+        """
+        :param queue: Cola de trabajos
+        :param worker_id: Identificador del worker (por defecto host:pid:hilo)
+        :param poll_interval: Segundos de espera cuando no hay trabajos disponibles
+        :param heartbeat_interval: Segundos entre renovaciones del alquiler del trabajo
+            en ejecución (por defecto JOB_HEARTBEAT_INTERVAL; 0 = sin latidos)
+        """
+        self.queue = queue
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+        self.poll_interval = poll_interval
+        self.heartbeat_interval = config.JOB_HEARTBEAT_INTERVAL if heartbeat_interval is None else heartbeat_interval
+
+    def run_once(self) -> bool:
+        """
+        Reclama y ejecuta un trabajo
+
+        :return: True si había un trabajo disponible
+        """
+        try:
+            job = self.queue.broker.claim(self.worker_id)
+            if job is None:
+                return False
+
+            logger.info(f"Worker {self.worker_id} ejecutando {job.job_type} {job.id} (intento {job.attempts})")
+            stop_heartbeat = self._start_heartbeat(job)
+            try:
+                self.queue.execute(job)
+            finally:
+                stop_heartbeat.set()
+            return True
+
+        finally:
+            # Cada trabajo empieza con una sesión limpia
+            db.session.remove()
+
+    def _start_heartbeat(self, job: JobRecord) -> threading.Event:
+        """
+        Renueva el alquiler del trabajo en un hilo aparte mientras se ejecuta
+
+        :return: Evento que detiene los latidos
+        """
+        stop_event = threading.Event()
+        if not self.heartbeat_interval:
+            return stop_event
+
+        # El hilo necesita su propio contexto (y por tanto su propia sesión de BD)
+        app = current_app._get_current_object() if has_app_context() else None
+
+        def _beat():
+            with app.app_context() if app is not None else nullcontext():
+                try:
+                    while not stop_event.wait(self.heartbeat_interval):
+                        try:
+                            if not self.queue.broker.heartbeat(job.id, self.worker_id):
+                                logger.warning(f"Worker {self.worker_id} perdió el alquiler de {job.job_type} {job.id}")
+                                return
+                        except Exception as e:
+                            logger.error(f"Error renovando el alquiler de {job.id}: {e}")
+                finally:
+                    if app is not None:
+                        db.session.remove()
+
+        threading.Thread(target=_beat, name=f"job-heartbeat-{job.id}", daemon=True).start()
+        return stop_event
+
+    def run_forever(self, stop_event: threading.Event) -> None:
+        """Procesa trabajos hasta que se active ``stop_event``"""
+        logger.info(f"Worker {self.worker_id} iniciado")
+
+        while not stop_event.is_set():
+            try:
+                if not self.run_once():
+                    stop_event.wait(self.poll_interval)
+            except Exception as e:
+                logger.error(f"Error en worker {self.worker_id}: {e}")
+                stop_event.wait(self.poll_interval)
+
+        logger.info(f"Worker {self.worker_id} detenido")
+
+
+def start_in_process_workers(app, count: int) -> threading.Event:
+    """
+    Arranca workers en hilos del propio proceso web (útil con el broker 'memory')
+
+    :param app: Aplicación Flask cuyo contexto usarán los workers
+    :param count: Número de hilos
+    :return: Evento para detener los workers
+    """
+    stop_event = threading.Event()
+
+    def _run():
+        with app.app_context():
+            JobWorker(get_job_queue(), poll_interval=config.JOB_POLL_INTERVAL).run_forever(stop_event)
+
+    for index in range(count):
+        threading.Thread(target=_run, name=f"job-worker-{index}", daemon=True).start()
+
+    logger.info(f"{count} workers de trabajos arrancados en el proceso web")
+    return stop_event
+
+
+def _worker_process_main(run_scheduler: bool = False) -> None:
+    """
+    Punto de entrada de cada proceso del pool
+
+    :param run_scheduler: Ejecutar también las tareas periódicas (uno de los procesos)
+    """
+    from ..main import create_app
+
+    stop_event = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop_event.set())
+    signal.signal(signal.SIGINT, lambda *_: stop_event.set())
+
+    app = create_app(start_job_workers=False)
+    if run_scheduler and config.SCHEDULER_ENABLED:
+        scheduler_stop = start_scheduler(app)
+        signal.signal(signal.SIGTERM, lambda *_: (stop_event.set(), scheduler_stop.set()))
+        signal.signal(signal.SIGINT, lambda *_: (stop_event.set(), scheduler_stop.set()))
+
+    with app.app_context():
+        JobWorker(get_job_queue(), poll_interval=config.JOB_POLL_INTERVAL).run_forever(stop_event)
+
+
+def run_worker_pool(processes: int) -> None:
+    """
+    Lanza un pool de procesos worker y espera a que terminen
+
+    :param processes: Número de procesos
+    """
+    if config.JOB_BROKER == 'memory':
+        raise ValueError("El broker 'memory' no se puede compartir entre procesos; usa 'database' o 'redis'")
+
+    workers: List[multiprocessing.Process] = [
+        multiprocessing.Process(target=_worker_process_main, args=(index == 0,), name=f"job-worker-{index}")
+        for index in range(processes)
+    ]
+    for process in workers:
+        process.start()
+
+    def _terminate(*_):
+        for process in workers:
+            if process.is_alive():
+                process.terminate()
+
+    signal.signal(signal.SIGTERM, _terminate)
+    signal.signal(signal.SIGINT, _terminate)
+
+    for process in workers:
+        process.join()
+
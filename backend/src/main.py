@@ -8,28 +8,42 @@ from src.database.database import db
 from src.auth.jwt_manager import jwt, init_jwt
 from src.routes.auth_routes import auth_bp
 from src.routes.assignment_routes import assignment_bp, init_assignment_service
+from src.routes.correction_routes import correction_bp
+from src.routes.metrics_routes import instrument_blueprints, metrics_bp
+from src.jobs import start_in_process_workers, start_scheduler
+from src.services.upload_ingestion import UploadRequest
 
 # Configurar logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def create_app():
-    """Factory function para crear la aplicación Flask"""
+def create_app(start_job_workers: bool = True):
+    """
+    Factory function para crear la aplicación Flask
+    
+    :param start_job_workers: Arrancar workers de trabajos dentro del proceso web
+        (solo si JOB_IN_PROCESS_WORKERS > 0 o el broker es 'memory') y el
+        planificador de tareas periódicas (si SCHEDULER_ENABLED)
+    """
     app = Flask(__name__)
+    # Las subidas se reciben en un temporal que calcula su hash al vuelo
+    app.request_class = UploadRequest
     
     # Configuración
     app.config.update({
         'SQLALCHEMY_DATABASE_URI': config.SQLALCHEMY_DATABASE_URI,
         'SQLALCHEMY_TRACK_MODIFICATIONS': config.SQLALCHEMY_TRACK_MODIFICATIONS,
         'JWT_SECRET_KEY': config.JWT_SECRET_KEY,
-        'SECRET_KEY': config.SECRET_KEY
+        'SECRET_KEY': config.SECRET_KEY,
+        # Werkzeug rechaza el cuerpo antes de leerlo si Content-Length lo supera
+        'MAX_CONTENT_LENGTH': config.MAX_CONTENT_LENGTH
     })
     
     # CORS - Configuración más permisiva para desarrollo
     CORS(app, 
          origins=["http://localhost:3000", "http://localhost:3001", "http://localhost:5173", "http://localhost:5174", "http://127.0.0.1:3000", "http://127.0.0.1:3001", "http://127.0.0.1:5173", "http://127.0.0.1:5174"],
          methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-         allow_headers=["Content-Type", "Authorization", "X-Requested-With", "Accept", "Origin"],
+         allow_headers=["Content-Type", "Authorization", "X-Requested-With", "Accept", "Origin", "X-Chunk-SHA256"],
          supports_credentials=True,
          expose_headers=["Content-Type", "Authorization"])
     
@@ -37,10 +51,9 @@ def create_app():
     db.init_app(app)
     init_jwt(app)  # Inicializar JWT correctamente
     
-    # Crear tablas
-    with app.app_context():
-        db.create_all()
-        logger.info("Base de datos inicializada")
+    # El esquema no se crea al arrancar cada worker: se aplica antes con las
+    # migraciones (``python -m src.cli init-db``)
+    config.ensure_directories()
     
     # Inicializar servicios
     upload_folder = config.UPLOAD_FOLDER
@@ -51,9 +64,25 @@ def create_app():
     
     init_assignment_service(upload_folder, openai_api_key)
     
+    # Workers de la cola de trabajos dentro del proceso web
+    if start_job_workers:
+        in_process_workers = config.JOB_IN_PROCESS_WORKERS
+        if config.JOB_BROKER == 'memory':
+            in_process_workers = max(in_process_workers, 1)
+        if in_process_workers > 0:
+            start_in_process_workers(app, in_process_workers)
+        # Recuperación de trabajos y asignaciones atascadas, limpieza de subidas
+        if config.SCHEDULER_ENABLED:
+            start_scheduler(app)
+    
     # Registrar blueprints
     app.register_blueprint(auth_bp)
     app.register_blueprint(assignment_bp)
+    app.register_blueprint(correction_bp)
+    app.register_blueprint(metrics_bp)
+    
+    # Latencia por ruta en /metrics
+    instrument_blueprints(app, auth_bp, assignment_bp, correction_bp)
     
     # Ruta de salud
     @app.route('/health')
@@ -66,6 +95,10 @@ def create_app():
     def not_found(error):
         return jsonify({'error': 'Endpoint no encontrado'}), 404
     
+    @app.errorhandler(413)
+    def request_too_large(error):
+        return jsonify({'error': 'El archivo supera el tamaño máximo permitido'}), 413
+    
     @app.errorhandler(500)
     def internal_error(error):
         return jsonify({'error': 'Error interno del servidor'}), 500
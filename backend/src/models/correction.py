@@ -1,6 +1,12 @@
 import logging
+import re
 from dataclasses import dataclass, asdict
-from typing import List, Optional
+from typing import Any, Dict, List, Optional, Tuple
+
+# Campos de la respuesta de corrección
+GRADING_FIELDS = ("grade", "comments", "strengths", "areas_of_improvement")
+# Campos de la respuesta de evaluación combinada (nota + detección de IA)
+EVALUATION_FIELDS = GRADING_FIELDS + ("ai_generated_percentage",)
 
 @dataclass
 class CorrectionResult:
@@ -11,6 +17,8 @@ class CorrectionResult:
     comments: str
     strengths: List[str] = None
     areas_of_improvement: List[str] = None
+    details: Optional[List[Dict[str, Any]]] = None  # Resultados por ejercicio/fragmento (corrección por partes)
+    error: bool = False  # La nota no viene del modelo: la evaluación falló (ver default_error_result)
     
     def __post_init__(self):
         """
@@ -31,12 +39,15 @@ class CorrectionResult:
         
         :return: Diccionario con los datos de corrección
         """
-        return {
+        result = {
             'grade': round(self.grade, 2),
             'comments': self.comments,
             'strengths': self.strengths,
             'areas_of_improvement': self.areas_of_improvement
         }
+        if self.details is not None:
+            result['details'] = self.details
+        return result
     
     @classmethod
     def default_error_result(cls, error_message: str = "Error en evaluación"):
@@ -44,11 +55,12 @@ class CorrectionResult:
         Crear un resultado de corrección por defecto en caso de error
         
         :param error_message: Mensaje de error personalizado
-        :return: Instancia de CorrectionResult con calificación 0
+        :return: Instancia de CorrectionResult con calificación 0 marcada como error
         """
         return cls(
             grade=0.0,
-            comments=error_message
+            comments=error_message,
+            error=True
         )
 
     @staticmethod
@@ -66,3 +78,59 @@ class CorrectionResult:
         except Exception as e:
             logging.error(f"Error al convertir la respuesta en CorrectionResult: {e}")
             return CorrectionResult.default_error_result()
+
+
+def _coerce_score(value: Any, upper: float) -> Optional[float]:
+    """Convierte 7, "7.5", "7,5/10" o "85%" en float dentro de [0, upper]"""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        number = float(value)
+    elif isinstance(value, str):
+        match = re.search(r"\d+(?:[.,]\d+)?", value)
+        if not match:
+            return None
+        number = float(match.group().replace(",", "."))
+    else:
+        return None
+    return number if 0.0 <= number <= upper else None
+
+def _coerce_text_list(value: Any) -> Optional[List[str]]:
+    """Acepta una lista o un texto con un elemento por línea o separado por ';'"""
+    if isinstance(value, list):
+        return [str(item).strip() for item in value if str(item).strip()]
+    if isinstance(value, str):
+        return [item.strip(" -•\t") for item in re.split(r"[\n;]", value) if item.strip(" -•\t")]
+    return None
+
+def validate_evaluation_response(response: Dict[str, Any]) -> Tuple[Dict[str, Any], List[str]]:
+    """
+    Valida campo a campo una respuesta de evaluación combinada.
+
+    Los campos válidos (o convertibles) se devuelven normalizados; el resto se
+    omite y se lista como inválido para que el llamador decida cómo suplirlos.
+
+    :param response: Diccionario devuelto por la estrategia del modelo.
+    :return: (campos válidos, nombres de los campos inválidos o ausentes)
+    """
+    values: Dict[str, Any] = {}
+
+    grade = _coerce_score(response.get("grade"), 10.0)
+    if grade is not None:
+        values["grade"] = grade
+
+    comments = response.get("comments")
+    if isinstance(comments, str) and comments.strip():
+        values["comments"] = comments.strip()
+
+    for field in ("strengths", "areas_of_improvement"):
+        items = _coerce_text_list(response.get(field))
+        if items is not None:
+            values[field] = items
+
+    ai_percentage = _coerce_score(response.get("ai_generated_percentage"), 100.0)
+    if ai_percentage is not None:
+        values["ai_generated_percentage"] = ai_percentage
+
+    invalid = [field for field in EVALUATION_FIELDS if field not in values]
+    return values, invalid
@@ -1,27 +1,71 @@
-import ollama
 import logging
 import json
 import re
 import os
 
-from langchain_community.chat_models import ChatOpenAI
-from langchain.prompts.prompt import PromptTemplate
-from typing import Dict, Any
+from typing import Dict, Any, Iterator, Optional, Sequence
 from abc import ABC, abstractmethod
 
+from src.config.settings import config
+from src.services.llm_transport import LLMTransport, get_llm_transport
+from src.utils.streaming_json import IncrementalJSONParser
+
 class ModelStrategy(ABC):
     """Abstract base class for all model strategies."""
+    # Context window (prompt + response) available to the model, in tokens
+    context_tokens: int = 8192
+
     @abstractmethod
-    def evaluate(self, prompt: str) -> Dict[str, Any]:
+    def evaluate(self, prompt: str, required_fields: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+        """
+        Evaluates the prompt and returns the decoded JSON answer.
+
+        When streaming is enabled, generation stops as soon as the JSON object is
+        closed or every field in ``required_fields`` has been received.
+        """
         pass
 
+    @staticmethod
+    def _consume_stream(stream: Iterator[str], required_fields: Optional[Sequence[str]]):
+        """Feeds streamed tokens to an incremental parser, stopping early when possible."""
+        parser = IncrementalJSONParser()
+        parts = []
+        try:
+            for token in stream:
+                parts.append(token)
+                parser.feed(token)
+                if parser.complete or (required_fields and parser.has(required_fields)):
+                    break
+        finally:
+            # Closing the stream drops the connection, so the server stops generating
+            stream.close()
+        done = parser.complete or bool(required_fields and parser.has(required_fields))
+        return parser, "".join(parts), done
+
 class OllamaModelStrategy(ModelStrategy):
-    def evaluate(self, prompt: str) -> Dict[str, Any]:
+    def __init__(self, model: Optional[str] = None, transport: Optional[LLMTransport] = None):
+        """Uses the shared pooled LLM transport unless one is given."""
+        self.model = model or config.OLLAMA_MODEL
+        self.transport = transport or get_llm_transport()
+        self.context_tokens = config.OLLAMA_NUM_CTX
+
+    def evaluate(self, prompt: str, required_fields: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+        messages = [{"role": "user", "content": prompt}]
+        # Ask for an explicit num_ctx: Ollama's default window silently truncates long prompts
+        options = {"num_ctx": self.context_tokens}
         try:
-            response = ollama.chat(model="llama3.2", messages=[{"role": "user", "content": prompt}])
+            if config.LLM_STREAM_RESPONSES:
+                stream = self.transport.ollama_chat_stream(self.model, messages, options=options)
+                parser, content, done = self._consume_stream(stream, required_fields)
+                if done:
+                    return parser.result(salvage=False)
+                return self._parse_response(content)
+
+            response = self.transport.ollama_chat(self.model, messages, options=options)
             content = response.get("message", {}).get("content", "")
             return self._parse_response(content)
         except Exception as e:
+            logging.error(f"Ollama evaluation failed: {e}")
             return {"error": "Failed to evaluate using Ollama."}
 
     def _parse_response(self, content: str) -> Dict[str, Any]:
@@ -37,6 +81,7 @@ class OllamaModelStrategy(ModelStrategy):
             comments_match = re.search(r'"comments":\s*"(.*?)"', content, re.DOTALL)
             strengths_match = re.search(r'"strengths":\s*\[(.*?)\]', content, re.DOTALL)
             improvements_match = re.search(r'"areas_of_improvement":\s*\[(.*?)\]', content, re.DOTALL)
+            ai_match = re.search(r'"ai_generated_percentage":\s*(\d+(\.\d+)?)', content)
 
             # Verificar si las coincidencias existen antes de acceder a group()
             grade = float(grade_match.group(1)) if grade_match else 0.0
@@ -44,31 +89,47 @@ class OllamaModelStrategy(ModelStrategy):
             strengths = json.loads(f"[{strengths_match.group(1)}]") if strengths_match else []
             areas_of_improvement = json.loads(f"[{improvements_match.group(1)}]") if improvements_match else []
 
-            return {
+            result = {
                 "grade": grade,
                 "comments": comments,
                 "strengths": strengths,
                 "areas_of_improvement": areas_of_improvement,
             }
+            if ai_match:
+                result["ai_generated_percentage"] = float(ai_match.group(1))
+            return result
         except Exception as e:
             return {"grade": 0.0, "comments": "Error parsing response."}
         
 class OpenAIModelStrategy(ModelStrategy):
-    def __init__(self):
+    def __init__(self, model: Optional[str] = None, transport: Optional[LLMTransport] = None):
         """Inicializa la estrategia de OpenAI."""
-        openai_api_key = os.getenv("OPENAI_API_KEY")
-        if not openai_api_key:
+        self.openai_api_key = os.getenv("OPENAI_API_KEY")
+        if not self.openai_api_key:
             raise ValueError("Falta la clave de API de OpenAI en las variables de entorno.")
-        self.llm = ChatOpenAI(
-            temperature=0,
-            model_name="gpt-4",
-            openai_api_key=openai_api_key
-        )
+        self.model = model or config.OPENAI_MODEL
+        self.transport = transport or get_llm_transport()
+        self.context_tokens = config.OPENAI_CONTEXT_TOKENS
 
-    def evaluate(self, prompt: str) -> Dict[str, Any]:
+    def evaluate(self, prompt: str, required_fields: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+        messages = [{"role": "user", "content": prompt}]
         try:
-            response = self.llm.predict(prompt)
-            return json.loads(response)
+            if config.LLM_STREAM_RESPONSES:
+                stream = self.transport.openai_chat_stream(
+                    self.model, messages, api_key=self.openai_api_key, temperature=0
+                )
+                parser, content, done = self._consume_stream(stream, required_fields)
+                if done:
+                    return parser.result(salvage=False)
+                return json.loads(content)
+
+            response = self.transport.openai_chat(
+                self.model,
+                messages,
+                api_key=self.openai_api_key,
+                temperature=0
+            )
+            return json.loads(response["choices"][0]["message"]["content"])
         except json.JSONDecodeError:
             return {"error": "Respuesta JSON inválida de OpenAI."}
         except Exception as e:
@@ -1,12 +1,19 @@
-from flask import Blueprint, request, jsonify, current_app, Response
+from flask import Blueprint, request, jsonify, current_app, send_file
 from flask_cors import cross_origin
+from werkzeug.exceptions import RequestEntityTooLarge
 from werkzeug.utils import secure_filename
+import io
 import os
 import logging
 
 from ..auth.decorators import jwt_required, require_roles
 from ..database.models import UserRole
-from ..services.assignment_service import AssignmentService
+from ..services.assignment_service import AssignmentService, DEFAULT_PAGE_SIZE
+from ..services.chunked_upload_service import ChunkedUploadService, UPLOAD_PURPOSE_ASSIGNMENT, UPLOAD_PURPOSE_SUBMISSIONS
+from ..services.export_service import BulkExportService
+from ..services.extraction_cache import get_extraction_cache
+from ..services.submission_service import SubmissionIngestionService
+from ..services.upload_ingestion import UploadRejected
 
 logger = logging.getLogger(__name__)
 
@@ -15,11 +22,17 @@ assignment_bp = Blueprint('assignments', __name__, url_prefix='/api/assignments'
 
 # Inicializar servicio (se configurará en main.py)
 assignment_service = None
+export_service = None
+chunked_upload_service = None
+submission_service = None
 
 def init_assignment_service(upload_folder: str, openai_api_key: str):
     """Inicializa el servicio de asignaciones"""
-    global assignment_service
+    global assignment_service, export_service, chunked_upload_service, submission_service
     assignment_service = AssignmentService()
+    export_service = BulkExportService()
+    chunked_upload_service = ChunkedUploadService()
+    submission_service = SubmissionIngestionService()
     logger.info("Servicio de asignaciones inicializado")
 
 def _check_service():
@@ -47,6 +60,7 @@ def upload_assignment():
         # Obtener datos del formulario
         title = request.form.get('title', '').strip()
         description = request.form.get('description', '').strip()
+        bypass_cache = request.form.get('bypass_cache', 'false').lower() in ('1', 'true', 'yes')
         
         if not title:
             return jsonify({'error': 'El título es requerido'}), 400
@@ -62,42 +76,252 @@ def upload_assignment():
             file=file,
             title=title,
             description=description,
-            teacher_id=teacher_id
+            teacher_id=teacher_id,
+            bypass_cache=bypass_cache
         )
         
+        # 202 si el análisis con IA sigue en la cola, 201 si se recuperó de caché
         return jsonify({
             'message': 'Asignación creada exitosamente',
             'data': result
-        }), 201
+        }), 202 if result.get('job_id') else 201
         
+    except UploadRejected as e:
+        return jsonify({'error': str(e)}), e.status_code
+    except RequestEntityTooLarge:
+        return jsonify({'error': 'El archivo supera el tamaño máximo permitido'}), 413
     except Exception as e:
         logger.error(f"Error subiendo asignación: {str(e)}")
         return jsonify({'error': 'Error interno del servidor'}), 500
 
+@assignment_bp.route('/uploads', methods=['POST'])
+@cross_origin(supports_credentials=True)
+@jwt_required
+@require_roles([UserRole.TEACHER, UserRole.COORDINATOR, UserRole.ADMIN])
+def create_chunked_upload():
+    """
+    Abre una subida reanudable por partes
+    
+    JSON: ``filename``, ``size``, ``sha256`` (opcional), ``purpose`` y los datos
+    del formulario de ese uso: ``title``, ``description`` y ``bypass_cache``
+    para una tarea, o ``assignment_id``, ``model_type`` y ``language`` para un
+    ZIP de entregas (``purpose=submissions``).
+    """
+    try:
+        _check_service()
+        
+        data = request.get_json(silent=True) or {}
+        purpose = data.get('purpose', UPLOAD_PURPOSE_ASSIGNMENT)
+        if purpose == UPLOAD_PURPOSE_SUBMISSIONS:
+            metadata = {
+                'assignment_id': str(data.get('assignment_id', '')).strip(),
+                'model_type': str(data.get('model_type', 'ollama')),
+                'language': str(data.get('language', 'español'))
+            }
+            if not metadata['assignment_id']:
+                return jsonify({'error': 'Se requiere assignment_id'}), 400
+        else:
+            metadata = {
+                'title': str(data.get('title', '')).strip(),
+                'description': str(data.get('description', '')).strip(),
+                'bypass_cache': bool(data.get('bypass_cache', False))
+            }
+            if purpose == UPLOAD_PURPOSE_ASSIGNMENT and not metadata['title']:
+                return jsonify({'error': 'El título es requerido'}), 400
+        
+        teacher_id = str(request.current_user['id'])
+        session = chunked_upload_service.create_session(
+            teacher_id, data.get('filename', ''), data.get('size'), purpose,
+            sha256=data.get('sha256'), metadata=metadata
+        )
+        return jsonify({'data': session}), 201
+        
+    except UploadRejected as e:
+        return jsonify({'error': str(e)}), e.status_code
+    except Exception as e:
+        logger.error(f"Error abriendo subida por partes: {str(e)}")
+        return jsonify({'error': 'Error interno del servidor'}), 500
+
+@assignment_bp.route('/uploads/<upload_id>', methods=['GET'])
+@cross_origin(supports_credentials=True)
+@jwt_required
+@require_roles([UserRole.TEACHER, UserRole.COORDINATOR, UserRole.ADMIN])
+def get_chunked_upload(upload_id: str):
+    """Estado de una subida por partes (``offset`` desde el que reanudarla)"""
+    try:
+        _check_service()
+        
+        session = chunked_upload_service.get_session(upload_id, str(request.current_user['id']))
+        if session is None:
+            return jsonify({'error': 'Subida no encontrada'}), 404
+        return jsonify({'data': session}), 200
+        
+    except Exception as e:
+        logger.error(f"Error obteniendo subida {upload_id}: {str(e)}")
+        return jsonify({'error': 'Error interno del servidor'}), 500
+
+@assignment_bp.route('/uploads/<upload_id>', methods=['PUT'])
+@cross_origin(supports_credentials=True)
+@jwt_required
+@require_roles([UserRole.TEACHER, UserRole.COORDINATOR, UserRole.ADMIN])
+def put_upload_chunk(upload_id: str):
+    """Recibe una parte (cuerpo binario) en ``offset`` con su hash en ``X-Chunk-SHA256``"""
+    teacher_id = str(request.current_user['id'])
+    try:
+        _check_service()
+        
+        offset = request.args.get('offset', type=int)
+        if offset is None or offset < 0:
+            return jsonify({'error': 'Se requiere el parámetro offset'}), 400
+        
+        session = chunked_upload_service.write_chunk(
+            upload_id, teacher_id, offset, request.stream, request.headers.get('X-Chunk-SHA256', '')
+        )
+        if session is None:
+            return jsonify({'error': 'Subida no encontrada'}), 404
+        return jsonify({'data': session}), 200
+        
+    except UploadRejected as e:
+        body = {'error': str(e)}
+        if e.status_code == 409:
+            # El cliente reanuda desde el offset que ya tiene el servidor
+            session = chunked_upload_service.get_session(upload_id, teacher_id)
+            body['offset'] = session['offset'] if session else None
+        return jsonify(body), e.status_code
+    except RequestEntityTooLarge:
+        return jsonify({'error': 'La parte supera el tamaño máximo permitido'}), 413
+    except Exception as e:
+        logger.error(f"Error recibiendo parte de la subida {upload_id}: {str(e)}")
+        return jsonify({'error': 'Error interno del servidor'}), 500
+
+@assignment_bp.route('/uploads/<upload_id>/complete', methods=['POST'])
+@cross_origin(supports_credentials=True)
+@jwt_required
+@require_roles([UserRole.TEACHER, UserRole.COORDINATOR, UserRole.ADMIN])
+def complete_chunked_upload(upload_id: str):
+    """Termina una subida por partes y procesa el archivo como una subida normal"""
+    try:
+        _check_service()
+        
+        teacher_id = str(request.current_user['id'])
+        completed = chunked_upload_service.complete(upload_id, teacher_id)
+        if completed is None:
+            return jsonify({'error': 'Subida no encontrada'}), 404
+        session, upload = completed
+        
+        try:
+            metadata = session['metadata']
+            if session['purpose'] == UPLOAD_PURPOSE_SUBMISSIONS:
+                try:
+                    result = submission_service.ingest_archive(
+                        metadata['assignment_id'], teacher_id, upload.stream,
+                        model_type=metadata['model_type'], language=metadata['language']
+                    )
+                finally:
+                    upload.close()
+                if result is None:
+                    return jsonify({'error': 'Asignación no encontrada'}), 404
+                return jsonify({'message': 'Entregas recibidas', 'data': result}), 201
+            
+            result = assignment_service.create_assignment_from_upload(
+                upload, metadata['title'], metadata['description'], teacher_id,
+                bypass_cache=metadata['bypass_cache']
+            )
+        finally:
+            chunked_upload_service.discard(upload_id)
+        
+        return jsonify({
+            'message': 'Asignación creada exitosamente',
+            'data': result
+        }), 202 if result.get('job_id') else 201
+        
+    except UploadRejected as e:
+        return jsonify({'error': str(e)}), e.status_code
+    except Exception as e:
+        logger.error(f"Error completando subida {upload_id}: {str(e)}")
+        return jsonify({'error': 'Error interno del servidor'}), 500
+
 @assignment_bp.route('', methods=['GET'])
 @assignment_bp.route('/', methods=['GET'])
 @cross_origin(supports_credentials=True)
 @jwt_required
 @require_roles([UserRole.TEACHER, UserRole.COORDINATOR, UserRole.ADMIN])
 def get_assignments():
-    """Obtiene todas las asignaciones del profesor"""
+    """
+    Lista las asignaciones del profesor por páginas
+    
+    Parámetros: ``limit``, ``cursor`` (``next_cursor`` de la página anterior),
+    ``status`` y ``fields`` (columnas pesadas separadas por comas, p. ej.
+    ``fields=final_rubric,final_solutions``).
+    """
     try:
         _check_service()
         
         current_user = request.current_user
         teacher_id = str(current_user['id'])
         
-        assignments = assignment_service.get_teacher_assignments(teacher_id)
+        fields = [field.strip() for field in request.args.get('fields', '').split(',') if field.strip()]
+        try:
+            page = assignment_service.list_teacher_assignments(
+                teacher_id,
+                limit=request.args.get('limit', DEFAULT_PAGE_SIZE, type=int),
+                cursor=request.args.get('cursor'),
+                fields=fields,
+                status=request.args.get('status')
+            )
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
         return jsonify({
             'message': 'Asignaciones obtenidas exitosamente',
-            'data': assignments
+            'data': page['items'],
+            'pagination': {
+                'next_cursor': page['next_cursor'],
+                'has_more': page['has_more']
+            }
         }), 200
         
     except Exception as e:
         logger.error(f"Error obteniendo asignaciones: {str(e)}")
         return jsonify({'error': 'Error interno del servidor'}), 500
 
+@assignment_bp.route('/count', methods=['GET'])
+@cross_origin(supports_credentials=True)
+@jwt_required
+@require_roles([UserRole.TEACHER, UserRole.COORDINATOR, UserRole.ADMIN])
+def count_assignments():
+    """Número total de asignaciones del profesor y desglose por estado"""
+    try:
+        _check_service()
+        
+        teacher_id = str(request.current_user['id'])
+        counts = assignment_service.count_teacher_assignments(teacher_id)
+        
+        return jsonify({
+            'message': 'Conteo obtenido exitosamente',
+            'data': counts
+        }), 200
+        
+    except Exception as e:
+        logger.error(f"Error contando asignaciones: {str(e)}")
+        return jsonify({'error': 'Error interno del servidor'}), 500
+
+@assignment_bp.route('/extraction-cache', methods=['GET'])
+@cross_origin(supports_credentials=True)
+@jwt_required
+@require_roles([UserRole.ADMIN])
+def extraction_cache_stats():
+    """Estadísticas de la caché de extracción de archivos (tasa de aciertos de este proceso)"""
+    try:
+        cache = get_extraction_cache()
+        if cache is None:
+            return jsonify({'enabled': False}), 200
+        return jsonify({'enabled': True, 'data': cache.stats()}), 200
+        
+    except Exception as e:
+        logger.error(f"Error obteniendo estadísticas de la caché de extracción: {str(e)}")
+        return jsonify({'error': 'Error interno del servidor'}), 500
+
 @assignment_bp.route('/<assignment_id>', methods=['GET'])
 @cross_origin(supports_credentials=True)
 @jwt_required
@@ -141,7 +365,10 @@ def update_solutions(assignment_id):
         current_user = request.current_user
         teacher_id = str(current_user['id'])
         
-        result = assignment_service.update_solutions(assignment_id, data['solutions'], teacher_id)
+        result = assignment_service.update_assignment_solutions(assignment_id, teacher_id, data['solutions'])
+        
+        if 'error' in result:
+            return jsonify(result), 404
         
         return jsonify({
             'message': 'Soluciones actualizadas exitosamente',
@@ -169,7 +396,10 @@ def update_rubric(assignment_id):
         current_user = request.current_user
         teacher_id = str(current_user['id'])
         
-        result = assignment_service.update_rubric(assignment_id, data['rubric'], teacher_id)
+        result = assignment_service.update_assignment_rubric(assignment_id, teacher_id, data['rubric'])
+        
+        if 'error' in result:
+            return jsonify(result), 404
         
         return jsonify({
             'message': 'Rúbrica actualizada exitosamente',
@@ -208,7 +438,7 @@ def finalize_assignment(assignment_id):
 @jwt_required
 @require_roles([UserRole.ADMIN])
 def check_stuck_assignments():
-    """Verifica y marca como error las asignaciones bloqueadas"""
+    """Vuelve a encolar ya las asignaciones bloqueadas (el planificador lo hace periódicamente)"""
     try:
         count = assignment_service.check_stuck_assignments()
         return jsonify({
@@ -241,6 +471,24 @@ def delete_assignment(assignment_id: str):
         logger.error(f"Error eliminando asignación {assignment_id}: {str(e)}")
         return jsonify({'error': 'Error interno del servidor'}), 500
 
+def _send_pdf(pdf_data):
+    """
+    Envía un PDF con ETag: si el cliente ya lo tiene responde 304 y, si está en
+    la caché de disco, el servidor WSGI lo envía directamente desde el archivo
+    """
+    source = pdf_data.get('path') or io.BytesIO(pdf_data['pdf_content'])
+    response = send_file(
+        source,
+        mimetype='application/pdf',
+        as_attachment=True,
+        download_name=pdf_data['filename'],
+        etag=pdf_data['etag'],
+        conditional=True,
+        max_age=0
+    )
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
 @assignment_bp.route('/<assignment_id>/download-rubric', methods=['GET'])
 @cross_origin(supports_credentials=True)
 @jwt_required
@@ -256,13 +504,7 @@ def download_rubric(assignment_id: str):
         if 'error' in pdf_data:
             return jsonify(pdf_data), 404
             
-        return Response(
-            pdf_data['pdf_content'],
-            mimetype='application/pdf',
-            headers={
-                'Content-Disposition': f'attachment; filename="{pdf_data["filename"]}"'
-            }
-        )
+        return _send_pdf(pdf_data)
         
     except Exception as e:
         logger.error(f"Error generando PDF de rúbrica {assignment_id}: {str(e)}")
@@ -283,14 +525,180 @@ def download_solutions(assignment_id: str):
         if 'error' in pdf_data:
             return jsonify(pdf_data), 404
             
-        return Response(
-            pdf_data['pdf_content'],
-            mimetype='application/pdf',
-            headers={
-                'Content-Disposition': f'attachment; filename="{pdf_data["filename"]}"'
-            }
-        )
+        return _send_pdf(pdf_data)
         
     except Exception as e:
         logger.error(f"Error generando PDF de soluciones {assignment_id}: {str(e)}")
         return jsonify({'error': 'Error interno del servidor'}), 500
+
+@assignment_bp.route('/<assignment_id>/submissions', methods=['POST'])
+@cross_origin(supports_credentials=True)
+@jwt_required
+@require_roles([UserRole.TEACHER, UserRole.COORDINATOR, UserRole.ADMIN])
+def upload_submissions(assignment_id: str):
+    """
+    Da de alta las entregas de los estudiantes y encola su corrección
+    
+    Formulario: un ZIP en ``archive`` o los archivos de una carpeta en
+    ``files`` (con su ruta relativa como nombre), más ``model_type`` y
+    ``language``. Los ZIP mayores que ``MAX_CONTENT_LENGTH`` se suben por
+    partes con ``purpose=submissions``.
+    """
+    try:
+        _check_service()
+        
+        teacher_id = str(request.current_user['id'])
+        model_type = request.form.get('model_type', 'ollama')
+        language = request.form.get('language', 'español')
+        
+        files = [file for file in request.files.getlist('files') if file.filename]
+        if 'archive' in request.files and request.files['archive'].filename:
+            result = submission_service.ingest_archive(
+                assignment_id, teacher_id, request.files['archive'].stream, model_type=model_type, language=language
+            )
+        elif files:
+            result = submission_service.ingest_files(
+                assignment_id, teacher_id, files, model_type=model_type, language=language
+            )
+        else:
+            return jsonify({'error': 'Se requiere un ZIP (archive) o los archivos de una carpeta (files)'}), 400
+        
+        if result is None:
+            return jsonify({'error': 'Asignación no encontrada'}), 404
+        
+        return jsonify({
+            'message': 'Entregas recibidas',
+            'data': result
+        }), 201
+        
+    except UploadRejected as e:
+        return jsonify({'error': str(e)}), e.status_code
+    except RequestEntityTooLarge:
+        return jsonify({'error': 'El envío supera el tamaño máximo permitido'}), 413
+    except Exception as e:
+        logger.error(f"Error recibiendo entregas de {assignment_id}: {str(e)}")
+        return jsonify({'error': 'Error interno del servidor'}), 500
+
+@assignment_bp.route('/<assignment_id>/exports', methods=['POST'])
+@cross_origin(supports_credentials=True)
+@jwt_required
+@require_roles([UserRole.TEACHER, UserRole.COORDINATOR, UserRole.ADMIN])
+def start_export(assignment_id: str):
+    """Inicia la exportación en ZIP de los PDF de todas las correcciones"""
+    try:
+        _check_service()
+        
+        teacher_id = str(request.current_user['id'])
+        result = export_service.start_export(assignment_id, teacher_id)
+        
+        if 'error' in result:
+            return jsonify(result), 404
+        
+        return jsonify({
+            'message': 'Exportación iniciada',
+            'data': result
+        }), 202
+        
+    except Exception as e:
+        logger.error(f"Error iniciando exportación de {assignment_id}: {str(e)}")
+        return jsonify({'error': 'Error interno del servidor'}), 500
+
+@assignment_bp.route('/exports/<export_id>', methods=['GET'])
+@cross_origin(supports_credentials=True)
+@jwt_required
+@require_roles([UserRole.TEACHER, UserRole.COORDINATOR, UserRole.ADMIN])
+def get_export(export_id: str):
+    """Estado y progreso de una exportación"""
+    try:
+        _check_service()
+        
+        teacher_id = str(request.current_user['id'])
+        status = export_service.get_export(export_id, teacher_id)
+        
+        if status is None:
+            return jsonify({'error': 'Exportación no encontrada'}), 404
+        
+        return jsonify({'data': status}), 200
+        
+    except Exception as e:
+        logger.error(f"Error obteniendo exportación {export_id}: {str(e)}")
+        return jsonify({'error': 'Error interno del servidor'}), 500
+
+@assignment_bp.route('/exports/<export_id>/download', methods=['GET'])
+@cross_origin(supports_credentials=True)
+@jwt_required
+@require_roles([UserRole.TEACHER, UserRole.COORDINATOR, UserRole.ADMIN])
+def download_export(export_id: str):
+    """Descarga el ZIP de una exportación terminada"""
+    try:
+        _check_service()
+        
+        teacher_id = str(request.current_user['id'])
+        export_file = export_service.get_export_file(export_id, teacher_id)
+        
+        if 'error' in export_file:
+            return jsonify(export_file), 409 if 'status' in export_file else 404
+        
+        return send_file(
+            export_file['path'],
+            mimetype='application/zip',
+            as_attachment=True,
+            download_name=export_file['filename'],
+            conditional=True
+        )
+        
+    except Exception as e:
+        logger.error(f"Error descargando exportación {export_id}: {str(e)}")
+        return jsonify({'error': 'Error interno del servidor'}), 500
+
+@assignment_bp.route('/<assignment_id>/similarity/submissions', methods=['POST'])
+@cross_origin(supports_credentials=True)
+@jwt_required
+@require_roles([UserRole.TEACHER, UserRole.COORDINATOR, UserRole.ADMIN])
+def index_submission(assignment_id: str):
+    """Añade una entrega al índice de plagio y devuelve las entregas parecidas"""
+    try:
+        _check_service()
+        
+        data = request.get_json()
+        if not data or not data.get('submission_key') or not isinstance(data.get('content'), str):
+            return jsonify({'error': 'Se requieren submission_key y content'}), 400
+        
+        teacher_id = str(request.current_user['id'])
+        if not assignment_service.owns_assignment(assignment_id, teacher_id):
+            return jsonify({'error': 'Asignación no encontrada'}), 404
+        
+        from ..services.similarity_service import get_similarity_service  # numpy, al primer uso
+        result = get_similarity_service().add_submission(assignment_id, str(data['submission_key']), data['content'])
+        return jsonify({'data': result}), 201
+        
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 409
+    except Exception as e:
+        logger.error(f"Error indexando entrega de {assignment_id}: {str(e)}")
+        return jsonify({'error': 'Error interno del servidor'}), 500
+
+@assignment_bp.route('/<assignment_id>/similarity', methods=['GET'])
+@cross_origin(supports_credentials=True)
+@jwt_required
+@require_roles([UserRole.TEACHER, UserRole.COORDINATOR, UserRole.ADMIN])
+def get_similar_submissions(assignment_id: str):
+    """Pares de entregas parecidas de una asignación (``threshold`` entre 0 y 1)"""
+    try:
+        _check_service()
+        
+        threshold = request.args.get('threshold', type=float)
+        if threshold is not None and not 0 < threshold <= 1:
+            return jsonify({'error': 'threshold debe estar entre 0 y 1'}), 400
+        
+        teacher_id = str(request.current_user['id'])
+        if not assignment_service.owns_assignment(assignment_id, teacher_id):
+            return jsonify({'error': 'Asignación no encontrada'}), 404
+        
+        from ..services.similarity_service import get_similarity_service
+        pairs = get_similarity_service().find_similar_pairs(assignment_id, threshold)
+        return jsonify({'data': pairs, 'total': len(pairs)}), 200
+        
+    except Exception as e:
+        logger.error(f"Error buscando entregas parecidas de {assignment_id}: {str(e)}")
+        return jsonify({'error': 'Error interno del servidor'}), 500
@@ -2,7 +2,7 @@ from flask import Blueprint, request, jsonify
 from flask_cors import cross_origin
 import logging
 
-from src.auth.decorators import jwt_required, validate_json_request
+from src.auth.decorators import jwt_required, admin_required, validate_json_request
 from src.auth.services import AuthService
 
 logger = logging.getLogger(__name__)
@@ -58,7 +58,8 @@ def login(data):
 def get_profile():
     """Obtiene el perfil del usuario actual"""
     try:
-        current_user = request.current_user
+        current_user = dict(request.current_user)
+        current_user['role'] = current_user['role'].value
         return jsonify({
             'message': 'Perfil obtenido exitosamente',
             'user': current_user
@@ -93,3 +94,41 @@ def logout():
     except Exception as e:
         logger.error(f"Error en logout: {str(e)}")
         return jsonify({'error': 'Error interno del servidor'}), 500
+
+@auth_bp.route('/users/<user_id>/role', methods=['PUT'])
+@cross_origin()
+@admin_required
+@validate_json_request(['role'])
+def update_user_role(data, user_id):
+    """Cambia el rol de un usuario (solo administradores)"""
+    try:
+        user = AuthService.update_user_role(user_id, data['role'])
+        return jsonify({
+            'message': 'Rol actualizado exitosamente',
+            'user': user
+        }), 200
+        
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error actualizando rol: {str(e)}")
+        return jsonify({'error': 'Error interno del servidor'}), 500
+
+@auth_bp.route('/users/<user_id>/active', methods=['PUT'])
+@cross_origin()
+@admin_required
+@validate_json_request(['is_active'])
+def set_user_active(data, user_id):
+    """Activa o desactiva un usuario (solo administradores)"""
+    try:
+        user = AuthService.set_user_active(user_id, data['is_active'])
+        return jsonify({
+            'message': 'Estado del usuario actualizado exitosamente',
+            'user': user
+        }), 200
+        
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error actualizando estado del usuario: {str(e)}")
+        return jsonify({'error': 'Error interno del servidor'}), 500
@@ -0,0 +1,96 @@
+from flask import Blueprint, request, jsonify, Response, stream_with_context
+from flask_cors import cross_origin
+import json
+import logging
+import time
+
+from ..auth.decorators import jwt_required, require_roles
+from ..database.models import UserRole
+from ..services.concurrency_limiter import get_ollama_limiter
+from ..services.correction_service import CorrectionService
+from ..services.llm_transport import transport_metrics
+
+logger = logging.getLogger(__name__)
+
+# Crear blueprint
+correction_bp = Blueprint('corrections', __name__, url_prefix='/api/corrections')
+
+@correction_bp.route('/batch/stream', methods=['POST'])
+@cross_origin(supports_credentials=True)
+@jwt_required
+@require_roles([UserRole.TEACHER, UserRole.COORDINATOR, UserRole.ADMIN])
+def stream_batch_correction():
+    """
+    Corrige un lote de tareas y envía cada resultado en cuanto está listo.
+
+    Por defecto responde en NDJSON (un objeto JSON por línea); con
+    ``Accept: text/event-stream`` o ``?format=sse`` usa Server-Sent Events.
+    """
+    try:
+        data = request.get_json()
+
+        if not data or not isinstance(data.get('assignments'), list) or not data['assignments']:
+            return jsonify({'error': 'Se requiere una lista de tareas'}), 400
+
+        if not all(isinstance(assignment, str) for assignment in data['assignments']):
+            return jsonify({'error': 'Cada tarea debe ser texto'}), 400
+
+        model_type = data.get('model_type', 'ollama')
+        key_criteria = data.get('key_criteria')
+        language = data.get('language', 'español')
+        assignments = data['assignments']
+
+        use_sse = (
+            request.args.get('format') == 'sse' or
+            'text/event-stream' in request.headers.get('Accept', '')
+        )
+
+        def _encode(event: str, payload: dict) -> str:
+            body = json.dumps(payload, ensure_ascii=False)
+            if use_sse:
+                return f"event: {event}\ndata: {body}\n\n"
+            return body + "\n"
+
+        def generate():
+            start = time.perf_counter()
+            results = CorrectionService.stream_batch_correction(model_type, key_criteria, assignments, language)
+            try:
+                for item in results:
+                    yield _encode('result', item.to_dict())
+                yield _encode('done', {
+                    'done': True,
+                    'total': len(assignments),
+                    'elapsed': round(time.perf_counter() - start, 3)
+                })
+            finally:
+                # Cancela las correcciones pendientes si el cliente se desconecta
+                results.close()
+
+        logger.info(f"Corrección en streaming de {len(assignments)} tareas con {model_type}")
+
+        return Response(
+            stream_with_context(generate()),
+            mimetype='text/event-stream' if use_sse else 'application/x-ndjson',
+            headers={
+                'Cache-Control': 'no-cache',
+                'X-Accel-Buffering': 'no'  # Evita que nginx acumule la respuesta
+            }
+        )
+
+    except Exception as e:
+        logger.error(f"Error en corrección en streaming: {str(e)}")
+        return jsonify({'error': 'Error interno del servidor'}), 500
+
+@correction_bp.route('/status', methods=['GET'])
+@cross_origin(supports_credentials=True)
+@jwt_required
+@require_roles([UserRole.COORDINATOR, UserRole.ADMIN])
+def correction_status():
+    """
+    Estado de los backends de corrección: límite de concurrencia adaptativo de
+    Ollama (límite, cola y latencias p50/p95) y reutilización de conexiones.
+    """
+    return jsonify({
+        'ollama_limiter': get_ollama_limiter().snapshot(),
+        'transport': transport_metrics.snapshot()
+    }), 200
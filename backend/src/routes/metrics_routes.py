@@ -0,0 +1,70 @@
+"""
+Ruta /metrics (formato de texto de Prometheus) y latencia de las rutas HTTP
+"""
+import hmac
+import logging
+import time
+
+from flask import Blueprint, Response, g, jsonify, request
+
+from ..config.settings import config
+from ..utils.metrics import HTTP_BUCKETS, REGISTRY, Histogram
+
+logger = logging.getLogger(__name__)
+
+metrics_bp = Blueprint('metrics', __name__)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# La etiqueta ``route`` es la plantilla de la ruta (/api/assignments/<assignment_id>),
+# no la URL, para que el número de series no crezca con los identificadores
+HTTP_REQUEST_DURATION = Histogram(
+    'http_request_duration_seconds', "Latencia de las peticiones HTTP por ruta",
+    ['method', 'route', 'status'], buckets=HTTP_BUCKETS
+)
+
+
+def instrument_blueprints(app, *blueprints) -> None:
+    """
+    Mide la latencia de las peticiones que atienden ``blueprints``
+
+    En respuestas en streaming se mide hasta el envío de las cabeceras.
+    """
+    names = frozenset(blueprint.name for blueprint in blueprints)
+
+    @app.before_request
+    def _start_timer():
+        if request.blueprint in names:
+            g.metrics_start = time.perf_counter()
+
+    @app.after_request
+    def _observe_request(response):
+        start = g.pop('metrics_start', None)
+        if start is not None:
+            route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+            HTTP_REQUEST_DURATION.labels(request.method, route, str(response.status_code)).observe(
+                time.perf_counter() - start
+            )
+        return response
+
+
+def _authorized() -> bool:
+    if not config.METRICS_TOKEN:
+        return True
+    received = request.headers.get('Authorization', '').encode()
+    return hmac.compare_digest(received, f"Bearer {config.METRICS_TOKEN}".encode())
+
+
+@metrics_bp.route('/metrics', methods=['GET'])
+def metrics():
+    """Métricas del proceso para Prometheus"""
+    if not config.METRICS_ENABLED:
+        return jsonify({'error': 'Endpoint no encontrado'}), 404
+    if not _authorized():
+        return jsonify({'error': 'No autorizado'}), 401
+
+    try:
+        return Response(REGISTRY.render(), content_type=CONTENT_TYPE)
+    except Exception as e:
+        logger.error(f"Error generando métricas: {str(e)}")
+        return jsonify({'error': 'Error interno del servidor'}), 500
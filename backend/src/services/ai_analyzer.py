@@ -1,70 +1,168 @@
 import json
 import logging
 from typing import Dict, List, Any, Optional
-import openai
 from datetime import datetime
 
+from ..config.settings import config
+from ..utils.streaming_json import IncrementalJSONParser
+from ..utils.tracing import child_span
+from .analysis_cache import AnalysisCache
+from .llm_transport import LLMTransport, get_llm_transport
+
 logger = logging.getLogger(__name__)
 
 class AIAnalyzer:
     """Servicio para analizar actividades con IA y generar soluciones y rúbricas"""
     
-    def __init__(self, api_key: str):
-        self.client = openai.OpenAI(api_key=api_key)
+    # Incrementar al cambiar los prompts para invalidar la caché de análisis
+    PROMPT_VERSION = "1"
+    
+    # Campos de la respuesta sin los que el análisis no sirve
+    REQUIRED_FIELDS = ("solutions", "rubric")
+    
+    def __init__(self, api_key: str, cache: Optional[AnalysisCache] = None, transport: Optional[LLMTransport] = None):
+        self.api_key = api_key
+        self.transport = transport or get_llm_transport()
         self.model = "gpt-4o-mini"
+        self.cache = cache
     
-    def analyze_assignment(self, extracted_content: Dict[str, Any]) -> Dict[str, Any]:
+    def get_cached_analysis(self, extracted_content: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Busca un análisis previo del mismo contenido sin llamar a la IA
+        
+        Args:
+            extracted_content: Contenido extraído del archivo
+            
+        Returns:
+            Dict con el análisis cacheado (ai_metadata.cache_hit = True) o None
+        """
+        if self.cache is None:
+            return None
+        
+        cache_key = AnalysisCache.build_key(extracted_content, self.model, self.PROMPT_VERSION)
+        cached = self.cache.get(cache_key)
+        if cached is None:
+            return None
+        
+        logger.info(f"Análisis obtenido de caché: {cache_key[:12]}")
+        metadata = cached.get("ai_metadata", {})
+        cached["ai_metadata"] = {
+            **metadata,
+            "cache_hit": True,
+            "cache_key": cache_key,
+            "originally_analyzed_at": metadata.get("analyzed_at"),
+            "analyzed_at": datetime.utcnow().isoformat()
+        }
+        return cached
+    
+    def analyze_assignment(self, extracted_content: Dict[str, Any], bypass_cache: bool = False) -> Dict[str, Any]:
         """
         Analiza una actividad y genera soluciones y rúbrica
         
         Args:
             extracted_content: Contenido extraído del archivo
+            bypass_cache: Ignorar la caché y forzar una nueva llamada a la IA
             
         Returns:
             Dict con soluciones y rúbrica generadas por IA
         """
+        with child_span('ai.analyze', {'llm.model': self.model}) as span:
+            analysis_result = self._analyze_assignment(extracted_content, bypass_cache)
+            metadata = analysis_result.get("ai_metadata") or {}
+            span.set_attribute('cache.hit', bool(metadata.get("cache_hit")))
+            span.set_attribute('llm.total_tokens', metadata.get("total_tokens"))
+            return analysis_result
+    
+    def _analyze_assignment(self, extracted_content: Dict[str, Any], bypass_cache: bool) -> Dict[str, Any]:
+        """Caché de análisis y, si no hay resultado, llamada a la IA"""
         try:
+            if not bypass_cache:
+                cached = self.get_cached_analysis(extracted_content)
+                if cached is not None:
+                    return cached
+            
             # Crear prompt para la IA
             prompt = self._create_analysis_prompt(extracted_content)
             
             # Llamar a la IA
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": self._get_system_prompt()
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                temperature=0.3,
-                max_tokens=4000
-            )
+            messages = [
+                {
+                    "role": "system",
+                    "content": self._get_system_prompt()
+                },
+                {
+                    "role": "user",
+                    "content": prompt
+                }
+            ]
+            if config.LLM_STREAM_RESPONSES:
+                ai_response, usage, parser = self._stream_completion(messages)
+            else:
+                response = self.transport.openai_chat(
+                    self.model,
+                    messages,
+                    api_key=self.api_key,
+                    temperature=0.3,
+                    max_tokens=4000
+                )
+                ai_response = response["choices"][0]["message"]["content"]
+                usage, parser = response.get("usage", {}), None
             
             # Procesar respuesta
-            ai_response = response.choices[0].message.content
             logger.info(f"Respuesta de IA recibida: {ai_response[:200]}...")
             
-            analysis_result = self._parse_ai_response(ai_response)
+            analysis_result = self._parse_ai_response(ai_response, parser)
             
             # Agregar metadatos
             analysis_result["ai_metadata"] = {
                 "model_used": self.model,
                 "analyzed_at": datetime.utcnow().isoformat(),
-                "prompt_tokens": response.usage.prompt_tokens,
-                "completion_tokens": response.usage.completion_tokens,
-                "total_tokens": response.usage.total_tokens
+                "prompt_tokens": usage.get("prompt_tokens", 0),
+                "completion_tokens": usage.get("completion_tokens", 0),
+                "total_tokens": usage.get("total_tokens", 0),
+                "cache_hit": False
             }
             
+            # No se cachean las respuestas por defecto ni las recuperadas de un JSON incompleto
+            if self.cache is not None and not analysis_result.get("fallback") and not analysis_result.get("salvaged"):
+                cache_key = AnalysisCache.build_key(extracted_content, self.model, self.PROMPT_VERSION)
+                self.cache.set(cache_key, self.model, self.PROMPT_VERSION, analysis_result)
+            
             return analysis_result
             
         except Exception as e:
             logger.error(f"Error en análisis de IA: {str(e)}")
             raise
     
+    def _stream_completion(self, messages: List[Dict[str, str]]):
+        """
+        Pide la respuesta en streaming y deja de leer en cuanto el JSON trae
+        soluciones y rúbrica, sin esperar (ni pagar) el texto posterior.
+        
+        Returns:
+            (texto recibido, consumo de tokens si se conoce, parser incremental)
+        """
+        usage: Dict[str, Any] = {}
+        parser = IncrementalJSONParser()
+        parts = []
+        stream = self.transport.openai_chat_stream(
+            self.model,
+            messages,
+            api_key=self.api_key,
+            usage=usage,
+            temperature=0.3,
+            max_tokens=4000
+        )
+        try:
+            for token in stream:
+                parts.append(token)
+                parser.feed(token)
+                if parser.complete or parser.has(self.REQUIRED_FIELDS):
+                    break
+        finally:
+            stream.close()
+        return "".join(parts), usage, parser
+    
     def _get_system_prompt(self) -> str:
         """Obtiene el prompt del sistema para la IA"""
         return """Eres un experto en educación y evaluación académica. Tu tarea es analizar actividades educativas y generar:
@@ -140,8 +238,13 @@ Responde ÚNICAMENTE con el JSON en el formato especificado.
         
         return prompt
     
-    def _parse_ai_response(self, response: str) -> Dict[str, Any]:
-        """Parsea la respuesta de la IA y la convierte a JSON"""
+    def _parse_ai_response(self, response: str, parser: Optional[IncrementalJSONParser] = None) -> Dict[str, Any]:
+        """
+        Parsea la respuesta de la IA y la convierte a JSON
+        
+        Si el JSON no es válido (texto extra, respuesta cortada...), se recuperan
+        los campos completos con el parser incremental en lugar de descartarlo todo.
+        """
         try:
             # Limpiar la respuesta
             response = response.strip()
@@ -156,8 +259,7 @@ Responde ÚNICAMENTE con el JSON en el formato especificado.
             try:
                 result = json.loads(response)
             except json.JSONDecodeError:
-                logger.warning("La respuesta de IA no es JSON válido, creando respuesta por defecto")
-                result = self._create_default_response()
+                result = self._salvage_response(response, parser)
             
             # Validar estructura
             if not isinstance(result, dict):
@@ -180,6 +282,25 @@ Responde ÚNICAMENTE con el JSON en el formato especificado.
             logger.error(f"Error procesando respuesta de IA: {str(e)}")
             return self._create_default_response()
     
+    def _salvage_response(self, response: str, parser: Optional[IncrementalJSONParser]) -> Dict[str, Any]:
+        """Recupera soluciones y rúbrica de una respuesta que no es JSON válido"""
+        if parser is None:
+            parser = IncrementalJSONParser()
+            parser.feed(response)
+        
+        if parser.complete or parser.has(self.REQUIRED_FIELDS):
+            return parser.result(salvage=False)
+        
+        salvaged = parser.result()
+        if not isinstance(salvaged.get('solutions'), list) or not salvaged['solutions']:
+            logger.warning("La respuesta de IA no es JSON válido, creando respuesta por defecto")
+            return self._create_default_response()
+        
+        logger.warning(f"Respuesta de IA incompleta: se recuperan {len(salvaged['solutions'])} soluciones")
+        salvaged.setdefault('rubric', self._create_default_rubric())
+        salvaged['salvaged'] = True
+        return salvaged
+    
     def _create_default_response(self) -> Dict[str, Any]:
         """Crea una respuesta por defecto cuando la IA falla"""
         return {
@@ -191,7 +312,8 @@ Responde ÚNICAMENTE con el JSON en el formato especificado.
                     "explanation": "Esta solución fue generada automáticamente debido a un error en el análisis de IA. Por favor, revise y edite manualmente."
                 }
             ],
-            "rubric": self._create_default_rubric()
+            "rubric": self._create_default_rubric(),
+            "fallback": True
         }
     
     def _create_default_rubric(self) -> Dict[str, Any]:
@@ -0,0 +1,170 @@
+"""
+Caché persistente de análisis de IA indexada por contenido
+"""
+import copy
+import hashlib
+import json
+import logging
+import re
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from sqlalchemy import func, select
+
+from ..database.database import db
+from ..database.models import AnalysisCacheEntry
+
+logger = logging.getLogger(__name__)
+
+
+class AnalysisCache:
+    """
+    Guarda los análisis de IA en la tabla ``analysis_cache``.
+
+    La clave es un hash del contenido extraído normalizado (título, instrucciones y
+    ejercicios), el modelo y la versión del prompt, de modo que subir el mismo
+    documento con otro título de asignación reutiliza el análisis. Las entradas
+    caducan tras ``ttl_seconds`` y, al superar ``max_entries``, se desalojan las
+    menos usadas recientemente.
+    """
+
+    def __init__(self, ttl_seconds: int, max_entries: int):
+        """
+        :param ttl_seconds: Vida máxima de cada entrada
+        :param max_entries: Número máximo de entradas antes de desalojar
+        """
+        self.ttl = timedelta(seconds=ttl_seconds)
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _normalize_text(value: Any) -> str:
+        return re.sub(r'\s+', ' ', str(value or '')).strip().lower()
+
+    @classmethod
+    def build_key(cls, extracted_content: Dict[str, Any], model: str, prompt_version: str) -> str:
+        """
+        Calcula la clave de caché de un contenido extraído
+
+        :param extracted_content: Contenido extraído del archivo
+        :param model: Modelo que genera el análisis
+        :param prompt_version: Versión del prompt usado
+        :return: Hash SHA-256 en hexadecimal
+        """
+        normalized = {
+            "title": cls._normalize_text(extracted_content.get('title')),
+            "instructions": cls._normalize_text(extracted_content.get('instructions')),
+            "exercises": [
+                {
+                    "number": exercise.get('number'),
+                    "statement": cls._normalize_text(exercise.get('statement')),
+                    "points": exercise.get('points'),
+                }
+                for exercise in extracted_content.get('exercises', [])
+            ],
+            "total_points": extracted_content.get('total_points'),
+            "model": model,
+            "prompt_version": prompt_version,
+        }
+        payload = json.dumps(normalized, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Busca un análisis en caché
+
+        :param key: Clave calculada con ``build_key``
+        :return: Copia del análisis o None si no existe o ha caducado
+        """
+        try:
+            entry = db.session.get(AnalysisCacheEntry, key)
+
+            if entry is None or self._is_expired(entry):
+                if entry is not None:
+                    db.session.delete(entry)
+                    db.session.commit()
+                self._count(hit=False)
+                return None
+
+            entry.hit_count += 1
+            entry.last_accessed_at = func.now()
+            analysis = copy.deepcopy(entry.analysis)
+            db.session.commit()
+
+            self._count(hit=True)
+            return analysis
+
+        except Exception as e:
+            logger.error(f"Error leyendo la caché de análisis: {str(e)}")
+            db.session.rollback()
+            self._count(hit=False)
+            return None
+
+    def set(self, key: str, model: str, prompt_version: str, analysis: Dict[str, Any]) -> None:
+        """Guarda un análisis y desaloja entradas si se supera el límite"""
+        try:
+            db.session.merge(AnalysisCacheEntry(
+                key=key,
+                model=model,
+                prompt_version=prompt_version,
+                analysis=analysis,
+                hit_count=0,
+                created_at=func.now(),
+                last_accessed_at=func.now()
+            ))
+            db.session.commit()
+            self.evict()
+
+        except Exception as e:
+            logger.error(f"Error guardando en la caché de análisis: {str(e)}")
+            db.session.rollback()
+
+    def evict(self) -> int:
+        """
+        Elimina entradas caducadas y las menos usadas si se supera ``max_entries``
+
+        :return: Número de entradas eliminadas
+        """
+        removed = db.session.query(AnalysisCacheEntry).filter(
+            AnalysisCacheEntry.created_at < func.now() - self.ttl
+        ).delete(synchronize_session=False)
+
+        overflow = (db.session.query(func.count(AnalysisCacheEntry.key)).scalar() or 0) - self.max_entries
+        if overflow > 0:
+            lru_keys = db.session.query(AnalysisCacheEntry.key).order_by(
+                AnalysisCacheEntry.last_accessed_at.asc()
+            ).limit(overflow).subquery()
+            removed += db.session.query(AnalysisCacheEntry).filter(
+                AnalysisCacheEntry.key.in_(select(lru_keys.c.key))
+            ).delete(synchronize_session=False)
+
+        db.session.commit()
+        if removed:
+            logger.info(f"Caché de análisis: {removed} entradas desalojadas")
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        """Contadores de aciertos y fallos del proceso actual"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / total, 4) if total else 0.0
+            }
+
+    def _is_expired(self, entry: AnalysisCacheEntry) -> bool:
+        if entry.created_at is None:
+            return False
+        now = datetime.now(entry.created_at.tzinfo) if entry.created_at.tzinfo else datetime.utcnow()
+        return now - entry.created_at > self.ttl
+
+    def _count(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
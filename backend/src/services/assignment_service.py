@@ -1,39 +1,149 @@
 import os
+import json
+import base64
+import io
 import logging
-from typing import Dict, List, Any, Optional
+import uuid
+from typing import Dict, List, Any, Optional, Sequence
 from datetime import datetime, timedelta
-from werkzeug.utils import secure_filename
-from sqlalchemy import and_
+from sqlalchemy import String, case, cast, exists, func, select, tuple_, update
 
 from ..database.database import db
-from ..database.models import Assignment, AssignmentStatus, User
+from ..database.models import Assignment, AssignmentStatus, Job, JobStatus, User
+from .extraction_cache import get_extraction_cache
 from .file_processor import FileProcessor
+from .upload_ingestion import IngestedUpload, ingest_upload
 from .ai_analyzer import AIAnalyzer
+from .analysis_cache import AnalysisCache
+from .pdf_cache import PDFArtifactCache
+from ..utils.pdf_styles import get_pdf_styles
+from ..utils.metrics import register_cache
+from ..utils.tracing import current_span, stage_timings, start_span
 from ..config.settings import config
+from ..jobs import DatabaseJobBroker, get_job_queue, get_scheduler
 
 logger = logging.getLogger(__name__)
 
+# Tipo de trabajo para el análisis con IA en segundo plano
+AI_ANALYSIS_JOB = 'assignment.ai_analysis'
+# Tarea periódica que vuelve a encolar las asignaciones atascadas
+RECOVER_STUCK_ASSIGNMENTS_TASK = 'assignments.recover_stuck'
+STUCK_RECOVERY_BATCH_SIZE = 500
+
+# Columnas JSON pesadas que el listado solo devuelve si se piden con ``fields``
+HEAVY_ASSIGNMENT_FIELDS = ('extracted_content', 'ai_analysis', 'final_solutions', 'final_rubric')
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# Tipos de PDF en la caché de disco
+PDF_RUBRIC = 'rubric'
+PDF_SOLUTIONS = 'solutions'
+
+def _json_present(column):
+    """Expresión SQL: la columna JSONB tiene un valor distinto de NULL/null"""
+    return func.coalesce(func.jsonb_typeof(column), 'null') != 'null'
+
+def _json_array_length(element):
+    """Expresión SQL: longitud del array JSONB, 0 si no es un array"""
+    return case((func.jsonb_typeof(element) == 'array', func.jsonb_array_length(element)), else_=0)
+
+def _encode_cursor(created_at: datetime, assignment_id) -> str:
+    raw = json.dumps({"c": created_at.isoformat(), "i": str(assignment_id)})
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+def _decode_cursor(cursor: str):
+    """
+    :raises ValueError: Si el cursor no es válido
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        data = json.loads(raw)
+        return datetime.fromisoformat(data["c"]), uuid.UUID(data["i"])
+    except Exception:
+        raise ValueError("Cursor de paginación inválido")
+
+def _with_pipeline_timings(extracted_content: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Copia del contenido extraído con los tiempos por etapa de la traza en curso
+
+    Se suman a los ya guardados (la subida y el trabajo de análisis miden en
+    procesos distintos); el commit que guarda los tiempos solo aparece en la traza.
+    """
+    span = current_span()
+    if span is None or not extracted_content:
+        return extracted_content
+    previous = extracted_content.get('pipeline_timings') or {}
+    return {
+        **extracted_content,
+        'pipeline_timings': {
+            'trace_id': span.trace_id,
+            'stages': {**previous.get('stages', {}), **stage_timings()}
+        }
+    }
+
 class AssignmentService:
     """Servicio para gestionar asignaciones"""
     
     def __init__(self):
         self.upload_folder = config.UPLOAD_FOLDER
-        self.file_processor = FileProcessor()
-        self.ai_analyzer = AIAnalyzer(config.OPENAI_API_KEY)
+        self.file_processor = FileProcessor(cache=get_extraction_cache())
+        self.analysis_cache = None
+        if config.ANALYSIS_CACHE_ENABLED:
+            self.analysis_cache = AnalysisCache(config.ANALYSIS_CACHE_TTL, config.ANALYSIS_CACHE_MAX_ENTRIES)
+            register_cache('analysis', self.analysis_cache)
+        self.ai_analyzer = AIAnalyzer(config.OPENAI_API_KEY, cache=self.analysis_cache)
+        self.pdf_cache = None
+        if config.PDF_CACHE_ENABLED:
+            self.pdf_cache = PDFArtifactCache(os.path.join(self.upload_folder, 'pdf_cache'), config.PDF_CACHE_MAX_BYTES)
+            register_cache('pdf', self.pdf_cache)
+        self.job_queue = get_job_queue()
+        self.job_queue.register(AI_ANALYSIS_JOB, self._process_ai_analysis, on_failure=self._on_ai_analysis_failed)
+        get_scheduler().register(RECOVER_STUCK_ASSIGNMENTS_TASK, self.check_stuck_assignments,
+                                 config.ASSIGNMENT_STUCK_CHECK_INTERVAL)
         
         # Crear directorio de uploads si no existe
         os.makedirs(self.upload_folder, exist_ok=True)
     
-    def create_assignment_from_file(self, file, title: str, description: str, teacher_id: str) -> Dict[str, Any]:
-        """Crea una nueva asignación desde un archivo"""
-        try:
-            # Guardar archivo temporalmente
-            temp_file_path = self._save_temp_file(file)
-            
+    def create_assignment_from_file(self, file, title: str, description: str, teacher_id: str,
+                                    bypass_cache: bool = False) -> Dict[str, Any]:
+        """
+        Crea una nueva asignación desde un archivo subido
+        
+        El archivo se lee del temporal en el que se recibió la subida (ver
+        ``upload_ingestion``), sin copiarlo a ``UPLOAD_FOLDER``.
+        
+        :raises UploadRejected: Si el archivo está vacío o no es PDF ni Word
+        """
+        with start_span('assignment.upload', {'teacher.id': teacher_id}, kind='server'):
+            try:
+                with start_span('upload.ingest'):
+                    upload = ingest_upload(file)
+            except Exception as e:
+                logger.error(f"Error recibiendo archivo: {str(e)}")
+                raise
+            return self.create_assignment_from_upload(upload, title, description, teacher_id, bypass_cache)
+    
+    def create_assignment_from_upload(self, upload: IngestedUpload, title: str, description: str, teacher_id: str,
+                                      bypass_cache: bool = False) -> Dict[str, Any]:
+        """
+        Crea una nueva asignación desde un archivo ya recibido (se cierra al terminar)
+        
+        Si el mismo contenido ya se analizó antes, el análisis se toma de la caché
+        y la asignación queda lista para editar sin pasar por la cola de trabajos.
+        Con ``bypass_cache`` se fuerza un nuevo análisis con IA.
+        
+        Los tiempos de cada etapa (recepción, extracción, commits, análisis) se
+        guardan en ``extracted_content['pipeline_timings']``, junto a
+        ``extraction_metadata``, con el ID de la traza en la que se midieron.
+        """
+        with start_span('assignment.create', {'teacher.id': teacher_id, 'file.name': upload.filename}) as span:
             try:
                 # Procesar archivo
-                logger.info(f"Procesando archivo: {temp_file_path}")
-                extracted_content = self.file_processor.extract_content(temp_file_path)
+                logger.info(f"Procesando archivo: {upload.filename}")
+                extracted_content = self.file_processor.process_stream(
+                    upload.stream, upload.extension, sha256=upload.sha256, source_name=upload.filename
+                )
+                extracted_content = _with_pipeline_timings(extracted_content)
                 
                 # Crear asignación en BD
                 assignment = Assignment(
@@ -49,26 +159,43 @@ class AssignmentService:
                 db.session.commit()
                 
                 logger.info(f"Asignación creada: {assignment.id}")
+                span.set_attribute('assignment.id', str(assignment.id))
+                
+                cached_analysis = None
+                if not bypass_cache:
+                    cached_analysis = self.ai_analyzer.get_cached_analysis(extracted_content)
+                
+                if cached_analysis is not None:
+                    self._apply_ai_analysis(assignment, cached_analysis)
+                    assignment.extracted_content = _with_pipeline_timings(assignment.extracted_content)
+                    db.session.commit()
+                    
+                    return {
+                        "id": str(assignment.id),
+                        "title": assignment.title,
+                        "status": assignment.status.value,
+                        "job_id": None,
+                        "message": "Asignación creada exitosamente. Análisis con IA recuperado de caché."
+                    }
                 
-                # Iniciar análisis de IA de forma asíncrona
-                self._start_ai_analysis(assignment.id)
+                # Encolar análisis de IA para que lo procese un worker
+                job_id = self._start_ai_analysis(assignment.id, bypass_cache=bypass_cache)
                 
                 return {
                     "id": str(assignment.id),
                     "title": assignment.title,
                     "status": assignment.status.value,
+                    "job_id": job_id,
                     "message": "Asignación creada exitosamente. El análisis con IA está en proceso."
                 }
                 
+            except Exception as e:
+                logger.error(f"Error creando asignación: {str(e)}")
+                db.session.rollback()
+                raise
             finally:
-                # Limpiar archivo temporal
-                if os.path.exists(temp_file_path):
-                    os.remove(temp_file_path)
-                    
-        except Exception as e:
-            logger.error(f"Error creando asignación: {str(e)}")
-            db.session.rollback()
-            raise
+                # Liberar el temporal de la subida
+                upload.close()
     
     def get_assignment(self, assignment_id: str, teacher_id: str) -> Optional[Dict[str, Any]]:
         """Obtiene una asignación por ID"""
@@ -87,19 +214,99 @@ class AssignmentService:
             logger.error(f"Error obteniendo asignación {assignment_id}: {str(e)}")
             raise
     
-    def get_teacher_assignments(self, teacher_id: str) -> List[Dict[str, Any]]:
-        """Obtiene todas las asignaciones de un profesor"""
+    def owns_assignment(self, assignment_id: str, teacher_id: str) -> bool:
+        """Indica si la asignación existe y pertenece al profesor (sin cargar columnas JSON)"""
+        return db.session.query(Assignment.id).filter(
+            Assignment.id == assignment_id,
+            Assignment.teacher_id == teacher_id
+        ).first() is not None
+    
+    def list_teacher_assignments(self, teacher_id: str, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None,
+                                 fields: Sequence[str] = (), status: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Lista las asignaciones de un profesor por páginas, de la más reciente a la más antigua
+        
+        Solo se leen las columnas de resumen; las columnas JSON pesadas se añaden
+        si se piden en ``fields``. La paginación es por clave (created_at, id), así
+        que el coste de cada página no depende de lo lejos que esté del inicio.
+        
+        Args:
+            teacher_id: ID del profesor
+            limit: Número máximo de asignaciones (1..MAX_PAGE_SIZE)
+            cursor: ``next_cursor`` devuelto por la página anterior
+            fields: Columnas pesadas a incluir (ver HEAVY_ASSIGNMENT_FIELDS)
+            status: Filtrar por estado
+            
+        Returns:
+            Dict con "items", "next_cursor" y "has_more"
+            
+        Raises:
+            ValueError: Si el cursor, los campos o el estado no son válidos
+        """
+        unknown = set(fields) - set(HEAVY_ASSIGNMENT_FIELDS)
+        if unknown:
+            raise ValueError(f"Campos no válidos: {', '.join(sorted(unknown))}")
+        limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+        
+        columns = [
+            Assignment.id,
+            Assignment.title,
+            Assignment.description,
+            Assignment.status,
+            Assignment.teacher_id,
+            Assignment.total_points,
+            Assignment.created_at,
+            Assignment.updated_at,
+            _json_array_length(Assignment.extracted_content['exercises']).label('exercise_count'),
+            _json_present(Assignment.final_solutions).label('has_final_solutions'),
+            _json_present(Assignment.final_rubric).label('has_final_rubric')
+        ]
+        columns.extend(getattr(Assignment, field) for field in fields)
+        
         try:
-            assignments = db.session.query(Assignment).filter(
-                Assignment.teacher_id == teacher_id
-            ).order_by(Assignment.created_at.desc()).all()
+            query = db.session.query(*columns).filter(Assignment.teacher_id == teacher_id)
+            
+            if status:
+                try:
+                    query = query.filter(Assignment.status == AssignmentStatus(status))
+                except ValueError:
+                    raise ValueError(f"Estado no válido: {status}")
             
-            return [self._assignment_to_dict(assignment) for assignment in assignments]
+            if cursor:
+                created_at, last_id = _decode_cursor(cursor)
+                query = query.filter(tuple_(Assignment.created_at, Assignment.id) < tuple_(created_at, last_id))
             
+            # Se pide una fila de más para saber si hay otra página
+            rows = query.order_by(Assignment.created_at.desc(), Assignment.id.desc()).limit(limit + 1).all()
+            has_more = len(rows) > limit
+            rows = rows[:limit]
+            
+            return {
+                "items": [self._summary_row_to_dict(row, fields) for row in rows],
+                "next_cursor": _encode_cursor(rows[-1].created_at, rows[-1].id) if has_more else None,
+                "has_more": has_more
+            }
+            
+        except ValueError:
+            raise
         except Exception as e:
             logger.error(f"Error obteniendo asignaciones del profesor {teacher_id}: {str(e)}")
             raise
     
+    def count_teacher_assignments(self, teacher_id: str) -> Dict[str, Any]:
+        """Cuenta las asignaciones de un profesor, en total y por estado"""
+        try:
+            rows = db.session.query(Assignment.status, func.count(Assignment.id)).filter(
+                Assignment.teacher_id == teacher_id
+            ).group_by(Assignment.status).all()
+            
+            by_status = {status.value: count for status, count in rows}
+            return {"total": sum(by_status.values()), "by_status": by_status}
+            
+        except Exception as e:
+            logger.error(f"Error contando asignaciones del profesor {teacher_id}: {str(e)}")
+            raise
+    
     def update_assignment_solutions(self, assignment_id: str, teacher_id: str, solutions: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Actualiza las soluciones de una asignación"""
         try:
@@ -114,6 +321,7 @@ class AssignmentService:
             assignment.final_solutions = solutions
             assignment.updated_at = datetime.utcnow()
             db.session.commit()
+            self._invalidate_pdf(assignment_id, PDF_SOLUTIONS)
             
             return {"message": "Soluciones actualizadas exitosamente"}
             
@@ -136,6 +344,7 @@ class AssignmentService:
             assignment.final_rubric = rubric
             assignment.updated_at = datetime.utcnow()
             db.session.commit()
+            self._invalidate_pdf(assignment_id, PDF_RUBRIC)
             
             return {"message": "Rúbrica actualizada exitosamente"}
             
@@ -170,59 +379,77 @@ class AssignmentService:
             raise
     
     def check_stuck_assignments(self) -> int:
-        """Verifica y marca como error las asignaciones que llevan más de 1 hora procesando"""
+        """
+        Vuelve a encolar el análisis de las asignaciones atascadas en PROCESSING
+        
+        Los trabajos abandonados por un worker ya los recupera la cola al caducar
+        su alquiler; aquí quedan las asignaciones que llevan más de
+        ``ASSIGNMENT_STUCK_TIMEOUT`` en PROCESSING sin ningún análisis en cola ni
+        en ejecución (con el broker 'database'; con los demás basta el tiempo).
+        Se recuperan con un solo ``UPDATE ... RETURNING`` y ``SKIP LOCKED``, así
+        que varias instancias pueden ejecutarlo a la vez sin encolar dos veces
+        la misma asignación.
+        
+        :return: Número de asignaciones recuperadas
+        """
         try:
-            # Buscar asignaciones en procesamiento por más de 1 hora
-            one_hour_ago = datetime.utcnow() - timedelta(hours=1)
-            
-            stuck_assignments = db.session.query(Assignment).filter(
-                and_(
-                    Assignment.status == AssignmentStatus.PROCESSING,
-                    Assignment.updated_at < one_hour_ago
-                )
-            ).all()
-            
-            count = 0
-            for assignment in stuck_assignments:
-                logger.warning(f"Marcando asignación {assignment.id} como error por timeout")
-                assignment.status = AssignmentStatus.ERROR
-                assignment.updated_at = datetime.utcnow()
-                count += 1
-            
-            if count > 0:
-                db.session.commit()
-                logger.info(f"Marcadas {count} asignaciones como error por timeout")
+            stuck = select(Assignment.id).where(
+                Assignment.status == AssignmentStatus.PROCESSING,
+                Assignment.updated_at < func.now() - timedelta(seconds=config.ASSIGNMENT_STUCK_TIMEOUT)
+            )
+            if isinstance(self.job_queue.broker, DatabaseJobBroker):
+                stuck = stuck.where(~exists().where(
+                    Job.status.in_([JobStatus.QUEUED, JobStatus.RUNNING]),
+                    Job.payload['assignment_id'].astext == cast(Assignment.id, String),
+                    Job.job_type == AI_ANALYSIS_JOB
+                ))
+            stuck = stuck.limit(STUCK_RECOVERY_BATCH_SIZE).with_for_update(skip_locked=True).scalar_subquery()
+            
+            recovered = db.session.execute(
+                update(Assignment).where(Assignment.id.in_(stuck)).values(
+                    status=AssignmentStatus.UPLOADED,
+                    updated_at=func.now()
+                ).returning(Assignment.id),
+                execution_options={"synchronize_session": False}
+            ).scalars().all()
+            
+            if recovered:
+                # Con el broker 'database' los trabajos se insertan en la misma transacción
+                self.job_queue.enqueue_many(AI_ANALYSIS_JOB, [
+                    {"assignment_id": str(assignment_id), "bypass_cache": False} for assignment_id in recovered
+                ])
+                logger.warning(f"Reencoladas {len(recovered)} asignaciones atascadas en procesamiento")
+            db.session.commit()
             
-            return count
+            return len(recovered)
             
         except Exception as e:
-            logger.error(f"Error verificando asignaciones bloqueadas: {str(e)}")
+            logger.error(f"Error recuperando asignaciones bloqueadas: {str(e)}")
             db.session.rollback()
             return 0
     
-    def _save_temp_file(self, file) -> str:
-        """Guarda un archivo temporalmente"""
-        filename = secure_filename(file.filename)
-        temp_filename = f"temp_{os.urandom(16).hex()}_{filename}"
-        temp_path = os.path.join(self.upload_folder, temp_filename)
-        
-        file.save(temp_path)
-        return temp_path
-    
-    def _start_ai_analysis(self, assignment_id: str) -> None:
-        """Inicia el análisis con IA de forma asíncrona"""
+    def _start_ai_analysis(self, assignment_id: str, bypass_cache: bool = False) -> Optional[str]:
+        """Encola el análisis con IA y devuelve el ID del trabajo"""
         try:
-            # En una implementación real, esto se haría con una cola de tareas (Celery, RQ, etc.)
-            # Por ahora, lo hacemos de forma síncrona
-            self._process_ai_analysis(assignment_id)
+            return self.job_queue.enqueue(AI_ANALYSIS_JOB, {
+                "assignment_id": str(assignment_id),
+                "bypass_cache": bypass_cache
+            })
             
         except Exception as e:
-            logger.error(f"Error iniciando análisis de IA: {str(e)}")
+            logger.error(f"Error encolando análisis de IA: {str(e)}")
             # Marcar asignación como error
             self._mark_assignment_error(assignment_id, str(e))
+            return None
     
-    def _process_ai_analysis(self, assignment_id: str) -> None:
-        """Procesa el análisis con IA"""
+    def _process_ai_analysis(self, payload: Dict[str, Any]) -> None:
+        """
+        Procesa el análisis con IA (manejador del trabajo en segundo plano)
+        
+        Si lanza una excepción, la cola reintenta el trabajo con backoff y, al agotar
+        los intentos, llama a ``_on_ai_analysis_failed``.
+        """
+        assignment_id = payload["assignment_id"]
         try:
             assignment = db.session.query(Assignment).filter(
                 Assignment.id == assignment_id
@@ -234,26 +461,39 @@ class AssignmentService:
             
             # Actualizar estado a procesando
             assignment.status = AssignmentStatus.PROCESSING
+            assignment.updated_at = datetime.utcnow()
             db.session.commit()
             
             # Analizar con IA
             logger.info(f"Iniciando análisis de IA para asignación {assignment_id}")
-            ai_analysis = self.ai_analyzer.analyze_assignment(assignment.extracted_content)
-            
-            # Guardar análisis
-            assignment.ai_analysis = ai_analysis
-            assignment.final_solutions = ai_analysis.get('solutions', [])
-            assignment.final_rubric = ai_analysis.get('rubric', {})
-            assignment.status = AssignmentStatus.READY_FOR_EDITING
-            assignment.updated_at = datetime.utcnow()
+            ai_analysis = self.ai_analyzer.analyze_assignment(
+                assignment.extracted_content,
+                bypass_cache=payload.get("bypass_cache", False)
+            )
             
+            # Guardar análisis (con los tiempos del trabajo junto a los de la subida)
+            self._apply_ai_analysis(assignment, ai_analysis)
+            assignment.extracted_content = _with_pipeline_timings(assignment.extracted_content)
             db.session.commit()
             
             logger.info(f"Análisis de IA completado para asignación {assignment_id}")
             
         except Exception as e:
             logger.error(f"Error en análisis de IA: {str(e)}")
-            self._mark_assignment_error(assignment_id, str(e))
+            db.session.rollback()
+            raise
+    
+    def _apply_ai_analysis(self, assignment: Assignment, ai_analysis: Dict[str, Any]) -> None:
+        """Copia el análisis a la asignación y la deja lista para editar"""
+        assignment.ai_analysis = ai_analysis
+        assignment.final_solutions = ai_analysis.get('solutions', [])
+        assignment.final_rubric = ai_analysis.get('rubric', {})
+        assignment.status = AssignmentStatus.READY_FOR_EDITING
+        assignment.updated_at = datetime.utcnow()
+    
+    def _on_ai_analysis_failed(self, payload: Dict[str, Any], error_message: str) -> None:
+        """Marca la asignación como error cuando se agotan los reintentos del análisis"""
+        self._mark_assignment_error(payload["assignment_id"], error_message)
     
     def _mark_assignment_error(self, assignment_id: str, error_message: str) -> None:
         """Marca una asignación como error"""
@@ -286,6 +526,25 @@ class AssignmentService:
             "updated_at": assignment.updated_at.isoformat() if assignment.updated_at else None
         }
     
+    def _summary_row_to_dict(self, row, fields: Sequence[str] = ()) -> Dict[str, Any]:
+        """Convierte una fila del listado (proyección de columnas) a diccionario"""
+        result = {
+            "id": str(row.id),
+            "title": row.title,
+            "description": row.description,
+            "status": row.status.value,
+            "teacher_id": str(row.teacher_id),
+            "total_points": row.total_points,
+            "exercise_count": row.exercise_count or 0,
+            "has_final_solutions": bool(row.has_final_solutions),
+            "has_final_rubric": bool(row.has_final_rubric),
+            "created_at": row.created_at.isoformat() if row.created_at else None,
+            "updated_at": row.updated_at.isoformat() if row.updated_at else None
+        }
+        for field in fields:
+            result[field] = getattr(row, field)
+        return result
+    
     def delete_assignment(self, assignment_id: str, teacher_id: str) -> Dict[str, Any]:
         """Elimina una asignación"""
         try:
@@ -299,6 +558,7 @@ class AssignmentService:
             
             db.session.delete(assignment)
             db.session.commit()
+            self._invalidate_pdf(assignment_id)
             
             return {"message": "Asignación eliminada exitosamente"}
             
@@ -308,7 +568,12 @@ class AssignmentService:
             raise
     
     def generate_rubric_pdf(self, assignment_id: str, teacher_id: str) -> Dict[str, Any]:
-        """Genera un PDF con la rúbrica de la asignación"""
+        """
+        Obtiene el PDF con la rúbrica de la asignación
+        
+        :return: ``filename`` y ``etag`` más ``path`` (PDF en la caché de disco)
+            o ``pdf_content`` (si la caché está desactivada), o ``error``
+        """
         try:
             assignment = db.session.query(Assignment).filter(
                 Assignment.id == assignment_id,
@@ -321,110 +586,20 @@ class AssignmentService:
             if not assignment.final_rubric:
                 return {"error": "No hay rúbrica disponible para esta asignación"}
             
-            # Generar PDF usando reportlab
-            from reportlab.lib.pagesizes import letter
-            from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-            from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-            from reportlab.lib import colors
-            from reportlab.lib.units import inch
-            import io
-            
-            buffer = io.BytesIO()
-            doc = SimpleDocTemplate(buffer, pagesize=letter)
-            styles = getSampleStyleSheet()
-            story = []
-            
-            # Título
-            title_style = ParagraphStyle(
-                'CustomTitle',
-                parent=styles['Heading1'],
-                fontSize=18,
-                spaceAfter=30,
-                alignment=1  # Centrado
-            )
-            story.append(Paragraph(f"Rúbrica: {assignment.title}", title_style))
-            story.append(Spacer(1, 12))
-            
-            # Información de la asignación
-            info_style = ParagraphStyle(
-                'Info',
-                parent=styles['Normal'],
-                fontSize=10,
-                spaceAfter=6
-            )
-            story.append(Paragraph(f"<b>Descripción:</b> {assignment.description or 'Sin descripción'}", info_style))
-            story.append(Paragraph(f"<b>Puntos totales:</b> {assignment.total_points}", info_style))
-            story.append(Spacer(1, 20))
-            
-            # Criterios
-            rubric = assignment.final_rubric
-            criteria = rubric.get('criteria', [])
-            
-            for i, criterion in enumerate(criteria, 1):
-                # Título del criterio
-                criterion_style = ParagraphStyle(
-                    'CriterionTitle',
-                    parent=styles['Heading2'],
-                    fontSize=14,
-                    spaceAfter=12,
-                    textColor=colors.darkblue
-                )
-                story.append(Paragraph(f"Criterio {i}: {criterion.get('name', 'Sin nombre')}", criterion_style))
-                
-                # Descripción del criterio
-                if criterion.get('description'):
-                    story.append(Paragraph(f"<b>Descripción:</b> {criterion['description']}", styles['Normal']))
-                    story.append(Spacer(1, 8))
-                
-                # Peso
-                story.append(Paragraph(f"<b>Peso:</b> {criterion.get('weight', 0):.1%}", styles['Normal']))
-                story.append(Spacer(1, 12))
-                
-                # Niveles de desempeño
-                levels = criterion.get('performance_levels', [])
-                if levels:
-                    # Crear tabla de niveles
-                    table_data = [['Nivel', 'Descripción', 'Puntos']]
-                    for level in levels:
-                        table_data.append([
-                            level.get('name', 'Sin nombre'),
-                            level.get('description', 'Sin descripción'),
-                            str(level.get('points', 0))
-                        ])
-                    
-                    table = Table(table_data, colWidths=[1.5*inch, 3*inch, 0.8*inch])
-                    table.setStyle(TableStyle([
-                        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                        ('FONTSIZE', (0, 0), (-1, 0), 10),
-                        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-                        ('GRID', (0, 0), (-1, -1), 1, colors.black)
-                    ]))
-                    
-                    story.append(table)
-                
-                story.append(Spacer(1, 20))
-            
-            # Construir PDF
-            doc.build(story)
-            buffer.seek(0)
-            
             filename = f"rubrica_{assignment.title.replace(' ', '_')}.pdf"
-            
-            return {
-                "pdf_content": buffer.getvalue(),
-                "filename": filename
-            }
+            return self._pdf_artifact(assignment, PDF_RUBRIC, assignment.final_rubric,
+                                      self._render_rubric_pdf, filename)
             
         except Exception as e:
             logger.error(f"Error generando PDF de rúbrica: {str(e)}")
             raise
     
     def generate_solutions_pdf(self, assignment_id: str, teacher_id: str) -> Dict[str, Any]:
-        """Genera un PDF con las soluciones de la asignación"""
+        """
+        Obtiene el PDF con las soluciones de la asignación
+        
+        :return: Mismo formato que ``generate_rubric_pdf``
+        """
         try:
             assignment = db.session.query(Assignment).filter(
                 Assignment.id == assignment_id,
@@ -437,96 +612,141 @@ class AssignmentService:
             if not assignment.final_solutions:
                 return {"error": "No hay soluciones disponibles para esta asignación"}
             
-            # Generar PDF usando reportlab
-            from reportlab.lib.pagesizes import letter
-            from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-            from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-            from reportlab.lib import colors
-            from reportlab.lib.units import inch
-            import io
-            
-            buffer = io.BytesIO()
-            doc = SimpleDocTemplate(buffer, pagesize=letter)
-            styles = getSampleStyleSheet()
-            story = []
-            
-            # Título
-            title_style = ParagraphStyle(
-                'CustomTitle',
-                parent=styles['Heading1'],
-                fontSize=18,
-                spaceAfter=30,
-                alignment=1  # Centrado
-            )
-            story.append(Paragraph(f"Soluciones: {assignment.title}", title_style))
-            story.append(Spacer(1, 12))
+            filename = f"soluciones_{assignment.title.replace(' ', '_')}.pdf"
+            return self._pdf_artifact(assignment, PDF_SOLUTIONS, assignment.final_solutions,
+                                      self._render_solutions_pdf, filename)
             
-            # Información de la asignación
-            info_style = ParagraphStyle(
-                'Info',
-                parent=styles['Normal'],
-                fontSize=10,
-                spaceAfter=6
-            )
-            story.append(Paragraph(f"<b>Descripción:</b> {assignment.description or 'Sin descripción'}", info_style))
-            story.append(Paragraph(f"<b>Puntos totales:</b> {assignment.total_points}", info_style))
-            story.append(Spacer(1, 20))
+        except Exception as e:
+            logger.error(f"Error generando PDF de soluciones: {str(e)}")
+            raise
+    
+    def _pdf_artifact(self, assignment: Assignment, kind: str, data: Any, render, filename: str) -> Dict[str, Any]:
+        """Devuelve el PDF de la caché de disco o lo genera y lo guarda"""
+        digest = PDFArtifactCache.build_digest(kind, {
+            "data": data,
+            "title": assignment.title,
+            "description": assignment.description,
+            "total_points": assignment.total_points
+        })
+        result = {"filename": filename, "etag": digest[:32]}
+        
+        if self.pdf_cache is None:
+            result["pdf_content"] = render(assignment)
+            return result
+        
+        assignment_id = str(assignment.id)
+        path = self.pdf_cache.get(assignment_id, kind, digest)
+        if path is None:
+            path = self.pdf_cache.put(assignment_id, kind, digest, render(assignment))
+        result["path"] = path
+        return result
+    
+    def _invalidate_pdf(self, assignment_id: str, kind: Optional[str] = None) -> None:
+        """Descarta los PDF cacheados de una asignación"""
+        if self.pdf_cache is None:
+            return
+        try:
+            self.pdf_cache.invalidate(str(assignment_id), kind)
+        except OSError as e:
+            logger.warning(f"No se pudo invalidar la caché de PDF de {assignment_id}: {str(e)}")
+    
+    def _pdf_header(self, styles: Dict[str, Any], heading: str, assignment: Assignment) -> List[Any]:
+        """Título e información común de los PDF de una asignación"""
+        Paragraph, Spacer = styles['Paragraph'], styles['Spacer']
+        return [
+            Paragraph(f"{heading}: {assignment.title}", styles['title']),
+            Spacer(1, 12),
+            Paragraph(f"<b>Descripción:</b> {assignment.description or 'Sin descripción'}", styles['info']),
+            Paragraph(f"<b>Puntos totales:</b> {assignment.total_points}", styles['info']),
+            Spacer(1, 20)
+        ]
+    
+    def _render_rubric_pdf(self, assignment: Assignment) -> bytes:
+        """Genera con ReportLab el PDF de la rúbrica"""
+        styles = get_pdf_styles()
+        Paragraph, Spacer, Table = styles['Paragraph'], styles['Spacer'], styles['Table']
+        inch, normal = styles['inch'], styles['normal']
+        
+        buffer = io.BytesIO()
+        doc = styles['SimpleDocTemplate'](buffer, pagesize=styles['pagesize'])
+        story = self._pdf_header(styles, "Rúbrica", assignment)
+        
+        # Criterios
+        criteria = assignment.final_rubric.get('criteria', [])
+        
+        for i, criterion in enumerate(criteria, 1):
+            story.append(Paragraph(f"Criterio {i}: {criterion.get('name', 'Sin nombre')}", styles['criterion']))
             
-            # Soluciones
-            solutions = assignment.final_solutions
-            
-            for i, solution in enumerate(solutions, 1):
-                # Título del ejercicio
-                exercise_style = ParagraphStyle(
-                    'ExerciseTitle',
-                    parent=styles['Heading2'],
-                    fontSize=14,
-                    spaceAfter=12,
-                    textColor=colors.darkgreen
-                )
-                story.append(Paragraph(f"Ejercicio {i}", exercise_style))
-                
-                # Respuesta esperada
-                if solution.get('expected_answer'):
-                    story.append(Paragraph(f"<b>Respuesta esperada:</b>", styles['Normal']))
-                    story.append(Paragraph(solution['expected_answer'], styles['Normal']))
-                    story.append(Spacer(1, 8))
-                
-                # Pasos de solución
-                steps = solution.get('solution_steps', [])
-                if steps:
-                    story.append(Paragraph(f"<b>Pasos de solución:</b>", styles['Normal']))
-                    for j, step in enumerate(steps, 1):
-                        if step.strip():  # Solo agregar pasos no vacíos
-                            story.append(Paragraph(f"{j}. {step}", styles['Normal']))
-                    story.append(Spacer(1, 8))
-                
-                # Explicación
-                if solution.get('explanation'):
-                    story.append(Paragraph(f"<b>Explicación:</b>", styles['Normal']))
-                    story.append(Paragraph(solution['explanation'], styles['Normal']))
-                    story.append(Spacer(1, 8))
-                
-                # Conceptos clave
-                concepts = solution.get('key_concepts', [])
-                if concepts:
-                    concepts_text = ", ".join([c for c in concepts if c.strip()])
-                    if concepts_text:
-                        story.append(Paragraph(f"<b>Conceptos clave:</b> {concepts_text}", styles['Normal']))
-                
-                story.append(Spacer(1, 20))
+            # Descripción del criterio
+            if criterion.get('description'):
+                story.append(Paragraph(f"<b>Descripción:</b> {criterion['description']}", normal))
+                story.append(Spacer(1, 8))
             
-            # Construir PDF
-            doc.build(story)
-            buffer.seek(0)
+            # Peso
+            story.append(Paragraph(f"<b>Peso:</b> {criterion.get('weight', 0):.1%}", normal))
+            story.append(Spacer(1, 12))
             
-            filename = f"soluciones_{assignment.title.replace(' ', '_')}.pdf"
+            # Niveles de desempeño
+            levels = criterion.get('performance_levels', [])
+            if levels:
+                table_data = [['Nivel', 'Descripción', 'Puntos']]
+                for level in levels:
+                    table_data.append([
+                        level.get('name', 'Sin nombre'),
+                        level.get('description', 'Sin descripción'),
+                        str(level.get('points', 0))
+                    ])
+                
+                table = Table(table_data, colWidths=[1.5*inch, 3*inch, 0.8*inch])
+                table.setStyle(styles['levels_table'])
+                story.append(table)
             
-            return {
-                "pdf_content": buffer.getvalue(),
-                "filename": filename
-            }
+            story.append(Spacer(1, 20))
+        
+        doc.build(story)
+        return buffer.getvalue()
+    
+    def _render_solutions_pdf(self, assignment: Assignment) -> bytes:
+        """Genera con ReportLab el PDF de las soluciones"""
+        styles = get_pdf_styles()
+        Paragraph, Spacer, normal = styles['Paragraph'], styles['Spacer'], styles['normal']
+        
+        buffer = io.BytesIO()
+        doc = styles['SimpleDocTemplate'](buffer, pagesize=styles['pagesize'])
+        story = self._pdf_header(styles, "Soluciones", assignment)
+        
+        for i, solution in enumerate(assignment.final_solutions, 1):
+            story.append(Paragraph(f"Ejercicio {i}", styles['exercise']))
+            
+            # Respuesta esperada
+            if solution.get('expected_answer'):
+                story.append(Paragraph("<b>Respuesta esperada:</b>", normal))
+                story.append(Paragraph(solution['expected_answer'], normal))
+                story.append(Spacer(1, 8))
+            
+            # Pasos de solución
+            steps = solution.get('solution_steps', [])
+            if steps:
+                story.append(Paragraph("<b>Pasos de solución:</b>", normal))
+                for j, step in enumerate(steps, 1):
+                    if step.strip():  # Solo agregar pasos no vacíos
+                        story.append(Paragraph(f"{j}. {step}", normal))
+                story.append(Spacer(1, 8))
+            
+            # Explicación
+            if solution.get('explanation'):
+                story.append(Paragraph("<b>Explicación:</b>", normal))
+                story.append(Paragraph(solution['explanation'], normal))
+                story.append(Spacer(1, 8))
+            
+            # Conceptos clave
+            concepts = solution.get('key_concepts', [])
+            if concepts:
+                concepts_text = ", ".join([c for c in concepts if c.strip()])
+                if concepts_text:
+                    story.append(Paragraph(f"<b>Conceptos clave:</b> {concepts_text}", normal))
             
-        except Exception as e:
-            logger.error(f"Error generando PDF de soluciones: {str(e)}")
-            raise
+            story.append(Spacer(1, 20))
+        
+        doc.build(story)
+        return buffer.getvalue()
@@ -0,0 +1,264 @@
+"""
+Subidas reanudables por partes
+
+Protocolo (todas las rutas bajo ``/api/assignments/uploads``):
+
+1. ``POST``: se declara el archivo (nombre, tamaño y, opcionalmente, su SHA-256)
+   y se obtiene un ``id`` de sesión.
+2. ``PUT /<id>?offset=N``: se envía una parte con su SHA-256 en la cabecera
+   ``X-Chunk-SHA256``. Solo se acepta en el offset por el que va la sesión; si
+   el cliente no sabe por dónde iba (se cortó la conexión), ``GET /<id>``
+   devuelve el ``offset`` desde el que seguir.
+3. ``POST /<id>/complete``: se comprueba el archivo completo y se procesa.
+
+Cada parte se escribe directamente al final de ``<id>.part`` mientras se lee
+del cuerpo de la petición, sin guardarla en memoria. Las sesiones sin
+actividad durante ``UPLOAD_SESSION_TTL`` segundos se eliminan.
+"""
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, BinaryIO, Dict, Optional
+
+from werkzeug.utils import secure_filename
+
+from ..config.settings import config
+from ..jobs import get_scheduler
+from .upload_ingestion import UPLOAD_CHUNK_SIZE, IngestedUpload, UploadRejected, ingest_path
+
+logger = logging.getLogger(__name__)
+
+# Usos de una subida completada
+UPLOAD_PURPOSE_ASSIGNMENT = 'assignment'
+UPLOAD_PURPOSE_SUBMISSIONS = 'submissions'
+UPLOAD_PURPOSES = (UPLOAD_PURPOSE_ASSIGNMENT, UPLOAD_PURPOSE_SUBMISSIONS)
+
+# Segundos mínimos entre dos limpiezas de sesiones caducadas
+PURGE_INTERVAL = 600
+# Tarea periódica que limpia las sesiones caducadas aunque no se abran nuevas
+PURGE_UPLOADS_TASK = 'uploads.purge_expired'
+
+
+def _isoformat(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat()
+
+
+class ChunkedUploadService:
+    """
+    Sesiones de subida por partes guardadas en ``UPLOAD_FOLDER/chunked``.
+
+    El estado de cada sesión es un JSON junto al archivo parcial, así que
+    cualquier proceso web puede recibir cualquier parte. El tamaño del archivo
+    parcial es el offset confirmado: las escrituras de una sesión se
+    serializan con un bloqueo sobre ese archivo.
+    """
+
+    def __init__(self):
+        self.folder = os.path.join(config.UPLOAD_FOLDER, 'chunked')
+        os.makedirs(self.folder, exist_ok=True)
+        self._last_purge = 0.0
+        get_scheduler().register(PURGE_UPLOADS_TASK, lambda: self.purge_expired(force=True), PURGE_INTERVAL)
+
+    def _session_path(self, upload_id: str) -> str:
+        return os.path.join(self.folder, f"{secure_filename(upload_id)}.json")
+
+    def _part_path(self, upload_id: str) -> str:
+        return os.path.join(self.folder, f"{secure_filename(upload_id)}.part")
+
+    def _read_session(self, upload_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._session_path(upload_id), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def _write_session(self, session: Dict[str, Any]) -> None:
+        # Escritura atómica: el lector nunca ve un JSON a medias
+        fd, tmp_path = tempfile.mkstemp(dir=self.folder, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(session, f)
+        os.replace(tmp_path, self._session_path(session['id']))
+
+    def _public(self, session: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            offset = os.path.getsize(self._part_path(session['id']))
+        except FileNotFoundError:
+            offset = 0
+        return {
+            "id": session['id'],
+            "filename": session['filename'],
+            "size": session['size'],
+            "offset": offset,
+            "chunk_size": config.UPLOAD_CHUNK_MAX_BYTES,
+            "purpose": session['purpose'],
+            "expires_at": _isoformat(session['expires_at'])
+        }
+
+    def create_session(self, teacher_id: str, filename: str, size: int, purpose: str,
+                       sha256: Optional[str] = None, metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Abre una sesión de subida
+
+        :param size: Tamaño total del archivo en bytes
+        :param purpose: Qué hacer con el archivo al completarlo (``UPLOAD_PURPOSES``)
+        :param sha256: Hash del archivo completo, para comprobarlo al final
+        :param metadata: Datos del formulario para el procesado final (título, etc.)
+        :raises UploadRejected: Si los datos declarados no son válidos
+        """
+        self.purge_expired()
+        if purpose not in UPLOAD_PURPOSES:
+            raise UploadRejected(f"Uso de subida desconocido: {purpose}")
+        if not isinstance(size, int) or size <= 0:
+            raise UploadRejected("El tamaño del archivo debe ser un entero positivo")
+        if size > config.UPLOAD_SESSION_MAX_BYTES:
+            raise UploadRejected(f"El archivo supera el máximo de {config.UPLOAD_SESSION_MAX_BYTES} bytes", 413)
+        if sha256 is not None and (len(sha256) != 64 or any(c not in '0123456789abcdef' for c in sha256.lower())):
+            raise UploadRejected("sha256 debe ser un hash SHA-256 en hexadecimal")
+
+        session = {
+            "id": str(uuid.uuid4()),
+            "teacher_id": str(teacher_id),
+            "filename": secure_filename(filename or '') or 'archivo',
+            "size": size,
+            "sha256": sha256.lower() if sha256 else None,
+            "purpose": purpose,
+            "metadata": metadata or {},
+            "created_at": time.time(),
+            "expires_at": time.time() + config.UPLOAD_SESSION_TTL
+        }
+        # Primero el JSON: un archivo parcial sin JSON se considera huérfano
+        self._write_session(session)
+        open(self._part_path(session['id']), 'wb').close()
+        return self._public(session)
+
+    def _owned_session(self, upload_id: str, teacher_id: str) -> Optional[Dict[str, Any]]:
+        session = self._read_session(upload_id)
+        if session is None or session['teacher_id'] != str(teacher_id):
+            return None
+        if session['expires_at'] < time.time():
+            self.discard(upload_id)
+            return None
+        return session
+
+    def get_session(self, upload_id: str, teacher_id: str) -> Optional[Dict[str, Any]]:
+        """Estado de una sesión del profesor (con el ``offset`` recibido), o None"""
+        session = self._owned_session(upload_id, teacher_id)
+        return self._public(session) if session else None
+
+    def write_chunk(self, upload_id: str, teacher_id: str, offset: int, stream: BinaryIO,
+                    checksum: str) -> Optional[Dict[str, Any]]:
+        """
+        Añade una parte al archivo
+
+        La parte se escribe según se lee de ``stream``; si su hash no coincide
+        con ``checksum`` o supera los límites, el archivo vuelve a su tamaño
+        anterior y la sesión sigue en el mismo offset.
+
+        :return: Estado de la sesión, o None si no existe
+        :raises UploadRejected: 409 si ``offset`` no es el esperado, 400 si el
+            hash no coincide, 413 si la parte o el archivo superan su tamaño
+        """
+        session = self._owned_session(upload_id, teacher_id)
+        if session is None:
+            return None
+        if not checksum:
+            raise UploadRejected("Falta la cabecera X-Chunk-SHA256")
+
+        with open(self._part_path(upload_id), 'r+b') as part:
+            fcntl.flock(part, fcntl.LOCK_EX)
+            received = os.fstat(part.fileno()).st_size
+            if offset != received:
+                raise UploadRejected(f"Offset incorrecto: la subida continúa en {received}", 409)
+
+            part.seek(offset)
+            digest = hashlib.sha256()
+            written = 0
+            try:
+                for chunk in iter(lambda: stream.read(UPLOAD_CHUNK_SIZE), b''):
+                    written += len(chunk)
+                    if written > config.UPLOAD_CHUNK_MAX_BYTES:
+                        raise UploadRejected(f"La parte supera el máximo de {config.UPLOAD_CHUNK_MAX_BYTES} bytes", 413)
+                    if offset + written > session['size']:
+                        raise UploadRejected("La parte supera el tamaño declarado del archivo", 413)
+                    digest.update(chunk)
+                    part.write(chunk)
+                if digest.hexdigest() != checksum.strip().lower():
+                    raise UploadRejected("El SHA-256 de la parte no coincide")
+                part.flush()
+            except Exception:
+                # Nada de una parte incompleta o corrupta queda en el archivo
+                part.truncate(offset)
+                raise
+
+        session['expires_at'] = time.time() + config.UPLOAD_SESSION_TTL
+        self._write_session(session)
+        return self._public(session)
+
+    def complete(self, upload_id: str, teacher_id: str):
+        """
+        Comprueba que el archivo está completo y lo prepara para el extractor
+
+        :return: ``(sesión, IngestedUpload)`` o None si la sesión no existe; el
+            llamador procesa el archivo y después llama a ``discard``
+        :raises UploadRejected: 409 si faltan partes, 400 si el hash del
+            archivo no coincide con el declarado, 415 si no es PDF, Word ni ZIP
+        """
+        session = self._owned_session(upload_id, teacher_id)
+        if session is None:
+            return None
+        received = os.path.getsize(self._part_path(upload_id))
+        if received != session['size']:
+            raise UploadRejected(f"Subida incompleta: recibidos {received} de {session['size']} bytes", 409)
+
+        upload: IngestedUpload = ingest_path(self._part_path(upload_id), session['filename'])
+        if session['sha256'] and upload.sha256 != session['sha256']:
+            upload.close()
+            self.discard(upload_id)
+            raise UploadRejected("El SHA-256 del archivo no coincide con el declarado; vuelve a subirlo")
+        return session, upload
+
+    def discard(self, upload_id: str) -> None:
+        """Elimina una sesión y su archivo parcial"""
+        for path in (self._part_path(upload_id), self._session_path(upload_id)):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def purge_expired(self, force: bool = False) -> int:
+        """
+        Elimina las sesiones caducadas (como mucho una vez cada ``PURGE_INTERVAL``)
+
+        :return: Número de sesiones eliminadas
+        """
+        now = time.time()
+        if not force and now - self._last_purge < PURGE_INTERVAL:
+            return 0
+        self._last_purge = now
+
+        removed = set()
+        for name in os.listdir(self.folder):
+            upload_id, extension = os.path.splitext(name)
+            if upload_id in removed:
+                continue
+            if extension == '.json':
+                session = self._read_session(upload_id)
+                if session is not None and session['expires_at'] >= now:
+                    continue
+            elif extension == '.part':
+                # Archivo parcial huérfano (sin JSON) de una sesión ya borrada a medias
+                if os.path.exists(self._session_path(upload_id)):
+                    continue
+            else:
+                continue
+            self.discard(upload_id)
+            removed.add(upload_id)
+        if removed:
+            logger.info(f"Sesiones de subida caducadas eliminadas: {len(removed)}")
+        return len(removed)
@@ -0,0 +1,239 @@
+"""
+Limitador de concurrencia adaptativo para servidores de modelos.
+
+Un único servidor de Ollama atiende peor cuantas más peticiones simultáneas
+recibe: a partir de cierto punto la latencia crece sin ganar rendimiento. El
+limitador descubre ese punto con AIMD sobre la latencia observada (sube el
+límite de uno en uno mientras la latencia se mantiene cerca de la mínima y lo
+reduce de forma multiplicativa cuando se dispara o hay errores) y encola el
+trabajo que excede el límite.
+"""
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+from ..config.settings import config
+from ..utils.metrics import CallbackMetric
+
+logger = logging.getLogger(__name__)
+
+
+class ConcurrencyLimitExceeded(Exception):
+    """La cola de espera está llena o se agotó el tiempo de espera"""
+
+
+def _percentile(ordered, fraction: float) -> Optional[float]:
+    if not ordered:
+        return None
+    index = min(int(round(fraction * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    Controla cuántas peticiones hay en curso contra un servidor.
+
+    ``acquire``/``release`` pueden usarse directamente; ``slot()`` las envuelve
+    en un context manager que mide la latencia de la llamada.
+    """
+
+    def __init__(self,
+                 min_limit: int = 1,
+                 max_limit: int = 8,
+                 initial_limit: int = 2,
+                 max_queue: int = 256,
+                 queue_timeout: Optional[float] = None,
+                 latency_tolerance: float = 2.0,
+                 backoff_ratio: float = 0.75,
+                 window: int = 200,
+                 name: str = "llm"):
+        """
+        :param min_limit: Límite inferior de peticiones simultáneas.
+        :param max_limit: Límite superior de peticiones simultáneas.
+        :param initial_limit: Límite con el que se empieza.
+        :param max_queue: Peticiones que pueden esperar turno antes de rechazar.
+        :param queue_timeout: Segundos máximos de espera en cola (None = sin límite).
+        :param latency_tolerance: Múltiplo de la latencia mínima a partir del cual se reduce el límite.
+        :param backoff_ratio: Factor multiplicativo aplicado al reducir el límite.
+        :param window: Número de latencias recientes usadas para la mínima y los percentiles.
+        :param name: Nombre para los logs.
+        """
+        if not 1 <= min_limit <= max_limit:
+            raise ValueError("Se requiere 1 <= min_limit <= max_limit")
+
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.latency_tolerance = latency_tolerance
+        self.backoff_ratio = backoff_ratio
+        self.name = name
+
+        self._limit = float(min(max(initial_limit, min_limit), max_limit))
+        self._inflight = 0
+        self._waiting = 0
+        self._latencies = deque(maxlen=window)
+        self._last_decrease = 0.0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._condition = threading.Condition()
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    def acquire(self, timeout: Optional[float] = None) -> None:
+        """
+        Reserva un hueco, esperando en cola si se ha alcanzado el límite.
+
+        :raises ConcurrencyLimitExceeded: Si la cola está llena o vence la espera.
+        """
+        timeout = self.queue_timeout if timeout is None else timeout
+        with self._condition:
+            if self._inflight < self.limit and not self._waiting:
+                self._inflight += 1
+                return
+
+            if self._waiting >= self.max_queue:
+                self._rejected += 1
+                raise ConcurrencyLimitExceeded(f"Cola de '{self.name}' llena ({self.max_queue} en espera)")
+
+            deadline = None if timeout is None else time.monotonic() + timeout
+            self._waiting += 1
+            try:
+                while self._inflight >= self.limit:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        self._rejected += 1
+                        raise ConcurrencyLimitExceeded(f"Tiempo de espera agotado en la cola de '{self.name}'")
+                    self._condition.wait(remaining)
+                self._inflight += 1
+            finally:
+                self._waiting -= 1
+
+    def release(self, latency: float, success: bool = True) -> None:
+        """
+        Libera el hueco y ajusta el límite con la latencia observada.
+
+        :param latency: Segundos que tardó la llamada.
+        :param success: False si la llamada falló (cuenta como sobrecarga).
+        """
+        with self._condition:
+            saturated = self._inflight >= self.limit
+            self._inflight = max(self._inflight - 1, 0)
+
+            if success:
+                self._completed += 1
+                self._latencies.append(latency)
+                overloaded = latency > min(self._latencies) * self.latency_tolerance
+            else:
+                self._failed += 1
+                overloaded = True
+
+            if overloaded:
+                self._decrease(latency)
+            elif saturated:
+                # Incremento aditivo: +1 por cada "ventana" completa de peticiones
+                self._limit = min(self._limit + 1.0 / self._limit, float(self.max_limit))
+
+            self._condition.notify(max(self.limit - self._inflight, 1))
+
+    def cancel(self) -> None:
+        """
+        Devuelve un hueco reservado con el que no se llegó a hacer la llamada (p. ej.
+        el que obtiene una espera ya cancelada); no ajusta el límite ni cuenta en
+        las estadísticas
+        """
+        with self._condition:
+            self._inflight = max(self._inflight - 1, 0)
+            self._condition.notify()
+
+    def _decrease(self, latency: float) -> None:
+        # Una sola reducción por cada ronda de peticiones en curso: las que ya
+        # estaban en vuelo cuando se detectó la sobrecarga no vuelven a contar.
+        now = time.monotonic()
+        if now - self._last_decrease < latency:
+            return
+        self._last_decrease = now
+        previous = self.limit
+        self._limit = max(self._limit * self.backoff_ratio, float(self.min_limit))
+        if self.limit != previous:
+            logger.info(f"Límite de concurrencia de '{self.name}' reducido de {previous} a {self.limit}")
+
+    @contextmanager
+    def slot(self, timeout: Optional[float] = None) -> Iterator[None]:
+        """
+        Ejecuta el bloque con un hueco reservado y registra su latencia
+
+        Si el bloque está dentro de un generador que el consumidor cierra antes
+        de terminar (``GeneratorExit``, p. ej. un streaming cortado en cuanto el
+        JSON está completo), la llamada cuenta como correcta.
+        """
+        self.acquire(timeout)
+        start = time.perf_counter()
+        success = False
+        try:
+            yield
+            success = True
+        except GeneratorExit:
+            success = True
+            raise
+        finally:
+            self.release(time.perf_counter() - start, success)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Estado actual: límite, peticiones en curso, cola y latencias p50/p95"""
+        with self._condition:
+            ordered = sorted(self._latencies)
+            return {
+                "name": self.name,
+                "limit": self.limit,
+                "min_limit": self.min_limit,
+                "max_limit": self.max_limit,
+                "inflight": self._inflight,
+                "queue_depth": self._waiting,
+                "completed": self._completed,
+                "failed": self._failed,
+                "rejected": self._rejected,
+                "latency_min": ordered[0] if ordered else None,
+                "latency_p50": _percentile(ordered, 0.50),
+                "latency_p95": _percentile(ordered, 0.95)
+            }
+
+
+_ollama_limiter: Optional[AdaptiveConcurrencyLimiter] = None
+_ollama_limiter_lock = threading.Lock()
+
+
+def get_ollama_limiter() -> AdaptiveConcurrencyLimiter:
+    """Limitador compartido por todas las llamadas a Ollama del proceso"""
+    global _ollama_limiter
+    with _ollama_limiter_lock:
+        if _ollama_limiter is None:
+            _ollama_limiter = AdaptiveConcurrencyLimiter(
+                min_limit=config.OLLAMA_MIN_CONCURRENCY,
+                max_limit=config.OLLAMA_MAX_CONCURRENCY,
+                initial_limit=config.OLLAMA_INITIAL_CONCURRENCY,
+                max_queue=config.OLLAMA_QUEUE_MAX,
+                queue_timeout=config.OLLAMA_QUEUE_TIMEOUT or None,
+                name="ollama"
+            )
+        return _ollama_limiter
+
+
+def _limiter_gauge(field: str):
+    def collect():
+        if _ollama_limiter is not None:
+            yield (_ollama_limiter.name,), _ollama_limiter.snapshot()[field]
+    return collect
+
+
+CallbackMetric('llm_concurrency_limit', "Límite actual de peticiones simultáneas al modelo", ['limiter'],
+               _limiter_gauge('limit'))
+CallbackMetric('llm_inflight_requests', "Peticiones al modelo en curso", ['limiter'], _limiter_gauge('inflight'))
+CallbackMetric('llm_queued_requests', "Peticiones esperando turno en el limitador", ['limiter'],
+               _limiter_gauge('queue_depth'))
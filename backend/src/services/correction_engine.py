@@ -0,0 +1,213 @@
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Tuple
+
+from src.config.settings import config
+from src.models.correction import CorrectionResult
+
+@dataclass
+class StreamedCorrection:
+    """
+    Resultado de corrección emitido en cuanto está listo
+    """
+    index: int                 # Posición de la tarea en el lote enviado
+    result: CorrectionResult
+    duration: float            # Segundos que tardó esta corrección
+    elapsed: float             # Segundos desde el inicio del lote
+
+    def to_dict(self) -> dict:
+        return {
+            'index': self.index,
+            'duration': round(self.duration, 3),
+            'elapsed': round(self.elapsed, 3),
+            'result': self.result.to_dict()
+        }
+
+class CorrectionEngine:
+    """
+    Motor de corrección concurrente de larga duración.
+
+    Las correcciones pasan casi todo el tiempo esperando la respuesta de Ollama u
+    OpenAI, así que se ejecutan en un pool de hilos persistente en lugar de crear
+    procesos en cada lote. Cada hilo reutiliza su propio ``CorrectionService`` (y,
+    con él, su estrategia y cliente del modelo).
+    """
+
+    def __init__(self, service_factory: Callable[[], Any], max_concurrency: int, name: str = "correction"):
+        """
+        Inicializa el motor.
+
+        :param service_factory: Función que crea un ``CorrectionService`` para cada hilo.
+        :param max_concurrency: Número máximo de correcciones simultáneas.
+        :param name: Prefijo de los hilos del pool.
+        """
+        self.service_factory = service_factory
+        self.max_concurrency = max_concurrency
+        self._local = threading.local()
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix=name)
+
+    def _service(self):
+        """Servicio del hilo actual, creado la primera vez que se necesita."""
+        service = getattr(self._local, "service", None)
+        if service is None:
+            service = self.service_factory()
+            self._local.service = service
+        return service
+
+    def _correct(self, key_criteria: Optional[Dict], assignment_content: str, language: str) -> CorrectionResult:
+        try:
+            return self._service().correct_assignment(key_criteria, assignment_content, language)
+        except Exception as e:
+            logging.error(f"Error en el motor de corrección: {e}")
+            return CorrectionResult.default_error_result("Error procesando la tarea.")
+
+    def _correct_timed(self, key_criteria: Optional[Dict], assignment_content: str, language: str) -> Tuple[CorrectionResult, float]:
+        start = time.perf_counter()
+        result = self._correct(key_criteria, assignment_content, language)
+        return result, time.perf_counter() - start
+
+    def submit(self, key_criteria: Optional[Dict], assignment_content: str, language: str = "español") -> Future:
+        """
+        Encola la corrección de una tarea.
+
+        :return: Future con el CorrectionResult.
+        """
+        return self._executor.submit(self._correct, key_criteria, assignment_content, language)
+
+    def correct_batch(self, key_criteria: Optional[Dict], assignments: List[str], language: str = "español") -> List[CorrectionResult]:
+        """
+        Corrige varias tareas de forma concurrente.
+
+        :return: Resultados en el mismo orden que ``assignments``.
+        """
+        futures = [self.submit(key_criteria, assignment, language) for assignment in assignments]
+
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                logging.error(f"Error recuperando resultado de corrección: {e}")
+                results.append(CorrectionResult.default_error_result("Error procesando la tarea."))
+        return results
+
+    def iter_batch(self, key_criteria: Optional[Dict], assignments: List[str], language: str = "español") -> Iterator[StreamedCorrection]:
+        """
+        Corrige varias tareas y emite cada resultado en cuanto termina.
+
+        Si el consumidor abandona el iterador (por ejemplo, el cliente HTTP se
+        desconecta), se cancelan las correcciones que aún no han empezado.
+
+        :return: Iterador de StreamedCorrection en orden de finalización.
+        """
+        start = time.perf_counter()
+        futures = {
+            self._executor.submit(self._correct_timed, key_criteria, assignment, language): index
+            for index, assignment in enumerate(assignments)
+        }
+
+        try:
+            for future in as_completed(futures):
+                yield self._to_streamed(futures[future], future, start)
+        finally:
+            for future in futures:
+                future.cancel()
+
+    async def aiter_batch(self, key_criteria: Optional[Dict], assignments: List[str], language: str = "español") -> AsyncIterator[StreamedCorrection]:
+        """
+        Variante asíncrona de ``iter_batch`` para consumidores basados en asyncio.
+
+        :return: Iterador asíncrono de StreamedCorrection en orden de finalización.
+        """
+        start = time.perf_counter()
+        pending = {}
+        for index, assignment in enumerate(assignments):
+            future = self._executor.submit(self._correct_timed, key_criteria, assignment, language)
+            pending[asyncio.wrap_future(future)] = (index, future)
+
+        try:
+            while pending:
+                done, _ = await asyncio.wait(pending.keys(), return_when=asyncio.FIRST_COMPLETED)
+                for wrapped in done:
+                    index, future = pending.pop(wrapped)
+                    yield self._to_streamed(index, future, start)
+        finally:
+            for _, future in pending.values():
+                future.cancel()
+
+    @staticmethod
+    def _to_streamed(index: int, future: Future, start: float) -> StreamedCorrection:
+        try:
+            result, duration = future.result()
+        except Exception as e:
+            logging.error(f"Error recuperando resultado de corrección: {e}")
+            result, duration = CorrectionResult.default_error_result("Error procesando la tarea."), 0.0
+        return StreamedCorrection(index, result, duration, time.perf_counter() - start)
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Detiene el pool de hilos."""
+        self._executor.shutdown(wait=wait)
+
+
+# Un motor por backend, compartido por todo el proceso
+_engines: Dict[str, CorrectionEngine] = {}
+_engines_lock = threading.Lock()
+
+def _max_concurrency(model_type: str) -> int:
+    if model_type == "openai":
+        return config.OPENAI_MAX_CONCURRENCY
+    return config.OLLAMA_MAX_CONCURRENCY
+
+def get_correction_engine(model_type: str = "ollama") -> CorrectionEngine:
+    """
+    Obtiene el motor de corrección del backend indicado, creándolo al primer uso.
+
+    :param model_type: Tipo de modelo ('ollama' o 'openai').
+    :return: CorrectionEngine compartido.
+    """
+    if model_type not in ("ollama", "openai"):
+        model_type = "ollama"
+
+    with _engines_lock:
+        engine = _engines.get(model_type)
+        if engine is None:
+            from src.services.correction_service import CorrectionService
+
+            engine = CorrectionEngine(
+                service_factory=lambda: CorrectionService(model_type),
+                max_concurrency=_max_concurrency(model_type),
+                name=f"correction-{model_type}"
+            )
+            _engines[model_type] = engine
+            logging.info(f"Motor de corrección '{model_type}' iniciado con concurrencia {engine.max_concurrency}")
+        return engine
+
+# Pool separado para los fragmentos de entregas largas: las correcciones del
+# motor esperan a sus fragmentos, así que no pueden compartir el mismo pool.
+_chunk_executor: Optional[ThreadPoolExecutor] = None
+
+def get_chunk_executor() -> ThreadPoolExecutor:
+    """Pool compartido para corregir fragmentos de entregas largas en paralelo."""
+    global _chunk_executor
+    with _engines_lock:
+        if _chunk_executor is None:
+            _chunk_executor = ThreadPoolExecutor(
+                max_workers=config.CORRECTION_CHUNK_CONCURRENCY,
+                thread_name_prefix="correction-chunk"
+            )
+        return _chunk_executor
+
+def shutdown_correction_engines(wait: bool = True) -> None:
+    """Detiene todos los motores de corrección del proceso."""
+    global _chunk_executor
+    with _engines_lock:
+        for engine in _engines.values():
+            engine.shutdown(wait=wait)
+        _engines.clear()
+        if _chunk_executor is not None:
+            _chunk_executor.shutdown(wait=wait)
+            _chunk_executor = None
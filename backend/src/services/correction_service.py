@@ -1,25 +1,29 @@
 import logging
-import os
 import json
 import re
-from typing import Dict, Any, List, Optional
-from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, Iterator, List, Optional
 
-from src.models.correction import CorrectionResult
+from src.config.settings import config
+from src.models.correction import EVALUATION_FIELDS, GRADING_FIELDS, CorrectionResult, validate_evaluation_response
+from src.services.correction_engine import StreamedCorrection, get_chunk_executor, get_correction_engine
 from src.services.file_processor import FileProcessor
-from src.models.model_strategy import OllamaModelStrategy, OpenAIModelStrategy
+from src.models.model_strategy import ModelStrategy, OllamaModelStrategy, OpenAIModelStrategy
 from src.utils.analysis import Analysis
+from src.utils.tokens import estimate_tokens, split_by_token_budget
 
 class CorrectionService:
     """Servicio principal para corrección de tareas"""
 
-    def __init__(self, model_type: str = "ollama"):
+    def __init__(self, model_type: str = "ollama", strategy: Optional[ModelStrategy] = None):
         """
         Inicializa el servicio con la estrategia de modelo apropiada.
 
         :param model_type: Tipo de modelo a utilizar ('ollama' o 'openai').
+        :param strategy: Estrategia ya construida; si se indica, se ignora ``model_type``.
         """
-        if model_type == "openai":
+        if strategy is not None:
+            self.strategy = strategy
+        elif model_type == "openai":
             self.strategy = OpenAIModelStrategy()
         elif model_type == "ollama":
             self.strategy = OllamaModelStrategy()
@@ -42,15 +46,34 @@ class CorrectionService:
         return missing_exercises
 
     @staticmethod
-    def build_prompt(criteria: Optional[Dict], assignment: str, language: str) -> str:
+    def build_prompt(criteria: Optional[Dict], assignment: str, language: str, include_ai_detection: bool = False,
+                     section_label: Optional[str] = None) -> str:
         """
         Construir el prompt para el modelo.
 
         :param criteria: Criterios clave.
         :param assignment: Contenido de la tarea.
         :param language: Idioma de respuesta.
+        :param include_ai_detection: Pedir también el porcentaje de contenido generado con IA
+            en la misma respuesta (modo combinado).
+        :param section_label: Fragmento de una entrega larga que se evalúa por separado.
         :return: Prompt.
         """
+        section_note = ""
+        if section_label:
+            section_note = f"""
+
+            Fragmento evaluado: {section_label}. Es solo una parte de una entrega más larga;
+            evalúa únicamente este fragmento sin penalizar lo que no aparece en él."""
+
+        ai_instruction = ""
+        ai_field = ""
+        if include_ai_detection:
+            ai_instruction = """
+            5. Estima qué porcentaje del texto parece haber sido generado con inteligencia artificial (0-100)."""
+            ai_field = """,
+                "ai_generated_percentage": float (0-100)"""
+
         if criteria:
             return f"""
             Se te proporciona una tarea académica ya completada por un estudiante. Tu objetivo es evaluarla 
@@ -59,13 +82,13 @@ class CorrectionService:
 
             Criterios: {json.dumps(criteria)}
 
-            Tarea del estudiante: {assignment}
+            Tarea del estudiante: {assignment}{section_note}
 
             Instrucciones para la evaluación:
             1. Califica la tarea de 0 a 10 basándote exclusivamente en la calidad técnica de las respuestas proporcionadas y sé crítico.
             2. Proporciona comentarios detallados justificando la calificación asignada.
             3. Identifica puntos fuertes y áreas de mejora específicos.
-            4. Responde estrictamente en el formato JSON proporcionado.
+            4. Responde estrictamente en el formato JSON proporcionado.{ai_instruction}
 
             Idioma de la respuesta: {language}
 
@@ -74,20 +97,20 @@ class CorrectionService:
                 "grade": float (0-10),
                 "comments": "Comentarios detallados",
                 "strengths": ["Punto fuerte 1", ...],
-                "areas_of_improvement": ["Área de mejora 1", ...]
+                "areas_of_improvement": ["Área de mejora 1", ...]{ai_field}
             }}
             """
         return f"""
         Se te proporciona una tarea académica ya completada por un estudiante. Tu objetivo es evaluarla 
         técnicamente. No necesitas crear respuestas ni completar ejercicios, solo evaluar el contenido que se te da.
 
-        Tarea del estudiante: {assignment}
+        Tarea del estudiante: {assignment}{section_note}
 
         Instrucciones para la evaluación:
         1. Califica la tarea de 0 a 10 basándote exclusivamente en la calidad técnica de las respuestas proporcionadas.
         2. Proporciona comentarios detallados justificando la calificación asignada.
         3. Identifica puntos fuertes y áreas de mejora específicos.
-        4. Responde estrictamente en el formato JSON proporcionado.
+        4. Responde estrictamente en el formato JSON proporcionado.{ai_instruction}
 
         Idioma de la respuesta: {language}
 
@@ -96,7 +119,7 @@ class CorrectionService:
             "grade": float (0-10),
             "comments": "Comentarios detallados",
             "strengths": ["Punto fuerte 1", ...],
-            "areas_of_improvement": ["Área de mejora 1", ...]
+            "areas_of_improvement": ["Área de mejora 1", ...]{ai_field}
         }}
         """
     
@@ -110,21 +133,63 @@ class CorrectionService:
         Returns:
             float: Porcentaje estimado de contenido generado con IA.
         """
-        prompt = f"""
-        Analiza el siguiente texto y estima qué porcentaje parece haber sido generado con inteligencia artificial. Responde estrictamente en el siguiente formato JSON:
-        {{
-            "ai_generated_percentage": float (0-100)
-        }}
+        # En entregas largas basta con una muestra que quepa en la ventana de contexto
+        budget = self.chunk_token_budget(None, "español")
+        sample = split_by_token_budget(assignment_content, budget)[0] if assignment_content.strip() else assignment_content
+        return Analysis.detect_ai_content(sample, self.strategy)
+    
+    def evaluate_fused(self, key_criteria: Optional[Dict], assignment_content: str, language: str = "español") -> Dict[str, Any]:
+        """
+        Corrige la tarea y estima el contenido generado con IA en una sola llamada al modelo.
+
+        Cada campo de la respuesta se valida por separado: los que faltan o no son
+        válidos se suplen sin repetir la evaluación completa (una llamada dedicada
+        solo si falta la nota o el porcentaje de IA).
 
-        Texto: {assignment_content}
+        Args:
+            key_criteria (Dict): Criterios de evaluación.
+            assignment_content (str): Contenido de la tarea.
+            language (str): Idioma de la respuesta.
+
+        Returns:
+            Dict[str, Any]: Resultado de la corrección incluyendo porcentaje de IA.
         """
+        if not assignment_content.strip():
+            logging.error("El contenido de la tarea está vacío o no válido.")
+            correction_dict = CorrectionResult.default_error_result("El contenido de la tarea está vacío o no válido.").to_dict()
+            correction_dict["ai_generated_percentage"] = 0.0
+            return correction_dict
+
+        if self.needs_chunking(key_criteria, assignment_content, language):
+            correction_dict = self.correct_long_assignment(key_criteria, assignment_content, language).to_dict()
+            correction_dict["ai_generated_percentage"] = round(self.detect_ai_content(assignment_content), 2)
+            return correction_dict
+
         try:
-            response = self.strategy.evaluate(prompt)
-            return response.get("ai_generated_percentage", 0.0)
+            prompt = self.build_prompt(key_criteria, assignment_content, language, include_ai_detection=True)
+            response = self.strategy.evaluate(prompt, required_fields=EVALUATION_FIELDS)
         except Exception as e:
-            logging.error(f"Error detectando contenido generado con IA: {e}")
-            return 0.0
-    
+            logging.error(f"Error en la evaluación combinada: {e}")
+            response = {"error": str(e)}
+
+        values, invalid = ({}, list(EVALUATION_FIELDS)) if "error" in response else validate_evaluation_response(response)
+        if invalid:
+            logging.warning(f"Evaluación combinada con campos inválidos: {', '.join(invalid)}")
+
+        if "grade" in values:
+            correction_result = CorrectionResult.from_response(values)
+        else:
+            correction_result = self.correct_assignment(key_criteria, assignment_content, language)
+
+        if "ai_generated_percentage" in values:
+            ai_percentage = values["ai_generated_percentage"]
+        else:
+            ai_percentage = self.detect_ai_content(assignment_content)
+
+        correction_dict = correction_result.to_dict()
+        correction_dict["ai_generated_percentage"] = round(ai_percentage, 2)
+        return correction_dict
+
     def correct_assignment_with_ai_detection(self, key_criteria: Optional[Dict], assignment_content: str, language: str = "español") -> Dict[str, Any]:
         """
         Corrige una tarea y detecta contenido generado con IA.
@@ -137,6 +202,9 @@ class CorrectionService:
         Returns:
             Dict[str, Any]: Resultado de la corrección incluyendo porcentaje de IA.
         """
+        if config.CORRECTION_FUSED_MODE:
+            return self.evaluate_fused(key_criteria, assignment_content, language)
+
         correction_result = self.correct_assignment(key_criteria, assignment_content, language)
         ai_percentage = Analysis.detect_ai_content(assignment_content, self.strategy)
         correction_dict = correction_result.to_dict()
@@ -157,12 +225,8 @@ class CorrectionService:
             Dict[str, Any]: Resultado de la corrección con ejercicios faltantes.
         """
         missing_exercises = self.validate_exercises(required_exercises, assignment_content)
-        correction_result = self.correct_assignment(key_criteria, assignment_content, language)
-        ai_percentage = self.detect_ai_content(assignment_content)
-        
-        correction_dict = correction_result.to_dict()
+        correction_dict = self.correct_assignment_with_ai_detection(key_criteria, assignment_content, language)
         correction_dict["missing_exercises"] = missing_exercises
-        correction_dict["ai_generated_percentage"] = round(ai_percentage, 2)
         return correction_dict
 
     def correct_assignment(self, key_criteria: Optional[Dict], assignment_content: str, language: str = "español") -> CorrectionResult:
@@ -181,11 +245,15 @@ class CorrectionService:
             logging.error("El contenido de la tarea está vacío o no válido.")
             return CorrectionResult.default_error_result("El contenido de la tarea está vacío o no válido.")
 
+        # Las entregas que no caben en la ventana de contexto se corrigen por partes
+        if self.needs_chunking(key_criteria, assignment_content, language):
+            return self.correct_long_assignment(key_criteria, assignment_content, language)
+
         try:
             # Construir el prompt
             prompt = self.build_prompt(key_criteria, assignment_content, language)
-            # Evaluar usando la estrategia configurada
-            response = self.strategy.evaluate(prompt)
+            # Evaluar usando la estrategia configurada (con streaming se corta al tener todos los campos)
+            response = self.strategy.evaluate(prompt, required_fields=GRADING_FIELDS)
 
             # Procesar la respuesta
             if "error" in response:
@@ -196,28 +264,132 @@ class CorrectionService:
             logging.error(f"Error en la corrección: {e}")
             return CorrectionResult.default_error_result("Error en la evaluación automática.")
 
+    def chunk_token_budget(self, key_criteria: Optional[Dict], language: str) -> int:
+        """
+        Tokens disponibles para el texto del estudiante en un único prompt.
+
+        Descuenta de la ventana de contexto del modelo el propio prompt y los
+        tokens reservados para la respuesta.
+        """
+        overhead = estimate_tokens(self.build_prompt(key_criteria, "", language, include_ai_detection=True, section_label="Ejercicio 00 (parte 00/00)"))
+        context_tokens = getattr(self.strategy, "context_tokens", ModelStrategy.context_tokens)
+        return max(context_tokens - overhead - config.CORRECTION_RESPONSE_TOKENS, 256)
+
+    def needs_chunking(self, key_criteria: Optional[Dict], assignment_content: str, language: str = "español") -> bool:
+        """Indica si la entrega supera el presupuesto de un solo prompt."""
+        return estimate_tokens(assignment_content) > self.chunk_token_budget(key_criteria, language)
+
     @staticmethod
-    def process_task(args: Dict[str, Any]) -> CorrectionResult:
+    def split_into_chunks(assignment_content: str, max_tokens: int) -> List[Dict[str, Any]]:
         """
-        Método estático para procesar una tarea dentro de un pool de procesos.
+        Divide una entrega en fragmentos que caben en un prompt.
+
+        Se corta primero por ejercicio y, si un ejercicio sigue siendo demasiado
+        largo, por párrafos o frases hasta ajustarse a ``max_tokens``.
 
-        :param args: Diccionario con argumentos necesarios para la corrección.
-        :return: CorrectionResult
+        Returns:
+            List[Dict[str, Any]]: Fragmentos con "exercise" (número o None), "label", "text" y "weight".
         """
+        sections = FileProcessor().split_exercise_sections(assignment_content)
+        if not sections:
+            sections = [{"number": None, "text": assignment_content}]
+
+        chunks = []
+        for section in sections:
+            parts = split_by_token_budget(section["text"], max_tokens)
+            base_label = f"Ejercicio {section['number']}" if section["number"] is not None else "Entrega"
+            for i, part in enumerate(parts, 1):
+                label = f"{base_label} (parte {i}/{len(parts)})" if len(parts) > 1 else base_label
+                chunks.append({"exercise": section["number"], "label": label, "text": part, "weight": len(part)})
+        return chunks
+
+    def _grade_chunk(self, key_criteria: Optional[Dict], chunk: Dict[str, Any], language: str) -> Optional[CorrectionResult]:
         try:
-            service = CorrectionService(args["model_type"])
-            return service.correct_assignment(
-                key_criteria=args["key_criteria"],
-                assignment_content=args["assignment_content"],
-                language=args["language"],
-            )
+            prompt = self.build_prompt(key_criteria, chunk["text"], language, section_label=chunk["label"])
+            response = self.strategy.evaluate(prompt, required_fields=GRADING_FIELDS)
+            if "error" in response:
+                logging.error(f"Error corrigiendo {chunk['label']}: {response['error']}")
+                return None
+            values, _ = validate_evaluation_response(response)
+            if "grade" not in values:
+                return None
+            return CorrectionResult.from_response(values)
         except Exception as e:
-            return CorrectionResult.default_error_result("Error interno en process_task.")
+            logging.error(f"Error corrigiendo {chunk['label']}: {e}")
+            return None
+
+    def correct_long_assignment(self, key_criteria: Optional[Dict], assignment_content: str, language: str = "español") -> CorrectionResult:
+        """
+        Corrige una entrega larga por partes (map-reduce).
+
+        Cada fragmento se corrige en paralelo y los resultados se combinan en un
+        único CorrectionResult: cada ejercicio pesa lo mismo en la nota final, y
+        las partes de un mismo ejercicio se ponderan por su longitud.
+
+        Args:
+            key_criteria (Dict): Criterios de evaluación.
+            assignment_content (str): Contenido de la tarea.
+            language (str): Idioma de la respuesta.
+
+        Returns:
+            CorrectionResult: Resultado combinado con el detalle por fragmento en ``details``.
+        """
+        chunks = self.split_into_chunks(assignment_content, self.chunk_token_budget(key_criteria, language))
+        logging.info(f"Corrección por partes: {len(chunks)} fragmentos")
+
+        executor = get_chunk_executor()
+        futures = [executor.submit(self._grade_chunk, key_criteria, chunk, language) for chunk in chunks]
+        results = [future.result() for future in futures]
+        return self.reduce_chunk_results(chunks, results)
+
+    @staticmethod
+    def reduce_chunk_results(chunks: List[Dict[str, Any]], results: List[Optional[CorrectionResult]]) -> CorrectionResult:
+        """
+        Combina los resultados por fragmento en un único CorrectionResult.
+
+        Los fragmentos sin resultado (None) se excluyen de la nota y se marcan
+        con ``error`` en el detalle.
+        """
+        details = []
+        groups: Dict[Any, List[tuple]] = {}
+        comments, strengths, improvements = [], [], []
+
+        for chunk, result in zip(chunks, results):
+            details.append({
+                "label": chunk["label"],
+                "exercise": chunk["exercise"],
+                "grade": round(result.grade, 2) if result else None,
+                "comments": result.comments if result else "No se pudo evaluar este fragmento.",
+                "error": result is None
+            })
+            if result is None:
+                continue
+            groups.setdefault(chunk["exercise"], []).append((chunk["weight"], result.grade))
+            comments.append(f"{chunk['label']}: {result.comments}")
+            strengths.extend(item for item in result.strengths if item not in strengths)
+            improvements.extend(item for item in result.areas_of_improvement if item not in improvements)
+
+        if not groups:
+            error_result = CorrectionResult.default_error_result("Error en la evaluación automática.")
+            error_result.details = details
+            return error_result
+
+        group_grades = [
+            sum(weight * grade for weight, grade in items) / sum(weight for weight, _ in items)
+            for items in groups.values()
+        ]
+        return CorrectionResult(
+            grade=sum(group_grades) / len(group_grades),
+            comments="\n".join(comments),
+            strengths=strengths[:10],
+            areas_of_improvement=improvements[:10],
+            details=details
+        )
 
     @classmethod
     def batch_correction(cls, model_type: str, key_criteria: Optional[Dict], assignments: List[str], language: str = "español") -> List[CorrectionResult]:
         """
-        Corrige múltiples tareas en paralelo.
+        Corrige múltiples tareas en paralelo usando el motor de corrección persistente del backend.
 
         Args:
             model_type (str): Tipo de modelo ('ollama' o 'openai').
@@ -226,28 +398,22 @@ class CorrectionService:
             language (str): Idioma de la respuesta.
 
         Returns:
-            List[CorrectionResult]: Lista de resultados.
-        """
-        tasks = [
-            {
-                "model_type": model_type,
-                "key_criteria": key_criteria,
-                "assignment_content": assignment,
-                "language": language,
-            }
-            for assignment in assignments
-        ]
+            List[CorrectionResult]: Lista de resultados en el orden de entrada.
+        """
+        return get_correction_engine(model_type).correct_batch(key_criteria, assignments, language)
 
-        results = []
-        with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
-            # Crear tareas de corrección
-            futures = [executor.submit(CorrectionService.process_task, task) for task in tasks]
+    @classmethod
+    def stream_batch_correction(cls, model_type: str, key_criteria: Optional[Dict], assignments: List[str], language: str = "español") -> Iterator[StreamedCorrection]:
+        """
+        Corrige múltiples tareas en paralelo emitiendo cada resultado en cuanto está listo.
 
-            # Recopilar resultados
-            for future in futures:
-                try:
-                    results.append(future.result())
-                except Exception as e:
-                    results.append(CorrectionResult.default_error_result("Error procesando la tarea."))
+        Args:
+            model_type (str): Tipo de modelo ('ollama' o 'openai').
+            key_criteria (Optional[Dict]): Criterios de evaluación.
+            assignments (List[str]): Lista de contenidos de tareas.
+            language (str): Idioma de la respuesta.
 
-        return results
+        Returns:
+            Iterator[StreamedCorrection]: Resultados en orden de finalización, etiquetados con su índice.
+        """
+        return get_correction_engine(model_type).iter_batch(key_criteria, assignments, language)
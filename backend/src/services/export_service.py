@@ -0,0 +1,300 @@
+"""
+Exportación masiva de correcciones: un ZIP con un PDF por estudiante
+"""
+import json
+import logging
+import multiprocessing
+import os
+import tempfile
+import time
+import uuid
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, Optional
+
+from werkzeug.utils import secure_filename
+
+from ..config.settings import config
+from ..database.database import db
+from ..database.models import Assignment, Correction
+from ..jobs import get_job_queue, get_scheduler
+from ..utils.correction_pdf import render_correction_pdf
+from ..utils.pdf_styles import get_pdf_styles
+
+logger = logging.getLogger(__name__)
+
+# Tipo de trabajo de la exportación en segundo plano
+BULK_EXPORT_JOB = 'assignment.bulk_export'
+
+# Correcciones leídas de la base de datos en cada lote
+EXPORT_FETCH_SIZE = 200
+
+# Segundos entre dos limpiezas de exportaciones terminadas
+PURGE_INTERVAL = 600
+# Tarea periódica que elimina los ZIP ya caducados
+PURGE_EXPORTS_TASK = 'exports.purge_finished'
+
+
+def _init_render_process() -> None:
+    """Inicializador de cada proceso del pool: carga ReportLab y los estilos una vez"""
+    get_pdf_styles()
+
+
+class BulkExportService:
+    """
+    Genera en segundo plano un ZIP con el PDF de retroalimentación de cada
+    corrección de una asignación.
+
+    Los PDF se generan en un pool de procesos y se escriben en el ZIP según
+    terminan, directamente en disco: en memoria solo hay, como mucho, una
+    ventana de ``EXPORT_PROCESS_WORKERS * 4`` documentos. El estado de cada
+    exportación (progreso, errores, tamaño) se guarda en un JSON junto al ZIP
+    para que el proceso web pueda consultarlo aunque el trabajo corra en otro
+    worker. Pasados ``EXPORT_RETENTION`` segundos desde que terminan, el ZIP
+    y su estado se eliminan.
+    """
+
+    def __init__(self):
+        self.export_folder = os.path.join(config.UPLOAD_FOLDER, 'exports')
+        os.makedirs(self.export_folder, exist_ok=True)
+        self.job_queue = get_job_queue()
+        self.job_queue.register(BULK_EXPORT_JOB, self._process_export, on_failure=self._on_export_failed)
+        get_scheduler().register(PURGE_EXPORTS_TASK, self.purge_finished, PURGE_INTERVAL)
+
+    # Estado de las exportaciones
+
+    def _status_path(self, export_id: str) -> str:
+        return os.path.join(self.export_folder, f"{secure_filename(export_id)}.json")
+
+    def _zip_path(self, export_id: str) -> str:
+        return os.path.join(self.export_folder, f"{secure_filename(export_id)}.zip")
+
+    def _read_status(self, export_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._status_path(export_id), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def _write_status(self, status: Dict[str, Any]) -> None:
+        # Escritura atómica: el lector nunca ve un JSON a medias
+        fd, tmp_path = tempfile.mkstemp(dir=self.export_folder, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(status, f)
+        os.replace(tmp_path, self._status_path(status['id']))
+
+    def _discard(self, export_id: str) -> None:
+        zip_path = self._zip_path(export_id)
+        for path in (zip_path, zip_path + '.part', self._status_path(export_id)):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    # API del servicio
+
+    def start_export(self, assignment_id: str, teacher_id: str) -> Dict[str, Any]:
+        """
+        Encola la exportación de las correcciones de una asignación
+
+        :return: Estado inicial de la exportación o ``error``
+        """
+        assignment = db.session.query(Assignment.id, Assignment.title).filter(
+            Assignment.id == assignment_id,
+            Assignment.teacher_id == teacher_id
+        ).first()
+        if not assignment:
+            return {"error": "Asignación no encontrada"}
+
+        total = db.session.query(Correction.id).filter(Correction.assignment_id == assignment_id).count()
+        if total == 0:
+            return {"error": "La asignación no tiene correcciones"}
+
+        export_id = str(uuid.uuid4())
+        status = {
+            "id": export_id,
+            "assignment_id": str(assignment_id),
+            "teacher_id": str(teacher_id),
+            "filename": f"correcciones_{secure_filename(assignment.title) or 'asignacion'}.zip",
+            "status": "queued",
+            "total": total,
+            "done": 0,
+            "failed": 0,
+            "errors": [],
+            "size": None,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "finished_at": None
+        }
+        self._write_status(status)
+        self.job_queue.enqueue(BULK_EXPORT_JOB, {"export_id": export_id})
+        return status
+
+    def get_export(self, export_id: str, teacher_id: str) -> Optional[Dict[str, Any]]:
+        """Estado de una exportación del profesor, o None si no existe"""
+        status = self._read_status(export_id)
+        if status is None or status['teacher_id'] != str(teacher_id):
+            return None
+        return status
+
+    def get_export_file(self, export_id: str, teacher_id: str) -> Dict[str, Any]:
+        """
+        Archivo de una exportación terminada
+
+        :return: ``path`` y ``filename``, o ``error``
+        """
+        status = self.get_export(export_id, teacher_id)
+        if status is None:
+            return {"error": "Exportación no encontrada"}
+        if status['status'] != 'completed':
+            return {"error": "La exportación todavía no ha terminado", "status": status['status']}
+        return {"path": self._zip_path(export_id), "filename": status['filename']}
+
+    # Trabajo en segundo plano
+
+    def _assignment_info(self, assignment_id: str) -> Optional[Dict[str, Any]]:
+        """Título y puntuación total de la asignación, o None si ya no existe"""
+        assignment = db.session.query(Assignment.title, Assignment.total_points).filter(
+            Assignment.id == assignment_id
+        ).first()
+        if not assignment:
+            return None
+        return {"title": assignment.title, "total_points": assignment.total_points}
+
+    def _iter_corrections(self, assignment_id: str) -> Iterator[Dict[str, Any]]:
+        """Correcciones como diccionarios serializables, leídas por lotes"""
+        query = db.session.query(
+            Correction.id, Correction.student_name, Correction.total_score, Correction.max_score,
+            Correction.percentage, Correction.correction_details, Correction.feedback,
+            Correction.suggestions, Correction.created_at
+        ).filter(
+            Correction.assignment_id == assignment_id
+        ).order_by(Correction.student_name, Correction.id).execution_options(yield_per=EXPORT_FETCH_SIZE)
+
+        for row in query:
+            yield {
+                "id": str(row.id),
+                "student_name": row.student_name,
+                "total_score": row.total_score or 0.0,
+                "max_score": row.max_score or 0.0,
+                "percentage": row.percentage or 0.0,
+                "correction_details": row.correction_details,
+                "feedback": row.feedback,
+                "suggestions": row.suggestions,
+                "created_at": row.created_at.isoformat() if row.created_at else None
+            }
+
+    @staticmethod
+    def _entry_name(index: int, correction: Dict[str, Any]) -> str:
+        student = secure_filename(correction['student_name'] or '') or 'estudiante'
+        return f"{index:04d}_{student}.pdf"
+
+    def _process_export(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Genera el ZIP de una exportación (manejador del trabajo)"""
+        export_id = payload['export_id']
+        status = self._read_status(export_id)
+        if status is None:
+            raise ValueError(f"Exportación {export_id} no encontrada")
+
+        assignment_info = self._assignment_info(status['assignment_id'])
+        if assignment_info is None:
+            raise ValueError(f"Asignación {status['assignment_id']} no encontrada")
+
+        status.update(status="running", done=0, failed=0, errors=[])
+        self._write_status(status)
+
+        workers = config.EXPORT_PROCESS_WORKERS or os.cpu_count() or 1
+        window = workers * 4
+        zip_path = self._zip_path(export_id)
+        tmp_path = zip_path + '.part'
+        last_report = [time.monotonic()]
+
+        # 'spawn': los hijos no heredan conexiones ni hilos del worker
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                                 initializer=_init_render_process) as pool, \
+                zipfile.ZipFile(tmp_path, 'w', compression=zipfile.ZIP_STORED, allowZip64=True) as archive:
+            pending = deque()
+
+            def _drain_one():
+                index, correction, future = pending.popleft()
+                try:
+                    # Los PDF ya van comprimidos: se guardan sin volver a comprimir
+                    archive.writestr(self._entry_name(index, correction), future.result())
+                    status['done'] += 1
+                except Exception as e:
+                    status['failed'] += 1
+                    if len(status['errors']) < 20:
+                        status['errors'].append({"student_name": correction['student_name'], "error": str(e)})
+                    logger.warning(f"Error generando PDF de la corrección {correction['id']}: {e}")
+                # Progreso como mucho una vez por segundo
+                if time.monotonic() - last_report[0] >= 1.0:
+                    self._write_status(status)
+                    last_report[0] = time.monotonic()
+
+            for index, correction in enumerate(self._iter_corrections(status['assignment_id']), 1):
+                pending.append((index, correction, pool.submit(render_correction_pdf, assignment_info, correction)))
+                if len(pending) >= window:
+                    _drain_one()
+
+            while pending:
+                _drain_one()
+
+        os.replace(tmp_path, zip_path)
+        status.update(
+            status="completed",
+            size=os.path.getsize(zip_path),
+            finished_at=datetime.now(timezone.utc).isoformat()
+        )
+        self._write_status(status)
+        logger.info(f"Exportación {export_id} completada: {status['done']} PDF, {status['failed']} errores")
+        return {"done": status['done'], "failed": status['failed'], "size": status['size']}
+
+    def _on_export_failed(self, payload: Dict[str, Any], error_message: str) -> None:
+        """Marca la exportación como fallida cuando se agotan los intentos"""
+        status = self._read_status(payload.get('export_id', ''))
+        if status is None:
+            return
+        status.update(status="error", error=error_message, finished_at=datetime.now(timezone.utc).isoformat())
+        self._write_status(status)
+        part = self._zip_path(status['id']) + '.part'
+        if os.path.exists(part):
+            os.remove(part)
+
+    def purge_finished(self) -> int:
+        """
+        Elimina las exportaciones terminadas hace más de ``EXPORT_RETENTION`` segundos
+
+        Los ZIP o archivos parciales sin estado (de una exportación borrada a
+        medias) se eliminan según su fecha de modificación.
+
+        :return: Número de exportaciones eliminadas
+        """
+        cutoff = time.time() - config.EXPORT_RETENTION
+        removed = set()
+        for name in os.listdir(self.export_folder):
+            if name.endswith('.zip.part'):
+                export_id = name[:-len('.zip.part')]
+            elif name.endswith(('.zip', '.json')):
+                export_id = os.path.splitext(name)[0]
+            else:
+                continue
+            if export_id in removed:
+                continue
+
+            status = self._read_status(export_id)
+            if status is not None:
+                finished_at = status.get('finished_at')
+                if finished_at is None or datetime.fromisoformat(finished_at).timestamp() >= cutoff:
+                    continue
+            else:
+                try:
+                    if os.path.getmtime(os.path.join(self.export_folder, name)) >= cutoff:
+                        continue
+                except FileNotFoundError:
+                    continue
+            self._discard(export_id)
+            removed.add(export_id)
+        if removed:
+            logger.info(f"Exportaciones caducadas eliminadas: {len(removed)}")
+        return len(removed)
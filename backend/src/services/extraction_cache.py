@@ -0,0 +1,249 @@
+"""
+Caché en disco de la extracción de contenido de archivos (PDF y Word)
+
+Uso como herramienta de línea de comandos (desde backend/)::
+
+    python -m src.services.extraction_cache stats
+    python -m src.services.extraction_cache warm uploads/ otra_carpeta/archivo.pdf
+    python -m src.services.extraction_cache purge [--older-than-days 30] [--stale-only]
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from ..config.settings import config
+from ..utils.metrics import register_cache
+
+logger = logging.getLogger(__name__)
+
+# Tamaño de los bloques leídos al calcular el hash de un archivo
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def file_sha256(file_path: str) -> str:
+    """SHA-256 de los bytes de un archivo, leído por bloques"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ExtractionCache:
+    """
+    Guarda el resultado de ``FileProcessor`` en ``<directorio>/<hash[:2]>/<hash>-v<versión>.json``.
+
+    La clave es el SHA-256 de los bytes del archivo más la versión del
+    extractor: el mismo documento subido de nuevo, corregido otra vez o
+    reintentado no se vuelve a analizar, y cambiar el extractor invalida las
+    entradas antiguas sin borrarlas a mano. Al superar ``max_bytes`` se eliminan
+    las entradas usadas hace más tiempo.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        """
+        :param directory: Carpeta de la caché
+        :param max_bytes: Tamaño total máximo de las entradas
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.errors = 0
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, sha256: str, version: str) -> str:
+        return os.path.join(self.directory, sha256[:2], f"{sha256}-v{version}.json")
+
+    def get(self, sha256: str, version: str) -> Optional[Dict[str, Any]]:
+        """
+        Entrada cacheada (``text`` y ``result``) o None si no existe
+        """
+        path = self._path(sha256, version)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+            # La fecha de modificación marca el último uso para el desalojo
+            os.utime(path)
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Entrada de extracción corrupta {path}: {e}")
+            with self._lock:
+                self.errors += 1
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return entry
+
+    def put(self, sha256: str, version: str, text: str, result: Dict[str, Any]) -> None:
+        """Guarda el texto extraído y el contenido estructurado de un archivo"""
+        path = self._path(sha256, version)
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        entry = {"sha256": sha256, "version": version, "text": text, "result": result}
+
+        # Escritura atómica: otro proceso nunca lee una entrada a medias
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(entry, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        with self._lock:
+            self.stores += 1
+        self._evict()
+
+    def _scan(self):
+        entries = []
+        for root, _dirs, files in os.walk(self.directory):
+            for name in files:
+                if not name.endswith('.json'):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def _evict(self) -> None:
+        entries = self._scan()
+        total = sum(size for _, size, _ in entries)
+        if total <= self.max_bytes:
+            return
+        for _, size, path in sorted(entries):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            if total <= self.max_bytes:
+                break
+        logger.info(f"Caché de extracción reducida a {total} bytes")
+
+    def purge(self, older_than: Optional[float] = None, keep_version: Optional[str] = None) -> int:
+        """
+        Elimina entradas de la caché
+
+        :param older_than: Solo las no usadas en este número de segundos
+        :param keep_version: Conservar las entradas de esta versión del extractor
+        :return: Número de entradas eliminadas
+        """
+        now = time.time()
+        removed = 0
+        for mtime, _, path in self._scan():
+            if older_than is not None and now - mtime < older_than:
+                continue
+            if keep_version is not None and path.endswith(f"-v{keep_version}.json"):
+                continue
+            try:
+                os.remove(path)
+                removed += 1
+            except FileNotFoundError:
+                pass
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        """Estadísticas de uso de la caché (los contadores son de este proceso)"""
+        entries = self._scan()
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(entries),
+            "bytes": sum(size for _, size, _ in entries),
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "errors": self.errors,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None
+        }
+
+
+# Caché compartida por el proceso (se crea al primer uso)
+_extraction_cache: Optional[ExtractionCache] = None
+_extraction_cache_lock = threading.Lock()
+
+
+def get_extraction_cache() -> Optional[ExtractionCache]:
+    """Caché de extracción del proceso, o None si EXTRACTION_CACHE_ENABLED es false"""
+    global _extraction_cache
+    if not config.EXTRACTION_CACHE_ENABLED:
+        return None
+    with _extraction_cache_lock:
+        if _extraction_cache is None:
+            _extraction_cache = ExtractionCache(
+                config.EXTRACTION_CACHE_FOLDER or os.path.join(config.UPLOAD_FOLDER, 'extraction_cache'),
+                config.EXTRACTION_CACHE_MAX_BYTES
+            )
+            register_cache('extraction', _extraction_cache)
+        return _extraction_cache
+
+
+def main(argv=None) -> None:
+    from .file_processor import EXTRACTOR_VERSION, FileProcessor
+
+    parser = argparse.ArgumentParser(description="Gestión de la caché de extracción de archivos")
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('stats', help="Muestra el tamaño de la caché")
+    warm = commands.add_parser('warm', help="Procesa archivos o carpetas para llenar la caché")
+    warm.add_argument('paths', nargs='+')
+    purge = commands.add_parser('purge', help="Elimina entradas de la caché")
+    purge.add_argument('--older-than-days', type=float, default=None,
+                       help="Solo las entradas no usadas en estos días")
+    purge.add_argument('--stale-only', action='store_true',
+                       help="Solo las entradas de versiones anteriores del extractor")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    cache = get_extraction_cache()
+    if cache is None:
+        parser.error("La caché de extracción está desactivada (EXTRACTION_CACHE_ENABLED=false)")
+
+    if args.command == 'stats':
+        print(json.dumps(cache.stats(), indent=2))
+
+    elif args.command == 'warm':
+        processor = FileProcessor(cache=cache)
+        processed = failed = 0
+        for root_path in args.paths:
+            if os.path.isdir(root_path):
+                files = [os.path.join(root, name) for root, _dirs, names in os.walk(root_path) for name in names]
+            else:
+                files = [root_path]
+            for file_path in files:
+                if os.path.splitext(file_path)[1].lower() not in processor.supported_formats:
+                    continue
+                try:
+                    processor.process_file(file_path)
+                    processed += 1
+                except Exception as e:
+                    failed += 1
+                    logger.warning(f"No se pudo procesar {file_path}: {e}")
+        stats = cache.stats()
+        print(f"Procesados: {processed}, errores: {failed}, "
+              f"ya en caché: {stats['hits']}, nuevos: {stats['stores']}")
+
+    elif args.command == 'purge':
+        older_than = args.older_than_days * 86400 if args.older_than_days is not None else None
+        removed = cache.purge(older_than, keep_version=EXTRACTOR_VERSION if args.stale_only else None)
+        print(f"Entradas eliminadas: {removed}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,19 +1,197 @@
+import faulthandler
 import json
+import mmap
+import multiprocessing
+import os
 import re
-from typing import Dict, List, Any, Optional
+import shutil
+import signal
+import tempfile
+import threading
+import time
+from typing import BinaryIO, Dict, List, Any, Optional, Tuple, Union
 from pathlib import Path
-import PyPDF2
-import docx
-from docx import Document
 import logging
 
+from ..config.settings import config
+from ..utils.exercise_parser import extract_exercises, find_exercise_headers
+from ..utils.metrics import SLOW_BUCKETS, Histogram
+from ..utils.tracing import child_span
+from .extraction_cache import ExtractionCache, file_sha256
+
 logger = logging.getLogger(__name__)
 
+# PyPDF2 y python-docx se importan al leer el primer archivo de cada tipo, no al
+# arrancar la aplicación
+
+# Pool de procesos para extraer PDF grandes por páginas (se crea al primer uso)
+_pdf_pool = None
+_pdf_pool_size = 0
+_pdf_pool_lock = threading.Lock()
+
+# PDF abierto en el proceso del pool: (ruta, mtime, tamaño, archivo, mmap, lector)
+_worker_pdf = None
+
+
+def _page_watchdog(timeout: float) -> float:
+    """Segundos tras los que se termina un proceso atascado con una página"""
+    return 2 * timeout + 1.0
+
+
+def _pdf_worker_count() -> int:
+    if config.PDF_EXTRACTION_WORKERS > 0:
+        return config.PDF_EXTRACTION_WORKERS
+    return min(4, os.cpu_count() or 1)
+
+
+class _PageTimeout(BaseException):
+    """
+    La página superó su tiempo en el proceso del pool
+
+    Hereda de ``BaseException`` porque PyPDF2 captura ``Exception`` en muchos
+    puntos y seguiría extrayendo.
+    """
+
+
+def _on_page_alarm(signum, frame):
+    raise _PageTimeout()
+
+
+def _init_pdf_worker() -> None:
+    if hasattr(signal, 'setitimer'):
+        signal.signal(signal.SIGALRM, _on_page_alarm)
+
+
+def _worker_page_text(file_path: str, page_index: int, timeout: float) -> Optional[str]:
+    """
+    Texto de una página, o None si tarda más de ``timeout`` segundos (se
+    ejecuta en un proceso del pool)
+    
+    Cada proceso abre el PDF una sola vez, mapeado en memoria, y lo reutiliza
+    para todas las páginas que le tocan mientras el archivo no cambie.
+    
+    El tiempo se mide desde que el proceso empieza la página, con una alarma
+    que interrumpe la extracción y deja el proceso libre para la siguiente.
+    Si la página está atascada en código nativo, donde la alarma no llega,
+    ``faulthandler`` termina el proceso (``_page_watchdog``) y el pool lo
+    sustituye sin afectar a las demás extracciones.
+    """
+    global _worker_pdf
+    faulthandler.dump_traceback_later(_page_watchdog(timeout), exit=True)
+    alarm = hasattr(signal, 'setitimer')
+    if alarm:
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        stat = os.stat(file_path)
+        key = (file_path, stat.st_mtime_ns, stat.st_size)
+        if _worker_pdf is None or _worker_pdf[:3] != key:
+            if _worker_pdf is not None:
+                _worker_pdf[4].close()
+                _worker_pdf[3].close()
+                _worker_pdf = None
+            import PyPDF2
+
+            handle = open(file_path, 'rb')
+            mapped = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+            _worker_pdf = key + (handle, mapped, PyPDF2.PdfReader(mapped))
+        return _worker_pdf[5].pages[page_index].extract_text()
+    except _PageTimeout:
+        # La alarma puede cortar el lector a medias: se vuelve a abrir en la siguiente página
+        if _worker_pdf is not None:
+            _worker_pdf[4].close()
+            _worker_pdf[3].close()
+            _worker_pdf = None
+        return None
+    finally:
+        if alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+        faulthandler.cancel_dump_traceback_later()
+
+
+def _get_pdf_pool(workers: int):
+    global _pdf_pool, _pdf_pool_size
+    with _pdf_pool_lock:
+        if _pdf_pool is None or _pdf_pool_size != workers:
+            if _pdf_pool is not None:
+                _pdf_pool.terminate()
+            # 'spawn': los hijos no heredan hilos ni conexiones del proceso web
+            _pdf_pool = multiprocessing.get_context('spawn').Pool(processes=workers, initializer=_init_pdf_worker)
+            _pdf_pool_size = workers
+        return _pdf_pool
+
+
+def _extract_pages_parallel(file_path: str, page_count: int, workers: int,
+                            timeout: Optional[float] = None) -> Tuple[List[str], List[int]]:
+    """
+    Extrae las páginas de un PDF en paralelo, en orden
+    
+    Cada página dispone de ``timeout`` segundos (``PDF_PAGE_TIMEOUT`` por
+    defecto) desde que un proceso la empieza; si se superan, se omite (texto
+    vacío). El pool es compartido y nunca se reinicia por una página lenta, así
+    que las demás extracciones en curso no se ven afectadas.
+    
+    La espera tiene un único plazo para todo el documento, por si un proceso
+    muere con una página (ver ``_worker_page_text``): el peor caso de cada
+    página repartido entre los procesos.
+    """
+    timeout = config.PDF_PAGE_TIMEOUT if timeout is None else timeout
+    pool = _get_pdf_pool(workers)
+    pending = [pool.apply_async(_worker_page_text, (file_path, index, timeout)) for index in range(page_count)]
+    rounds = -(-page_count // workers)
+    deadline = time.monotonic() + _page_watchdog(timeout) * (rounds + 1)
+    pages, skipped = [], []
+    for index, result in enumerate(pending):
+        try:
+            text = result.get(timeout=max(0.0, deadline - time.monotonic()))
+        except multiprocessing.TimeoutError:
+            text = None
+        if text is None:
+            skipped.append(index + 1)
+            text = ""
+        pages.append(text)
+    return pages, skipped
+
+
+def _extract_stream_pages_parallel(stream: BinaryIO, page_count: int, workers: int) -> Tuple[List[str], List[int]]:
+    """
+    ``_extract_pages_parallel`` para un archivo abierto sin ruta en disco (una
+    subida en memoria o en un temporal anónimo): los procesos del pool leen una
+    copia en ``TEMP_FOLDER`` que se borra al terminar
+    """
+    os.makedirs(config.TEMP_FOLDER, exist_ok=True)
+    with tempfile.NamedTemporaryFile(suffix='.pdf', dir=config.TEMP_FOLDER) as copy:
+        stream.seek(0)
+        shutil.copyfileobj(stream, copy)
+        copy.flush()
+        return _extract_pages_parallel(copy.name, page_count, workers)
+
+
+def _stream_path(stream: BinaryIO) -> Optional[str]:
+    """Ruta de un archivo abierto con ``open`` (p. ej. una subida por partes), o None"""
+    name = getattr(stream, 'name', None)
+    if isinstance(name, str) and os.path.isfile(name):
+        return name
+    return None
+
+
+# Versión del extractor: cambiarla al modificar la extracción invalida la caché
+EXTRACTOR_VERSION = "2"
+
+# Solo extracciones reales (los aciertos de caché se ven en cache_hits_total)
+EXTRACTION_DURATION = Histogram(
+    'file_extraction_duration_seconds', "Duración de la extracción de texto y estructura de un archivo",
+    ['format'], buckets=SLOW_BUCKETS
+)
+
 class FileProcessor:
     """Servicio para procesar archivos PDF y Word y extraer contenido estructurado"""
     
-    def __init__(self):
+    def __init__(self, cache: Optional[ExtractionCache] = None):
+        """
+        :param cache: Caché de extracción por hash del archivo (opcional)
+        """
         self.supported_formats = ['.pdf', '.docx', '.doc']
+        self.cache = cache
     
     def process_file(self, file_path: str) -> Dict[str, Any]:
         """
@@ -25,6 +203,37 @@ class FileProcessor:
         Returns:
             Dict con el contenido estructurado
         """
+        _, result = self._extract(file_path)
+        return result
+    
+    def extract_text(self, file_path: str) -> str:
+        """
+        Texto completo de un archivo PDF o Word (comparte la caché con ``process_file``)
+        """
+        text, _ = self._extract(file_path)
+        return text
+    
+    def process_stream(self, stream: BinaryIO, extension: str, sha256: Optional[str] = None,
+                       source_name: str = '') -> Dict[str, Any]:
+        """
+        Procesa un archivo ya abierto, p. ej. una subida guardada en un ``SpooledTemporaryFile``
+        
+        Args:
+            stream: Archivo binario con posibilidad de ``seek``
+            extension: Formato del archivo ('.pdf', '.docx' o '.doc')
+            sha256: Hash del contenido ya calculado (evita volver a leerlo para la caché)
+            source_name: Nombre con el que se identifica el archivo en el resultado
+            
+        Returns:
+            Dict con el contenido estructurado
+        """
+        if extension not in self.supported_formats:
+            raise ValueError(f"Formato no soportado: {extension}")
+        _, result = self._extract_source(stream, extension, sha256, source_name)
+        return result
+    
+    def _extract(self, file_path: str) -> Tuple[str, Dict[str, Any]]:
+        """Texto y contenido estructurado, desde la caché si el archivo ya se procesó"""
         file_path = Path(file_path)
         
         if not file_path.exists():
@@ -33,38 +242,96 @@ class FileProcessor:
         if file_path.suffix.lower() not in self.supported_formats:
             raise ValueError(f"Formato no soportado: {file_path.suffix}")
         
-        try:
-            if file_path.suffix.lower() == '.pdf':
-                return self._process_pdf(file_path)
-            elif file_path.suffix.lower() in ['.docx', '.doc']:
-                return self._process_docx(file_path)
-        except Exception as e:
-            logger.error(f"Error procesando archivo {file_path}: {str(e)}")
-            raise
+        sha256 = file_sha256(str(file_path)) if self.cache is not None else None
+        return self._extract_source(file_path, file_path.suffix.lower(), sha256, str(file_path))
     
-    def _process_pdf(self, file_path: Path) -> Dict[str, Any]:
-        """Procesa un archivo PDF"""
-        content = ""
-        
-        with open(file_path, 'rb') as file:
-            pdf_reader = PyPDF2.PdfReader(file)
+    def _extract_source(self, source: Union[Path, BinaryIO], extension: str, sha256: Optional[str],
+                        source_file: str) -> Tuple[str, Dict[str, Any]]:
+        """Extracción de una ruta o un archivo abierto, pasando por la caché si hay hash"""
+        with child_span('file.extract', {'file.format': extension.lstrip('.')}) as span:
+            if self.cache is not None and sha256:
+                entry = self.cache.get(sha256, EXTRACTOR_VERSION)
+                span.set_attribute('cache.hit', entry is not None)
+                if entry is not None:
+                    # El resultado es el mismo para cualquier copia del archivo salvo la ruta
+                    result = dict(entry['result'], source_file=source_file)
+                    return entry['text'], result
+            
+            start = time.perf_counter()
+            try:
+                skipped_pages = []
+                if extension == '.pdf':
+                    text, skipped_pages = self._read_pdf_text(source)
+                else:
+                    text = self._read_docx_text(source)
+            except Exception as e:
+                logger.error(f"Error procesando archivo {source_file}: {str(e)}")
+                raise
             
-            for page_num, page in enumerate(pdf_reader.pages):
-                page_text = page.extract_text()
-                content += f"\n--- Página {page_num + 1} ---\n"
-                content += page_text
+            result = self._extract_structured_content(text, source_file)
+            EXTRACTION_DURATION.labels(extension.lstrip('.')).observe(time.perf_counter() - start)
+            span.set_attribute('file.content_length', len(text))
+            
+            if skipped_pages:
+                # Resultado incompleto: se devuelve pero no se guarda en caché
+                logger.warning(f"Páginas omitidas por tiempo en {source_file}: {skipped_pages}")
+                result["extraction_metadata"]["skipped_pages"] = skipped_pages
+            elif self.cache is not None and sha256:
+                try:
+                    self.cache.put(sha256, EXTRACTOR_VERSION, text, result)
+                except OSError as e:
+                    logger.warning(f"No se pudo guardar la extracción de {source_file} en caché: {str(e)}")
+            return text, result
+    
+    def _read_pdf_text(self, source: Union[Path, BinaryIO]) -> Tuple[str, List[int]]:
+        """
+        Extrae el texto de un archivo PDF (ruta o archivo abierto)
+        
+        Los documentos con al menos ``PDF_PARALLEL_MIN_PAGES`` páginas se
+        reparten por páginas entre el pool de procesos, que abren el archivo por
+        su ruta. Un archivo abierto sin ruta en disco (una subida en memoria) se
+        copia antes a un temporal para que también tenga ``PDF_PAGE_TIMEOUT``.
         
-        return self._extract_structured_content(content, str(file_path))
+        Returns:
+            Texto con un separador por página y números de las páginas omitidas
+            por superar ``PDF_PAGE_TIMEOUT``
+        """
+        if isinstance(source, Path):
+            with open(source, 'rb') as file:
+                return self._read_pdf_pages(file, str(source))
+        source.seek(0)
+        return self._read_pdf_pages(source, _stream_path(source))
     
-    def _process_docx(self, file_path: Path) -> Dict[str, Any]:
-        """Procesa un archivo Word"""
-        doc = Document(file_path)
-        content = ""
+    def _read_pdf_pages(self, file: BinaryIO, file_path: Optional[str]) -> Tuple[str, List[int]]:
+        import PyPDF2
+
+        pdf_reader = PyPDF2.PdfReader(file)
+        page_count = len(pdf_reader.pages)
         
-        for paragraph in doc.paragraphs:
-            content += paragraph.text + "\n"
+        workers = _pdf_worker_count()
+        if workers > 1 and page_count >= config.PDF_PARALLEL_MIN_PAGES:
+            if file_path:
+                pages, skipped = _extract_pages_parallel(file_path, page_count, workers)
+            else:
+                pages, skipped = _extract_stream_pages_parallel(file, page_count, workers)
+        else:
+            pages, skipped = [page.extract_text() for page in pdf_reader.pages], []
         
-        return self._extract_structured_content(content, str(file_path))
+        # Lista y join en lugar de concatenar (coste lineal con el número de páginas)
+        parts = []
+        for page_num, page_text in enumerate(pages):
+            parts.append(f"\n--- Página {page_num + 1} ---\n")
+            parts.append(page_text)
+        return "".join(parts), skipped
+    
+    def _read_docx_text(self, source: Union[Path, BinaryIO]) -> str:
+        """Extrae el texto de un archivo Word (ruta o archivo abierto)"""
+        from docx import Document
+
+        if not isinstance(source, Path):
+            source.seek(0)
+        doc = Document(source)
+        return "".join(paragraph.text + "\n" for paragraph in doc.paragraphs)
     
     def _extract_structured_content(self, content: str, file_path: str) -> Dict[str, Any]:
         """
@@ -148,36 +415,8 @@ class FileProcessor:
         return ""
     
     def _extract_exercises(self, content: str) -> List[Dict[str, Any]]:
-        """Extrae los ejercicios del contenido"""
-        exercises = []
-        
-        # Patrones para identificar ejercicios
-        exercise_patterns = [
-            r'(\d+)\.\s*(.*?)(?=\d+\.|$)',  # 1. Enunciado...
-            r'ejercicio\s*(\d+)[:\s]*(.*?)(?=ejercicio\s*\d+|$)',  # Ejercicio 1: ...
-            r'pregunta\s*(\d+)[:\s]*(.*?)(?=pregunta\s*\d+|$)'  # Pregunta 1: ...
-        ]
-        
-        for pattern in exercise_patterns:
-            matches = re.finditer(pattern, content, re.IGNORECASE | re.DOTALL)
-            
-            for match in matches:
-                exercise_num = int(match.group(1))
-                statement = match.group(2).strip()
-                
-                if len(statement) > 10:  # Solo ejercicios con contenido sustancial
-                    # Intentar extraer puntos del enunciado
-                    points = self._extract_points_from_statement(statement)
-                    
-                    # Determinar tipo de ejercicio
-                    exercise_type = self._determine_exercise_type(statement)
-                    
-                    exercises.append({
-                        "number": exercise_num,
-                        "statement": statement[:1000],  # Limitar longitud
-                        "type": exercise_type,
-                        "points": points
-                    })
+        """Extrae los ejercicios del contenido (una sola pasada, ver ``exercise_parser``)"""
+        exercises = extract_exercises(content)
         
         # Si no se encontraron ejercicios con patrones, intentar dividir por números
         if not exercises:
@@ -185,40 +424,37 @@ class FileProcessor:
         
         return exercises
     
-    def _extract_points_from_statement(self, statement: str) -> int:
-        """Extrae los puntos de un enunciado"""
-        # Buscar patrones de puntos
-        point_patterns = [
-            r'(\d+)\s*puntos?',
-            r'puntos?[:\s]*(\d+)',
-            r'\((\d+)\s*p\)',
-            r'\[(\d+)\s*p\]'
-        ]
-        
-        for pattern in point_patterns:
-            match = re.search(pattern, statement, re.IGNORECASE)
-            if match:
-                return int(match.group(1))
-        
-        return 10  # Puntos por defecto
-    
-    def _determine_exercise_type(self, statement: str) -> str:
-        """Determina el tipo de ejercicio basado en el enunciado"""
-        statement_lower = statement.lower()
-        
-        if any(word in statement_lower for word in ['calcular', 'resolver', 'hallar', 'encontrar']):
-            return 'calculation'
-        elif any(word in statement_lower for word in ['explicar', 'describir', 'analizar', 'comentar']):
-            return 'open_question'
-        elif any(word in statement_lower for word in ['verdadero', 'falso', 'v/f']):
-            return 'true_false'
-        elif any(word in statement_lower for word in ['seleccionar', 'elegir', 'marcar']):
-            return 'multiple_choice'
-        elif any(word in statement_lower for word in ['completar', 'llenar', 'rellenar']):
-            return 'fill_blank'
-        else:
-            return 'mixed'
-    
+    def split_exercise_sections(self, content: str) -> List[Dict[str, Any]]:
+        """
+        Divide el texto de una entrega en secciones por ejercicio.
+
+        Reconoce los encabezados igual que ``_extract_exercises``
+        (``find_exercise_headers``) pero conserva el texto completo de cada
+        sección. Solo se aceptan números consecutivos
+        (1, 2, 3...) para no cortar en cifras del propio contenido; el texto
+        anterior al primer ejercicio se une a la primera sección.
+
+        :return: Lista de {"number", "text"}; vacía si no hay al menos dos ejercicios.
+        """
+        boundaries = []
+        expected = 1
+        for number, start in find_exercise_headers(content):
+            if number == expected:
+                boundaries.append((number, start))
+                expected += 1
+
+        if len(boundaries) < 2:
+            return []
+
+        sections = []
+        for i, (number, start) in enumerate(boundaries):
+            start = 0 if i == 0 else start
+            end = boundaries[i + 1][1] if i + 1 < len(boundaries) else len(content)
+            text = content[start:end].strip()
+            if text:
+                sections.append({"number": number, "text": text})
+        return sections
+
     def _extract_exercises_fallback(self, content: str) -> List[Dict[str, Any]]:
         """Método alternativo para extraer ejercicios si los patrones fallan"""
         exercises = []
@@ -0,0 +1,542 @@
+"""
+Capa de transporte HTTP compartida por todos los backends de LLM.
+
+Ollama y OpenAI se llaman a través de un único cliente httpx por host, con
+conexiones keep-alive, límites de conexiones por host y timeouts configurables.
+El transporte registra cuántas peticiones reutilizan una conexión abierta y,
+en ``/metrics``, la duración y los tokens de cada llamada por backend y modelo.
+
+httpx (y httpcore) se importan al crear el primer cliente, no al importar el
+módulo: así no cuentan en el arranque de los procesos que nunca llaman al LLM.
+"""
+import asyncio
+import json
+import logging
+import threading
+import time
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, AsyncIterator, Dict, Iterator, List, Optional
+from urllib.parse import urlsplit
+
+from ..config.settings import config
+from ..utils.metrics import SLOW_BUCKETS, Counter, Histogram
+from .concurrency_limiter import AdaptiveConcurrencyLimiter, get_ollama_limiter
+
+if TYPE_CHECKING:
+    import httpx
+
+logger = logging.getLogger(__name__)
+
+
+class TransportMetrics:
+    """Contadores de peticiones y conexiones por host"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._hosts: Dict[str, Dict[str, int]] = {}
+
+    def _host(self, host: str) -> Dict[str, int]:
+        return self._hosts.setdefault(host, {"requests": 0, "connections_opened": 0, "errors": 0})
+
+    def record(self, host: str, counter: str) -> None:
+        with self._lock:
+            self._host(host)[counter] += 1
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Contadores por host con el ratio de reutilización de conexiones"""
+        with self._lock:
+            result = {}
+            for host, counters in self._hosts.items():
+                requests = counters["requests"]
+                reused = max(requests - counters["connections_opened"], 0)
+                result[host] = {
+                    **counters,
+                    "connections_reused": reused,
+                    "reuse_ratio": round(reused / requests, 4) if requests else 0.0
+                }
+            return result
+
+
+LLM_REQUEST_DURATION = Histogram(
+    'llm_request_duration_seconds', "Duración de las llamadas a los modelos (sin la espera en el limitador)",
+    ['backend', 'model', 'operation', 'outcome'], buckets=SLOW_BUCKETS
+)
+LLM_TOKENS = Counter('llm_tokens_total', "Tokens de prompt y de respuesta consumidos", ['backend', 'model', 'kind'])
+
+
+class _LLMCall:
+    """
+    Mide una llamada a un modelo: ``with _LLMCall(...) as call`` y ``call.tokens``
+    con el consumo que informe la respuesta
+
+    El resultado es ``ok``, ``error`` o ``cancelled`` (streaming que el
+    consumidor cerró antes de terminar).
+    """
+
+    __slots__ = ('backend', 'model', 'operation', 'start')
+
+    def __init__(self, backend: str, model: str, operation: str):
+        self.backend = backend
+        self.model = model
+        self.operation = operation
+
+    def __enter__(self) -> "_LLMCall":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            outcome = "ok"
+        elif issubclass(exc_type, GeneratorExit):
+            outcome = "cancelled"
+        else:
+            outcome = "error"
+        LLM_REQUEST_DURATION.labels(self.backend, self.model, self.operation, outcome).observe(
+            time.perf_counter() - self.start
+        )
+
+    def tokens(self, prompt: Optional[int], completion: Optional[int]) -> None:
+        if prompt:
+            LLM_TOKENS.labels(self.backend, self.model, "prompt").inc(prompt)
+        if completion:
+            LLM_TOKENS.labels(self.backend, self.model, "completion").inc(completion)
+
+    def ollama_tokens(self, data: Dict[str, Any]) -> None:
+        """Consumo de una respuesta de Ollama (o del último fragmento del streaming)"""
+        self.tokens(data.get("prompt_eval_count"), data.get("eval_count"))
+
+    def openai_tokens(self, usage: Optional[Dict[str, Any]]) -> None:
+        if usage:
+            self.tokens(usage.get("prompt_tokens"), usage.get("completion_tokens"))
+
+
+def _host_of(base_url: str) -> str:
+    return urlsplit(base_url).netloc
+
+
+@lru_cache(maxsize=None)
+def _metered_transports():
+    """
+    Clases de transporte httpx que cuentan peticiones y conexiones TCP nuevas
+
+    Se definen al primer uso porque heredan de las de httpx.
+
+    :return: (transporte síncrono, transporte asíncrono)
+    """
+    import httpx
+
+    class _MeteredTransport(httpx.HTTPTransport):
+        """Transporte httpx que cuenta peticiones y conexiones TCP nuevas"""
+
+        def __init__(self, metrics: TransportMetrics, host: str, **kwargs):
+            super().__init__(**kwargs)
+            self._metrics = metrics
+            self._host = host
+
+        def _trace(self, event_name: str, info: Dict[str, Any]) -> None:
+            if event_name == "connection.connect_tcp.complete":
+                self._metrics.record(self._host, "connections_opened")
+
+        def handle_request(self, request: httpx.Request) -> httpx.Response:
+            request.extensions["trace"] = self._trace
+            self._metrics.record(self._host, "requests")
+            try:
+                return super().handle_request(request)
+            except Exception:
+                self._metrics.record(self._host, "errors")
+                raise
+
+
+    class _AsyncMeteredTransport(httpx.AsyncHTTPTransport):
+        """Variante asíncrona de ``_MeteredTransport``"""
+
+        def __init__(self, metrics: TransportMetrics, host: str, **kwargs):
+            super().__init__(**kwargs)
+            self._metrics = metrics
+            self._host = host
+
+        async def _trace(self, event_name: str, info: Dict[str, Any]) -> None:
+            if event_name == "connection.connect_tcp.complete":
+                self._metrics.record(self._host, "connections_opened")
+
+        async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+            request.extensions["trace"] = self._trace
+            self._metrics.record(self._host, "requests")
+            try:
+                return await super().handle_async_request(request)
+            except Exception:
+                self._metrics.record(self._host, "errors")
+                raise
+
+    return _MeteredTransport, _AsyncMeteredTransport
+
+
+def _limits() -> "httpx.Limits":
+    import httpx
+
+    return httpx.Limits(
+        max_connections=config.LLM_MAX_CONNECTIONS_PER_HOST,
+        max_keepalive_connections=config.LLM_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=config.LLM_KEEPALIVE_EXPIRY
+    )
+
+
+def _timeout() -> "httpx.Timeout":
+    import httpx
+
+    return httpx.Timeout(config.LLM_READ_TIMEOUT, connect=config.LLM_CONNECT_TIMEOUT)
+
+
+def _openai_headers(api_key: Optional[str]) -> Dict[str, str]:
+    api_key = api_key or config.OPENAI_API_KEY
+    if not api_key:
+        raise ValueError("Falta la clave de API de OpenAI")
+    return {"Authorization": f"Bearer {api_key}"}
+
+
+def _ollama_payload(model: str, messages: List[Dict[str, str]], options: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    payload = {"model": model, "messages": messages, "stream": False}
+    if options:
+        payload["options"] = options
+    return payload
+
+
+def _openai_payload(model: str, messages: List[Dict[str, str]], **params) -> Dict[str, Any]:
+    return {"model": model, "messages": messages, **{k: v for k, v in params.items() if v is not None}}
+
+
+def _ollama_stream_delta(line: str) -> Optional[Dict[str, Any]]:
+    """Decodifica una línea NDJSON de ``/api/chat`` con ``stream: true``"""
+    if not line.strip():
+        return None
+    data = json.loads(line)
+    if data.get("error"):
+        raise RuntimeError(f"Error de Ollama: {data['error']}")
+    return data
+
+
+def _openai_stream_delta(line: str) -> Optional[Dict[str, Any]]:
+    """Decodifica una línea SSE de ``/chat/completions`` con ``stream: true``"""
+    if not line.startswith("data:"):
+        return None
+    data = line[len("data:"):].strip()
+    if data == "[DONE]":
+        return {"done": True}
+    return json.loads(data)
+
+
+def _openai_stream_content(chunk: Dict[str, Any]) -> str:
+    choices = chunk.get("choices") or []
+    return (choices[0].get("delta") or {}).get("content") or "" if choices else ""
+
+
+class LLMTransport:
+    """
+    Fachada síncrona: un ``httpx.Client`` con pool keep-alive por host.
+
+    Las llamadas a ``/api/chat`` de Ollama pasan por ``ollama_limiter`` si se
+    indica, de modo que todos los servicios comparten el mismo límite adaptativo.
+    """
+
+    def __init__(self, metrics: Optional[TransportMetrics] = None,
+                 ollama_limiter: Optional[AdaptiveConcurrencyLimiter] = None):
+        self.metrics = metrics or TransportMetrics()
+        self.ollama_limiter = ollama_limiter
+        self._clients: Dict[str, "httpx.Client"] = {}
+        self._lock = threading.Lock()
+
+    def client(self, base_url: str) -> "httpx.Client":
+        """Cliente compartido para ``base_url``, creado al primer uso"""
+        with self._lock:
+            client = self._clients.get(base_url)
+            if client is None:
+                import httpx
+
+                metered_transport, _ = _metered_transports()
+                client = httpx.Client(
+                    base_url=base_url,
+                    timeout=_timeout(),
+                    transport=metered_transport(self.metrics, _host_of(base_url), limits=_limits())
+                )
+                self._clients[base_url] = client
+            return client
+
+    def post_json(self, base_url: str, path: str, payload: Dict[str, Any],
+                  headers: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        """
+        Envía un POST JSON y devuelve el cuerpo decodificado
+
+        :raises httpx.HTTPError: Si la petición falla o la respuesta no es 2xx
+        """
+        response = self.client(base_url).post(path, json=payload, headers=headers)
+        response.raise_for_status()
+        return response.json()
+
+    def ollama_chat(self, model: str, messages: List[Dict[str, str]],
+                    options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Llamada a ``/api/chat`` de Ollama (respuesta completa, sin streaming)"""
+        payload = _ollama_payload(model, messages, options)
+        if self.ollama_limiter is None:
+            return self._ollama_chat(payload)
+        with self.ollama_limiter.slot():
+            return self._ollama_chat(payload)
+
+    def _ollama_chat(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        with _LLMCall("ollama", payload["model"], "chat") as call:
+            result = self.post_json(config.ollama_base_url, "/api/chat", payload)
+            call.ollama_tokens(result)
+            return result
+
+    def stream_lines(self, base_url: str, path: str, payload: Dict[str, Any],
+                     headers: Optional[Dict[str, str]] = None) -> Iterator[str]:
+        """
+        Envía un POST y devuelve las líneas de la respuesta según llegan.
+
+        Si el consumidor cierra el iterador antes de terminar, se cierra la
+        conexión y el servidor deja de generar.
+        """
+        with self.client(base_url).stream("POST", path, json=payload, headers=headers) as response:
+            response.raise_for_status()
+            yield from response.iter_lines()
+
+    def ollama_chat_stream(self, model: str, messages: List[Dict[str, str]],
+                           options: Optional[Dict[str, Any]] = None) -> Iterator[str]:
+        """Llamada a ``/api/chat`` de Ollama en streaming: devuelve el texto a trozos"""
+        payload = {**_ollama_payload(model, messages, options), "stream": True}
+        if self.ollama_limiter is None:
+            yield from self._ollama_stream(payload)
+            return
+        with self.ollama_limiter.slot():
+            yield from self._ollama_stream(payload)
+
+    def _ollama_stream(self, payload: Dict[str, Any]) -> Iterator[str]:
+        with _LLMCall("ollama", payload["model"], "stream") as call:
+            for line in self.stream_lines(config.ollama_base_url, "/api/chat", payload):
+                data = _ollama_stream_delta(line)
+                if data is None:
+                    continue
+                content = (data.get("message") or {}).get("content")
+                if content:
+                    yield content
+                if data.get("done"):
+                    call.ollama_tokens(data)
+                    return
+
+    def ollama_show(self, model: str) -> Dict[str, Any]:
+        """Información de un modelo instalado en Ollama (falla si no existe)"""
+        return self.post_json(config.ollama_base_url, "/api/show", {"name": model})
+
+    def openai_chat(self, model: str, messages: List[Dict[str, str]], api_key: Optional[str] = None,
+                    **params) -> Dict[str, Any]:
+        """Llamada a ``/chat/completions`` de OpenAI (``params``: temperature, max_tokens...)"""
+        with _LLMCall("openai", model, "chat") as call:
+            result = self.post_json(
+                config.OPENAI_BASE_URL,
+                "/chat/completions",
+                _openai_payload(model, messages, **params),
+                headers=_openai_headers(api_key)
+            )
+            call.openai_tokens(result.get("usage"))
+            return result
+
+    def openai_chat_stream(self, model: str, messages: List[Dict[str, str]], api_key: Optional[str] = None,
+                           usage: Optional[Dict[str, Any]] = None, **params) -> Iterator[str]:
+        """
+        Llamada a ``/chat/completions`` de OpenAI en streaming: devuelve el texto a trozos.
+
+        :param usage: Diccionario que se rellena con el consumo de tokens si la
+            respuesta llega a informarlo (solo cuando se consume hasta el final).
+        """
+        payload = {**_openai_payload(model, messages, **params), "stream": True,
+                   "stream_options": {"include_usage": True}}
+        lines = self.stream_lines(config.OPENAI_BASE_URL, "/chat/completions", payload,
+                                  headers=_openai_headers(api_key))
+        with _LLMCall("openai", model, "stream") as call:
+            for line in lines:
+                chunk = _openai_stream_delta(line)
+                if chunk is None:
+                    continue
+                if chunk.get("done"):
+                    return
+                if chunk.get("usage"):
+                    call.openai_tokens(chunk["usage"])
+                    if usage is not None:
+                        usage.update(chunk["usage"])
+                content = _openai_stream_content(chunk)
+                if content:
+                    yield content
+
+    def close(self) -> None:
+        with self._lock:
+            for client in self._clients.values():
+                client.close()
+            self._clients.clear()
+
+
+class AsyncLLMTransport:
+    """
+    Fachada asíncrona: un ``httpx.AsyncClient`` por host.
+
+    Los clientes asíncronos quedan ligados al event loop en el que se crean, así
+    que cada loop debe usar su propia instancia.
+    """
+
+    def __init__(self, metrics: Optional[TransportMetrics] = None,
+                 ollama_limiter: Optional[AdaptiveConcurrencyLimiter] = None):
+        self.metrics = metrics or TransportMetrics()
+        self.ollama_limiter = ollama_limiter
+        self._clients: Dict[str, "httpx.AsyncClient"] = {}
+
+    def client(self, base_url: str) -> "httpx.AsyncClient":
+        client = self._clients.get(base_url)
+        if client is None:
+            import httpx
+
+            _, metered_transport = _metered_transports()
+            client = httpx.AsyncClient(
+                base_url=base_url,
+                timeout=_timeout(),
+                transport=metered_transport(self.metrics, _host_of(base_url), limits=_limits())
+            )
+            self._clients[base_url] = client
+        return client
+
+    async def post_json(self, base_url: str, path: str, payload: Dict[str, Any],
+                        headers: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        response = await self.client(base_url).post(path, json=payload, headers=headers)
+        response.raise_for_status()
+        return response.json()
+
+    async def ollama_chat(self, model: str, messages: List[Dict[str, str]],
+                          options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        payload = _ollama_payload(model, messages, options)
+        if self.ollama_limiter is None:
+            return await self._ollama_chat(payload)
+
+        await self._acquire_ollama_slot()
+        start = time.perf_counter()
+        success = False
+        try:
+            result = await self._ollama_chat(payload)
+            success = True
+            return result
+        finally:
+            self.ollama_limiter.release(time.perf_counter() - start, success)
+
+    async def _acquire_ollama_slot(self) -> None:
+        """
+        Reserva un hueco de ``ollama_limiter`` sin bloquear el event loop
+
+        El limitador es síncrono y la espera corre en un hilo que no se puede
+        interrumpir: si la tarea se cancela mientras espera, el hueco que
+        consiga después el hilo se devuelve con ``cancel``.
+        """
+        future = asyncio.get_running_loop().run_in_executor(None, self.ollama_limiter.acquire)
+        try:
+            await asyncio.shield(future)
+        except asyncio.CancelledError:
+            future.add_done_callback(self._cancel_acquired_slot)
+            raise
+
+    def _cancel_acquired_slot(self, future: "asyncio.Future") -> None:
+        if not future.cancelled() and future.exception() is None:
+            self.ollama_limiter.cancel()
+
+    async def _ollama_chat(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        with _LLMCall("ollama", payload["model"], "chat") as call:
+            result = await self.post_json(config.ollama_base_url, "/api/chat", payload)
+            call.ollama_tokens(result)
+            return result
+
+    async def openai_chat(self, model: str, messages: List[Dict[str, str]], api_key: Optional[str] = None,
+                          **params) -> Dict[str, Any]:
+        with _LLMCall("openai", model, "chat") as call:
+            result = await self.post_json(
+                config.OPENAI_BASE_URL,
+                "/chat/completions",
+                _openai_payload(model, messages, **params),
+                headers=_openai_headers(api_key)
+            )
+            call.openai_tokens(result.get("usage"))
+            return result
+
+    async def stream_lines(self, base_url: str, path: str, payload: Dict[str, Any],
+                           headers: Optional[Dict[str, str]] = None) -> AsyncIterator[str]:
+        async with self.client(base_url).stream("POST", path, json=payload, headers=headers) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                yield line
+
+    async def ollama_chat_stream(self, model: str, messages: List[Dict[str, str]],
+                                 options: Optional[Dict[str, Any]] = None) -> AsyncIterator[str]:
+        payload = {**_ollama_payload(model, messages, options), "stream": True}
+        if self.ollama_limiter is not None:
+            await self._acquire_ollama_slot()
+        start = time.perf_counter()
+        success = False
+        try:
+            with _LLMCall("ollama", model, "stream") as call:
+                async for line in self.stream_lines(config.ollama_base_url, "/api/chat", payload):
+                    data = _ollama_stream_delta(line)
+                    if data is None:
+                        continue
+                    content = (data.get("message") or {}).get("content")
+                    if content:
+                        yield content
+                    if data.get("done"):
+                        call.ollama_tokens(data)
+                        break
+            success = True
+        except GeneratorExit:
+            # El consumidor dejó de leer porque ya tenía lo que necesitaba
+            success = True
+            raise
+        finally:
+            if self.ollama_limiter is not None:
+                self.ollama_limiter.release(time.perf_counter() - start, success)
+
+    async def openai_chat_stream(self, model: str, messages: List[Dict[str, str]], api_key: Optional[str] = None,
+                                 usage: Optional[Dict[str, Any]] = None, **params) -> AsyncIterator[str]:
+        payload = {**_openai_payload(model, messages, **params), "stream": True,
+                   "stream_options": {"include_usage": True}}
+        with _LLMCall("openai", model, "stream") as call:
+            async for line in self.stream_lines(config.OPENAI_BASE_URL, "/chat/completions", payload,
+                                                 headers=_openai_headers(api_key)):
+                chunk = _openai_stream_delta(line)
+                if chunk is None:
+                    continue
+                if chunk.get("done"):
+                    break
+                if chunk.get("usage"):
+                    call.openai_tokens(chunk["usage"])
+                    if usage is not None:
+                        usage.update(chunk["usage"])
+                content = _openai_stream_content(chunk)
+                if content:
+                    yield content
+
+    async def aclose(self) -> None:
+        for client in self._clients.values():
+            await client.aclose()
+        self._clients.clear()
+
+
+# Métricas y transporte síncrono compartidos por todo el proceso
+transport_metrics = TransportMetrics()
+_transport: Optional[LLMTransport] = None
+_transport_lock = threading.Lock()
+
+
+def get_llm_transport() -> LLMTransport:
+    """Transporte síncrono compartido del proceso"""
+    global _transport
+    with _transport_lock:
+        if _transport is None:
+            _transport = LLMTransport(transport_metrics, get_ollama_limiter())
+            logger.info(f"Transporte LLM inicializado (Ollama en {config.ollama_base_url})")
+        return _transport
+
+
+def create_async_llm_transport() -> AsyncLLMTransport:
+    """Nuevo transporte asíncrono para el event loop actual (comparte métricas y limitador)"""
+    return AsyncLLMTransport(transport_metrics, get_ollama_limiter())
@@ -1,19 +1,23 @@
-import ollama
 import logging
 from typing import Dict, Any, Optional
 
+from .llm_transport import LLMTransport, get_llm_transport
+
 class OllamaService:
     def __init__(self, 
                  model: str = 'llama3.2', 
-                 logger: Optional[logging.Logger] = None):
+                 logger: Optional[logging.Logger] = None,
+                 transport: Optional[LLMTransport] = None):
         """
         Inicializar servicio de Ollama
         
         :param model: Modelo de lenguaje a utilizar
         :param logger: Logger para registrar eventos
+        :param transport: Transporte HTTP (por defecto, el compartido del proceso)
         """
         self.model = model
         self.logger = logger or logging.getLogger(__name__)
+        self.transport = transport or get_llm_transport()
 
     def generate_prompt(self, 
                         task_content: str, 
@@ -65,9 +69,9 @@ class OllamaService:
             prompt = self.generate_prompt(task_content, evaluation_criteria)
 
             # Llamada a Ollama
-            response = ollama.chat(
-                model=self.model,
-                messages=[{'role': 'user', 'content': prompt}]
+            response = self.transport.ollama_chat(
+                self.model,
+                [{'role': 'user', 'content': prompt}]
             )
 
             # Procesar respuesta
@@ -95,11 +99,8 @@ class OllamaService:
         :return: True si el modelo está disponible, False en caso contrario
         """
         try:
-            # Intentar una consulta simple
-            ollama.chat(
-                model=self.model, 
-                messages=[{'role': 'user', 'content': 'Hola'}]
-            )
+            # Consultar los metadatos del modelo en lugar de generar una respuesta
+            self.transport.ollama_show(self.model)
             self.logger.info(f"Modelo {self.model} disponible")
             return True
         except Exception as e:
@@ -0,0 +1,171 @@
+"""
+Caché en disco de los PDF generados (rúbricas y soluciones)
+"""
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Cambiar al modificar el diseño de los PDF para no servir versiones antiguas
+PDF_RENDER_VERSION = "1"
+
+
+class PDFArtifactCache:
+    """
+    Guarda cada PDF en ``<directorio>/<assignment_id>/<tipo>-<hash>.pdf``.
+
+    El hash cubre todo lo que aparece en el documento (rúbrica o soluciones,
+    título, descripción y puntos), así que también sirve de ETag: si el
+    contenido cambia, cambia el nombre del archivo y el anterior se descarta.
+    Al superar ``max_bytes`` se eliminan los archivos usados hace más tiempo.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        """
+        :param directory: Carpeta de la caché
+        :param max_bytes: Tamaño total máximo de los archivos guardados
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(self.directory, exist_ok=True)
+
+    @staticmethod
+    def build_digest(kind: str, payload: Dict[str, Any]) -> str:
+        """
+        Hash del contenido de un PDF
+
+        :param kind: Tipo de documento ('rubric' o 'solutions')
+        :param payload: Datos que se vuelcan en el PDF
+        :return: Hash SHA-256 en hexadecimal
+        """
+        raw = json.dumps(
+            {"kind": kind, "version": PDF_RENDER_VERSION, "payload": payload},
+            sort_keys=True, ensure_ascii=False, default=str
+        )
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def _assignment_dir(self, assignment_id: str) -> str:
+        return os.path.join(self.directory, str(assignment_id))
+
+    def _path(self, assignment_id: str, kind: str, digest: str) -> str:
+        return os.path.join(self._assignment_dir(assignment_id), f"{kind}-{digest}.pdf")
+
+    def get(self, assignment_id: str, kind: str, digest: str) -> Optional[str]:
+        """
+        Ruta del PDF cacheado o None si no existe
+        """
+        path = self._path(assignment_id, kind, digest)
+        try:
+            # La fecha de modificación marca el último uso para el desalojo
+            os.utime(path)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return path
+
+    def put(self, assignment_id: str, kind: str, digest: str, content: bytes) -> str:
+        """
+        Guarda un PDF y descarta las versiones anteriores del mismo tipo
+
+        :return: Ruta del archivo guardado
+        """
+        directory = self._assignment_dir(assignment_id)
+        os.makedirs(directory, exist_ok=True)
+        path = self._path(assignment_id, kind, digest)
+
+        # Escritura atómica: nunca se sirve un PDF a medio escribir
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as tmp:
+                tmp.write(content)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        self.invalidate(assignment_id, kind, keep=path)
+        self._evict()
+        return path
+
+    def invalidate(self, assignment_id: str, kind: Optional[str] = None, keep: Optional[str] = None) -> int:
+        """
+        Elimina los PDF cacheados de una asignación
+
+        :param kind: Solo los de este tipo (todos si es None)
+        :param keep: Ruta que no se debe borrar
+        :return: Número de archivos eliminados
+        """
+        directory = self._assignment_dir(assignment_id)
+        removed = 0
+        try:
+            names = os.listdir(directory)
+        except FileNotFoundError:
+            return 0
+        for name in names:
+            if not name.endswith('.pdf') or (kind and not name.startswith(f"{kind}-")):
+                continue
+            path = os.path.join(directory, name)
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+                removed += 1
+            except FileNotFoundError:
+                pass
+        if kind is None:
+            try:
+                os.rmdir(directory)
+            except OSError:
+                pass
+        return removed
+
+    def _scan(self):
+        entries = []
+        for root, _dirs, files in os.walk(self.directory):
+            for name in files:
+                if not name.endswith('.pdf'):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def _evict(self) -> None:
+        with self._lock:
+            entries = self._scan()
+            total = sum(size for _, size, _ in entries)
+            if total <= self.max_bytes:
+                return
+            for _, size, path in sorted(entries):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+                if total <= self.max_bytes:
+                    break
+            logger.info(f"Caché de PDF reducida a {total} bytes")
+
+    def stats(self) -> Dict[str, Any]:
+        """Estadísticas de uso de la caché"""
+        entries = self._scan()
+        return {
+            "files": len(entries),
+            "bytes": sum(size for _, size, _ in entries),
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses
+        }
@@ -0,0 +1,203 @@
+"""
+Detección de plagio entre entregas de una misma asignación
+"""
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, List, Optional
+
+from ..config.settings import config
+from ..database.database import db
+from ..database.models import SubmissionSignature
+from ..utils.similarity import (
+    LSHIndex, MinHasher, alignment_similarity, estimate_jaccard,
+    signature_from_bytes, signature_to_bytes
+)
+
+logger = logging.getLogger(__name__)
+
+# Índices LSH de asignaciones que se mantienen en memoria
+MAX_CACHED_INDEXES = 32
+
+
+def find_similar_pairs(items: Dict[Hashable, str], index: LSHIndex, threshold: float) -> List[Dict[str, Any]]:
+    """
+    Pares de textos parecidos usando LSH para elegir candidatos
+
+    :param items: Textos de (al menos) las entregas candidatas, por clave
+    :param index: Índice con las firmas de todos los textos
+    :param threshold: Similitud de Jaccard estimada mínima (0-1)
+    :return: Pares con similitud estimada y alineación exacta, de mayor a menor
+    """
+    pairs = []
+    for key1, key2 in index.candidate_pairs():
+        estimated = estimate_jaccard(index.signature(key1), index.signature(key2))
+        if estimated < threshold or key1 not in items or key2 not in items:
+            continue
+        pairs.append({
+            "submissions": [str(key1), str(key2)],
+            "estimated_similarity": round(estimated * 100, 2),
+            "similarity": round(alignment_similarity(items[key1], items[key2]), 2)
+        })
+    pairs.sort(key=lambda pair: pair["similarity"], reverse=True)
+    return pairs
+
+
+def find_similar_texts(texts: Iterable[str], threshold: Optional[float] = None) -> List[Dict[str, Any]]:
+    """
+    Pares de textos parecidos dentro de un lote (sin persistir nada)
+
+    :return: Igual que ``find_similar_pairs``, con los índices de los textos como claves
+    """
+    threshold = threshold if threshold is not None else config.SIMILARITY_THRESHOLD
+    hasher = MinHasher(config.SIMILARITY_NUM_PERM)
+    index = LSHIndex(config.SIMILARITY_NUM_PERM, threshold)
+    items = dict(enumerate(texts))
+    for key, text in items.items():
+        index.insert(key, hasher.signature_for_text(text))
+    return find_similar_pairs(items, index, threshold)
+
+
+class SimilarityService:
+    """
+    Índice de similitud persistente por asignación.
+
+    Las firmas MinHash se guardan en ``submission_signatures`` al añadir cada
+    entrega, así que una entrega tardía solo se compara con los candidatos que
+    devuelve el índice LSH de la asignación. Los índices se reconstruyen desde
+    las firmas guardadas (sin volver a procesar los textos) y se mantienen en
+    memoria para las asignaciones usadas más recientemente.
+    """
+
+    def __init__(self, num_perm: Optional[int] = None, threshold: Optional[float] = None):
+        self.num_perm = num_perm or config.SIMILARITY_NUM_PERM
+        self.threshold = threshold if threshold is not None else config.SIMILARITY_THRESHOLD
+        self.hasher = MinHasher(self.num_perm)
+        self._indexes: "OrderedDict[str, LSHIndex]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _load_index(self, assignment_id: str) -> LSHIndex:
+        """
+        Índice de la asignación, al día con las firmas guardadas
+
+        Otros procesos pueden haber añadido entregas, así que se cargan las
+        firmas que falten en el índice en memoria.
+        """
+        with self._lock:
+            index = self._indexes.get(assignment_id)
+            if index is None:
+                index = LSHIndex(self.num_perm, self.threshold)
+                self._indexes[assignment_id] = index
+            self._indexes.move_to_end(assignment_id)
+            while len(self._indexes) > MAX_CACHED_INDEXES:
+                self._indexes.popitem(last=False)
+
+        keys = db.session.query(SubmissionSignature.submission_key).filter(
+            SubmissionSignature.assignment_id == assignment_id,
+            SubmissionSignature.num_perm == self.num_perm
+        ).all()
+        missing = [key for (key,) in keys if key not in index]
+        if missing:
+            rows = db.session.query(SubmissionSignature.submission_key, SubmissionSignature.signature).filter(
+                SubmissionSignature.assignment_id == assignment_id,
+                SubmissionSignature.submission_key.in_(missing)
+            )
+            with self._lock:
+                for key, signature in rows:
+                    if key not in index:
+                        index.insert(key, signature_from_bytes(signature))
+        return index
+
+    def _contents(self, assignment_id: str, keys: Iterable[str]) -> Dict[str, str]:
+        keys = list(keys)
+        if not keys:
+            return {}
+        rows = db.session.query(SubmissionSignature.submission_key, SubmissionSignature.content).filter(
+            SubmissionSignature.assignment_id == assignment_id,
+            SubmissionSignature.submission_key.in_(keys)
+        )
+        return dict(rows)
+
+    def add_submission(self, assignment_id: str, submission_key: str, content: str) -> Dict[str, Any]:
+        """
+        Guarda la firma de una entrega y la compara con las anteriores
+
+        :param assignment_id: Asignación a la que pertenece la entrega
+        :param submission_key: Identificador único de la entrega en la asignación
+        :param content: Texto de la entrega
+        :return: Entregas anteriores parecidas, de mayor a menor similitud
+        :raises ValueError: Si la entrega ya estaba indexada
+        """
+        assignment_id = str(assignment_id)
+        index = self._load_index(assignment_id)
+        if submission_key in index:
+            raise ValueError(f"La entrega '{submission_key}' ya está indexada")
+
+        signature = self.hasher.signature_for_text(content)
+        candidates = {}
+        for key in index.query(signature):
+            estimated = estimate_jaccard(signature, index.signature(key))
+            if estimated >= self.threshold:
+                candidates[key] = estimated
+
+        try:
+            db.session.add(SubmissionSignature(
+                assignment_id=assignment_id,
+                submission_key=submission_key,
+                signature=signature_to_bytes(signature),
+                num_perm=self.num_perm,
+                content=content
+            ))
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        with self._lock:
+            if submission_key not in index:
+                index.insert(submission_key, signature)
+
+        matches = []
+        for key, other in self._contents(assignment_id, candidates).items():
+            matches.append({
+                "submission_key": key,
+                "estimated_similarity": round(candidates[key] * 100, 2),
+                "similarity": round(alignment_similarity(content, other), 2)
+            })
+        matches.sort(key=lambda match: match["similarity"], reverse=True)
+        return {"submission_key": submission_key, "indexed": len(index), "matches": matches}
+
+    def find_similar_pairs(self, assignment_id: str, threshold: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Pares de entregas parecidas de una asignación
+
+        :param threshold: Similitud estimada mínima (0-1); por defecto, la del índice
+        """
+        assignment_id = str(assignment_id)
+        threshold = self.threshold if threshold is None else threshold
+        index = self._load_index(assignment_id)
+        if threshold < self.threshold:
+            # Un umbral más bajo que el del índice necesita bandas más cortas
+            rebuilt = LSHIndex(self.num_perm, threshold)
+            for key in index.keys():
+                rebuilt.insert(key, index.signature(key))
+            index = rebuilt
+
+        candidate_keys = {key for pair in index.candidate_pairs() for key in pair}
+        items = self._contents(assignment_id, candidate_keys)
+        return find_similar_pairs(items, index, threshold)
+
+    def remove_assignment(self, assignment_id: str) -> None:
+        """Olvida el índice en memoria de una asignación"""
+        with self._lock:
+            self._indexes.pop(str(assignment_id), None)
+
+
+# Servicio compartido por el proceso
+_similarity_service: Optional[SimilarityService] = None
+
+
+def get_similarity_service() -> SimilarityService:
+    global _similarity_service
+    if _similarity_service is None:
+        _similarity_service = SimilarityService()
+    return _similarity_service
@@ -0,0 +1,399 @@
+"""
+Ingesta masiva de las entregas de una clase
+
+El profesor sube todas las entregas de una asignación de una vez: un ZIP
+(directamente o como subida por partes) o una carpeta (un formulario con
+varios archivos cuyo nombre incluye la ruta relativa). Cada entrega:
+
+1. se copia a ``UPLOAD_FOLDER/submissions/<asignación>/<id><ext>``; el formato
+   se comprueba por el contenido, no por la extensión;
+2. se extrae su texto en un pool de procesos. El resultado queda en la caché
+   de extracción, así que la corrección no vuelve a leer el PDF;
+3. se inserta como ``Correction`` pendiente con un INSERT de varias filas por
+   cada lote de ``SUBMISSION_INSERT_BATCH_SIZE`` entregas y un commit por lote;
+4. tras el commit del lote se encolan sus correcciones con ``enqueue_many``.
+
+Una corrección está pendiente mientras ``correction_details`` sea nulo; el
+trabajo ``correction.grade`` guarda en ella el resultado del modelo.
+"""
+import logging
+import multiprocessing
+import os
+import posixpath
+import re
+import time
+import uuid
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Any, BinaryIO, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import insert
+from werkzeug.datastructures import FileStorage
+
+from ..config.settings import config
+from ..database.database import db
+from ..database.models import Assignment, Correction
+from ..jobs import get_job_queue
+from ..utils.tracing import start_span
+from .correction_engine import get_correction_engine
+from .extraction_cache import get_extraction_cache
+from .file_processor import FileProcessor
+from .upload_ingestion import MAGIC_BYTES, UPLOAD_CHUNK_SIZE, UploadRejected, detect_file_type
+
+logger = logging.getLogger(__name__)
+
+# Tipo de trabajo de la corrección de una entrega
+GRADE_SUBMISSION_JOB = 'correction.grade'
+
+# Carpetas y archivos que añaden los sistemas operativos y los editores
+_IGNORED_DIRECTORIES = {'__MACOSX', '.git'}
+_IGNORED_PREFIXES = ('.', '~$')
+
+# Sufijo de las carpetas de la descarga de entregas de Moodle ("Nombre_123_assignsubmission_file_")
+_MOODLE_SUFFIX = re.compile(r'_\d+_assignsubmission_\w*$')
+_PAGE_MARKER = re.compile(r'\n--- Página \d+ ---\n')
+
+# Entrega por leer: nombre dentro del ZIP o carpeta y función que la abre
+SubmissionEntry = Tuple[str, Callable[[], BinaryIO]]
+
+
+@dataclass
+class _StoredSubmission:
+    correction_id: uuid.UUID
+    student_name: str
+    filename: str
+    file_path: str
+
+
+def _entry_parts(name: str) -> List[str]:
+    return [part for part in name.replace('\\', '/').split('/') if part not in ('', '.')]
+
+
+def _is_submission_entry(name: str) -> bool:
+    parts = _entry_parts(name)
+    if not parts or any(part in _IGNORED_DIRECTORIES for part in parts):
+        return False
+    return not parts[-1].startswith(_IGNORED_PREFIXES)
+
+
+def _clean_name(name: str) -> str:
+    name = _MOODLE_SUFFIX.sub('', name)
+    name = re.sub(r'[_\-\s]+', ' ', name).strip()
+    return name[:255] or 'Estudiante'
+
+
+def student_names(entry_names: Sequence[str]) -> List[str]:
+    """
+    Nombre del estudiante de cada entrega según su ruta
+
+    Si hay varias entregas se descartan las carpetas comunes a todas (la
+    carpeta de la clase); después, si la entrega está dentro de una carpeta,
+    esa carpeta es el estudiante ("Ana Pérez/tarea.pdf"), y si no, el nombre
+    del archivo ("ana_perez.pdf").
+    """
+    paths = [_entry_parts(name) for name in entry_names]
+    common = 0
+    if len(paths) > 1:
+        shortest = min(len(parts) for parts in paths)
+        while common < shortest - 1 and len({parts[common] for parts in paths}) == 1:
+            common += 1
+
+    names = []
+    for parts in paths:
+        parts = parts[common:]
+        names.append(_clean_name(parts[0] if len(parts) > 1 else posixpath.splitext(parts[-1])[0]))
+    return names
+
+
+def _remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _text_length(processor: FileProcessor, file_path: str) -> Tuple[int, Optional[str]]:
+    """Caracteres de texto de una entrega (sin separadores de página) o el error"""
+    try:
+        text = processor.extract_text(file_path)
+        return len(_PAGE_MARKER.sub('', text).strip()), None
+    except Exception as e:
+        return 0, str(e) or e.__class__.__name__
+
+
+_worker_processor: Optional[FileProcessor] = None
+
+
+def _init_extraction_process() -> None:
+    """Inicializador de cada proceso del pool: un extractor con la caché compartida en disco"""
+    global _worker_processor
+    # Cada proceso ya extrae una entrega: sin un segundo pool para las páginas de un PDF largo
+    config.PDF_EXTRACTION_WORKERS = 1
+    _worker_processor = FileProcessor(cache=get_extraction_cache())
+
+
+def _extract_in_worker(file_path: str) -> Tuple[int, Optional[str]]:
+    return _text_length(_worker_processor, file_path)
+
+
+class SubmissionIngestionService:
+    """Alta masiva de entregas como correcciones pendientes y su corrección en segundo plano"""
+
+    def __init__(self):
+        self.folder = os.path.join(config.UPLOAD_FOLDER, 'submissions')
+        os.makedirs(self.folder, exist_ok=True)
+        self.file_processor = FileProcessor(cache=get_extraction_cache())
+        self.job_queue = get_job_queue()
+        self.job_queue.register(GRADE_SUBMISSION_JOB, self._process_grading, on_failure=self._on_grading_failed)
+
+    # API del servicio
+
+    def ingest_archive(self, assignment_id: str, teacher_id: str, archive: BinaryIO,
+                       model_type: str = 'ollama', language: str = 'español') -> Optional[Dict[str, Any]]:
+        """
+        Da de alta las entregas de un ZIP
+
+        :param archive: ZIP abierto con posibilidad de ``seek``
+        :return: Resumen de la ingesta (ver ``_ingest``) o None si la asignación no existe
+        :raises UploadRejected: Si no es un ZIP válido o no contiene entregas
+        """
+        try:
+            bundle = zipfile.ZipFile(archive)
+        except zipfile.BadZipFile:
+            raise UploadRejected("El archivo no es un ZIP válido")
+        with bundle:
+            entries = [
+                (info.filename, lambda info=info: bundle.open(info))
+                for info in bundle.infolist() if not info.is_dir()
+            ]
+            return self._ingest(assignment_id, teacher_id, entries, model_type, language)
+
+    def ingest_files(self, assignment_id: str, teacher_id: str, files: Sequence[FileStorage],
+                     model_type: str = 'ollama', language: str = 'español') -> Optional[Dict[str, Any]]:
+        """
+        Da de alta las entregas de una carpeta subida como varios archivos de un formulario
+
+        :return: Resumen de la ingesta o None si la asignación no existe
+        :raises UploadRejected: Si no hay entregas
+        """
+        entries = [(file.filename or '', lambda file=file: file.stream) for file in files]
+        return self._ingest(assignment_id, teacher_id, entries, model_type, language)
+
+    def _ingest(self, assignment_id: str, teacher_id: str, entries: List[SubmissionEntry],
+                model_type: str, language: str) -> Optional[Dict[str, Any]]:
+        """
+        Alta de las entregas en una traza que continúan los trabajos de corrección
+
+        :return: ``created`` (número de correcciones), ``corrections`` (id,
+            estudiante y archivo de cada una), ``skipped`` (archivos descartados
+            con el motivo) y ``elapsed`` (segundos)
+        """
+        with start_span('submissions.ingest', {'assignment.id': str(assignment_id), 'submissions.files': len(entries)},
+                        kind='server') as span:
+            result = self._ingest_entries(assignment_id, teacher_id, entries, model_type, language)
+            if result is not None:
+                span.set_attribute('submissions.created', result['created'])
+            return result
+
+    def _ingest_entries(self, assignment_id: str, teacher_id: str, entries: List[SubmissionEntry],
+                        model_type: str, language: str) -> Optional[Dict[str, Any]]:
+        """Comprobaciones, copia, extracción y alta por lotes de las entregas"""
+        start = time.perf_counter()
+        try:
+            assignment_uuid, teacher_uuid = uuid.UUID(str(assignment_id)), uuid.UUID(str(teacher_id))
+        except ValueError:
+            return None
+        if not self._owns_assignment(assignment_uuid, teacher_uuid):
+            return None
+
+        entries = [entry for entry in entries if _is_submission_entry(entry[0])]
+        if not entries:
+            raise UploadRejected("No se encontró ninguna entrega")
+        if len(entries) > config.SUBMISSION_MAX_FILES:
+            raise UploadRejected(f"Se admiten como máximo {config.SUBMISSION_MAX_FILES} entregas por envío", 413)
+
+        target = os.path.join(self.folder, str(assignment_uuid))
+        os.makedirs(target, exist_ok=True)
+
+        stored: List[_StoredSubmission] = []
+        skipped: List[Dict[str, str]] = []
+        for (name, opener), student_name in zip(entries, student_names([name for name, _ in entries])):
+            try:
+                stored.append(self._store(target, name, student_name, opener))
+            except UploadRejected as e:
+                skipped.append({"filename": name, "error": str(e)})
+            except Exception as e:
+                logger.warning(f"No se pudo leer la entrega {name}: {str(e)}")
+                skipped.append({"filename": name, "error": "No se pudo leer el archivo"})
+
+        created: List[_StoredSubmission] = []
+        batch: List[_StoredSubmission] = []
+        for submission, (characters, error) in self._extract(stored):
+            if error or not characters:
+                skipped.append({"filename": submission.filename,
+                                "error": error or "La entrega no contiene texto extraíble"})
+                _remove(submission.file_path)
+                continue
+            batch.append(submission)
+            if len(batch) >= config.SUBMISSION_INSERT_BATCH_SIZE:
+                self._save_batch(assignment_uuid, teacher_uuid, batch, model_type, language)
+                created.extend(batch)
+                batch = []
+        if batch:
+            self._save_batch(assignment_uuid, teacher_uuid, batch, model_type, language)
+            created.extend(batch)
+
+        elapsed = time.perf_counter() - start
+        logger.info(f"Ingesta de entregas en {assignment_uuid}: {len(created)} creadas, "
+                    f"{len(skipped)} descartadas en {elapsed:.1f}s")
+        return {
+            "created": len(created),
+            "corrections": [
+                {"id": str(s.correction_id), "student_name": s.student_name, "filename": s.filename}
+                for s in created
+            ],
+            "skipped": skipped,
+            "elapsed": round(elapsed, 3)
+        }
+
+    # Pasos de la ingesta
+
+    def _store(self, folder: str, name: str, student_name: str, opener: Callable[[], BinaryIO]) -> _StoredSubmission:
+        """
+        Copia una entrega a la carpeta de la asignación
+
+        El tamaño se cuenta al leer (no se confía en el que declara el ZIP) y
+        el formato se decide por los primeros bytes.
+
+        :raises UploadRejected: Si está vacía, es demasiado grande o no es PDF ni Word
+        """
+        correction_id = uuid.uuid4()
+        tmp_path = os.path.join(folder, f"{correction_id}.part")
+        size, head = 0, b''
+        try:
+            with opener() as source, open(tmp_path, 'wb') as target:
+                for chunk in iter(lambda: source.read(UPLOAD_CHUNK_SIZE), b''):
+                    size += len(chunk)
+                    if size > config.MAX_CONTENT_LENGTH:
+                        raise UploadRejected(f"El archivo supera el máximo de {config.MAX_CONTENT_LENGTH} bytes", 413)
+                    if len(head) < MAGIC_BYTES:
+                        head += chunk[:MAGIC_BYTES - len(head)]
+                    target.write(chunk)
+            if size == 0:
+                raise UploadRejected("El archivo está vacío")
+            extension = detect_file_type(head)
+            if extension is None:
+                raise UploadRejected("Tipo de archivo no soportado: se aceptan PDF y Word", 415)
+        except Exception:
+            _remove(tmp_path)
+            raise
+
+        file_path = os.path.join(folder, f"{correction_id}{extension}")
+        os.replace(tmp_path, file_path)
+        filename = _entry_parts(name)[-1]
+        return _StoredSubmission(correction_id, student_name, filename, file_path)
+
+    def _extract(self, submissions: List[_StoredSubmission]) -> Iterator[Tuple[_StoredSubmission, Tuple[int, Optional[str]]]]:
+        """Texto de cada entrega en un pool de procesos, en el orden de entrada"""
+        paths = [submission.file_path for submission in submissions]
+        workers = min(config.SUBMISSION_EXTRACTION_WORKERS or os.cpu_count() or 1, len(paths))
+        if workers <= 1:
+            yield from zip(submissions, (_text_length(self.file_processor, path) for path in paths))
+            return
+
+        # 'spawn': los hijos no heredan la conexión a la base de datos ni los hilos del proceso web
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                                 initializer=_init_extraction_process) as pool:
+            yield from zip(submissions, pool.map(_extract_in_worker, paths, chunksize=4))
+
+    def _owns_assignment(self, assignment_id: uuid.UUID, teacher_id: uuid.UUID) -> bool:
+        return db.session.query(Assignment.id).filter(
+            Assignment.id == assignment_id,
+            Assignment.teacher_id == teacher_id
+        ).first() is not None
+
+    def _insert_corrections(self, rows: List[Dict[str, Any]]) -> None:
+        # Un INSERT con varias filas por lote en lugar de un add + commit por corrección
+        try:
+            db.session.execute(insert(Correction), rows)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+    def _save_batch(self, assignment_id: uuid.UUID, teacher_id: uuid.UUID, batch: List[_StoredSubmission],
+                    model_type: str, language: str) -> None:
+        self._insert_corrections([
+            {
+                "id": submission.correction_id,
+                "assignment_id": assignment_id,
+                "teacher_id": teacher_id,
+                "student_name": submission.student_name,
+                "student_file_path": submission.file_path,
+                "total_score": 0.0,
+                "max_score": config.MAX_GRADE,
+                "percentage": 0.0
+            }
+            for submission in batch
+        ])
+        # Después del commit: ningún worker recibe una corrección que aún no existe
+        self.job_queue.enqueue_many(GRADE_SUBMISSION_JOB, [
+            {"correction_id": str(submission.correction_id), "model_type": model_type, "language": language}
+            for submission in batch
+        ])
+
+    # Corrección en segundo plano
+
+    def _process_grading(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Corrige una entrega pendiente (manejador del trabajo)"""
+        correction = db.session.get(Correction, uuid.UUID(payload['correction_id']))
+        if correction is None:
+            # La asignación se eliminó mientras la corrección esperaba en la cola
+            return {"skipped": True}
+        if correction.correction_details is not None:
+            return {"grade": correction.total_score}
+
+        assignment = db.session.query(Assignment.final_rubric, Assignment.final_solutions).filter(
+            Assignment.id == correction.assignment_id
+        ).first()
+        key_criteria = None
+        if assignment and (assignment.final_rubric or assignment.final_solutions):
+            key_criteria = {"rubric": assignment.final_rubric, "solutions": assignment.final_solutions}
+
+        text = self.file_processor.extract_text(correction.student_file_path)
+        engine = get_correction_engine(payload.get('model_type', 'ollama'))
+        result = engine.submit(key_criteria, text, payload.get('language', 'español')).result()
+        if result.error:
+            # El motor no lanza excepciones: sin esto un modelo caído pondría un 0 a todas las
+            # entregas. Así la cola reintenta y, al agotar los intentos, llama a _on_grading_failed
+            raise RuntimeError(f"La corrección automática falló: {result.comments}")
+
+        feedback = result.comments
+        if result.strengths:
+            feedback = f"{feedback}\n\nPuntos fuertes: " + "; ".join(result.strengths)
+        try:
+            correction.total_score = result.grade
+            correction.max_score = config.MAX_GRADE
+            correction.percentage = round(result.grade / config.MAX_GRADE * 100, 2)
+            correction.correction_details = result.details or []
+            correction.feedback = feedback
+            correction.suggestions = "\n".join(result.areas_of_improvement) or None
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        return {"grade": result.grade}
+
+    def _on_grading_failed(self, payload: Dict[str, Any], error_message: str) -> None:
+        """Deja constancia del error en la corrección cuando se agotan los intentos"""
+        try:
+            correction = db.session.get(Correction, uuid.UUID(payload['correction_id']))
+            if correction is None:
+                return
+            correction.correction_details = {"error": error_message}
+            correction.feedback = "No se pudo corregir automáticamente la entrega"
+            db.session.commit()
+        except Exception as e:
+            logger.error(f"Error guardando el fallo de la corrección {payload.get('correction_id')}: {str(e)}")
+            db.session.rollback()
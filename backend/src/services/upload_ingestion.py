@@ -0,0 +1,170 @@
+"""
+Recepción de archivos subidos en streaming
+
+Flask guarda cada archivo de un formulario multipart en el objeto que devuelve
+``Request._get_file_stream`` a medida que llegan los bloques del cuerpo. Con
+``UploadRequest`` ese objeto es un ``HashingSpooledFile``: calcula el SHA-256 y
+el tamaño mientras se escribe, guarda los primeros bytes para reconocer el
+formato y se queda en memoria hasta ``UPLOAD_SPOOL_MAX_BYTES`` (después pasa a
+un temporal en disco). El extractor lee directamente de ese objeto, sin copiar
+el archivo a ``UPLOAD_FOLDER`` ni leerlo otra vez para el hash.
+"""
+import hashlib
+import logging
+import tempfile
+from dataclasses import dataclass
+from typing import BinaryIO, Optional
+
+from flask import Request
+from werkzeug.datastructures import FileStorage
+from werkzeug.exceptions import RequestEntityTooLarge
+from werkzeug.utils import secure_filename
+
+from ..config.settings import config
+
+logger = logging.getLogger(__name__)
+
+# Bytes iniciales que se conservan para reconocer el formato
+MAGIC_BYTES = 8
+
+# Tamaño de los bloques al copiar una subida que no llegó por ``UploadRequest``
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+# Firmas de los formatos aceptados (DOCX es un ZIP; DOC, un documento OLE2)
+_SIGNATURES = (
+    (b'%PDF-', '.pdf'),
+    (b'PK\x03\x04', '.docx'),
+    (b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1', '.doc'),
+)
+
+
+class UploadRejected(ValueError):
+    """Subida no válida; ``status_code`` es el código HTTP a devolver"""
+
+    def __init__(self, message: str, status_code: int = 400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def detect_file_type(head: bytes) -> Optional[str]:
+    """Extensión del formato según sus primeros bytes, o None si no se reconoce"""
+    for signature, extension in _SIGNATURES:
+        if head.startswith(signature):
+            return extension
+    return None
+
+
+class HashingSpooledFile(tempfile.SpooledTemporaryFile):
+    """
+    Temporal en memoria (o en disco a partir de ``max_size``) que calcula el
+    SHA-256 y el tamaño de lo que se escribe y corta la escritura al superar
+    ``max_bytes``.
+    """
+
+    def __init__(self, max_size: int, max_bytes: int, dir: Optional[str] = None):
+        super().__init__(max_size=max_size, mode='w+b', dir=dir)
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.head = b''
+        self._digest = hashlib.sha256()
+
+    def write(self, data) -> int:
+        self.size += len(data)
+        if self.size > self.max_bytes:
+            raise RequestEntityTooLarge(f"El archivo supera el máximo de {self.max_bytes} bytes")
+        self._digest.update(data)
+        if len(self.head) < MAGIC_BYTES:
+            self.head += bytes(data[:MAGIC_BYTES - len(self.head)])
+        return super().write(data)
+
+    @property
+    def sha256(self) -> str:
+        return self._digest.hexdigest()
+
+
+def new_upload_spool() -> HashingSpooledFile:
+    return HashingSpooledFile(config.UPLOAD_SPOOL_MAX_BYTES, config.MAX_CONTENT_LENGTH, dir=config.UPLOAD_FOLDER)
+
+
+class UploadRequest(Request):
+    """Petición de Flask que recibe los archivos en un ``HashingSpooledFile``"""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return new_upload_spool()
+
+
+@dataclass
+class IngestedUpload:
+    """Archivo subido listo para el extractor"""
+    filename: str
+    extension: str
+    sha256: str
+    size: int
+    stream: BinaryIO
+
+    def close(self) -> None:
+        self.stream.close()
+
+
+def ingest_upload(file: FileStorage) -> IngestedUpload:
+    """
+    Valida un archivo subido y lo prepara para ``FileProcessor.process_stream``
+
+    Si la petición no usó ``UploadRequest`` (p. ej. un ``FileStorage`` creado a
+    mano), el contenido se copia por bloques a un ``HashingSpooledFile``.
+
+    :raises UploadRejected: Si el archivo está vacío o su formato no es PDF ni Word
+    :raises RequestEntityTooLarge: Si supera ``MAX_CONTENT_LENGTH``
+    """
+    spool = file.stream
+    if not isinstance(spool, HashingSpooledFile):
+        spool = new_upload_spool()
+        try:
+            for chunk in iter(lambda: file.stream.read(UPLOAD_CHUNK_SIZE), b''):
+                spool.write(chunk)
+        except Exception:
+            spool.close()
+            raise
+
+    return _ingested(spool, file.filename, spool.size, spool.sha256, spool.head)
+
+
+def ingest_path(file_path: str, filename: str) -> IngestedUpload:
+    """
+    Prepara para el extractor un archivo ya guardado (p. ej. una subida por partes)
+
+    El archivo se lee una vez por bloques para calcular el hash y reconocer el
+    formato; el extractor lo lee después desde el mismo descriptor.
+
+    :raises UploadRejected: Si el archivo está vacío o su formato no es PDF ni Word
+    """
+    digest = hashlib.sha256()
+    size = 0
+    handle = open(file_path, 'rb')
+    try:
+        head = handle.read(MAGIC_BYTES)
+        handle.seek(0)
+        for chunk in iter(lambda: handle.read(UPLOAD_CHUNK_SIZE), b''):
+            digest.update(chunk)
+            size += len(chunk)
+    except Exception:
+        handle.close()
+        raise
+    return _ingested(handle, filename, size, digest.hexdigest(), head)
+
+
+def _ingested(stream: BinaryIO, filename: Optional[str], size: int, sha256: str, head: bytes) -> IngestedUpload:
+    if size == 0:
+        stream.close()
+        raise UploadRejected("El archivo está vacío")
+
+    # El formato se decide por el contenido, no por la extensión que envía el cliente
+    extension = detect_file_type(head)
+    if extension is None:
+        stream.close()
+        raise UploadRejected("Tipo de archivo no soportado: se aceptan PDF y Word", 415)
+
+    stream.seek(0)
+    filename = secure_filename(filename or '') or f"archivo{extension}"
+    logger.info(f"Subida recibida: {filename} ({size} bytes, {extension}, sha256 {sha256[:12]})")
+    return IngestedUpload(filename=filename, extension=extension, sha256=sha256, size=size, stream=stream)
@@ -1,14 +1,50 @@
-from difflib import SequenceMatcher
 import json
 import logging
 
 from src.services.file_processor import FileProcessor
 
 class Analysis:
+    @staticmethod
+    def detect_ai_content(content: str, strategy) -> float:
+        """
+        Estima el porcentaje del contenido generado con inteligencia artificial.
+
+        La llamada pasa por la estrategia indicada, y con ella por el transporte
+        compartido y su limitador de concurrencia.
+        """
+        prompt = f"""
+        Analiza el siguiente texto y estima qué porcentaje parece haber sido generado con inteligencia artificial. Responde estrictamente en el siguiente formato JSON:
+        {{
+            "ai_generated_percentage": float (0-100)
+        }}
+
+        Texto: {content}
+        """
+        try:
+            # Con streaming basta con recibir el porcentaje para cortar la generación
+            response = strategy.evaluate(prompt, required_fields=["ai_generated_percentage"])
+            return float(response.get("ai_generated_percentage", 0.0))
+        except Exception as e:
+            logging.error(f"Error detectando contenido generado con IA: {e}")
+            return 0.0
+
     @staticmethod
     def detect_similarity(content1: str, content2: str) -> float:
-        """Calcula el porcentaje de similitud entre dos contenidos."""
-        return SequenceMatcher(None, content1, content2).ratio() * 100
+        """
+        Calcula el porcentaje de similitud entre dos contenidos.
+
+        Para comparar todas las entregas de una clase usar
+        ``find_similar_submissions``, que evita comparar cada pareja.
+        """
+        # Importa numpy: solo al usarlo, no al cargar el servicio de corrección
+        from src.utils.similarity import alignment_similarity
+        return alignment_similarity(content1, content2)
+
+    @staticmethod
+    def find_similar_submissions(contents: list, threshold: float = None) -> list:
+        """Pares de entregas parecidas de un lote (MinHash + LSH y alineación de los candidatos)."""
+        from src.services.similarity_service import find_similar_texts
+        return find_similar_texts(contents, threshold)
 
     @staticmethod
     def detect_missing_exercises(required_exercises: list, content: str) -> list:
@@ -0,0 +1,93 @@
+"""
+PDF de retroalimentación de una corrección individual.
+
+Solo depende de ReportLab y de los estilos compartidos, de modo que los
+procesos del pool de exportación no cargan Flask ni la base de datos.
+"""
+import io
+from typing import Any, Dict, List
+from xml.sax.saxutils import escape
+
+from .pdf_styles import get_pdf_styles
+
+
+def _text(value: Any) -> str:
+    """Texto seguro para un ``Paragraph`` (escapa ``&``, ``<`` y ``>``)"""
+    return escape(str(value)) if value is not None else ''
+
+
+def _detail_rows(details: Any) -> List[List[str]]:
+    """Filas (apartado, puntuación, comentario) a partir de ``correction_details``"""
+    rows = []
+    if isinstance(details, dict):
+        details = [
+            dict(value, name=key) if isinstance(value, dict) else {"name": key, "comments": value}
+            for key, value in details.items()
+        ]
+    if not isinstance(details, list):
+        return rows
+    for index, item in enumerate(details, 1):
+        if not isinstance(item, dict):
+            rows.append([str(index), '', str(item)])
+            continue
+        name = item.get('name') or item.get('criterion') or item.get('exercise') or item.get('exercise_number') or index
+        score = item.get('score', item.get('grade', item.get('points', '')))
+        comment = item.get('comments') or item.get('feedback') or item.get('comment') or ''
+        if isinstance(comment, list):
+            comment = '; '.join(str(c) for c in comment)
+        rows.append([str(name), str(score), str(comment)])
+    return rows
+
+
+def render_correction_pdf(assignment: Dict[str, Any], correction: Dict[str, Any]) -> bytes:
+    """
+    Genera el PDF de retroalimentación de un estudiante
+
+    :param assignment: ``title`` y ``total_points`` de la asignación
+    :param correction: Datos de la corrección (``student_name``, puntuaciones,
+        ``correction_details``, ``feedback`` y ``suggestions``)
+    :return: Contenido del PDF
+    """
+    styles = get_pdf_styles()
+    Paragraph, Spacer, Table = styles['Paragraph'], styles['Spacer'], styles['Table']
+    inch, normal, info = styles['inch'], styles['normal'], styles['info']
+
+    buffer = io.BytesIO()
+    doc = styles['SimpleDocTemplate'](buffer, pagesize=styles['pagesize'])
+    story = [
+        Paragraph(f"Corrección: {_text(assignment.get('title'))}", styles['title']),
+        Spacer(1, 12),
+        Paragraph(f"<b>Estudiante:</b> {_text(correction.get('student_name'))}", info),
+        Paragraph(
+            f"<b>Puntuación:</b> {correction.get('total_score', 0):g} / {correction.get('max_score', 0):g} "
+            f"({correction.get('percentage', 0):.1f}%)",
+            info
+        ),
+    ]
+    if correction.get('created_at'):
+        story.append(Paragraph(f"<b>Fecha:</b> {_text(correction['created_at'])}", info))
+    story.append(Spacer(1, 20))
+
+    rows = _detail_rows(correction.get('correction_details'))
+    if rows:
+        story.append(Paragraph("Detalle", styles['criterion']))
+        table_data = [['Apartado', 'Puntos', 'Comentario']]
+        table_data.extend(
+            [Paragraph(_text(name), normal), score, Paragraph(_text(comment), normal)]
+            for name, score, comment in rows
+        )
+        table = Table(table_data, colWidths=[1.6*inch, 0.8*inch, 3.6*inch], repeatRows=1)
+        table.setStyle(styles['levels_table'])
+        story.append(table)
+        story.append(Spacer(1, 20))
+
+    for heading, key in (("Comentarios", 'feedback'), ("Sugerencias de mejora", 'suggestions')):
+        if correction.get(key):
+            story.append(Paragraph(heading, styles['criterion']))
+            for paragraph in str(correction[key]).split('\n'):
+                if paragraph.strip():
+                    story.append(Paragraph(_text(paragraph), normal))
+            story.append(Spacer(1, 12))
+
+    doc.build(story)
+    return buffer.getvalue()
@@ -0,0 +1,154 @@
+"""
+Extracción de ejercicios de un enunciado en una sola pasada.
+
+Una única expresión regular precompilada recorre el texto una vez y lo divide
+en tokens: encabezados de ejercicio ("Ejercicio 2:", "Pregunta 3", "4." o
+"5)"), puntuaciones ("3 puntos", "puntos: 3", "(3 p)") y palabras que indican
+el tipo de ejercicio. Una pequeña máquina de estados asigna cada token al
+ejercicio abierto, así que el coste es lineal en la longitud del documento.
+
+Los encabezados con palabra clave tienen prioridad: si el documento los usa,
+los números sueltos ("1.", "2)") se consideran apartados dentro del enunciado.
+Un número de ejercicio repetido no abre un ejercicio nuevo; su texto se une al
+ejercicio en curso.
+"""
+import re
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+# Longitud máxima del enunciado guardado y mínima para considerarlo ejercicio
+MAX_STATEMENT_LENGTH = 1000
+MIN_STATEMENT_LENGTH = 10
+
+DEFAULT_POINTS = 10
+
+# Tipos de ejercicio por orden de prioridad y palabras que los identifican
+EXERCISE_TYPE_KEYWORDS = [
+    ('calculation', ['calcular', 'resolver', 'hallar', 'encontrar']),
+    ('open_question', ['explicar', 'describir', 'analizar', 'comentar']),
+    ('true_false', ['verdadero', 'falso', 'v/f']),
+    ('multiple_choice', ['seleccionar', 'elegir', 'marcar']),
+    ('fill_blank', ['completar', 'llenar', 'rellenar']),
+]
+_TYPE_BY_KEYWORD = {word: exercise_type for exercise_type, words in EXERCISE_TYPE_KEYWORDS for word in words}
+_TYPE_PRIORITY = [exercise_type for exercise_type, _ in EXERCISE_TYPE_KEYWORDS]
+
+# Se busca sobre el texto en minúsculas. La anticipación inicial descarta sin
+# probar ninguna alternativa las posiciones que no pueden empezar un token, y
+# los números no pueden empezar en mitad de otro número (sin ella, una tira
+# larga de cifras de un OCR costaría un tiempo cuadrático).
+_TOKEN_PATTERN = (
+    r"(?=[\d\(\[" + ''.join(sorted({word[0] for word in _TYPE_BY_KEYWORD} | set('ejp'))) + r"])"
+    r"""(?:
+      (?P<keyword_header>\b(?:ejercicio|pregunta)\s*(?P<keyword_number>\d+)\s*[\.\:\)\-]?)
+    | (?P<number_header>(?:(?<=\s)|^)(?P<number>\d+)[\.\)](?=\s|$))
+    | [\(\[](?P<bracket_points>\d+)\s*p[\)\]]
+    | (?<!\d)(?P<points>\d+)\s*puntos?
+    | puntos?[:\s]*(?P<points_after>\d+)
+    | (?P<type_keyword>""" + '|'.join(re.escape(word) for word in _TYPE_BY_KEYWORD) + r""")
+    )"""
+)
+_TOKEN = re.compile(_TOKEN_PATTERN, re.VERBOSE)
+# Para textos cuya conversión a minúsculas cambia la longitud (y las posiciones)
+_TOKEN_IGNORECASE = re.compile(_TOKEN_PATTERN, re.VERBOSE | re.IGNORECASE)
+
+
+class _ExerciseSegmenter:
+    """Ejercicios delimitados por un tipo de encabezado"""
+
+    def __init__(self, content: str):
+        self.content = content
+        self.exercises: List[Dict[str, Any]] = []
+        self.headers = 0
+        self._seen: Set[int] = set()
+        self._number: Optional[int] = None
+        self._body_start = 0
+        self._points: Optional[int] = None
+        self._types: Set[str] = set()
+
+    def open(self, number: int, header_start: int, body_start: int) -> None:
+        if number in self._seen:
+            return
+        self.close(header_start)
+        self._seen.add(number)
+        self.headers += 1
+        self._number = number
+        self._body_start = body_start
+        self._points = None
+        self._types = set()
+
+    def add_points(self, points: int) -> None:
+        # Cuenta la primera puntuación del enunciado
+        if self._number is not None and self._points is None:
+            self._points = points
+
+    def add_type(self, exercise_type: str) -> None:
+        if self._number is not None:
+            self._types.add(exercise_type)
+
+    def close(self, end: int) -> None:
+        if self._number is None:
+            return
+        statement = self.content[self._body_start:end].strip()
+        if len(statement) > MIN_STATEMENT_LENGTH:
+            self.exercises.append({
+                "number": self._number,
+                "statement": statement[:MAX_STATEMENT_LENGTH],
+                "type": next((t for t in _TYPE_PRIORITY if t in self._types), 'mixed'),
+                "points": self._points if self._points is not None else DEFAULT_POINTS
+            })
+        self._number = None
+
+
+def _tokens(content: str) -> Iterator["re.Match[str]"]:
+    lowered = content.lower()
+    if len(lowered) == len(content):
+        return _TOKEN.finditer(lowered)
+    return _TOKEN_IGNORECASE.finditer(content)
+
+
+def find_exercise_headers(content: str) -> List[Tuple[int, int]]:
+    """
+    Encabezados de ejercicio como (número, posición de inicio), en orden de aparición
+
+    Se reconocen igual que en ``extract_exercises``: si hay encabezados con
+    palabra clave, los números sueltos no cuentan.
+    """
+    by_keyword, by_number = [], []
+    for match in _tokens(content):
+        kind = match.lastgroup
+        if kind == 'keyword_header':
+            by_keyword.append((int(match.group('keyword_number')), match.start()))
+        elif kind == 'number_header':
+            by_number.append((int(match.group('number')), match.start()))
+    return by_keyword or by_number
+
+
+def extract_exercises(content: str) -> List[Dict[str, Any]]:
+    """
+    Ejercicios de un enunciado, en orden de aparición
+
+    :return: Lista de {"number", "statement", "type", "points"}; vacía si no
+        hay encabezados de ejercicio
+    """
+    by_keyword = _ExerciseSegmenter(content)
+    by_number = _ExerciseSegmenter(content)
+    segmenters = (by_keyword, by_number)
+
+    for match in _tokens(content):
+        kind = match.lastgroup
+        if kind == 'keyword_header':
+            by_keyword.open(int(match.group('keyword_number')), match.start(), match.end())
+        elif kind == 'number_header':
+            by_number.open(int(match.group('number')), match.start(), match.end())
+        elif kind == 'type_keyword':
+            exercise_type = _TYPE_BY_KEYWORD[match.group(kind).lower()]
+            for segmenter in segmenters:
+                segmenter.add_type(exercise_type)
+        else:
+            points = int(match.group('bracket_points') or match.group('points') or match.group('points_after'))
+            for segmenter in segmenters:
+                segmenter.add_points(points)
+
+    for segmenter in segmenters:
+        segmenter.close(len(content))
+    return by_keyword.exercises if by_keyword.headers else by_number.exercises
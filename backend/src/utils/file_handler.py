@@ -3,7 +3,6 @@ import os
 import uuid
 from werkzeug.utils import secure_filename
 import json
-import PyPDF2
 import time
 
 class FileHandler:
@@ -84,16 +83,16 @@ class FileHandler:
         """
         Read a PDF file and return its text content.
         
+        Uses the same extraction (and extraction cache) as ``FileProcessor``.
+        
         :param file_path: Path to the PDF file
         :return: String containing all text extracted from the PDF
         """
+        from src.services.extraction_cache import get_extraction_cache
+        from src.services.file_processor import FileProcessor
+        
         try:
-            with open(file_path, 'rb') as file:  # 'rb' for reading in binary mode
-                pdf_reader = PyPDF2.PdfReader(file)
-                text = []
-                for page in pdf_reader.pages:
-                    text.append(page.extract_text())
-                return ' '.join(text)
+            return FileProcessor(cache=get_extraction_cache()).extract_text(file_path)
         except FileNotFoundError:
             raise FileNotFoundError(f"The file at {file_path} does not exist.")
         except Exception as e:
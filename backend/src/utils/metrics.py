@@ -0,0 +1,289 @@
+"""
+Métricas en el formato de texto de Prometheus, sin dependencias externas.
+
+Los contadores e histogramas se reparten por hilo: cada hilo suma en su propia
+lista de valores, sin tomar ningún lock porque solo él la escribe, y al leer
+las métricas se suman las listas de todos los hilos. Solo la primera
+observación de un hilo (o de una combinación de etiquetas nueva) toma un lock.
+Las listas de los hilos que ya terminaron se acumulan aparte al leer, para que
+el servidor de desarrollo (un hilo por petición) no las vaya amontonando.
+
+Cada proceso tiene su propio registro: con varios workers de gunicorn cada
+uno expone sus métricas y Prometheus las agrega por instancia.
+"""
+import bisect
+import math
+import threading
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Latencias de peticiones HTTP (segundos)
+HTTP_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Latencias de llamadas a modelos y de trabajos en segundo plano (segundos)
+SLOW_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+
+LabelValues = Tuple[str, ...]
+
+
+class _ShardedValues:
+    """Vector de valores con una copia por hilo; ``totals`` suma todas las copias"""
+
+    __slots__ = ('_size', '_local', '_lock', '_shards', '_retired')
+
+    def __init__(self, size: int):
+        self._size = size
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._shards: List[Tuple[threading.Thread, List[float]]] = []
+        self._retired = [0.0] * size
+
+    def local(self) -> List[float]:
+        """Valores del hilo actual (se crean la primera vez)"""
+        values = getattr(self._local, 'values', None)
+        if values is None:
+            values = [0.0] * self._size
+            with self._lock:
+                self._fold_finished()
+                self._shards.append((threading.current_thread(), values))
+            self._local.values = values
+        return values
+
+    def totals(self) -> List[float]:
+        with self._lock:
+            self._fold_finished()
+            totals = list(self._retired)
+            for _, values in self._shards:
+                for index, value in enumerate(values):
+                    totals[index] += value
+        return totals
+
+    def _fold_finished(self) -> None:
+        # Un hilo terminado ya no escribe: sus valores pasan al acumulado
+        alive = []
+        for thread, values in self._shards:
+            if thread.is_alive():
+                alive.append((thread, values))
+            else:
+                for index, value in enumerate(values):
+                    self._retired[index] += value
+        self._shards = alive
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class MetricsRegistry:
+    """Conjunto de métricas que se exponen juntas en ``/metrics``"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, '_Metric'] = {}
+
+    def register(self, metric: '_Metric') -> None:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Métrica duplicada: {metric.name}")
+            self._metrics[metric.name] = metric
+
+    def get(self, name: str) -> Optional['_Metric']:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        """Todas las métricas en el formato de texto de Prometheus (0.0.4)"""
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda metric: metric.name)
+        lines: List[str] = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(metric.samples())
+        return '\n'.join(lines) + '\n'
+
+
+# Registro del proceso
+REGISTRY = MetricsRegistry()
+
+
+class _Metric(ABC):
+    type = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 registry: Optional[MetricsRegistry] = REGISTRY):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._children: Dict[LabelValues, Any] = {}
+        if registry is not None:
+            registry.register(self)
+
+    def labels(self, *values: str):
+        """
+        Serie para unos valores de etiquetas (en el orden de ``labelnames``)
+
+        Guardar la serie devuelta evita buscarla en cada observación.
+        """
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} espera las etiquetas {self.labelnames}")
+            with self._lock:
+                child = self._children.get(values)
+                if child is None:
+                    child = self._new_child(_format_labels(self.labelnames, values))
+                    self._children[values] = child
+        return child
+
+    @abstractmethod
+    def _new_child(self, labels: str):
+        """Serie nueva con las etiquetas ya formateadas"""
+
+    @abstractmethod
+    def samples(self) -> Iterable[str]:
+        """Líneas de la métrica en el formato de texto de Prometheus"""
+
+
+class _CounterChild:
+    __slots__ = ('labels', '_values')
+
+    def __init__(self, labels: str):
+        self.labels = labels
+        self._values = _ShardedValues(1)
+
+    def inc(self, amount: float = 1) -> None:
+        self._values.local()[0] += amount
+
+    def value(self) -> float:
+        return self._values.totals()[0]
+
+
+class Counter(_Metric):
+    """Contador que solo crece (el nombre debe acabar en ``_total``)"""
+    type = 'counter'
+
+    def _new_child(self, labels: str) -> _CounterChild:
+        return _CounterChild(labels)
+
+    def inc(self, amount: float = 1) -> None:
+        self.labels().inc(amount)
+
+    def samples(self) -> Iterable[str]:
+        for child in list(self._children.values()):
+            yield f"{self.name}{child.labels} {_format_value(child.value())}"
+
+
+class _HistogramChild:
+    __slots__ = ('labels', '_bounds', '_values')
+
+    def __init__(self, labels: str, bounds: Tuple[float, ...]):
+        self.labels = labels
+        self._bounds = bounds
+        # Un contador por cubeta (la última es +Inf) y la suma de las observaciones
+        self._values = _ShardedValues(len(bounds) + 2)
+
+    def observe(self, value: float) -> None:
+        values = self._values.local()
+        values[bisect.bisect_left(self._bounds, value)] += 1
+        values[-1] += value
+
+    def totals(self) -> Tuple[List[float], float]:
+        """Cuentas por cubeta (no acumuladas) y suma"""
+        totals = self._values.totals()
+        return totals[:-1], totals[-1]
+
+
+class Histogram(_Metric):
+    """Distribución de valores en cubetas acumuladas (``le``), con suma y cuenta"""
+    type = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = HTTP_BUCKETS, registry: Optional[MetricsRegistry] = REGISTRY):
+        self.bounds = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _new_child(self, labels: str) -> _HistogramChild:
+        return _HistogramChild(labels, self.bounds)
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def samples(self) -> Iterable[str]:
+        for values, child in list(self._children.items()):
+            counts, total = child.totals()
+            cumulative = 0.0
+            for bound, count in zip(self.bounds + (math.inf,), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                yield f"{self.name}_bucket{_format_labels(self.labelnames, values, le)} {_format_value(cumulative)}"
+            yield f"{self.name}_sum{child.labels} {_format_value(total)}"
+            yield f"{self.name}_count{child.labels} {_format_value(cumulative)}"
+
+
+class CallbackMetric(_Metric):
+    """
+    Métrica cuyo valor se calcula al leerla (profundidad de la cola, estado de
+    las cachés...); no tiene coste entre lecturas
+
+    ``callback`` devuelve pares (valores de las etiquetas, valor). Si falla, la
+    métrica se omite en esa lectura.
+    """
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str],
+                 callback: Callable[[], Iterable[Tuple[LabelValues, float]]], metric_type: str = 'gauge',
+                 registry: Optional[MetricsRegistry] = REGISTRY):
+        self.type = metric_type
+        self.callback = callback
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _new_child(self, labels: str):
+        raise TypeError(f"{self.name} se calcula al leerla: no tiene series propias")
+
+    def samples(self) -> Iterable[str]:
+        try:
+            values = list(self.callback())
+        except Exception:
+            return []
+        return [f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+                for labels, value in values if value is not None]
+
+
+# Cachés con contadores ``hits``/``misses`` que se exponen en /metrics
+_caches: Dict[str, Any] = {}
+
+
+def register_cache(name: str, cache: Any) -> None:
+    """Expone los aciertos y fallos de una caché (sustituye a la registrada con el mismo nombre)"""
+    _caches[name] = cache
+
+
+def _cache_counter(attribute: str) -> Callable[[], Iterable[Tuple[LabelValues, float]]]:
+    def collect():
+        return [((name,), getattr(cache, attribute)) for name, cache in list(_caches.items())]
+    return collect
+
+
+def _cache_hit_ratio() -> Iterable[Tuple[LabelValues, float]]:
+    for name, cache in list(_caches.items()):
+        lookups = cache.hits + cache.misses
+        yield (name,), (cache.hits / lookups if lookups else 0.0)
+
+
+CallbackMetric('cache_hits_total', "Aciertos de cada caché", ['cache'], _cache_counter('hits'), 'counter')
+CallbackMetric('cache_misses_total', "Fallos de cada caché", ['cache'], _cache_counter('misses'), 'counter')
+CallbackMetric('cache_hit_ratio', "Proporción de aciertos de cada caché desde el arranque", ['cache'], _cache_hit_ratio)
@@ -0,0 +1,80 @@
+"""
+Estilos compartidos de los PDF de rúbricas y soluciones.
+
+ReportLab se importa y los ``ParagraphStyle`` se crean una sola vez por
+proceso, en la primera descarga, en lugar de en cada PDF generado.
+"""
+import threading
+from typing import Any, Dict, Optional
+
+_styles: Optional[Dict[str, Any]] = None
+_lock = threading.Lock()
+
+
+def get_pdf_styles() -> Dict[str, Any]:
+    """
+    Estilos y elementos de ReportLab usados por los PDF de asignaciones
+
+    :return: Diccionario con los módulos de platypus, los estilos de párrafo y
+        el estilo de tabla de niveles de la rúbrica
+    """
+    global _styles
+    if _styles is not None:
+        return _styles
+
+    with _lock:
+        if _styles is None:
+            from reportlab.lib import colors
+            from reportlab.lib.pagesizes import letter
+            from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+            from reportlab.lib.units import inch
+            from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+            sample = getSampleStyleSheet()
+            _styles = {
+                "pagesize": letter,
+                "inch": inch,
+                "SimpleDocTemplate": SimpleDocTemplate,
+                "Paragraph": Paragraph,
+                "Spacer": Spacer,
+                "Table": Table,
+                "normal": sample['Normal'],
+                "title": ParagraphStyle(
+                    'CustomTitle',
+                    parent=sample['Heading1'],
+                    fontSize=18,
+                    spaceAfter=30,
+                    alignment=1  # Centrado
+                ),
+                "info": ParagraphStyle(
+                    'Info',
+                    parent=sample['Normal'],
+                    fontSize=10,
+                    spaceAfter=6
+                ),
+                "criterion": ParagraphStyle(
+                    'CriterionTitle',
+                    parent=sample['Heading2'],
+                    fontSize=14,
+                    spaceAfter=12,
+                    textColor=colors.darkblue
+                ),
+                "exercise": ParagraphStyle(
+                    'ExerciseTitle',
+                    parent=sample['Heading2'],
+                    fontSize=14,
+                    spaceAfter=12,
+                    textColor=colors.darkgreen
+                ),
+                "levels_table": TableStyle([
+                    ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+                    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+                    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+                    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+                    ('FONTSIZE', (0, 0), (-1, 0), 10),
+                    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+                    ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+                    ('GRID', (0, 0), (-1, -1), 1, colors.black)
+                ]),
+            }
+    return _styles
@@ -0,0 +1,182 @@
+"""
+Detección de entregas casi duplicadas con MinHash y LSH.
+
+Cada entrega se reduce a un conjunto de shingles (secuencias de ``k`` palabras
+normalizadas) y a una firma MinHash de ``num_perm`` enteros de 32 bits que
+estima la similitud de Jaccard entre conjuntos. El índice LSH divide las firmas
+en bandas: dos entregas son candidatas si coinciden en alguna banda completa,
+así que encontrar los pares sospechosos de una clase cuesta un tiempo casi
+lineal en lugar de comparar todas las parejas. La alineación exacta (costosa)
+solo se ejecuta sobre los candidatos.
+"""
+import re
+import unicodedata
+import zlib
+from collections import defaultdict
+from difflib import SequenceMatcher
+from typing import Dict, Hashable, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+DEFAULT_SHINGLE_SIZE = 5
+DEFAULT_NUM_PERM = 128
+
+
+def normalize_words(text: str) -> List[str]:
+    """Palabras en minúsculas y sin tildes (el formato no cuenta como diferencia)"""
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    return _WORD.findall(text.lower())
+
+
+def shingle_hashes(text: str, k: int = DEFAULT_SHINGLE_SIZE) -> np.ndarray:
+    """
+    Hashes de 32 bits de los shingles de ``k`` palabras de un texto
+
+    :return: Array ``uint64`` sin repetidos (vacío si el texto no tiene palabras)
+    """
+    words = normalize_words(text)
+    if not words:
+        return np.empty(0, dtype=np.uint64)
+    if len(words) < k:
+        shingles = {' '.join(words)}
+    else:
+        shingles = {' '.join(words[i:i + k]) for i in range(len(words) - k + 1)}
+    return np.fromiter((zlib.crc32(s.encode('utf-8')) for s in shingles), dtype=np.uint64, count=len(shingles))
+
+
+class MinHasher:
+    """
+    Calcula firmas MinHash con ``num_perm`` permutaciones ``(a·x + b) mod p``.
+
+    Con la misma semilla las firmas son estables entre procesos y ejecuciones,
+    lo que permite guardarlas en la base de datos y compararlas más tarde.
+    """
+
+    def __init__(self, num_perm: int = DEFAULT_NUM_PERM, seed: int = 1):
+        generator = np.random.RandomState(seed)
+        self.num_perm = num_perm
+        self._a = generator.randint(1, 1 << 32, size=num_perm, dtype=np.uint64)
+        self._b = generator.randint(0, 1 << 32, size=num_perm, dtype=np.uint64)
+
+    def signature(self, hashes: np.ndarray) -> np.ndarray:
+        """
+        Firma MinHash de un conjunto de hashes de shingles
+
+        :return: Array ``uint32`` de ``num_perm`` valores
+        """
+        if hashes.size == 0:
+            return np.full(self.num_perm, _MAX_HASH, dtype=np.uint32)
+        permuted = (np.outer(self._a, hashes) + self._b[:, None]) % _MERSENNE_PRIME & _MAX_HASH
+        return permuted.min(axis=1).astype(np.uint32)
+
+    def signature_for_text(self, text: str, k: int = DEFAULT_SHINGLE_SIZE) -> np.ndarray:
+        return self.signature(shingle_hashes(text, k))
+
+
+def estimate_jaccard(sig1: np.ndarray, sig2: np.ndarray) -> float:
+    """Similitud de Jaccard estimada a partir de dos firmas (0-1)"""
+    return float(np.count_nonzero(sig1 == sig2)) / len(sig1)
+
+
+def signature_to_bytes(signature: np.ndarray) -> bytes:
+    return signature.astype('<u4').tobytes()
+
+
+def signature_from_bytes(data: bytes) -> np.ndarray:
+    return np.frombuffer(data, dtype='<u4').astype(np.uint32)
+
+
+def lsh_params(num_perm: int, threshold: float) -> Tuple[int, int]:
+    """
+    Bandas y filas por banda cuyo umbral ``(1/b)^(1/r)`` se acerca más a ``threshold``
+
+    Ante la duda se prefiere un umbral algo menor: un falso candidato solo
+    cuesta una alineación exacta, un par que no aparece no se detecta nunca.
+    """
+    best = None
+    for rows in range(1, num_perm + 1):
+        if num_perm % rows:
+            continue
+        bands = num_perm // rows
+        effective = (1.0 / bands) ** (1.0 / rows)
+        score = abs(effective - threshold) + (0.05 if effective > threshold else 0.0)
+        if best is None or score < best[0]:
+            best = (score, bands, rows)
+    return best[1], best[2]
+
+
+class LSHIndex:
+    """
+    Índice LSH en memoria sobre firmas MinHash.
+
+    Cada banda de ``rows`` valores se usa como clave de un diccionario; las
+    entregas que comparten clave en alguna banda son candidatas.
+    """
+
+    def __init__(self, num_perm: int = DEFAULT_NUM_PERM, threshold: float = 0.5):
+        self.num_perm = num_perm
+        self.threshold = threshold
+        self.bands, self.rows = lsh_params(num_perm, threshold)
+        self._buckets: List[Dict[bytes, List[Hashable]]] = [defaultdict(list) for _ in range(self.bands)]
+        self._signatures: Dict[Hashable, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._signatures
+
+    def _band_keys(self, signature: np.ndarray) -> Iterable[bytes]:
+        for band in range(self.bands):
+            yield signature[band * self.rows:(band + 1) * self.rows].tobytes()
+
+    def insert(self, key: Hashable, signature: np.ndarray) -> None:
+        if key in self._signatures:
+            raise KeyError(f"La entrega {key} ya está en el índice")
+        self._signatures[key] = signature
+        for band, band_key in enumerate(self._band_keys(signature)):
+            self._buckets[band][band_key].append(key)
+
+    def keys(self) -> List[Hashable]:
+        return list(self._signatures)
+
+    def signature(self, key: Hashable) -> Optional[np.ndarray]:
+        return self._signatures.get(key)
+
+    def query(self, signature: np.ndarray) -> Set[Hashable]:
+        """Entregas del índice que comparten alguna banda con la firma"""
+        candidates: Set[Hashable] = set()
+        for band, band_key in enumerate(self._band_keys(signature)):
+            candidates.update(self._buckets[band].get(band_key, ()))
+        return candidates
+
+    def candidate_pairs(self) -> Set[Tuple[Hashable, Hashable]]:
+        """Todos los pares de entregas que comparten alguna banda"""
+        pairs: Set[Tuple[Hashable, Hashable]] = set()
+        for buckets in self._buckets:
+            for keys in buckets.values():
+                if len(keys) < 2:
+                    continue
+                ordered = sorted(keys, key=str)
+                for i in range(len(ordered)):
+                    for j in range(i + 1, len(ordered)):
+                        pairs.add((ordered[i], ordered[j]))
+        return pairs
+
+
+def alignment_similarity(text1: str, text2: str) -> float:
+    """
+    Porcentaje de texto alineado entre dos entregas (comparación exacta)
+
+    Se compara por palabras normalizadas, que es mucho más rápido que por
+    caracteres y no penaliza cambios de formato o mayúsculas.
+    """
+    words1, words2 = normalize_words(text1), normalize_words(text2)
+    if not words1 and not words2:
+        return 100.0
+    return SequenceMatcher(None, words1, words2, autojunk=False).ratio() * 100
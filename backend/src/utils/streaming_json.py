@@ -0,0 +1,203 @@
+"""
+Parser JSON incremental y tolerante para respuestas de LLM en streaming.
+
+Recibe el texto a trozos según llega del modelo y extrae cada campo de primer
+nivel del objeto JSON en cuanto su valor está completo, de modo que el llamador
+puede dejar de generar en cuanto tiene los campos que necesita. Ignora el
+texto previo al primer ``{`` (explicaciones, bloques ```json) y lo que venga
+después de cerrar el objeto.
+"""
+import json
+import re
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+_TRAILING_COMMA = re.compile(r",\s*([\]}])")
+_CLOSERS = {"{": "}", "[": "]"}
+
+
+def _loads_tolerant(text: str) -> Any:
+    """json.loads que acepta comas finales antes de ``]`` o ``}``"""
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        return json.loads(_TRAILING_COMMA.sub(r"\1", text))
+
+
+class IncrementalJSONParser:
+    """
+    Extrae los campos de primer nivel de un objeto JSON que llega por partes.
+
+    Uso::
+
+        parser = IncrementalJSONParser()
+        for token in stream:
+            parser.feed(token)
+            if parser.has(["grade", "comments"]):
+                break
+        data = parser.result()
+    """
+
+    def __init__(self):
+        self._text = ""
+        self._pos = 0                 # Siguiente carácter por analizar
+        self._root_start: Optional[int] = None
+        self._stack: List[str] = []   # Corchetes/llaves abiertos
+        self._in_string = False
+        self._escaped = False
+        self._string_start = 0
+        self._key: Optional[str] = None
+        self._expect_key = False
+        self._value_start: Optional[int] = None
+        # Último punto en el que el valor pendiente podía cerrarse: (índice, profundidad)
+        self._safe_point: Optional[Tuple[int, int]] = None
+        self.fields: Dict[str, Any] = {}
+        self.complete = False
+
+    def feed(self, chunk: str) -> List[str]:
+        """
+        Añade texto y analiza lo recibido.
+
+        :return: Nombres de los campos que se han completado con este trozo.
+        """
+        if self.complete or not chunk:
+            return []
+        self._text += chunk
+        completed = []
+        text = self._text
+
+        while self._pos < len(text) and not self.complete:
+            i = self._pos
+            char = text[i]
+            self._pos += 1
+
+            if self._root_start is None:
+                if char == "{":
+                    self._root_start = i
+                    self._stack.append("{")
+                    self._expect_key = True
+                continue
+
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                    if len(self._stack) == 1 and self._expect_key:
+                        self._key = json.loads(text[self._string_start:i + 1])
+                continue
+
+            depth = len(self._stack)
+            if char == '"':
+                self._in_string = True
+                self._string_start = i
+            elif depth == 1 and char == ":" and self._key is not None:
+                self._expect_key = False
+                self._value_start = i + 1
+                self._safe_point = None
+            elif char in "{[":
+                self._stack.append(char)
+            elif char in "}]":
+                if self._stack:
+                    self._stack.pop()
+                if depth > 1:
+                    self._safe_point = (i + 1, depth - 1)
+                else:
+                    # Cierre del objeto raíz
+                    completed.extend(self._close_value(i))
+                    self.complete = True
+            elif char == ",":
+                if depth == 1:
+                    completed.extend(self._close_value(i))
+                    self._expect_key = True
+                else:
+                    self._safe_point = (i, depth)
+
+        return completed
+
+    def _close_value(self, end: int) -> List[str]:
+        key, start = self._key, self._value_start
+        self._key, self._value_start, self._safe_point = None, None, None
+        if key is None or start is None:
+            return []
+        raw = self._text[start:end].strip()
+        try:
+            self.fields[key] = _loads_tolerant(raw)
+        except (json.JSONDecodeError, ValueError):
+            return []
+        return [key]
+
+    def has(self, required: Iterable[str]) -> bool:
+        """Indica si ya están completos todos los campos indicados"""
+        return all(field in self.fields for field in required)
+
+    def pending_field(self) -> Optional[Tuple[str, Any]]:
+        """
+        Recupera el campo que se estaba recibiendo cuando se cortó el texto.
+
+        Se trunca en el último elemento completo y se cierran los corchetes
+        abiertos, así que una lista de soluciones cortada conserva las
+        soluciones ya terminadas.
+
+        :return: (clave, valor reparado) o None si no se puede recuperar.
+        """
+        if self.complete or self._key is None or self._value_start is None or self._safe_point is None:
+            return None
+        cut, depth = self._safe_point
+        # Corchetes abiertos entre el objeto raíz y el punto de corte
+        opened = self._opened_brackets(self._value_start, cut)
+        if opened is None or len(opened) + 1 != depth:
+            return None
+        raw = self._text[self._value_start:cut].rstrip().rstrip(",")
+        raw += "".join(_CLOSERS[bracket] for bracket in reversed(opened))
+        try:
+            return self._key, _loads_tolerant(raw)
+        except (json.JSONDecodeError, ValueError):
+            return None
+
+    def _opened_brackets(self, start: int, end: int) -> Optional[List[str]]:
+        stack: List[str] = []
+        in_string = escaped = False
+        for char in self._text[start:end]:
+            if in_string:
+                if escaped:
+                    escaped = False
+                elif char == "\\":
+                    escaped = True
+                elif char == '"':
+                    in_string = False
+            elif char == '"':
+                in_string = True
+            elif char in "{[":
+                stack.append(char)
+            elif char in "}]":
+                if not stack:
+                    return None
+                stack.pop()
+        return stack
+
+    def result(self, salvage: bool = True) -> Dict[str, Any]:
+        """
+        Campos obtenidos hasta ahora.
+
+        :param salvage: Si el texto se cortó a mitad de un campo, intentar recuperarlo.
+        """
+        result = dict(self.fields)
+        if salvage:
+            pending = self.pending_field()
+            if pending is not None:
+                result[pending[0]] = pending[1]
+        return result
+
+
+def parse_json_tolerant(text: str) -> Dict[str, Any]:
+    """
+    Analiza una respuesta completa del modelo de forma tolerante.
+
+    Ignora el texto fuera del objeto JSON y recupera los campos completos
+    aunque el objeto esté truncado o mal cerrado.
+    """
+    parser = IncrementalJSONParser()
+    parser.feed(text)
+    return parser.result()
@@ -0,0 +1,61 @@
+import math
+import re
+from typing import List
+
+# Aproximación conservadora para texto en español con los tokenizadores BPE
+# habituales (llama, GPT): ~4 caracteres por token, y al menos un token por
+# palabra o signo de puntuación.
+CHARS_PER_TOKEN = 4.0
+_WORD_OR_SYMBOL = re.compile(r"\w+|[^\w\s]")
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+_SENTENCE_END = re.compile(r"(?<=[\.\!\?;:])\s+")
+
+def estimate_tokens(text: str) -> int:
+    """Estima el número de tokens de un texto sin cargar ningún tokenizador."""
+    if not text:
+        return 0
+    by_chars = len(text) / CHARS_PER_TOKEN
+    by_words = len(_WORD_OR_SYMBOL.findall(text)) * 1.1
+    return math.ceil(max(by_chars, by_words))
+
+def split_by_token_budget(text: str, max_tokens: int) -> List[str]:
+    """
+    Divide un texto en fragmentos de como máximo ``max_tokens`` tokens estimados.
+
+    Corta preferentemente entre párrafos, después entre frases y, como último
+    recurso, por número de caracteres.
+    """
+    if max_tokens <= 0:
+        raise ValueError("max_tokens debe ser positivo")
+    if estimate_tokens(text) <= max_tokens:
+        return [text]
+
+    pieces: List[str] = []
+    for paragraph in _PARAGRAPH_BREAK.split(text):
+        if estimate_tokens(paragraph) <= max_tokens:
+            pieces.append(paragraph)
+            continue
+        for sentence in _SENTENCE_END.split(paragraph):
+            if estimate_tokens(sentence) <= max_tokens:
+                pieces.append(sentence)
+            else:
+                # Frase sin cortes naturales: trozos de max_tokens caracteres, que
+                # nunca superan el presupuesto aunque el texto sea muy denso
+                step = max_tokens
+                pieces.extend(sentence[i:i + step] for i in range(0, len(sentence), step))
+
+    chunks: List[str] = []
+    current = ""
+    for piece in pieces:
+        piece = piece.strip()
+        if not piece:
+            continue
+        candidate = f"{current}\n\n{piece}" if current else piece
+        if current and estimate_tokens(candidate) > max_tokens:
+            chunks.append(current)
+            current = piece
+        else:
+            current = candidate
+    if current:
+        chunks.append(current)
+    return chunks
@@ -0,0 +1,344 @@
+"""
+Trazas por etapas (spans) con exportación en el formato OTLP/JSON de OpenTelemetry.
+
+Uso::
+
+    with start_span('assignment.create', {'teacher.id': teacher_id}) as span:
+        ...
+        span.set_attribute('assignment.id', assignment_id)
+
+Los spans anidados heredan la traza del span actual (``contextvars``, así que
+cada hilo y cada tarea asíncrona tiene el suyo). ``child_span`` solo mide si ya
+hay una traza en curso: sirve para código de librería (extracción, análisis)
+que también se llama desde herramientas y procesos del pool, donde no interesa
+abrir una traza por archivo.
+
+La traza pasa a los trabajos en segundo plano con la cabecera W3C
+``traceparent`` dentro del payload (``inject`` al encolar y ``extract`` al
+ejecutar). Con ``TRACING_EXPORTER`` los spans terminados se envían por lotes
+desde un hilo de fondo:
+
+- ``file``: una línea JSON por lote en ``TRACING_FILE`` (lo que lee el receptor
+  ``otlpjsonfile`` del OpenTelemetry Collector)
+- ``otlp``: POST a ``TRACING_OTLP_ENDPOINT``/v1/traces (OTLP/HTTP con JSON)
+
+Aunque no se exporte nada, la duración de cada etapa de la traza en curso está
+disponible con ``stage_timings``.
+"""
+import atexit
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Deque, Dict, Iterator, List, NamedTuple, Optional
+
+from ..config.settings import config
+
+logger = logging.getLogger(__name__)
+
+# Clave del payload de los trabajos con el contexto de la traza
+TRACEPARENT_KEY = 'traceparent'
+
+_TRACEPARENT = re.compile(r'^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$')
+
+# SpanKind de OTLP
+_KINDS = {'internal': 1, 'server': 2, 'client': 3, 'producer': 4, 'consumer': 5}
+
+
+class SpanContext(NamedTuple):
+    """Identidad de un span remoto (el que encoló un trabajo)"""
+    trace_id: str
+    span_id: str
+    sampled: bool
+
+
+class Span:
+    """Una etapa medida; se termina al salir de ``start_span``"""
+
+    __slots__ = ('name', 'kind', 'trace_id', 'span_id', 'parent_id', 'sampled', 'start_ns', 'end_ns',
+                 'attributes', 'error', '_stages')
+
+    def __init__(self, name: str, kind: str, trace_id: str, parent_id: Optional[str], sampled: bool,
+                 stages: Dict[str, float], attributes: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.kind = kind
+        self.trace_id = trace_id
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.sampled = sampled
+        self.attributes = dict(attributes) if attributes else {}
+        self.error: Optional[str] = None
+        # Duraciones por nombre de etapa, compartidas por los spans de la traza en este proceso
+        self._stages = stages
+        self.start_ns = time.time_ns()
+        self.end_ns = 0
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+    @property
+    def duration(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e9
+
+    def _finish(self, end_ns: Optional[int] = None) -> None:
+        self.end_ns = end_ns or time.time_ns()
+        self._stages[self.name] = self._stages.get(self.name, 0.0) + self.duration
+        if self.sampled:
+            exporter = get_span_exporter()
+            if exporter is not None:
+                exporter.submit(self)
+
+
+class _NoopSpan:
+    """Lo que devuelve ``child_span`` fuera de una traza"""
+    __slots__ = ()
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+_current: ContextVar[Optional[Span]] = ContextVar('current_span', default=None)
+
+
+def current_span() -> Optional[Span]:
+    return _current.get()
+
+
+def _new_span(name: str, attributes: Optional[Dict[str, Any]], kind: str,
+              parent: Optional[SpanContext]) -> Span:
+    if parent is not None:
+        return Span(name, kind, parent.trace_id, parent.span_id, parent.sampled, {}, attributes)
+    local_parent = _current.get()
+    if local_parent is not None:
+        return Span(name, kind, local_parent.trace_id, local_parent.span_id, local_parent.sampled,
+                    local_parent._stages, attributes)
+    sampled = random.random() < config.TRACING_SAMPLE_RATIO
+    return Span(name, kind, f"{random.getrandbits(128):032x}", None, sampled, {}, attributes)
+
+
+@contextmanager
+def start_span(name: str, attributes: Optional[Dict[str, Any]] = None, kind: str = 'internal',
+               parent: Optional[SpanContext] = None) -> Iterator[Span]:
+    """
+    Mide un bloque como span hijo del actual (o de ``parent``, o como raíz de una traza nueva)
+
+    Una excepción que salga del bloque marca el span como error y se relanza.
+    """
+    span = _new_span(name, attributes, kind, parent)
+    token = _current.set(span)
+    try:
+        yield span
+    except Exception as e:
+        span.error = f"{e.__class__.__name__}: {e}"
+        raise
+    finally:
+        _current.reset(token)
+        span._finish()
+
+
+@contextmanager
+def child_span(name: str, attributes: Optional[Dict[str, Any]] = None) -> Iterator[Any]:
+    """Como ``start_span``, pero sin efecto si no hay una traza en curso"""
+    if _current.get() is None:
+        yield _NOOP_SPAN
+        return
+    with start_span(name, attributes) as span:
+        yield span
+
+
+def record_span(name: str, start_ns: int, end_ns: Optional[int] = None,
+                attributes: Optional[Dict[str, Any]] = None, error: Optional[str] = None) -> None:
+    """Registra un span ya terminado como hijo del actual (p. ej. desde eventos de SQLAlchemy)"""
+    parent = _current.get()
+    if parent is None:
+        return
+    span = Span(name, 'internal', parent.trace_id, parent.span_id, parent.sampled, parent._stages, attributes)
+    span.start_ns = start_ns
+    span.error = error
+    span._finish(end_ns)
+
+
+def stage_timings() -> Dict[str, float]:
+    """Segundos por etapa terminada de la traza en curso en este proceso ({} fuera de una traza)"""
+    span = _current.get()
+    if span is None:
+        return {}
+    return {name: round(seconds, 4) for name, seconds in span._stages.items()}
+
+
+def inject(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Copia de ``payload`` con el ``traceparent`` del span actual (el mismo payload fuera de una traza)"""
+    span = _current.get()
+    if span is None:
+        return payload
+    return {**payload, TRACEPARENT_KEY: span.traceparent}
+
+
+def extract(payload: Dict[str, Any]) -> Optional[SpanContext]:
+    """Contexto de la traza guardado por ``inject`` (None si no hay o no es válido)"""
+    match = _TRACEPARENT.match(str(payload.get(TRACEPARENT_KEY) or ''))
+    if match is None:
+        return None
+    trace_id, span_id, flags = match.groups()
+    return SpanContext(trace_id, span_id, bool(int(flags, 16) & 1))
+
+
+def _attribute_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _attributes(values: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [{"key": key, "value": _attribute_value(value)} for key, value in values.items() if value is not None]
+
+
+def to_otlp_json(spans: List[Span], service_name: str) -> Dict[str, Any]:
+    """Petición ``ExportTraceServiceRequest`` de OTLP en su codificación JSON"""
+    encoded = []
+    for span in spans:
+        item = {
+            "traceId": span.trace_id,
+            "spanId": span.span_id,
+            "name": span.name,
+            "kind": _KINDS.get(span.kind, 1),
+            "startTimeUnixNano": str(span.start_ns),
+            "endTimeUnixNano": str(span.end_ns),
+            "attributes": _attributes(span.attributes),
+            "status": {"code": 2, "message": span.error} if span.error else {"code": 1},
+        }
+        if span.parent_id:
+            item["parentSpanId"] = span.parent_id
+        encoded.append(item)
+    return {"resourceSpans": [{
+        "resource": {"attributes": _attributes({"service.name": service_name, "process.pid": os.getpid()})},
+        "scopeSpans": [{"scope": {"name": "autograder"}, "spans": encoded}]
+    }]}
+
+
+class SpanExporter:
+    """
+    Cola acotada de spans terminados que un hilo de fondo escribe por lotes
+
+    Si la cola se llena, los spans nuevos se descartan (``dropped``) en lugar de
+    bloquear la petición. El hilo se arranca con el primer span de cada proceso
+    (también en los hijos de un fork).
+    """
+
+    def __init__(self, write: Callable[[bytes], None], service_name: str, max_queue: int = 4096,
+                 batch_size: int = 512, interval: float = 2.0):
+        """
+        :param write: Función que envía un lote ya codificado
+        :param interval: Segundos máximos que un span espera en la cola
+        """
+        self.write = write
+        self.service_name = service_name
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.interval = interval
+        self.dropped = 0
+        self._queue: Deque[Span] = deque()
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._pid: Optional[int] = None
+
+    def submit(self, span: Span) -> None:
+        if self._pid != os.getpid():
+            self._start()
+        if len(self._queue) >= self.max_queue:
+            self.dropped += 1
+            return
+        self._queue.append(span)
+        if len(self._queue) >= self.batch_size:
+            self._wake.set()
+
+    def flush(self) -> int:
+        """Envía todo lo pendiente; devuelve el número de spans enviados"""
+        sent = 0
+        with self._lock:
+            while self._queue:
+                batch = []
+                while self._queue and len(batch) < self.batch_size:
+                    batch.append(self._queue.popleft())
+                try:
+                    self.write(json.dumps(to_otlp_json(batch, self.service_name), separators=(',', ':')).encode())
+                    sent += len(batch)
+                except Exception as e:
+                    logger.warning(f"No se pudieron exportar {len(batch)} spans: {e}")
+        return sent
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._queue.clear()
+            threading.Thread(target=self._run, name="span-exporter", daemon=True).start()
+            atexit.register(self.flush)
+
+    def _run(self) -> None:
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            self.flush()
+
+
+def file_writer(path: str) -> Callable[[bytes], None]:
+    """Añade cada lote como una línea del archivo (varios procesos pueden compartirlo)"""
+    def write(data: bytes) -> None:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'ab') as f:
+            f.write(data + b'\n')
+    return write
+
+
+def otlp_http_writer(endpoint: str, timeout: float = 5.0) -> Callable[[bytes], None]:
+    """Envía cada lote a un colector OTLP/HTTP (``/v1/traces`` con JSON)"""
+    url = endpoint.rstrip('/') + '/v1/traces'
+
+    def write(data: bytes) -> None:
+        import urllib.request
+
+        request = urllib.request.Request(url, data=data, method='POST',
+                                         headers={'Content-Type': 'application/json'})
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            response.read()
+    return write
+
+
+# Exportador del proceso (se crea al primer span muestreado)
+_exporter: Optional[SpanExporter] = None
+_exporter_configured = False
+_exporter_lock = threading.Lock()
+
+
+def get_span_exporter() -> Optional[SpanExporter]:
+    """Exportador configurado con ``TRACING_EXPORTER``, o None si no se exporta"""
+    global _exporter, _exporter_configured
+    if _exporter_configured:
+        return _exporter
+    with _exporter_lock:
+        if not _exporter_configured:
+            if config.TRACING_EXPORTER == 'file':
+                _exporter = SpanExporter(file_writer(config.TRACING_FILE), config.TRACING_SERVICE_NAME)
+            elif config.TRACING_EXPORTER == 'otlp':
+                _exporter = SpanExporter(otlp_http_writer(config.TRACING_OTLP_ENDPOINT), config.TRACING_SERVICE_NAME)
+            _exporter_configured = True
+    return _exporter
@@ -0,0 +1,205 @@
+import pytest
+import io
+import json
+import os
+import sys
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from flask import Flask
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.compiler import compiles
+
+# Configuración del path para que src sea reconocible
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.config.settings import config
+from src.database.database import db
+from src.database.models import AnalysisCacheEntry, Assignment, AssignmentStatus, User
+from src.services.ai_analyzer import AIAnalyzer
+from src.services.analysis_cache import AnalysisCache
+from src.services.assignment_service import AssignmentService
+from src.services.upload_ingestion import IngestedUpload
+
+# El desalojo por TTL compara fechas en SQL (``now() - interval``): esa parte
+# solo se comprueba contra PostgreSQL; el resto también corre sobre SQLite
+TEST_DATABASE_URL = os.getenv('TEST_DATABASE_URL')
+requires_postgres = pytest.mark.skipif(not TEST_DATABASE_URL, reason="Requiere TEST_DATABASE_URL (PostgreSQL de pruebas)")
+
+TABLES = [User.__table__, Assignment.__table__, AnalysisCacheEntry.__table__]
+
+@compiles(JSONB, 'sqlite')
+def _compile_jsonb_sqlite(element, compiler, **kw):
+    return "JSON"
+
+CONTENT = {
+    "title": "Tarea de  álgebra",
+    "instructions": "Resuelve\n los ejercicios",
+    "exercises": [{"number": 1, "statement": "Resolver x + 2 = 5", "points": 10}],
+    "total_points": 10,
+}
+
+ANALYSIS = {
+    "solutions": [{"exercise_number": 1, "solution": "x = 3"}],
+    "rubric": {"criteria": [{"name": "Resultado", "points": 10}]},
+    "ai_metadata": {"model_used": "gpt-4o-mini", "analyzed_at": "2026-03-02T10:30:15", "cache_hit": False},
+}
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config.update(SQLALCHEMY_DATABASE_URI=TEST_DATABASE_URL or 'sqlite://')
+    db.init_app(app)
+    with app.app_context():
+        db.metadata.create_all(db.engine, tables=TABLES)
+        try:
+            yield app
+        finally:
+            db.session.remove()
+            db.metadata.drop_all(db.engine, tables=TABLES)
+
+def _seed(key, created_at=None, last_accessed_at=None):
+    now = datetime.now(timezone.utc)
+    db.session.add(AnalysisCacheEntry(
+        key=key, model="gpt-4o-mini", prompt_version="1", analysis={"key": key}, hit_count=0,
+        created_at=created_at or now, last_accessed_at=last_accessed_at or now
+    ))
+    db.session.commit()
+
+def _keys():
+    return {key for (key,) in db.session.query(AnalysisCacheEntry.key)}
+
+def test_build_key_ignores_whitespace_and_case():
+    variant = {
+        **CONTENT,
+        "title": "  TAREA de álgebra ",
+        "instructions": "resuelve los\tEJERCICIOS",
+        "exercises": [{"number": 1, "statement": "resolver  x + 2 = 5\n", "points": 10}],
+    }
+
+    assert AnalysisCache.build_key(variant, "gpt-4o-mini", "1") == AnalysisCache.build_key(CONTENT, "gpt-4o-mini", "1")
+
+def test_build_key_changes_with_content_model_and_prompt_version():
+    key = AnalysisCache.build_key(CONTENT, "gpt-4o-mini", "1")
+    other_points = {**CONTENT, "exercises": [{**CONTENT["exercises"][0], "points": 5}]}
+
+    assert AnalysisCache.build_key(CONTENT, "gpt-4o", "1") != key
+    assert AnalysisCache.build_key(CONTENT, "gpt-4o-mini", "2") != key
+    assert AnalysisCache.build_key(other_points, "gpt-4o-mini", "1") != key
+
+def test_get_counts_hits_and_misses(app):
+    cache = AnalysisCache(ttl_seconds=3600, max_entries=10)
+    _seed("fresca")
+
+    first = cache.get("fresca")
+    first["key"] = "modificada"
+    second = cache.get("fresca")
+
+    assert cache.get("inexistente") is None
+    assert second == {"key": "fresca"}
+    assert db.session.get(AnalysisCacheEntry, "fresca").hit_count == 2
+    assert cache.stats() == {"hits": 2, "misses": 1, "hit_ratio": 0.6667}
+
+def test_get_drops_expired_entries(app):
+    cache = AnalysisCache(ttl_seconds=3600, max_entries=10)
+    _seed("caducada", created_at=datetime.now(timezone.utc) - timedelta(hours=2))
+
+    assert cache.get("caducada") is None
+    assert _keys() == set()
+    assert cache.stats() == {"hits": 0, "misses": 1, "hit_ratio": 0.0}
+
+def test_set_evicts_least_recently_used(app):
+    cache = AnalysisCache(ttl_seconds=86400, max_entries=3)
+    now = datetime.now(timezone.utc)
+    for hours, key in ((3, "a"), (2, "b"), (1, "c")):
+        _seed(key, created_at=now - timedelta(hours=hours), last_accessed_at=now - timedelta(hours=hours))
+
+    # Leer "a" la convierte en la más reciente: sale "b"
+    assert cache.get("a") == {"key": "a"}
+    cache.set("d", "gpt-4o-mini", "1", {"key": "d"})
+
+    assert _keys() == {"a", "c", "d"}
+    assert cache.evict() == 0
+
+@requires_postgres
+def test_evict_removes_expired_entries(app):
+    cache = AnalysisCache(ttl_seconds=3600, max_entries=10)
+    _seed("caducada", created_at=datetime.now(timezone.utc) - timedelta(hours=2))
+    _seed("fresca")
+
+    assert cache.evict() == 1
+    assert _keys() == {"fresca"}
+
+class _FileProcessor:
+    def process_stream(self, stream, extension, sha256=None, source_name=None):
+        return json.loads(json.dumps(CONTENT))
+
+class _Transport:
+    def __init__(self):
+        self.calls = 0
+
+    def openai_chat(self, model, messages, **kwargs):
+        self.calls += 1
+        content = json.dumps({"solutions": ANALYSIS["solutions"], "rubric": {"criteria": [{"name": "Nueva", "points": 10}]}})
+        return {"choices": [{"message": {"content": content}}], "usage": {"total_tokens": 42}}
+
+@pytest.fixture
+def service(app, monkeypatch):
+    monkeypatch.setattr(config, 'LLM_STREAM_RESPONSES', False)
+    cache = AnalysisCache(ttl_seconds=3600, max_entries=10)
+    analyzer = AIAnalyzer('clave-de-pruebas', cache=cache, transport=_Transport())
+    cache.set(AnalysisCache.build_key(CONTENT, analyzer.model, analyzer.PROMPT_VERSION), analyzer.model,
+              analyzer.PROMPT_VERSION, ANALYSIS)
+
+    # Sin cola de trabajos ni tareas periódicas: el análisis encolado se anota
+    service = AssignmentService.__new__(AssignmentService)
+    service.file_processor = _FileProcessor()
+    service.ai_analyzer = analyzer
+    service.enqueued = []
+    service._start_ai_analysis = lambda assignment_id, bypass_cache=False: (
+        service.enqueued.append((str(assignment_id), bypass_cache)) or "trabajo-1"
+    )
+
+    teacher = User(id=uuid.uuid4(), email='profe@test', username='profe', password_hash='x',
+                   first_name='Ana', last_name='Pérez')
+    db.session.add(teacher)
+    db.session.commit()
+    service.teacher_id = teacher.id
+    return service
+
+def _create(service, bypass_cache):
+    upload = IngestedUpload(filename="tarea.docx", extension=".docx", sha256="0" * 64, size=3,
+                            stream=io.BytesIO(b"doc"))
+    return service.create_assignment_from_upload(upload, "Tarea", "", service.teacher_id, bypass_cache=bypass_cache)
+
+def test_cached_analysis_skips_the_job_queue(service):
+    result = _create(service, bypass_cache=False)
+    assignment = db.session.get(Assignment, uuid.UUID(result["id"]))
+
+    assert result["job_id"] is None
+    assert service.enqueued == []
+    assert assignment.status == AssignmentStatus.READY_FOR_EDITING
+    assert assignment.final_rubric == ANALYSIS["rubric"]
+    assert assignment.ai_analysis["ai_metadata"]["cache_hit"] is True
+    assert assignment.ai_analysis["ai_metadata"]["originally_analyzed_at"] == "2026-03-02T10:30:15"
+    assert service.ai_analyzer.cache.stats()["hits"] == 1
+
+def test_bypass_cache_enqueues_a_fresh_analysis(service):
+    result = _create(service, bypass_cache=True)
+
+    assert result["job_id"] == "trabajo-1"
+    assert service.enqueued == [(result["id"], True)]
+    assert db.session.get(Assignment, uuid.UUID(result["id"])).status == AssignmentStatus.UPLOADED
+    # La caché ni se consulta
+    assert service.ai_analyzer.cache.stats() == {"hits": 0, "misses": 0, "hit_ratio": 0.0}
+
+    # El trabajo llama a la IA aunque haya entrada y la sustituye (SQLite solo
+    # compara UUID como objeto; la cola guarda el texto)
+    assignment_id = uuid.UUID(result["id"])
+    service._process_ai_analysis({"assignment_id": assignment_id, "bypass_cache": True})
+    assignment = db.session.get(Assignment, assignment_id)
+
+    assert service.ai_analyzer.transport.calls == 1
+    assert assignment.ai_analysis["ai_metadata"]["cache_hit"] is False
+    assert assignment.final_rubric == {"criteria": [{"name": "Nueva", "points": 10}]}
+    assert service.ai_analyzer.get_cached_analysis(CONTENT)["rubric"] == assignment.final_rubric
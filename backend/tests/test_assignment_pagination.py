@@ -0,0 +1,166 @@
+import pytest
+import base64
+import os
+import sys
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from flask import Flask
+from flask_jwt_extended import JWTManager, create_access_token
+
+# Configuración del path para que src sea reconocible
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.auth import decorators
+from src.database.database import db
+from src.database.models import Assignment, AssignmentStatus, User, UserRole
+from src.routes import assignment_routes
+from src.services.assignment_service import AssignmentService, _decode_cursor, _encode_cursor
+
+# Las consultas del listado usan funciones JSONB: las pruebas que las ejecutan
+# necesitan una base de datos PostgreSQL de pruebas
+TEST_DATABASE_URL = os.getenv('TEST_DATABASE_URL')
+requires_postgres = pytest.mark.skipif(not TEST_DATABASE_URL, reason="Requiere TEST_DATABASE_URL (PostgreSQL de pruebas)")
+
+TEACHER_ID = uuid.uuid4()
+OTHER_TEACHER_ID = uuid.uuid4()
+NOW = datetime(2026, 3, 2, 10, 30, 15, 123456, tzinfo=timezone.utc)
+
+def _identity(user_id):
+    return {'id': user_id, 'email': 'profe@test', 'username': 'profe', 'role': 'teacher',
+            'first_name': 'Ana', 'last_name': 'Pérez', 'is_active': True}
+
+def _listing_service():
+    # Solo se usa el listado: sin colas, cachés ni tareas periódicas
+    return AssignmentService.__new__(AssignmentService)
+
+@pytest.fixture
+def app(monkeypatch):
+    app = Flask(__name__)
+    app.config.update(SQLALCHEMY_DATABASE_URI=TEST_DATABASE_URL or 'sqlite://', JWT_SECRET_KEY='clave-de-pruebas-del-listado-paginado')
+    db.init_app(app)
+    JWTManager(app)
+    app.register_blueprint(assignment_routes.assignment_bp)
+    monkeypatch.setattr(decorators, 'get_request_identity', _identity)
+    monkeypatch.setattr(assignment_routes, 'assignment_service', _listing_service())
+    return app
+
+@pytest.fixture
+def get_page(app):
+    with app.app_context():
+        token = create_access_token(identity=str(TEACHER_ID))
+    client = app.test_client()
+
+    def _get(**params):
+        return client.get('/api/assignments', query_string=params, headers={'Authorization': f'Bearer {token}'})
+    return _get
+
+def test_cursor_round_trip():
+    assignment_id = uuid.uuid4()
+    cursor = _encode_cursor(NOW, assignment_id)
+
+    assert '=' not in cursor
+    assert _decode_cursor(cursor) == (NOW, assignment_id)
+
+@pytest.mark.parametrize('cursor', [
+    'no-es-un-cursor',
+    base64.urlsafe_b64encode(b'{"c": "2026-03-02T10:30:15"}').decode(),
+    base64.urlsafe_b64encode(b'{"c": "ayer", "i": "00000000-0000-0000-0000-000000000000"}').decode(),
+])
+def test_malformed_cursor_returns_400(get_page, cursor):
+    response = get_page(cursor=cursor)
+
+    assert response.status_code == 400
+    assert response.get_json()['error'] == "Cursor de paginación inválido"
+
+def test_unknown_fields_and_status_return_400(get_page):
+    response = get_page(fields='final_rubric,password_hash')
+    assert response.status_code == 400
+    assert response.get_json()['error'] == "Campos no válidos: password_hash"
+
+    response = get_page(status='borrada')
+    assert response.status_code == 400
+    assert response.get_json()['error'] == "Estado no válido: borrada"
+
+@pytest.fixture
+def seeded(app):
+    """Esquema creado con las migraciones y asignaciones de dos profesores"""
+    from alembic import command
+    from test_migrations import alembic_config
+
+    with app.app_context():
+        with db.engine.connect() as connection:
+            command.upgrade(alembic_config(connection=connection), 'head')
+            connection.commit()
+        try:
+            for user_id, name in ((TEACHER_ID, 'profe'), (OTHER_TEACHER_ID, 'otro')):
+                db.session.add(User(id=user_id, email=f'{name}@test', username=name, password_hash='x',
+                                    first_name='Ana', last_name='Pérez', role=UserRole.TEACHER))
+            db.session.flush()
+            # Cinco asignaciones comparten created_at: el id desempata
+            times = [NOW] * 5 + [NOW - timedelta(minutes=n) for n in range(1, 4)]
+            for n, created_at in enumerate(times):
+                db.session.add(Assignment(
+                    title=f"Tarea {n}", teacher_id=TEACHER_ID, total_points=10.0, created_at=created_at,
+                    extracted_content={"exercises": [{"number": 1}, {"number": 2}]},
+                    status=AssignmentStatus.FINALIZED if n % 2 else AssignmentStatus.UPLOADED
+                ))
+            db.session.add(Assignment(title="Ajena", teacher_id=OTHER_TEACHER_ID, total_points=10.0, created_at=NOW))
+            db.session.commit()
+            expected = [str(row.id) for row in db.session.query(Assignment.id).filter(
+                Assignment.teacher_id == TEACHER_ID
+            ).order_by(Assignment.created_at.desc(), Assignment.id.desc())]
+            yield expected
+        finally:
+            db.session.remove()
+            with db.engine.connect() as connection:
+                command.downgrade(alembic_config(connection=connection), 'base')
+                connection.commit()
+
+@requires_postgres
+def test_pages_cover_every_assignment_once_despite_ties(app, seeded):
+    service = _listing_service()
+    seen, cursor = [], None
+    with app.app_context():
+        while True:
+            page = service.list_teacher_assignments(str(TEACHER_ID), limit=2, cursor=cursor)
+            seen.extend(item['id'] for item in page['items'])
+            if not page['has_more']:
+                break
+            cursor = page['next_cursor']
+
+    assert seen == seeded
+    assert page['next_cursor'] is None
+
+@requires_postgres
+def test_has_more_at_page_boundary(app, seeded):
+    service = _listing_service()
+    with app.app_context():
+        exact = service.list_teacher_assignments(str(TEACHER_ID), limit=len(seeded))
+        short = service.list_teacher_assignments(str(TEACHER_ID), limit=len(seeded) - 1)
+        last = service.list_teacher_assignments(str(TEACHER_ID), limit=1, cursor=short['next_cursor'])
+
+    assert exact['has_more'] is False and exact['next_cursor'] is None
+    assert short['has_more'] is True and len(short['items']) == len(seeded) - 1
+    assert [item['id'] for item in last['items']] == seeded[-1:] and last['has_more'] is False
+
+@requires_postgres
+def test_status_filter_and_heavy_fields(app, seeded):
+    service = _listing_service()
+    with app.app_context():
+        page = service.list_teacher_assignments(str(TEACHER_ID), status='finalized', fields=['extracted_content'])
+
+    assert len(page['items']) == 4
+    assert {item['status'] for item in page['items']} == {'finalized'}
+    assert page['items'][0]['exercise_count'] == 2
+    assert page['items'][0]['extracted_content'] == {"exercises": [{"number": 1}, {"number": 2}]}
+    assert 'final_rubric' not in page['items'][0]
+
+@requires_postgres
+def test_route_follows_next_cursor(get_page, seeded):
+    first = get_page(limit=5).get_json()
+    second = get_page(limit=5, cursor=first['pagination']['next_cursor']).get_json()
+
+    assert first['pagination']['has_more'] is True
+    assert second['pagination'] == {'next_cursor': None, 'has_more': False}
+    assert [item['id'] for item in first['data'] + second['data']] == seeded
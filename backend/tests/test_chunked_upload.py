@@ -0,0 +1,79 @@
+import pytest
+import hashlib
+import io
+import os
+import sys
+
+from docx import Document
+
+# Configuración del path para que src sea reconocible
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.config.settings import config
+from src.services.chunked_upload_service import ChunkedUploadService
+from src.services.upload_ingestion import UploadRejected
+
+def _docx_bytes(text):
+    buffer = io.BytesIO()
+    document = Document()
+    document.add_paragraph(text)
+    document.save(buffer)
+    return buffer.getvalue()
+
+def _sha(data):
+    return hashlib.sha256(data).hexdigest()
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "UPLOAD_FOLDER", str(tmp_path))
+    return ChunkedUploadService()
+
+def test_resumed_upload_is_assembled(service):
+    data = _docx_bytes("Ejercicio 1: Resolver la ecuación x + 2 = 5 (2 puntos)")
+    session = service.create_session("profe", "tarea.docx", len(data), "assignment", sha256=_sha(data))
+    chunks = [data[i:i + 1000] for i in range(0, len(data), 1000)]
+
+    offset = 0
+    for i, chunk in enumerate(chunks):
+        if i == 2:
+            # Se cortó la conexión: el cliente pregunta por dónde iba
+            offset = service.get_session(session["id"], "profe")["offset"]
+        offset = service.write_chunk(session["id"], "profe", offset, io.BytesIO(chunk), _sha(chunk))["offset"]
+
+    session_data, upload = service.complete(session["id"], "profe")
+    try:
+        assert upload.extension == ".docx"
+        assert upload.sha256 == _sha(data)
+        assert upload.stream.read() == data
+    finally:
+        upload.close()
+        service.discard(session["id"])
+    assert service.get_session(session["id"], "profe") is None
+
+def test_rejected_chunks_do_not_move_the_offset(service):
+    data = b"%PDF-" + os.urandom(3000)
+    session = service.create_session("profe", "tarea.pdf", len(data), "assignment")
+    first, second = data[:2000], data[2000:]
+    service.write_chunk(session["id"], "profe", 0, io.BytesIO(first), _sha(first))
+
+    with pytest.raises(UploadRejected) as wrong_offset:
+        service.write_chunk(session["id"], "profe", 0, io.BytesIO(first), _sha(first))
+    with pytest.raises(UploadRejected) as corrupted:
+        service.write_chunk(session["id"], "profe", 2000, io.BytesIO(second), _sha(b"otra cosa"))
+    with pytest.raises(UploadRejected) as incomplete:
+        service.complete(session["id"], "profe")
+
+    assert (wrong_offset.value.status_code, corrupted.value.status_code, incomplete.value.status_code) == (409, 400, 409)
+    assert service.get_session(session["id"], "profe")["offset"] == 2000
+    assert service.get_session(session["id"], "otro_profe") is None
+
+def test_abandoned_sessions_expire(service, monkeypatch):
+    active = service.create_session("profe", "tarea.pdf", 10, "assignment")
+    monkeypatch.setattr(config, "UPLOAD_SESSION_TTL", -1)
+    abandoned = service.create_session("profe", "otra.pdf", 10, "assignment")
+    # Archivo parcial de una sesión cuyo JSON ya no existe
+    open(os.path.join(service.folder, "huerfana.part"), "wb").close()
+
+    assert service.purge_expired(force=True) == 2
+    assert sorted(os.listdir(service.folder)) == sorted([active["id"] + ".json", active["id"] + ".part"])
+    assert service.get_session(abandoned["id"], "profe") is None
@@ -0,0 +1,110 @@
+import pytest
+import asyncio
+import os
+import sys
+import threading
+import time
+
+# Configuración del path para que src sea reconocible
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.services.concurrency_limiter import AdaptiveConcurrencyLimiter, ConcurrencyLimitExceeded
+from src.services.llm_transport import AsyncLLMTransport
+
+def _fill(limiter):
+    """Ocupa todos los huecos disponibles"""
+    for _ in range(limiter.limit):
+        limiter.acquire()
+    return limiter.limit
+
+def test_limit_grows_while_latency_stays_low():
+    limiter = AdaptiveConcurrencyLimiter(min_limit=1, max_limit=8, initial_limit=2)
+    for _ in range(50):
+        for _ in range(_fill(limiter)):
+            limiter.release(0.01)
+    assert limiter.limit == 8
+
+def test_limit_shrinks_when_latency_spikes():
+    limiter = AdaptiveConcurrencyLimiter(min_limit=1, max_limit=8, initial_limit=8)
+    limiter.acquire()
+    limiter.release(0.01)
+    limiter.acquire()
+    limiter.release(1.0)
+    assert limiter.limit == 6
+
+def test_failures_count_as_overload():
+    limiter = AdaptiveConcurrencyLimiter(min_limit=2, max_limit=8, initial_limit=4)
+    with pytest.raises(RuntimeError):
+        with limiter.slot():
+            raise RuntimeError("Ollama caído")
+    assert limiter.limit == 3
+    assert limiter.snapshot()["failed"] == 1
+
+def test_excess_work_waits_in_queue():
+    limiter = AdaptiveConcurrencyLimiter(min_limit=1, max_limit=1, initial_limit=1)
+    limiter.acquire()
+    acquired = threading.Event()
+
+    def waiter():
+        limiter.acquire()
+        acquired.set()
+
+    thread = threading.Thread(target=waiter)
+    thread.start()
+    time.sleep(0.05)
+    assert limiter.snapshot()["queue_depth"] == 1
+    assert not acquired.is_set()
+
+    limiter.release(0.01)
+    thread.join(timeout=1)
+    assert acquired.is_set()
+    assert limiter.snapshot()["inflight"] == 1
+
+def test_full_queue_and_timeouts_are_rejected():
+    limiter = AdaptiveConcurrencyLimiter(min_limit=1, max_limit=1, initial_limit=1, max_queue=0)
+    limiter.acquire()
+    with pytest.raises(ConcurrencyLimitExceeded):
+        limiter.acquire()
+
+    limiter = AdaptiveConcurrencyLimiter(min_limit=1, max_limit=1, initial_limit=1)
+    limiter.acquire()
+    with pytest.raises(ConcurrencyLimitExceeded):
+        limiter.acquire(timeout=0.01)
+    assert limiter.snapshot()["rejected"] == 1
+
+def test_snapshot_reports_latency_percentiles():
+    limiter = AdaptiveConcurrencyLimiter(max_limit=4, initial_limit=4, latency_tolerance=1000)
+    for latency in [0.01 * i for i in range(1, 101)]:
+        limiter.acquire()
+        limiter.release(latency)
+    snapshot = limiter.snapshot()
+    assert snapshot["latency_p50"] == pytest.approx(0.51)
+    assert snapshot["latency_p95"] == pytest.approx(0.95)
+
+def test_cancelled_async_wait_returns_its_slot():
+    # Con el hueco perdido la segunda llamada se rechazaría por tiempo en lugar de esperar
+    limiter = AdaptiveConcurrencyLimiter(min_limit=1, max_limit=1, initial_limit=1, queue_timeout=0.5)
+    transport = AsyncLLMTransport(ollama_limiter=limiter)
+
+    async def _chat(payload):
+        return {"message": {"content": "ok"}}
+
+    transport._ollama_chat = _chat
+
+    async def scenario():
+        limiter.acquire()
+        waiting = asyncio.ensure_future(transport.ollama_chat("llama3.2", [{"role": "user", "content": "hola"}]))
+        await asyncio.sleep(0.05)
+        assert limiter.snapshot()["queue_depth"] == 1
+        waiting.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+        # El hilo sigue esperando y se queda el hueco al liberarlo, pero lo devuelve
+        limiter.release(0.01)
+        await asyncio.sleep(0.05)
+        return await transport.ollama_chat("llama3.2", [{"role": "user", "content": "hola"}])
+
+    assert asyncio.run(asyncio.wait_for(scenario(), timeout=2)) == {"message": {"content": "ok"}}
+    snapshot = limiter.snapshot()
+    assert snapshot["inflight"] == 0
+    assert snapshot["completed"] == 2 and snapshot["failed"] == 0
@@ -0,0 +1,61 @@
+import pytest
+import os
+import sys
+import time
+
+# Configuración del path para que src sea reconocible
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.services.correction_engine import CorrectionEngine
+from src.models.correction import CorrectionResult
+
+class FakeService:
+    """Servicio de corrección que tarda más en las tareas pares"""
+    instances = []
+
+    def __init__(self):
+        FakeService.instances.append(self)
+
+    def correct_assignment(self, key_criteria, assignment_content, language):
+        index = int(assignment_content.split()[-1])
+        time.sleep(0.02 if index % 2 == 0 else 0.0)
+        return CorrectionResult(grade=index % 10, comments=assignment_content)
+
+@pytest.fixture
+def engine():
+    FakeService.instances = []
+    engine = CorrectionEngine(FakeService, max_concurrency=4)
+    yield engine
+    engine.shutdown()
+
+def test_batch_results_keep_submission_order(engine):
+    assignments = [f"Tarea {i}" for i in range(20)]
+    results = engine.correct_batch(None, assignments)
+    assert [result.comments for result in results] == assignments
+
+def test_services_are_reused_per_worker_thread(engine):
+    engine.correct_batch(None, [f"Tarea {i}" for i in range(40)])
+    assert len(FakeService.instances) <= engine.max_concurrency
+
+def test_service_errors_become_error_results():
+    class BrokenService:
+        def correct_assignment(self, *args):
+            raise RuntimeError("Ollama caído")
+
+    engine = CorrectionEngine(BrokenService, max_concurrency=2)
+    results = engine.correct_batch(None, ["Tarea 1", "Tarea 2"])
+    engine.shutdown()
+    assert all(isinstance(result, CorrectionResult) and result.grade == 0 for result in results)
+
+def test_iter_batch_yields_every_result_tagged_with_its_index(engine):
+    assignments = [f"Tarea {i}" for i in range(10)]
+    streamed = list(engine.iter_batch(None, assignments))
+
+    assert sorted(item.index for item in streamed) == list(range(10))
+    for item in streamed:
+        assert item.result.comments == assignments[item.index]
+        assert item.elapsed >= item.duration >= 0
+
+def test_iter_batch_emits_fast_results_first(engine):
+    first = next(iter(engine.iter_batch(None, ["Tarea 0", "Tarea 1"])))
+    assert first.index == 1
@@ -0,0 +1,32 @@
+import pytest
+import os
+import sys
+
+# Configuración del path para que src sea reconocible
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.utils.correction_pdf import _detail_rows, _text
+
+def test_detail_rows_from_list_of_exercises():
+    details = [
+        {"exercise_number": 1, "score": 2.5, "comments": ["Bien planteado", "Falta la unidad"]},
+        {"criterion": "Claridad", "grade": 8, "feedback": "Ordenado"},
+        "Sin estructura"
+    ]
+    assert _detail_rows(details) == [
+        ["1", "2.5", "Bien planteado; Falta la unidad"],
+        ["Claridad", "8", "Ordenado"],
+        ["3", "", "Sin estructura"]
+    ]
+
+def test_detail_rows_from_mapping():
+    details = {"Ejercicio 1": {"score": 3, "comments": "Correcto"}, "Ejercicio 2": "No entregado"}
+    assert _detail_rows(details) == [
+        ["Ejercicio 1", "3", "Correcto"],
+        ["Ejercicio 2", "", "No entregado"]
+    ]
+    assert _detail_rows(None) == []
+
+def test_text_is_escaped_for_reportlab():
+    assert _text("Pérez & <García>") == "Pérez &amp; &lt;García&gt;"
+    assert _text(None) == ""
@@ -0,0 +1,113 @@
+import pytest
+import json
+import os
+import sys
+import threading
+import uuid
+
+from flask import Flask
+from flask_jwt_extended import JWTManager, create_access_token
+
+# Configuración del path para que src sea reconocible
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.auth import decorators
+from src.models.correction import CorrectionResult
+from src.routes.correction_routes import correction_bp
+from src.services import correction_service
+from src.services.correction_engine import CorrectionEngine
+
+TEACHER_ID = str(uuid.uuid4())
+
+def _identity(user_id):
+    return {'id': user_id, 'email': 'profe@test', 'username': 'profe', 'role': 'teacher',
+            'first_name': 'Ana', 'last_name': 'Pérez', 'is_active': True}
+
+class FakeService:
+    """Servicio de corrección que retiene la tarea «lenta» hasta que se le indique"""
+    release = threading.Event()
+
+    def correct_assignment(self, key_criteria, assignment_content, language):
+        if assignment_content == "lenta":
+            assert FakeService.release.wait(5)
+        return CorrectionResult(grade=len(assignment_content), comments=assignment_content)
+
+@pytest.fixture
+def engine(monkeypatch):
+    FakeService.release = threading.Event()
+    engine = CorrectionEngine(FakeService, max_concurrency=4)
+    monkeypatch.setattr(correction_service, 'get_correction_engine', lambda model_type: engine)
+    yield engine
+    FakeService.release.set()
+    engine.shutdown()
+
+@pytest.fixture
+def post_batch(engine, monkeypatch):
+    app = Flask(__name__)
+    app.config.update(JWT_SECRET_KEY='clave-de-pruebas-de-la-correccion-en-streaming')
+    JWTManager(app)
+    app.register_blueprint(correction_bp)
+    monkeypatch.setattr(decorators, 'get_request_identity', _identity)
+    with app.app_context():
+        token = create_access_token(identity=TEACHER_ID)
+    client = app.test_client()
+
+    def _post(assignments, **kwargs):
+        headers = {'Authorization': f'Bearer {token}', **kwargs.pop('headers', {})}
+        return client.post('/api/corrections/batch/stream', json={'assignments': assignments},
+                           headers=headers, buffered=False, **kwargs)
+    return _post
+
+def _ndjson(chunks):
+    return [json.loads(line) for chunk in chunks for line in chunk.decode().splitlines() if line]
+
+def test_ndjson_emits_each_result_as_it_completes(post_batch):
+    response = post_batch(["lenta", "rápida", "media"])
+    chunks = response.response
+
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    assert response.headers['Cache-Control'] == 'no-cache'
+
+    # La tarea lenta sigue retenida: las otras dos ya se han enviado
+    first = _ndjson([next(chunks), next(chunks)])
+    assert sorted(item['index'] for item in first) == [1, 2]
+    FakeService.release.set()
+    rest = _ndjson(chunks)
+    response.close()
+
+    slow, summary = rest
+    assert slow['index'] == 0
+    assert slow['result']['comments'] == "lenta"
+    assert slow['elapsed'] >= slow['duration'] >= 0
+    assert summary['done'] is True and summary['total'] == 3
+
+def _events(body):
+    events = []
+    for block in body.split('\n\n'):
+        if block:
+            event, data = block.split('\n')
+            assert event.startswith('event: ') and data.startswith('data: ')
+            events.append((event[len('event: '):], json.loads(data[len('data: '):])))
+    return events
+
+@pytest.mark.parametrize('negotiation', [
+    {'headers': {'Accept': 'text/event-stream'}},
+    {'query_string': {'format': 'sse'}},
+])
+def test_sse_events_are_negotiated(post_batch, negotiation):
+    FakeService.release.set()
+    response = post_batch(["una", "dos"], **negotiation)
+    body = response.get_data(as_text=True)
+
+    assert response.mimetype == 'text/event-stream'
+    events = _events(body)
+    assert [event for event, _ in events] == ['result', 'result', 'done']
+    assert sorted(payload['index'] for _, payload in events[:2]) == [0, 1]
+    assert events[-1][1]['total'] == 2
+
+@pytest.mark.parametrize('payload', [{'assignments': []}, {'assignments': [1, 2]}])
+def test_invalid_batches_are_rejected(post_batch, payload):
+    response = post_batch(payload['assignments'])
+
+    assert response.status_code == 400
@@ -0,0 +1,53 @@
+import pytest
+import glob
+import json
+import os
+import sys
+
+# Configuración del path para que src sea reconocible
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.services.file_processor import FileProcessor
+from src.utils.exercise_parser import extract_exercises, find_exercise_headers
+
+# Cada enunciado del corpus (.txt) tiene junto a él los ejercicios esperados (.json)
+CORPUS = sorted(glob.glob(os.path.join(os.path.dirname(__file__), 'corpus', 'exercises', '*.txt')))
+
+@pytest.mark.parametrize("path", CORPUS, ids=[os.path.basename(path)[:-4] for path in CORPUS])
+def test_corpus(path):
+    with open(path, encoding='utf-8') as f:
+        text = f.read()
+    with open(path[:-4] + '.json', encoding='utf-8') as f:
+        expected = json.load(f)
+
+    result = FileProcessor()._extract_structured_content(text, path)
+
+    assert result["exercises"] == expected
+
+def test_large_document_is_segmented_once_per_exercise():
+    body = "Calcular el valor de la expresión con 2.5 decimales y justificar. " * 20
+    content = " ".join(f"Ejercicio {n}: {body}(3 puntos)" for n in range(1, 2001))
+
+    exercises = extract_exercises(content)
+
+    assert [exercise["number"] for exercise in exercises] == list(range(1, 2001))
+    assert all(exercise["points"] == 3 and exercise["type"] == "calculation" for exercise in exercises)
+
+def test_long_digit_runs_are_scanned_linearly():
+    # Una tira de cifras de OCR: con los patrones anteriores el coste era cuadrático
+    content = f"1. Completar la tabla escaneada: {'7' * 50000} (2 puntos) 2. Explicar el resultado obtenido"
+
+    exercises = extract_exercises(content)
+
+    assert [(exercise["number"], exercise["points"]) for exercise in exercises] == [(1, 2), (2, 10)]
+
+def test_submission_sections_use_the_statement_headers():
+    content = ("Respuesta al Ejercicio 1: 1. planteo 2. resultado. "
+               "EJERCICIO 2: la solución sin apartados. Ejercicio 3) conclusión final")
+
+    assert [number for number, _ in find_exercise_headers(content)] == [1, 2, 3]
+    sections = FileProcessor().split_exercise_sections(content)
+    # Con encabezados "Ejercicio N" los números sueltos son apartados, no secciones
+    assert [section["number"] for section in sections] == [1, 2, 3]
+    assert sections[0]["text"] == "Respuesta al Ejercicio 1: 1. planteo 2. resultado."
+    assert sections[2]["text"] == "Ejercicio 3) conclusión final"
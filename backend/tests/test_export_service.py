@@ -0,0 +1,117 @@
+import pytest
+import os
+import sys
+import time
+import zipfile
+from collections import deque
+from datetime import datetime, timedelta, timezone
+
+# Configuración del path para que src sea reconocible
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.config.settings import config
+from src.jobs import JobQueue, MemoryJobBroker, PeriodicScheduler
+from src.services import export_service
+from src.services.export_service import BULK_EXPORT_JOB, PURGE_EXPORTS_TASK, BulkExportService
+
+class _Window(deque):
+    """``deque`` que recuerda cuántos PDF llegó a tener pendientes a la vez"""
+    largest = 0
+
+    def append(self, item):
+        super().append(item)
+        _Window.largest = max(_Window.largest, len(self))
+
+def _correction(n, total_score=7.5):
+    return {"id": f"c{n}", "student_name": f"Estudiante {n}", "total_score": total_score, "max_score": 10.0,
+            "percentage": 75.0, "correction_details": [{"exercise_number": 1, "score": 7.5, "comments": "Bien"}],
+            "feedback": "Buen trabajo", "suggestions": None, "created_at": None}
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "UPLOAD_FOLDER", str(tmp_path))
+    monkeypatch.setattr(config, "EXPORT_PROCESS_WORKERS", 1)
+    monkeypatch.setattr(export_service, "get_job_queue", lambda: JobQueue(MemoryJobBroker(), max_attempts=1))
+    scheduler = PeriodicScheduler()
+    monkeypatch.setattr(export_service, "get_scheduler", lambda: scheduler)
+    service = BulkExportService()
+    service.scheduler = scheduler
+    return service
+
+def _queue_export(service, corrections):
+    export_id = "exportacion-1"
+    service._write_status({"id": export_id, "assignment_id": "asignacion-1", "teacher_id": "profe",
+                           "filename": "correcciones_Tarea.zip", "status": "queued", "total": len(corrections),
+                           "done": 0, "failed": 0, "errors": [], "size": None,
+                           "created_at": datetime.now(timezone.utc).isoformat(), "finished_at": None})
+    service.job_queue.enqueue(BULK_EXPORT_JOB, {"export_id": export_id})
+    return export_id
+
+def test_export_writes_pdfs_through_a_bounded_window(service, monkeypatch):
+    # Lecturas de la base de datos sustituidas: el resto (pool, ZIP, estado) es el real
+    corrections = [_correction(n) for n in range(1, 10)]
+    corrections[4] = _correction(5, total_score="diez")  # el PDF no se puede generar
+    monkeypatch.setattr(service, "_assignment_info", lambda assignment_id: {"title": "Tarea", "total_points": 10.0})
+    monkeypatch.setattr(service, "_iter_corrections", lambda assignment_id: iter(corrections))
+    monkeypatch.setattr(export_service, "deque", _Window)
+    _Window.largest = 0
+    export_id = _queue_export(service, corrections)
+
+    job = service.job_queue.broker.claim("worker-1")
+    assert service.job_queue.execute(job) is True
+
+    status = service.get_export(export_id, "profe")
+    zip_path = service._zip_path(export_id)
+    assert status["status"] == "completed"
+    assert (status["done"], status["failed"]) == (8, 1)
+    assert status["errors"][0]["student_name"] == "Estudiante 5"
+    assert status["size"] == os.path.getsize(zip_path)
+    assert not os.path.exists(zip_path + ".part")
+    # Un proceso: como mucho 4 PDF en vuelo
+    assert _Window.largest == 4
+
+    with zipfile.ZipFile(zip_path) as archive:
+        names = archive.namelist()
+        assert all(archive.read(name).startswith(b"%PDF") for name in names)
+    assert names == [f"{n:04d}_Estudiante_{n}.pdf" for n in range(1, 10) if n != 5]
+    assert service.get_export_file(export_id, "profe") == {"path": zip_path, "filename": "correcciones_Tarea.zip"}
+
+def test_missing_assignment_marks_the_export_as_failed(service, monkeypatch):
+    monkeypatch.setattr(service, "_assignment_info", lambda assignment_id: None)
+    export_id = _queue_export(service, [_correction(1)])
+
+    assert service.job_queue.execute(service.job_queue.broker.claim("worker-1")) is False
+
+    status = service.get_export(export_id, "profe")
+    assert status["status"] == "error"
+    assert "no encontrada" in status["error"]
+    assert not os.path.exists(service._zip_path(export_id) + ".part")
+
+def _finished(service, export_id, age, status="completed"):
+    finished_at = (datetime.now(timezone.utc) - timedelta(seconds=age)).isoformat()
+    service._write_status({"id": export_id, "teacher_id": "profe", "status": status, "finished_at": finished_at})
+    if status == "completed":
+        with open(service._zip_path(export_id), "wb") as f:
+            f.write(b"PK")
+
+def test_purge_removes_only_expired_exports(service, monkeypatch):
+    monkeypatch.setattr(config, "EXPORT_RETENTION", 3600)
+    _finished(service, "antigua", age=7200)
+    _finished(service, "fallida", age=7200, status="error")
+    _finished(service, "reciente", age=60)
+    service._write_status({"id": "en-curso", "teacher_id": "profe", "status": "running", "finished_at": None})
+    # Parcial sin estado de una exportación borrada a medias
+    orphan = service._zip_path("huerfana") + ".part"
+    open(orphan, "wb").close()
+    old = time.time() - 7200
+    os.utime(orphan, (old, old))
+
+    assert service.purge_finished() == 3
+    assert sorted(os.listdir(service.export_folder)) == ["en-curso.json", "reciente.json", "reciente.zip"]
+    assert service.get_export("antigua", "profe") is None
+
+def test_purge_is_registered_with_the_scheduler(service):
+    _finished(service, "antigua", age=config.EXPORT_RETENTION + 60)
+
+    assert PURGE_EXPORTS_TASK in service.scheduler.run_pending(now=time.monotonic())
+    assert os.listdir(service.export_folder) == []
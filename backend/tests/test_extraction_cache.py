@@ -0,0 +1,67 @@
+import pytest
+import os
+import shutil
+import sys
+
+from docx import Document
+
+# Configuración del path para que src sea reconocible
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.services.extraction_cache import ExtractionCache, main
+from src.services.file_processor import EXTRACTOR_VERSION, FileProcessor
+
+def _docx(path, text):
+    document = Document()
+    for line in text.split("\n"):
+        document.add_paragraph(line)
+    document.save(path)
+    return str(path)
+
+ASSIGNMENT = "PRÁCTICA DE ÁLGEBRA\nInstrucciones: resolver todos los ejercicios\n1. Resolver la ecuación x + 2 = 5 (2 puntos)\n2. Calcular el determinante de la matriz dada"
+
+def test_second_extraction_skips_parsing(tmp_path, monkeypatch):
+    cache = ExtractionCache(str(tmp_path / "cache"), max_bytes=1024 * 1024)
+    processor = FileProcessor(cache=cache)
+    first = processor.process_file(_docx(tmp_path / "a.docx", ASSIGNMENT))
+
+    def _fail(*_):
+        raise AssertionError("no debería volver a analizar el archivo")
+    monkeypatch.setattr(FileProcessor, "_read_docx_text", _fail)
+
+    # Mismos bytes con otro nombre: acierto de caché (un .docx guardado de nuevo
+    # lleva otra fecha de modificación y no sería el mismo archivo)
+    copy = shutil.copy(str(tmp_path / "a.docx"), str(tmp_path / "copia.docx"))
+    second = processor.process_file(copy)
+
+    assert second["exercises"] == first["exercises"]
+    assert second["source_file"] == copy
+    assert "Resolver la ecuación" in processor.extract_text(copy)
+    assert cache.stats()["hits"] == 2
+    assert cache.stats()["stores"] == 1
+
+def test_new_extractor_version_misses(tmp_path):
+    cache = ExtractionCache(str(tmp_path / "cache"), max_bytes=1024 * 1024)
+    cache.put("ab" * 32, "0", "texto", {"title": "viejo"})
+
+    assert cache.get("ab" * 32, EXTRACTOR_VERSION) is None
+    assert cache.get("ab" * 32, "0")["result"] == {"title": "viejo"}
+    assert cache.purge(keep_version=EXTRACTOR_VERSION) == 1
+    assert cache.stats()["entries"] == 0
+
+def test_cli_warms_cache(tmp_path, monkeypatch, capsys):
+    from src.config.settings import config
+    monkeypatch.setattr(config, "EXTRACTION_CACHE_FOLDER", str(tmp_path / "cache"))
+    monkeypatch.setattr("src.services.extraction_cache._extraction_cache", None)
+    uploads = tmp_path / "uploads"
+    uploads.mkdir()
+    _docx(uploads / "a.docx", ASSIGNMENT)
+    _docx(uploads / "b.docx", ASSIGNMENT + "\n3. Demostrar el teorema")
+    (uploads / "notas.txt").write_text("no se procesa")
+
+    main(["warm", str(uploads)])
+    main(["warm", str(uploads)])
+
+    output = capsys.readouterr().out.strip().splitlines()
+    assert output[0] == "Procesados: 2, errores: 0, ya en caché: 0, nuevos: 2"
+    assert output[1] == "Procesados: 2, errores: 0, ya en caché: 2, nuevos: 2"
@@ -0,0 +1,86 @@
+import pytest
+import os
+import sys
+
+# Configuración del path para que src sea reconocible
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.models.correction import validate_evaluation_response
+from src.models.model_strategy import ModelStrategy
+from src.services.correction_service import CorrectionService
+
+class FakeStrategy(ModelStrategy):
+    """Estrategia que devuelve respuestas predefinidas y registra los prompts"""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.prompts = []
+        self.required_fields = []
+
+    def evaluate(self, prompt, required_fields=None):
+        self.prompts.append(prompt)
+        self.required_fields.append(tuple(required_fields or ()))
+        return self.responses.pop(0)
+
+def test_validation_normalizes_loose_fields():
+    values, invalid = validate_evaluation_response({
+        "grade": "7,5/10",
+        "comments": " Bien resuelto ",
+        "strengths": "Claridad; Orden",
+        "areas_of_improvement": ["Citar fuentes", ""],
+        "ai_generated_percentage": "35%"
+    })
+    assert invalid == []
+    assert values == {
+        "grade": 7.5,
+        "comments": "Bien resuelto",
+        "strengths": ["Claridad", "Orden"],
+        "areas_of_improvement": ["Citar fuentes"],
+        "ai_generated_percentage": 35.0
+    }
+
+def test_validation_reports_out_of_range_and_missing_fields():
+    values, invalid = validate_evaluation_response({"grade": 14, "comments": "", "ai_generated_percentage": True})
+    assert values == {}
+    assert set(invalid) == {"grade", "comments", "strengths", "areas_of_improvement", "ai_generated_percentage"}
+
+def test_fused_mode_uses_a_single_call():
+    strategy = FakeStrategy({
+        "grade": 8, "comments": "Correcto", "strengths": ["Orden"],
+        "areas_of_improvement": [], "ai_generated_percentage": 12.345
+    })
+    result = CorrectionService(strategy=strategy).evaluate_fused(None, "Respuesta del estudiante")
+
+    assert len(strategy.prompts) == 1
+    assert "ai_generated_percentage" in strategy.prompts[0]
+    assert result["grade"] == 8
+    assert result["ai_generated_percentage"] == 12.35
+
+def test_fused_mode_only_requests_missing_ai_percentage():
+    strategy = FakeStrategy(
+        {"grade": 6, "comments": "Incompleto", "strengths": [], "areas_of_improvement": []},
+        {"ai_generated_percentage": 40}
+    )
+    result = CorrectionService(strategy=strategy).evaluate_fused(None, "Respuesta del estudiante")
+
+    assert len(strategy.prompts) == 2
+    assert result["grade"] == 6
+    assert result["ai_generated_percentage"] == 40
+
+def test_fused_mode_falls_back_to_dedicated_grading_on_error():
+    strategy = FakeStrategy(
+        {"error": "Failed to evaluate using Ollama."},
+        {"grade": 5, "comments": "Aceptable"},
+        {"ai_generated_percentage": 10}
+    )
+    result = CorrectionService(strategy=strategy).evaluate_fused(None, "Respuesta del estudiante")
+
+    assert len(strategy.prompts) == 3
+    # Cada llamada corta la generación en cuanto tiene los campos que necesita
+    assert strategy.required_fields == [
+        ("grade", "comments", "strengths", "areas_of_improvement", "ai_generated_percentage"),
+        ("grade", "comments", "strengths", "areas_of_improvement"),
+        ("ai_generated_percentage",),
+    ]
+    assert result["grade"] == 5
+    assert result["ai_generated_percentage"] == 10
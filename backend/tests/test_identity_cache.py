@@ -0,0 +1,197 @@
+import pytest
+import os
+import sys
+import time
+import uuid
+from types import SimpleNamespace
+
+from flask import Flask, jsonify, request
+from flask_jwt_extended import JWTManager, create_access_token
+
+# Configuración del path para que src sea reconocible
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.auth import identity_cache
+from src.auth.decorators import jwt_required
+from src.auth.identity_cache import IdentityCache, MemoryIdentityCache, identity_from_user
+from src.auth.jwt_manager import identity_claims
+from src.auth.services import AuthService
+from src.config.settings import config
+from src.database.database import db
+from src.database.models import User, UserRole
+from src.routes.auth_routes import auth_bp
+
+# SQLite solo acepta UUID como objeto y las rutas reciben el ID como texto: las
+# pruebas de extremo a extremo necesitan una base de datos PostgreSQL de pruebas
+TEST_DATABASE_URL = os.getenv('TEST_DATABASE_URL')
+requires_postgres = pytest.mark.skipif(not TEST_DATABASE_URL, reason="Requiere TEST_DATABASE_URL (PostgreSQL de pruebas)")
+
+def _identity(user_id, role='teacher'):
+    return {'id': user_id, 'email': f'{user_id}@test', 'username': user_id, 'role': role,
+            'first_name': 'Ana', 'last_name': 'Pérez', 'is_active': True}
+
+def test_entries_expire_after_ttl():
+    cache = MemoryIdentityCache(ttl=0.05)
+    cache.set('u1', _identity('u1'))
+    assert cache.get('u1')['role'] == 'teacher'
+    time.sleep(0.06)
+    assert cache.get('u1') is None
+
+def test_least_recently_used_entry_is_evicted():
+    cache = MemoryIdentityCache(ttl=60, max_entries=2)
+    cache.set('u1', _identity('u1'))
+    cache.set('u2', _identity('u2'))
+    cache.get('u1')
+    cache.set('u3', _identity('u3'))
+
+    assert cache.get('u2') is None
+    assert cache.get('u1') is not None
+    assert cache.get('u3') is not None
+
+def test_invalidate_forces_a_fresh_lookup():
+    cache = MemoryIdentityCache(ttl=60)
+    cache.set('u1', _identity('u1', role='admin'))
+    cache.invalidate('u1')
+    assert cache.get('u1') is None
+
+def test_identity_cache_is_abstract():
+    class Incomplete(IdentityCache):
+        def get(self, user_id):
+            return None
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+class _Users:
+    """Sustituye a ``User.query``: cuenta las consultas de ``load_identity``"""
+
+    def __init__(self):
+        self.rows = {}
+        self.lookups = 0
+
+    def add(self, name, role=UserRole.TEACHER):
+        user = SimpleNamespace(id=uuid.uuid4(), email=f'{name}@test', username=name, role=role,
+                               first_name='Ana', last_name='Pérez', is_active=True)
+        self.rows[str(user.id)] = user
+        return user
+
+    def filter_by(self, id):
+        self.lookups += 1
+        return SimpleNamespace(first=lambda: self.rows.get(str(id)))
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = MemoryIdentityCache(ttl=60)
+    monkeypatch.setattr(config, 'IDENTITY_CACHE_TTL', 60.0)
+    monkeypatch.setattr(identity_cache, '_cache', cache)
+    return cache
+
+@pytest.fixture
+def app(cache):
+    app = Flask(__name__)
+    app.config.update(SQLALCHEMY_DATABASE_URI=TEST_DATABASE_URL or 'sqlite://',
+                      JWT_SECRET_KEY='clave-de-pruebas-de-la-cache-de-identidades')
+    db.init_app(app)
+    JWTManager(app)
+    app.register_blueprint(auth_bp)
+
+    @app.route('/api/private')
+    @jwt_required
+    def private():
+        return jsonify({'role': request.current_user['role'].value})
+
+    # Cada petición abre su propio contexto (y su ``g``), como en producción
+    with app.app_context():
+        db.metadata.create_all(db.engine, tables=[User.__table__])
+    yield app
+    with app.app_context():
+        db.metadata.drop_all(db.engine, tables=[User.__table__])
+
+@pytest.fixture
+def users():
+    # ``monkeypatch`` leería el ``query`` heredado, que exige un contexto de aplicación
+    users = _Users()
+    User.query = users
+    yield users
+    del User.query
+
+def _headers(app, user):
+    with app.app_context():
+        token = create_access_token(identity=str(user.id), additional_claims=identity_claims(user))
+    return {'Authorization': f'Bearer {token}'}
+
+def _db_user(name, role=UserRole.TEACHER):
+    user = User(id=uuid.uuid4(), email=f'{name}@test', username=name, password_hash='x',
+                first_name='Ana', last_name='Pérez', role=role, is_active=True)
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+def _db_user_headers(app, name, role=UserRole.TEACHER):
+    with app.app_context():
+        user = _db_user(name, role)
+        return str(user.id), _headers(app, user)
+
+def test_jwt_required_rejects_stale_role_once_invalidated(app, users):
+    user = users.add('profe')
+    headers = _headers(app, user)
+    client = app.test_client()
+
+    assert client.get('/api/private', headers=headers).status_code == 200
+    user.role = UserRole.ADMIN
+
+    # Hasta que se invalida, la identidad sale de la caché sin consultar la tabla
+    assert client.get('/api/private', headers=headers).get_json() == {'role': 'teacher'}
+    assert users.lookups == 1
+
+    identity_cache.invalidate_identity(user.id)
+    response = client.get('/api/private', headers=headers)
+
+    assert response.status_code == 401
+    assert response.get_json()['error'] == 'stale_token'
+    assert users.lookups == 2
+
+def test_jwt_required_rejects_deactivated_user_once_invalidated(app, users):
+    user = users.add('profe')
+    headers = _headers(app, user)
+    client = app.test_client()
+
+    assert client.get('/api/private', headers=headers).status_code == 200
+    user.is_active = False
+    identity_cache.invalidate_identity(user.id)
+    response = client.get('/api/private', headers=headers)
+
+    assert response.status_code == 401
+    assert response.get_json()['message'] == "Usuario no válido o inactivo"
+
+def test_auth_service_changes_invalidate_cached_identity(app, cache):
+    with app.app_context():
+        user = _db_user('profe')
+        user_id = str(user.id)
+
+        cache.set(user_id, identity_from_user(user))
+        assert AuthService.update_user_role(user.id, 'coordinator')['role'] == 'coordinator'
+        assert cache.get(user_id) is None
+
+        cache.set(user_id, identity_from_user(user))
+        assert AuthService.set_user_active(user.id, False)['is_active'] is False
+        assert cache.get(user_id) is None
+
+@requires_postgres
+def test_admin_routes_invalidate_cached_identity(app, cache):
+    users = [_db_user_headers(app, 'admin', role=UserRole.ADMIN), _db_user_headers(app, 'profe'), _db_user_headers(app, 'otro')]
+    (_, admin_headers), (teacher_id, teacher_headers), (other_id, other_headers) = users
+    client = app.test_client()
+
+    assert client.get('/api/private', headers=teacher_headers).status_code == 200
+    assert client.get('/api/private', headers=other_headers).status_code == 200
+
+    response = client.put(f'/api/auth/users/{teacher_id}/role', json={'role': 'coordinator'}, headers=admin_headers)
+    assert response.status_code == 200
+    response = client.get('/api/private', headers=teacher_headers)
+    assert response.status_code == 401 and response.get_json()['error'] == 'stale_token'
+
+    response = client.put(f'/api/auth/users/{other_id}/active', json={'is_active': False}, headers=admin_headers)
+    assert response.status_code == 200
+    response = client.get('/api/private', headers=other_headers)
+    assert response.status_code == 401 and response.get_json()['message'] == "Usuario no válido o inactivo"
@@ -0,0 +1,122 @@
+import pytest
+import os
+import sys
+import threading
+
+from flask import Flask
+
+# Configuración del path para que src sea reconocible
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.config.settings import Config
+from src.database.database import db
+from src.jobs.brokers import MemoryJobBroker
+from src.jobs.queue import JobQueue
+from src.jobs.worker import JobWorker
+
+@pytest.fixture
+def queue():
+    return JobQueue(MemoryJobBroker(), max_attempts=3, retry_base_delay=0, retry_max_delay=0)
+
+def test_successful_job_is_removed_from_queue(queue):
+    processed = []
+    queue.register('test.job', lambda payload: processed.append(payload['value']))
+    queue.enqueue('test.job', {'value': 42})
+
+    job = queue.broker.claim('worker-1')
+    assert queue.execute(job) is True
+    assert processed == [42]
+    assert queue.broker.depth() == 0
+
+def test_failed_job_is_retried_until_max_attempts(queue):
+    failures = []
+
+    def handler(payload):
+        raise RuntimeError("LLM no disponible")
+
+    queue.register('test.job', handler, on_failure=lambda payload, error: failures.append(error))
+    queue.enqueue('test.job', {'value': 1})
+
+    attempts = []
+    while True:
+        job = queue.broker.claim('worker-1')
+        if job is None:
+            break
+        attempts.append(job.attempts)
+        queue.execute(job)
+
+    assert attempts == [1, 2, 3]
+    assert failures == ["LLM no disponible"]
+
+def test_delayed_job_is_not_claimed_early(queue):
+    queue.register('test.job', lambda payload: None)
+    queue.enqueue('test.job', {}, delay=60)
+
+    assert queue.broker.claim('worker-1') is None
+    assert queue.broker.depth() == 1
+
+def test_backoff_grows_exponentially():
+    queue = JobQueue(MemoryJobBroker(), retry_base_delay=1, retry_max_delay=100)
+    assert 0.8 <= queue.backoff_delay(1) <= 1.2
+    assert 3.2 <= queue.backoff_delay(3) <= 4.8
+    assert queue.backoff_delay(20) <= 120
+
+def test_expired_lease_is_requeued_and_stale_worker_cannot_complete():
+    queue = JobQueue(MemoryJobBroker(lease_seconds=0), max_attempts=3, retry_base_delay=0, retry_max_delay=0)
+    processed = []
+    queue.register('test.job', lambda payload: processed.append(payload['value']))
+    queue.enqueue('test.job', {'value': 7})
+
+    stale = queue.broker.claim('worker-caido')
+    assert queue.reclaim_expired() == 1
+    assert queue.broker.heartbeat(stale.id, 'worker-caido') is False
+
+    job = queue.broker.claim('worker-2')
+    assert (job.id, job.attempts) == (stale.id, 2)
+    assert queue.broker.complete(stale.id, worker_id='worker-caido') is False
+    assert queue.execute(job) is True
+    assert processed == [7]
+    assert queue.reclaim_expired() == 0
+
+def test_heartbeat_keeps_the_lease():
+    broker = MemoryJobBroker(lease_seconds=60)
+    queue = JobQueue(broker)
+    queue.enqueue('test.job', {})
+    job = broker.claim('worker-1')
+
+    assert broker.heartbeat(job.id, 'worker-1') is True
+    assert broker.heartbeat(job.id, 'worker-2') is False
+    assert queue.reclaim_expired() == 0
+
+def test_expired_lease_on_last_attempt_runs_failure_hook():
+    queue = JobQueue(MemoryJobBroker(lease_seconds=0), max_attempts=1)
+    failures = []
+    queue.register('test.job', lambda payload: None, on_failure=lambda payload, error: failures.append(payload))
+    queue.enqueue('test.job', {'value': 3})
+
+    queue.broker.claim('worker-caido')
+    assert queue.reclaim_expired() == 1
+    assert failures == [{'value': 3}]
+    assert queue.broker.depth() == 0
+    assert queue.broker.claim('worker-2') is None
+
+def test_zero_heartbeat_interval_disables_heartbeats(monkeypatch):
+    monkeypatch.setenv('JOB_HEARTBEAT_INTERVAL', '0')
+    assert Config().JOB_HEARTBEAT_INTERVAL == 0
+    monkeypatch.setenv('JOB_HEARTBEAT_INTERVAL', '60')
+    with pytest.raises(ValueError):
+        Config()
+
+    queue = JobQueue(MemoryJobBroker())
+    beating = []
+    queue.register('test.job', lambda payload: beating.extend(
+        thread.name for thread in threading.enumerate() if thread.name.startswith('job-heartbeat-')
+    ))
+    queue.enqueue('test.job', {})
+
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+    with app.app_context():
+        assert JobWorker(queue, heartbeat_interval=0).run_once() is True
+    assert beating == []
@@ -0,0 +1,78 @@
+import pytest
+import os
+import re
+import sys
+
+# Configuración del path para que src sea reconocible
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.models.correction import CorrectionResult
+from src.models.model_strategy import ModelStrategy
+from src.services.correction_service import CorrectionService
+from src.services.file_processor import FileProcessor
+from src.utils.tokens import estimate_tokens, split_by_token_budget
+
+class SectionGradingStrategy(ModelStrategy):
+    """Pone como nota el número del ejercicio evaluado y tiene una ventana pequeña"""
+    context_tokens = 1800
+
+    def __init__(self):
+        self.prompts = []
+
+    def evaluate(self, prompt, required_fields=None):
+        self.prompts.append(prompt)
+        match = re.search(r"Fragmento evaluado: Ejercicio (\d+)", prompt)
+        number = int(match.group(1)) if match else 5
+        return {"grade": number, "comments": f"Revisado {number}", "strengths": ["Orden"], "areas_of_improvement": []}
+
+def _long_submission(exercises=4, sentences=120):
+    body = " ".join(f"La respuesta desarrolla el paso {i} con detalle." for i in range(sentences))
+    return "\n".join(f"Ejercicio {n}: {body}" for n in range(1, exercises + 1))
+
+def test_token_estimate_grows_with_text():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("hola mundo") >= 2
+    assert estimate_tokens("palabra " * 1000) > estimate_tokens("palabra " * 100)
+
+def test_split_by_token_budget_respects_budget_and_keeps_text():
+    text = "\n\n".join(f"Párrafo {i}. " + "Frase de relleno. " * 30 for i in range(20))
+    chunks = split_by_token_budget(text, 200)
+    assert len(chunks) > 1
+    assert all(estimate_tokens(chunk) <= 200 for chunk in chunks)
+    assert "".join(chunks).replace("\n", "").replace(" ", "") == text.replace("\n", "").replace(" ", "")
+
+def test_exercise_sections_require_consecutive_numbers():
+    content = "Intro. 1. Primera respuesta con 3. valores 2. Segunda respuesta 7. otra cifra 3. Tercera"
+    sections = FileProcessor().split_exercise_sections(content)
+    assert [section["number"] for section in sections] == [1, 2, 3]
+    assert sections[0]["text"].startswith("Intro.")
+
+def test_short_submissions_use_a_single_prompt():
+    strategy = SectionGradingStrategy()
+    result = CorrectionService(strategy=strategy).correct_assignment(None, "1. Respuesta corta 2. Otra respuesta")
+    assert len(strategy.prompts) == 1
+    assert result.details is None
+
+def test_long_submissions_are_graded_per_exercise_and_reduced():
+    strategy = SectionGradingStrategy()
+    service = CorrectionService(strategy=strategy)
+    content = _long_submission()
+    assert service.needs_chunking(None, content)
+
+    result = service.correct_assignment(None, content)
+
+    assert len(strategy.prompts) >= 4
+    assert {detail["exercise"] for detail in result.details} == {1, 2, 3, 4}
+    # Cada ejercicio pesa lo mismo: media de 1, 2, 3 y 4
+    assert result.grade == pytest.approx(2.5)
+    assert "Ejercicio 4" in result.comments
+    assert result.to_dict()["details"] == result.details
+
+def test_failed_chunks_are_excluded_from_the_grade():
+    chunks = [
+        {"exercise": 1, "label": "Ejercicio 1", "text": "a", "weight": 1},
+        {"exercise": 2, "label": "Ejercicio 2", "text": "b", "weight": 1}
+    ]
+    result = CorrectionService.reduce_chunk_results(chunks, [CorrectionResult(grade=8, comments="Bien"), None])
+    assert result.grade == 8
+    assert [detail["error"] for detail in result.details] == [False, True]
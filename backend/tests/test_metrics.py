@@ -0,0 +1,98 @@
+import pytest
+import os
+import sys
+import threading
+
+from flask import Blueprint, Flask
+
+# Configuración del path para que src sea reconocible
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.config.settings import config
+from src.routes.metrics_routes import instrument_blueprints, metrics_bp
+from src.services.llm_transport import LLMTransport
+from src.utils.metrics import REGISTRY, CallbackMetric, Counter, Histogram, MetricsRegistry, _Metric
+
+def _lines(registry, prefix):
+    return [line for line in registry.render().splitlines() if line.startswith(prefix)]
+
+def test_counter_sums_every_thread():
+    registry = MetricsRegistry()
+    counter = Counter('pruebas_total', "Pruebas", ['kind'], registry=registry)
+    series = counter.labels('a')
+
+    def _work():
+        for _ in range(1000):
+            series.inc()
+
+    threads = [threading.Thread(target=_work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    series.inc(5)
+
+    # Los hilos terminados se acumulan aparte y no se pierde ninguna cuenta
+    assert series.value() == 8005
+    assert _lines(registry, 'pruebas_total') == ['pruebas_total{kind="a"} 8005']
+
+def test_histogram_renders_cumulative_buckets():
+    registry = MetricsRegistry()
+    histogram = Histogram('latencia_seconds', "Latencia", ['route'], buckets=(0.1, 1.0), registry=registry)
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.labels('/api/"x"').observe(value)
+
+    assert _lines(registry, 'latencia_seconds') == [
+        'latencia_seconds_bucket{route="/api/\\"x\\"",le="0.1"} 2',
+        'latencia_seconds_bucket{route="/api/\\"x\\"",le="1"} 3',
+        'latencia_seconds_bucket{route="/api/\\"x\\"",le="+Inf"} 4',
+        'latencia_seconds_sum{route="/api/\\"x\\""} 3.65',
+        'latencia_seconds_count{route="/api/\\"x\\""} 4',
+    ]
+
+def test_metric_types_must_implement_series_and_samples():
+    class Gauge(_Metric):
+        def samples(self):
+            return []
+
+    with pytest.raises(TypeError):
+        Gauge('incompleta', "Sin series", registry=None)
+
+    callback = CallbackMetric('profundidad', "Profundidad", ['cola'], lambda: [(('a',), 3)], registry=None)
+    assert callback.samples() == ['profundidad{cola="a"} 3']
+    with pytest.raises(TypeError):
+        callback.labels('a')
+
+def test_llm_calls_record_duration_and_tokens():
+    transport = LLMTransport()
+    transport.post_json = lambda *args, **kwargs: {
+        "message": {"content": "ok"}, "prompt_eval_count": 120, "eval_count": 30
+    }
+    transport.ollama_chat('modelo-metricas', [{"role": "user", "content": "hola"}])
+
+    text = REGISTRY.render()
+    assert 'llm_tokens_total{backend="ollama",model="modelo-metricas",kind="prompt"} 120' in text
+    assert 'llm_tokens_total{backend="ollama",model="modelo-metricas",kind="completion"} 30' in text
+    assert ('llm_request_duration_seconds_count{backend="ollama",model="modelo-metricas",'
+            'operation="chat",outcome="ok"} 1') in text
+
+def test_metrics_endpoint_times_routes_and_requires_token(monkeypatch):
+    monkeypatch.setattr(config, 'METRICS_ENABLED', True)
+    monkeypatch.setattr(config, 'METRICS_TOKEN', 'secreto')
+    blueprint = Blueprint('metricas_prueba', __name__, url_prefix='/api/metricas-prueba')
+    blueprint.add_url_rule('/<item_id>', 'item', lambda item_id: {'id': item_id})
+    app = Flask(__name__)
+    app.register_blueprint(blueprint)
+    app.register_blueprint(metrics_bp)
+    instrument_blueprints(app, blueprint)
+    client = app.test_client()
+
+    client.get('/api/metricas-prueba/1')
+    client.get('/api/metricas-prueba/2')
+
+    assert client.get('/metrics').status_code == 401
+    response = client.get('/metrics', headers={'Authorization': 'Bearer secreto'})
+    assert response.status_code == 200
+    assert response.content_type.startswith('text/plain; version=0.0.4')
+    assert ('http_request_duration_seconds_count{method="GET",route="/api/metricas-prueba/<item_id>",'
+            'status="200"} 2') in response.get_data(as_text=True)
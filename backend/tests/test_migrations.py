@@ -0,0 +1,56 @@
+import pytest
+import io
+import os
+import sys
+
+from alembic import command
+from alembic.config import Config
+from alembic.script import ScriptDirectory
+
+# Configuración del path para que src sea reconocible
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+TEST_DATABASE_URL = os.getenv('TEST_DATABASE_URL')
+
+def alembic_config(output_buffer=None, **attributes):
+    cfg = Config(os.path.join(BACKEND_DIR, 'alembic.ini'), output_buffer=output_buffer)
+    cfg.set_main_option('script_location', os.path.join(BACKEND_DIR, 'migrations'))
+    cfg.attributes['configure_logger'] = False
+    cfg.attributes.update(attributes)
+    return cfg
+
+def test_migrations_form_a_single_chain():
+    script = ScriptDirectory.from_config(alembic_config())
+    assert script.get_heads() == ['0003']
+    assert [revision.revision for revision in reversed(list(script.walk_revisions()))] == ['0001', '0002', '0003']
+
+def test_offline_upgrade_converts_json_and_builds_indexes_concurrently():
+    output = io.StringIO()
+    command.upgrade(alembic_config(output_buffer=output), 'head', sql=True)
+    sql = output.getvalue()
+
+    assert 'ALTER TABLE assignments ALTER COLUMN extracted_content TYPE JSONB USING extracted_content::jsonb' in sql
+    assert 'CREATE INDEX CONCURRENTLY ix_assignments_teacher_created ON assignments (teacher_id, created_at DESC, id DESC)' in sql
+    assert "CREATE INDEX CONCURRENTLY ix_assignments_processing_updated ON assignments (updated_at) WHERE status = 'PROCESSING'" in sql
+    # CONCURRENTLY necesita ir fuera de la transacción de la migración
+    assert sql.index('COMMIT', sql.index('TYPE JSONB')) < sql.index('CREATE INDEX CONCURRENTLY')
+
+@pytest.mark.skipif(not TEST_DATABASE_URL, reason="Requiere TEST_DATABASE_URL (PostgreSQL de pruebas)")
+def test_migrated_schema_matches_models():
+    from alembic.autogenerate import compare_metadata
+    from alembic.migration import MigrationContext
+    from sqlalchemy import create_engine
+
+    from src.database.database import db
+    from src.database import models  # noqa: F401
+
+    engine = create_engine(TEST_DATABASE_URL)
+    with engine.connect() as connection:
+        command.upgrade(alembic_config(connection=connection), 'head')
+        try:
+            context = MigrationContext.configure(connection, opts={'compare_type': True})
+            assert compare_metadata(context, db.metadata) == []
+        finally:
+            command.downgrade(alembic_config(connection=connection), 'base')
+    engine.dispose()
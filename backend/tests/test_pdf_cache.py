@@ -0,0 +1,57 @@
+import pytest
+import os
+import sys
+import time
+
+# Configuración del path para que src sea reconocible
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.services.pdf_cache import PDFArtifactCache
+
+RUBRIC = {"criteria": [{"name": "Claridad", "weight": 0.5}], "total_points": 10}
+
+def test_digest_changes_with_content():
+    first = PDFArtifactCache.build_digest('rubric', {"data": RUBRIC, "title": "Tarea 1"})
+    assert first == PDFArtifactCache.build_digest('rubric', {"title": "Tarea 1", "data": RUBRIC})
+    assert first != PDFArtifactCache.build_digest('rubric', {"data": RUBRIC, "title": "Tarea 2"})
+    assert first != PDFArtifactCache.build_digest('solutions', {"data": RUBRIC, "title": "Tarea 1"})
+
+def test_new_version_replaces_previous_file(tmp_path):
+    cache = PDFArtifactCache(str(tmp_path), max_bytes=1024 * 1024)
+    assert cache.get('a1', 'rubric', 'v1') is None
+
+    old_path = cache.put('a1', 'rubric', 'v1', b'%PDF-1')
+    assert cache.get('a1', 'rubric', 'v1') == old_path
+    solutions_path = cache.put('a1', 'solutions', 's1', b'%PDF-s')
+
+    new_path = cache.put('a1', 'rubric', 'v2', b'%PDF-2')
+    assert not os.path.exists(old_path)
+    assert open(new_path, 'rb').read() == b'%PDF-2'
+    assert os.path.exists(solutions_path)
+
+def test_invalidate_by_kind_and_whole_assignment(tmp_path):
+    cache = PDFArtifactCache(str(tmp_path), max_bytes=1024 * 1024)
+    cache.put('a1', 'rubric', 'v1', b'%PDF-r')
+    cache.put('a1', 'solutions', 's1', b'%PDF-s')
+
+    assert cache.invalidate('a1', 'rubric') == 1
+    assert cache.get('a1', 'rubric', 'v1') is None
+    assert cache.get('a1', 'solutions', 's1') is not None
+
+    assert cache.invalidate('a1') == 1
+    assert not os.path.exists(os.path.join(str(tmp_path), 'a1'))
+
+def test_least_recently_used_files_are_evicted(tmp_path):
+    cache = PDFArtifactCache(str(tmp_path), max_bytes=250)
+    cache.put('a1', 'rubric', 'v1', b'x' * 100)
+    cache.put('a2', 'rubric', 'v1', b'x' * 100)
+    past = time.time() - 60
+    os.utime(cache._path('a1', 'rubric', 'v1'), (past, past))
+    os.utime(cache._path('a2', 'rubric', 'v1'), (past + 1, past + 1))
+    cache.get('a1', 'rubric', 'v1')
+
+    cache.put('a3', 'rubric', 'v1', b'x' * 100)
+
+    assert cache.get('a2', 'rubric', 'v1') is None
+    assert cache.get('a1', 'rubric', 'v1') is not None
+    assert cache.stats()["bytes"] == 200
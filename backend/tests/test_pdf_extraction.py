@@ -0,0 +1,112 @@
+import pytest
+import os
+import sys
+
+from reportlab.pdfgen import canvas
+
+# Configuración del path para que src sea reconocible
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.config.settings import config
+from src.services import file_processor
+from src.services.file_processor import FileProcessor
+from src.services.upload_ingestion import HashingSpooledFile, ingest_path
+
+def _pdf(path, pages, lines=1):
+    pdf = canvas.Canvas(str(path))
+    for page in range(pages):
+        pdf.drawString(72, 720, f"{page + 1}. Ejercicio de la página {page + 1} (2 puntos)")
+        for line in range(1, lines):
+            pdf.drawString(72, 720 - (line % 60) * 11, f"Línea {line} de la respuesta")
+        pdf.showPage()
+    pdf.save()
+    return str(path)
+
+def test_parallel_extraction_matches_sequential(tmp_path, monkeypatch):
+    path = _pdf(tmp_path / "examen.pdf", 6)
+    processor = FileProcessor()
+
+    monkeypatch.setattr(config, "PDF_EXTRACTION_WORKERS", 1)
+    sequential = processor.extract_text(path)
+
+    monkeypatch.setattr(config, "PDF_EXTRACTION_WORKERS", 2)
+    monkeypatch.setattr(config, "PDF_PARALLEL_MIN_PAGES", 2)
+    parallel = processor.extract_text(path)
+
+    assert parallel == sequential
+    assert sequential.index("--- Página 2 ---") < sequential.index("Ejercicio de la página 2")
+    assert "--- Página 6 ---" in sequential
+
+def test_timed_out_pages_are_skipped_and_not_cached(tmp_path, monkeypatch):
+    from src.services.extraction_cache import ExtractionCache
+
+    cache = ExtractionCache(str(tmp_path / "cache"), max_bytes=1024 * 1024)
+    path = _pdf(tmp_path / "examen.pdf", 3)
+    monkeypatch.setattr(config, "PDF_EXTRACTION_WORKERS", 2)
+    monkeypatch.setattr(config, "PDF_PARALLEL_MIN_PAGES", 2)
+    monkeypatch.setattr(file_processor, "_extract_pages_parallel",
+                        lambda file_path, page_count, workers: (["uno", "", "tres"], [2]))
+
+    result = FileProcessor(cache=cache).process_file(path)
+
+    assert result["extraction_metadata"]["skipped_pages"] == [2]
+    assert cache.stats()["stores"] == 0
+
+def test_uploaded_streams_get_page_timeouts(tmp_path, monkeypatch):
+    path = _pdf(tmp_path / "examen.pdf", 3)
+    monkeypatch.setattr(config, "TEMP_FOLDER", str(tmp_path / "temp"))
+    monkeypatch.setattr(config, "PDF_EXTRACTION_WORKERS", 2)
+    monkeypatch.setattr(config, "PDF_PARALLEL_MIN_PAGES", 2)
+    read_from = []
+
+    def _parallel(file_path, page_count, workers):
+        read_from.append((file_path, os.path.getsize(file_path)))
+        return ["uno", "", "tres"], [2]
+
+    monkeypatch.setattr(file_processor, "_extract_pages_parallel", _parallel)
+
+    # Subida directa: en memoria, sin ruta
+    spool = HashingSpooledFile(max_size=10 * 1024 * 1024, max_bytes=10 * 1024 * 1024)
+    with open(path, 'rb') as f:
+        spool.write(f.read())
+    direct = FileProcessor().process_stream(spool, ".pdf", sha256=spool.sha256)
+    spool.close()
+
+    # Subida por partes: el descriptor del archivo ya ensamblado
+    upload = ingest_path(path, "examen.pdf")
+    chunked = FileProcessor().process_stream(upload.stream, upload.extension, sha256=upload.sha256)
+    upload.close()
+
+    assert direct["extraction_metadata"]["skipped_pages"] == chunked["extraction_metadata"]["skipped_pages"] == [2]
+    assert read_from[0][1] == read_from[1][1] == os.path.getsize(path)
+    assert read_from[1][0] == path
+    # La copia temporal de la subida en memoria se borra al terminar
+    assert os.listdir(tmp_path / "temp") == []
+
+def test_page_timeout_does_not_disturb_concurrent_extractions(tmp_path, monkeypatch):
+    import threading
+
+    # Páginas con miles de líneas: no se extraen en el milisegundo que se les da
+    slow = _pdf(tmp_path / "atascado.pdf", 4, lines=3000)
+    other = _pdf(tmp_path / "examen.pdf", 8)
+    import PyPDF2
+    expected = [page.extract_text() for page in PyPDF2.PdfReader(other).pages]
+    monkeypatch.setattr(config, "PDF_EXTRACTION_WORKERS", 2)
+    monkeypatch.setattr(config, "PDF_PARALLEL_MIN_PAGES", 2)
+    pool = file_processor._get_pdf_pool(2)
+    results = {}
+
+    def _extract(name, path, pages, timeout):
+        results[name] = file_processor._extract_pages_parallel(path, pages, 2, timeout=timeout)
+
+    threads = [threading.Thread(target=_extract, args=("lento", slow, 4, 0.001)),
+               threading.Thread(target=_extract, args=("normal", other, 8, None))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=60)
+
+    # El documento lento pierde sus páginas; el otro sale completo del mismo pool
+    assert results["lento"][1] == [1, 2, 3, 4]
+    assert results["normal"] == (expected, [])
+    assert file_processor._get_pdf_pool(2) is pool
@@ -0,0 +1,158 @@
+import pytest
+import os
+import sys
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import create_engine, insert, select, text, tuple_
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
+
+# Configuración del path para que src sea reconocible
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.database.models import (Assignment, AssignmentStatus, Correction, Job, JobStatus, Rubric, User,
+                                 UserRole)
+
+# Solo con una base de datos PostgreSQL de pruebas: el esquema se crea con las
+# migraciones y se elimina al terminar
+TEST_DATABASE_URL = os.getenv('TEST_DATABASE_URL')
+pytestmark = pytest.mark.skipif(not TEST_DATABASE_URL, reason="Requiere TEST_DATABASE_URL (PostgreSQL de pruebas)")
+
+TEACHERS = 200
+PER_TEACHER = 100
+
+class Explain(Executable, ClauseElement):
+    """``EXPLAIN (FORMAT JSON)`` de una consulta con sus parámetros ya enlazados"""
+    inherit_cache = False
+
+    def __init__(self, statement):
+        self.statement = statement
+
+@compiles(Explain, 'postgresql')
+def _compile_explain(element, compiler, **kw):
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.statement, **kw)
+
+def _nodes(plan):
+    yield plan
+    for child in plan.get('Plans', []):
+        yield from _nodes(child)
+
+def _seed(connection):
+    now = datetime.now(timezone.utc)
+    teachers = [{
+        "id": uuid.uuid4(), "email": f"plan{n}@autograder.local", "username": f"plan{n}", "password_hash": "x",
+        "first_name": "Plan", "last_name": str(n), "role": UserRole.TEACHER, "is_active": True
+    } for n in range(TEACHERS)]
+    connection.execute(insert(User), teachers)
+
+    assignments, rubrics, corrections, jobs = [], [], [], []
+    for t, teacher in enumerate(teachers):
+        for n in range(PER_TEACHER):
+            processing = t == 0 and n < 20
+            assignments.append({
+                "id": uuid.uuid4(), "title": f"Tarea {n}", "total_points": 10.0, "teacher_id": teacher["id"],
+                "extracted_content": {"exercises": [{"number": 1}]},
+                "status": AssignmentStatus.PROCESSING if processing else AssignmentStatus.FINALIZED,
+                "created_at": now - timedelta(minutes=t * PER_TEACHER + n),
+                "updated_at": now - timedelta(hours=2 if processing else 0)
+            })
+            rubrics.append({
+                "id": uuid.uuid4(), "title": f"Rúbrica {n}", "total_points": 10.0, "teacher_id": teacher["id"],
+                "criteria": [], "is_template": False, "is_public": n == 0 and t % 4 == 0,
+                "created_at": now - timedelta(minutes=t * PER_TEACHER + n)
+            })
+    connection.execute(insert(Assignment), assignments)
+    connection.execute(insert(Rubric), rubrics)
+
+    for assignment in assignments[:TEACHERS]:
+        for n in range(PER_TEACHER):
+            corrections.append({
+                "id": uuid.uuid4(), "assignment_id": assignment["id"], "teacher_id": assignment["teacher_id"],
+                "student_name": f"Estudiante {n:03d}", "total_score": 0.0, "max_score": 10.0, "percentage": 0.0
+            })
+    connection.execute(insert(Correction), corrections)
+
+    for n in range(TEACHERS * PER_TEACHER):
+        status = JobStatus.QUEUED if n < 50 else JobStatus.RUNNING if n < 100 else JobStatus.SUCCEEDED
+        jobs.append({
+            "id": uuid.uuid4(), "job_type": "assignment.ai_analysis",
+            "payload": {"assignment_id": str(assignments[n % len(assignments)]["id"])},
+            "status": status, "attempts": 1, "max_attempts": 3,
+            "lease_expires_at": now - timedelta(seconds=n) if status == JobStatus.RUNNING else None
+        })
+    connection.execute(insert(Job), jobs)
+    connection.commit()
+    connection.execute(text("ANALYZE"))
+    connection.commit()
+    return teachers[0]["id"], assignments[0]["id"]
+
+@pytest.fixture(scope='module')
+def seeded():
+    from alembic import command
+    from test_migrations import alembic_config
+
+    engine = create_engine(TEST_DATABASE_URL)
+    connection = engine.connect()
+    command.upgrade(alembic_config(connection=connection), 'head')
+    try:
+        yield connection, _seed(connection)
+    finally:
+        connection.rollback()
+        command.downgrade(alembic_config(connection=connection), 'base')
+        connection.close()
+        engine.dispose()
+
+def _plan(connection, statement):
+    plan = connection.execute(Explain(statement)).scalar()[0]['Plan']
+    connection.rollback()
+    return list(_nodes(plan))
+
+def _queries(teacher_id, assignment_id):
+    now = datetime.now(timezone.utc)
+    return {
+        # AssignmentService.list_teacher_assignments (primera página y siguientes)
+        "listado": (select(Assignment.id, Assignment.title).where(Assignment.teacher_id == teacher_id)
+                    .order_by(Assignment.created_at.desc(), Assignment.id.desc()).limit(51),
+                    'assignments', 'ix_assignments_teacher_created'),
+        "listado con cursor": (select(Assignment.id).where(
+                                   Assignment.teacher_id == teacher_id,
+                                   tuple_(Assignment.created_at, Assignment.id) < tuple_(now - timedelta(minutes=50), uuid.uuid4())
+                               ).order_by(Assignment.created_at.desc(), Assignment.id.desc()).limit(51),
+                               'assignments', 'ix_assignments_teacher_created'),
+        # AssignmentService.check_stuck_assignments
+        "atascadas": (select(Assignment.id).where(Assignment.status == AssignmentStatus.PROCESSING,
+                                                  Assignment.updated_at < now - timedelta(hours=1)),
+                      'assignments', 'ix_assignments_processing_updated'),
+        # RubricService.get_teacher_rubrics con include_public
+        "rúbricas": (select(Rubric.id).where((Rubric.teacher_id == teacher_id) | (Rubric.is_public == True))
+                     .order_by(Rubric.created_at.desc()),
+                     'rubrics', 'ix_rubrics_public_created'),
+        # BulkExportService._iter_corrections
+        "correcciones": (select(Correction.id, Correction.student_name).where(Correction.assignment_id == assignment_id)
+                         .order_by(Correction.student_name, Correction.id),
+                         'corrections', 'ix_corrections_assignment_student'),
+        # DatabaseJobBroker.claim
+        "siguiente trabajo": (select(Job.id).where(Job.status == JobStatus.QUEUED, Job.run_at <= now)
+                              .order_by(Job.run_at).limit(1).with_for_update(skip_locked=True),
+                              'jobs', 'ix_jobs_queued_run_at'),
+        # DatabaseJobBroker.reclaim_expired
+        "alquileres caducados": (select(Job.id).where(Job.status == JobStatus.RUNNING, Job.lease_expires_at < now)
+                                 .order_by(Job.lease_expires_at).limit(500).with_for_update(skip_locked=True),
+                                 'jobs', 'ix_jobs_running_lease'),
+        # AssignmentService.check_stuck_assignments: ¿análisis activo?
+        "análisis activo": (select(Job.id).where(Job.status.in_([JobStatus.QUEUED, JobStatus.RUNNING]),
+                                                 Job.payload['assignment_id'].astext == str(assignment_id)),
+                            'jobs', 'ix_jobs_active_assignment'),
+    }
+
+@pytest.mark.parametrize('name', ["listado", "listado con cursor", "atascadas", "rúbricas", "correcciones",
+                                  "siguiente trabajo", "alquileres caducados", "análisis activo"])
+def test_hot_query_uses_index(seeded, name):
+    connection, (teacher_id, assignment_id) = seeded
+    statement, table, index = _queries(teacher_id, assignment_id)[name]
+
+    nodes = _plan(connection, statement)
+
+    assert index in {node.get('Index Name') for node in nodes}
+    assert not [node for node in nodes if node['Node Type'] == 'Seq Scan' and node.get('Relation Name') == table]
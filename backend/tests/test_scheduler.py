@@ -0,0 +1,34 @@
+import pytest
+import os
+import sys
+
+# Configuración del path para que src sea reconocible
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.jobs.scheduler import PeriodicScheduler
+
+def test_tasks_run_when_their_interval_is_due():
+    scheduler = PeriodicScheduler()
+    runs = []
+    scheduler.register('rapida', lambda: runs.append('rapida'), interval=10)
+    scheduler.register('lenta', lambda: runs.append('lenta'), interval=60)
+
+    assert scheduler.run_pending(now=0) == ['rapida', 'lenta']
+    assert scheduler.run_pending(now=5) == []
+    assert scheduler.run_pending(now=10) == ['rapida']
+    assert scheduler.run_pending(now=60) == ['rapida', 'lenta']
+    assert runs == ['rapida', 'lenta', 'rapida', 'rapida', 'lenta']
+
+def test_failing_task_does_not_stop_the_others():
+    scheduler = PeriodicScheduler()
+    runs = []
+
+    def broken():
+        raise RuntimeError("base de datos no disponible")
+
+    scheduler.register('rota', broken, interval=1)
+    scheduler.register('sana', lambda: runs.append(1), interval=1)
+
+    scheduler.run_pending(now=0)
+    scheduler.run_pending(now=1)
+    assert runs == [1, 1]
@@ -0,0 +1,67 @@
+import pytest
+import os
+import random
+import sys
+
+# Configuración del path para que src sea reconocible
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.services.similarity_service import find_similar_texts
+from src.utils.similarity import (
+    LSHIndex, MinHasher, estimate_jaccard, shingle_hashes,
+    signature_from_bytes, signature_to_bytes
+)
+
+VOCABULARY = ("derivada integral función límite serie matriz vector espacio base "
+              "teorema prueba valor punto recta plano curva área volumen").split()
+
+def _essay(seed, words=300):
+    rng = random.Random(seed)
+    return " ".join(rng.choice(VOCABULARY) for _ in range(words))
+
+def _mutate(text, ratio, seed):
+    rng = random.Random(seed)
+    words = text.split()
+    for i in range(len(words)):
+        if rng.random() < ratio:
+            words[i] = rng.choice(VOCABULARY)
+    return " ".join(words)
+
+def test_signature_estimates_jaccard():
+    hasher = MinHasher(num_perm=256)
+    original = _essay(1)
+    copy = "  ".join(original.upper().split())
+
+    assert estimate_jaccard(hasher.signature_for_text(original), hasher.signature_for_text(copy)) == 1.0
+    a, b = set(shingle_hashes(original)), set(shingle_hashes(_mutate(original, 0.05, 2)))
+    exact = len(a & b) / len(a | b)
+    estimated = estimate_jaccard(hasher.signature_for_text(original), hasher.signature_for_text(_mutate(original, 0.05, 2)))
+    assert abs(estimated - exact) < 0.1
+
+def test_signatures_round_trip_and_are_stable():
+    text = _essay(3)
+    signature = MinHasher(seed=1).signature_for_text(text)
+    assert (signature_from_bytes(signature_to_bytes(signature)) == signature).all()
+    assert (MinHasher(seed=1).signature_for_text(text) == signature).all()
+
+def test_lsh_returns_near_duplicates_only():
+    hasher = MinHasher()
+    index = LSHIndex(threshold=0.5)
+    original = _essay(10)
+    index.insert("original", hasher.signature_for_text(original))
+    for seed in range(20):
+        index.insert(f"otra-{seed}", hasher.signature_for_text(_essay(100 + seed)))
+
+    candidates = index.query(hasher.signature_for_text(_mutate(original, 0.03, 4)))
+    assert "original" in candidates
+    assert len(candidates) <= 2
+
+def test_find_similar_texts_reports_planted_pairs():
+    texts = [_essay(seed) for seed in range(30)]
+    texts.append(_mutate(texts[7], 0.02, 1))
+    texts.append(texts[12] + " Conclusión añadida al final.")
+
+    pairs = find_similar_texts(texts, threshold=0.5)
+
+    assert {tuple(pair["submissions"]) for pair in pairs} == {("12", "31"), ("30", "7")}
+    assert all(pair["similarity"] > 90 for pair in pairs)
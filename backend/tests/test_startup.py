@@ -0,0 +1,53 @@
+import pytest
+import json
+import os
+import subprocess
+import sys
+
+# Configuración del path para que src sea reconocible
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.cli import BACKEND_DIR, BOOT_SNIPPET, parse_importtime, summarize_importtime
+
+# Dependencias que solo deben cargarse al usarse (LLM, PDF/Word, plagio, migraciones)
+LAZY_MODULES = ['httpx', 'PyPDF2', 'docx', 'numpy', 'reportlab', 'alembic', 'flask_migrate', 'redis']
+# Margen amplio para máquinas de CI lentas; en local el arranque ronda el medio segundo
+BOOT_TIME_BUDGET = float(os.getenv('BOOT_TIME_BUDGET', '5'))
+
+def _boot(tmp_path):
+    code = f"""
+import json, sys, time
+start = time.perf_counter()
+{BOOT_SNIPPET}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"elapsed": elapsed, "loaded": [m for m in {LAZY_MODULES!r} if m in sys.modules]}}))
+"""
+    # Sin base de datos: arrancar un worker no debe conectarse ni crear tablas
+    env = dict(os.environ, DATABASE_URL='sqlite://', UPLOAD_FOLDER=str(tmp_path / 'uploads'),
+               TEMP_FOLDER=str(tmp_path / 'temp'), JOB_BROKER='database', SCHEDULER_ENABLED='false')
+    result = subprocess.run([sys.executable, '-c', code], cwd=BACKEND_DIR, env=env, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def test_worker_boot_is_fast_and_skips_heavy_dependencies(tmp_path):
+    boot = _boot(tmp_path)
+
+    assert boot["loaded"] == []
+    assert boot["elapsed"] < BOOT_TIME_BUDGET
+    assert (tmp_path / 'uploads').is_dir()
+
+def test_importtime_summary():
+    stderr = [
+        "import time: self [us] | cumulative | imported package",
+        "import time:       100 |        100 |     sqlalchemy.sql",
+        "import time:        50 |        150 |   sqlalchemy",
+        "import time:        30 |         30 |   src.config.settings",
+        "import time:        20 |        200 | src.main",
+    ]
+    timings = parse_importtime(stderr)
+
+    assert [(t.module, t.depth) for t in timings] == [('sqlalchemy.sql', 2), ('sqlalchemy', 1),
+                                                       ('src.config.settings', 1), ('src.main', 0)]
+    summary = summarize_importtime(timings, top=2)
+    assert summary["packages"] == [('sqlalchemy', 150), ('src', 50)]
+    assert summary["modules"] == [('src.main', 200), ('sqlalchemy', 150)]
@@ -0,0 +1,102 @@
+import pytest
+import json
+import os
+import sys
+
+# Configuración del path para que src sea reconocible
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.models.model_strategy import OllamaModelStrategy
+from src.services.concurrency_limiter import AdaptiveConcurrencyLimiter
+from src.services.llm_transport import LLMTransport
+from src.utils.streaming_json import IncrementalJSONParser, parse_json_tolerant
+
+ANSWER = {
+    "grade": 8.5,
+    "comments": "Usa \"comillas\", llaves {} y comas, sin romper el parser",
+    "strengths": ["Orden", "Claridad"],
+    "areas_of_improvement": [{"tema": "citas", "nivel": [1, 2]}]
+}
+
+def _tokens(text, size=3):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+def test_fields_are_reported_as_soon_as_they_complete():
+    parser = IncrementalJSONParser()
+    completed = []
+    for token in _tokens("Claro, aquí tienes:\n```json\n" + json.dumps(ANSWER, ensure_ascii=False) + "\n```\nSaludos"):
+        new_fields = parser.feed(token)
+        if "grade" in new_fields:
+            assert "strengths" not in parser.fields
+        completed.extend(new_fields)
+
+    assert completed == list(ANSWER)
+    assert parser.complete
+    assert parser.result() == ANSWER
+
+def test_parser_tolerates_trailing_commas():
+    assert parse_json_tolerant('{"solutions": [1, 2,], "rubric": {"total_points": 100,},}') == {
+        "solutions": [1, 2],
+        "rubric": {"total_points": 100}
+    }
+
+def test_truncated_list_keeps_completed_items():
+    text = '{"rubric": {"total_points": 10}, "solutions": [{"exercise_number": 1}, {"exercise_number": 2}, {"exercise_nu'
+    parser = IncrementalJSONParser()
+    parser.feed(text)
+
+    assert not parser.complete
+    assert parser.result(salvage=False) == {"rubric": {"total_points": 10}}
+    assert parser.result()["solutions"] == [{"exercise_number": 1}, {"exercise_number": 2}]
+
+class FakeStreamTransport:
+    """Transporte que emite la respuesta a trozos seguida de texto sobrante"""
+
+    def __init__(self, text):
+        self.text = text
+        self.sent = 0
+        self.closed = False
+
+    def ollama_chat_stream(self, model, messages, options=None):
+        try:
+            for token in _tokens(self.text):
+                self.sent += len(token)
+                yield token
+        finally:
+            self.closed = True
+
+def test_strategy_stops_generation_once_json_is_complete():
+    body = json.dumps(ANSWER)
+    transport = FakeStreamTransport(body + " Espero que sirva." * 50)
+
+    result = OllamaModelStrategy(model="llama3.2", transport=transport).evaluate("prompt")
+
+    assert result == ANSWER
+    assert transport.closed
+    assert transport.sent < len(body) + 10
+
+def test_strategy_stops_when_required_fields_arrive():
+    body = json.dumps(ANSWER)
+    transport = FakeStreamTransport(body)
+
+    result = OllamaModelStrategy(model="llama3.2", transport=transport).evaluate("prompt", required_fields=["grade"])
+
+    assert result == {"grade": 8.5}
+    assert transport.sent < len(body) / 2
+
+def test_early_stopped_stream_counts_as_success_in_limiter():
+    limiter = AdaptiveConcurrencyLimiter(min_limit=1, max_limit=8, initial_limit=8, latency_tolerance=1000)
+    transport = LLMTransport(ollama_limiter=limiter)
+    body = json.dumps(ANSWER) + " Espero que sirva." * 50
+    transport.stream_lines = lambda *args, **kwargs: (
+        json.dumps({"message": {"content": token}, "done": False}) for token in _tokens(body)
+    )
+
+    strategy = OllamaModelStrategy(model="llama3.2", transport=transport)
+    for _ in range(5):
+        assert strategy.evaluate("prompt") == ANSWER
+
+    snapshot = limiter.snapshot()
+    assert (snapshot["completed"], snapshot["failed"], snapshot["inflight"]) == (5, 0, 0)
+    assert snapshot["limit"] == 8
+    assert snapshot["latency_p50"] is not None
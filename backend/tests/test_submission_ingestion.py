@@ -0,0 +1,140 @@
+import pytest
+import io
+import os
+import sys
+import uuid
+import zipfile
+from types import SimpleNamespace
+
+from docx import Document
+from werkzeug.datastructures import FileStorage
+
+# Configuración del path para que src sea reconocible
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.config.settings import config
+from src.jobs.brokers import MemoryJobBroker
+from src.jobs.queue import JobQueue
+from src.services import submission_service as submission_module
+from src.services.correction_engine import CorrectionEngine
+from src.services.submission_service import GRADE_SUBMISSION_JOB, SubmissionIngestionService, student_names
+
+ASSIGNMENT_ID = str(uuid.uuid4())
+TEACHER_ID = str(uuid.uuid4())
+
+def _docx_bytes(text):
+    buffer = io.BytesIO()
+    document = Document()
+    if text:
+        document.add_paragraph(text)
+    document.save(buffer)
+    return buffer.getvalue()
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "UPLOAD_FOLDER", str(tmp_path))
+    monkeypatch.setattr(config, "EXTRACTION_CACHE_ENABLED", False)
+    monkeypatch.setattr(config, "SUBMISSION_EXTRACTION_WORKERS", 1)
+    monkeypatch.setattr(config, "SUBMISSION_INSERT_BATCH_SIZE", 2)
+    queue = JobQueue(MemoryJobBroker())
+    monkeypatch.setattr(submission_module, "get_job_queue", lambda: queue)
+
+    service = SubmissionIngestionService()
+    service.inserted_batches = []
+    monkeypatch.setattr(service, "_owns_assignment", lambda assignment_id, teacher_id: True)
+    monkeypatch.setattr(service, "_insert_corrections", service.inserted_batches.append)
+    return service
+
+def test_student_names_from_paths():
+    assert student_names(["clase/ana_perez.pdf", "clase/Luis-Gomez.docx"]) == ["ana perez", "Luis Gomez"]
+    assert student_names(["entregas/Ana Pérez/tarea.pdf", "entregas/Luis Gómez/tarea.pdf"]) == ["Ana Pérez", "Luis Gómez"]
+    assert student_names(["Ana Pérez_1234_assignsubmission_file_/tarea.pdf"]) == ["Ana Pérez"]
+
+def test_zip_is_ingested_in_batches_and_graded_in_background(service):
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, 'w') as bundle:
+        for name in ("ana", "luis", "marta"):
+            bundle.writestr(f"clase/{name}.docx", _docx_bytes(f"Ejercicio 1: respuesta de {name} con el desarrollo completo"))
+        bundle.writestr("clase/notas.txt", "no es una entrega")
+        bundle.writestr("clase/vacia.docx", _docx_bytes(""))
+        bundle.writestr("__MACOSX/clase/._ana.docx", b"metadatos")
+    archive.seek(0)
+
+    result = service.ingest_archive(ASSIGNMENT_ID, TEACHER_ID, archive)
+
+    assert result["created"] == 3
+    assert sorted(c["student_name"] for c in result["corrections"]) == ["ana", "luis", "marta"]
+    assert sorted(s["filename"] for s in result["skipped"]) == ["clase/notas.txt", "vacia.docx"]
+    # Lotes de dos filas: un INSERT con dos correcciones y otro con una
+    assert [len(batch) for batch in service.inserted_batches] == [2, 1]
+    rows = [row for batch in service.inserted_batches for row in batch]
+    assert all(os.path.exists(row["student_file_path"]) for row in rows)
+    assert len(os.listdir(os.path.dirname(rows[0]["student_file_path"]))) == 3
+
+    queued = []
+    while (job := service.job_queue.broker.claim("worker")) is not None:
+        queued.append(job)
+    assert {job.job_type for job in queued} == {GRADE_SUBMISSION_JOB}
+    assert {job.payload["correction_id"] for job in queued} == {str(row["id"]) for row in rows}
+
+def test_folder_upload_uses_relative_paths(service):
+    files = [
+        FileStorage(io.BytesIO(_docx_bytes("Respuesta completa de la primera estudiante")), "entregas/Ana/tarea.docx"),
+        FileStorage(io.BytesIO(_docx_bytes("Respuesta completa del segundo estudiante")), "entregas/Luis/tarea.docx"),
+    ]
+
+    result = service.ingest_files(ASSIGNMENT_ID, TEACHER_ID, files)
+
+    assert [c["student_name"] for c in result["corrections"]] == ["Ana", "Luis"]
+    assert result["skipped"] == []
+
+class _FakeSession:
+    """Sesión mínima para los manejadores de corrección: una única corrección en memoria"""
+
+    def __init__(self, correction):
+        self.correction = correction
+        self.commits = 0
+
+    def get(self, model, correction_id):
+        return self.correction
+
+    def query(self, *columns):
+        return self
+
+    def filter(self, *criteria):
+        return self
+
+    def first(self):
+        return None
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        pass
+
+def test_failing_model_retries_and_records_error_instead_of_zero(service, monkeypatch):
+    class BrokenService:
+        def correct_assignment(self, key_criteria, assignment_content, language):
+            raise ConnectionError("Ollama no responde")
+
+    engine = CorrectionEngine(BrokenService, max_concurrency=1)
+    correction = SimpleNamespace(assignment_id=ASSIGNMENT_ID, student_file_path="tarea.docx", total_score=None,
+                                 correction_details=None, feedback=None)
+    session = _FakeSession(correction)
+    monkeypatch.setattr(submission_module, "db", SimpleNamespace(session=session))
+    monkeypatch.setattr(submission_module, "get_correction_engine", lambda model_type: engine)
+    monkeypatch.setattr(service.file_processor, "extract_text", lambda path: "Respuesta del estudiante")
+    queue = service.job_queue
+    queue.retry_base_delay = queue.retry_max_delay = 0
+
+    queue.enqueue(GRADE_SUBMISSION_JOB, {"correction_id": str(uuid.uuid4())}, max_attempts=2)
+    outcomes = []
+    while (job := queue.broker.claim("worker")) is not None:
+        outcomes.append(queue.execute(job))
+    engine.shutdown()
+
+    assert outcomes == [False, False]
+    assert correction.total_score is None
+    assert correction.feedback == "No se pudo corregir automáticamente la entrega"
+    assert correction.correction_details["error"].startswith("La corrección automática falló")
@@ -0,0 +1,86 @@
+import pytest
+import os
+import sys
+import json
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+# Configuración del path para que src sea reconocible
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import src.database.database  # registra los spans de los commits
+from src.jobs.brokers import MemoryJobBroker
+from src.jobs.queue import JobQueue
+from src.utils.tracing import SpanExporter, child_span, current_span, file_writer, stage_timings, start_span
+
+def test_nested_spans_share_trace_and_timings():
+    with child_span('file.extract') as outside:
+        pass
+
+    with pytest.raises(ValueError):
+        with start_span('assignment.create') as root:
+            with start_span('file.extract') as child:
+                pass
+            with child_span('ai.analyze') as nested:
+                pass
+            timings = stage_timings()
+            raise ValueError("fallo al guardar")
+
+    # Fuera de una traza child_span no mide nada
+    assert not hasattr(outside, 'trace_id')
+    assert child.trace_id == nested.trace_id == root.trace_id
+    assert child.parent_id == nested.parent_id == root.span_id
+    assert set(timings) == {'file.extract', 'ai.analyze'}
+    assert root.error == "ValueError: fallo al guardar"
+    assert current_span() is None
+
+def test_commits_inside_a_trace_are_spans():
+    engine = create_engine('sqlite://')
+    with Session(engine) as session:
+        session.execute(text("SELECT 1"))
+        session.commit()
+        with start_span('job assignment.ai_analysis'):
+            session.execute(text("SELECT 1"))
+            session.commit()
+            timings = stage_timings()
+    assert list(timings) == ['db.commit']
+
+def test_jobs_continue_the_trace_of_the_enqueuer():
+    queue = JobQueue(MemoryJobBroker(), retry_base_delay=0)
+    seen = []
+    queue.register('test.job', lambda payload: seen.append((payload['value'], current_span())))
+
+    with start_span('submissions.ingest') as root:
+        queue.enqueue_many('test.job', [{'value': 1}, {'value': 2}])
+    queue.enqueue('test.job', {'value': 3})
+
+    while (job := queue.broker.claim('worker-1')) is not None:
+        queue.execute(job)
+
+    traced = {value: span for value, span in seen}
+    assert traced[1].trace_id == traced[2].trace_id == root.trace_id
+    assert traced[1].parent_id == root.span_id
+    assert traced[1].kind == 'consumer'
+    # Sin traza al encolar, el trabajo abre una nueva
+    assert traced[3].parent_id is None and traced[3].trace_id != root.trace_id
+
+def test_file_exporter_writes_otlp_json(tmp_path):
+    path = tmp_path / 'traces' / 'spans.jsonl'
+    exporter = SpanExporter(file_writer(str(path)), 'autograder-test', interval=60)
+    with start_span('assignment.upload', {'teacher.id': 'abc', 'file.size': 10}, kind='server') as root:
+        with start_span('upload.ingest') as child:
+            pass
+    exporter.submit(child)
+    exporter.submit(root)
+
+    assert exporter.flush() == 2
+    request = json.loads(path.read_text().splitlines()[0])
+    resource = request['resourceSpans'][0]
+    spans = resource['scopeSpans'][0]['spans']
+    assert {"key": "service.name", "value": {"stringValue": "autograder-test"}} in resource['resource']['attributes']
+    assert [span['name'] for span in spans] == ['upload.ingest', 'assignment.upload']
+    assert spans[0]['parentSpanId'] == spans[1]['spanId'] == root.span_id
+    assert spans[1]['kind'] == 2 and spans[1]['status'] == {"code": 1}
+    assert {"key": "file.size", "value": {"intValue": "10"}} in spans[1]['attributes']
+    assert int(spans[1]['endTimeUnixNano']) >= int(spans[0]['endTimeUnixNano'])
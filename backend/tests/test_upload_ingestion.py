@@ -0,0 +1,69 @@
+import pytest
+import hashlib
+import io
+import os
+import sys
+
+from docx import Document
+from flask import Flask, jsonify, request
+
+# Configuración del path para que src sea reconocible
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.config.settings import config
+from src.services.file_processor import FileProcessor
+from src.services.upload_ingestion import HashingSpooledFile, UploadRejected, UploadRequest, ingest_upload
+
+def _docx_bytes(text):
+    buffer = io.BytesIO()
+    document = Document()
+    document.add_paragraph(text)
+    document.save(buffer)
+    return buffer.getvalue()
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "UPLOAD_FOLDER", str(tmp_path))
+    app = Flask(__name__)
+    app.request_class = UploadRequest
+
+    @app.route('/upload', methods=['POST'])
+    def upload():
+        try:
+            file = request.files['file']
+            streamed = isinstance(file.stream, HashingSpooledFile)
+            upload = ingest_upload(file)
+        except UploadRejected as e:
+            return jsonify({'error': str(e)}), e.status_code
+        result = FileProcessor().process_stream(upload.stream, upload.extension, sha256=upload.sha256)
+        upload.close()
+        return jsonify({'sha256': upload.sha256, 'size': upload.size, 'extension': upload.extension,
+                        'streamed': streamed, 'exercises': len(result['exercises'])})
+
+    return app.test_client()
+
+def test_upload_is_hashed_while_received(client):
+    data = _docx_bytes("Ejercicio 1: Resolver la ecuación x + 2 = 5 (2 puntos)")
+
+    # El nombre y la extensión no cuentan: el formato se reconoce por el contenido
+    response = client.post('/upload', data={'file': (io.BytesIO(data), 'entrega.pdf')})
+
+    assert response.status_code == 200
+    assert response.json == {'sha256': hashlib.sha256(data).hexdigest(), 'size': len(data),
+                             'extension': '.docx', 'streamed': True, 'exercises': 1}
+
+def test_unknown_format_is_rejected(client):
+    response = client.post('/upload', data={'file': (io.BytesIO(b'hola, soy un .txt'), 'entrega.pdf')})
+
+    assert response.status_code == 415
+
+def test_oversized_upload_stops_early(client, monkeypatch):
+    from werkzeug.exceptions import RequestEntityTooLarge
+    from werkzeug.datastructures import FileStorage
+
+    monkeypatch.setattr(config, "MAX_CONTENT_LENGTH", 1024)
+    response = client.post('/upload', data={'file': (io.BytesIO(b'%PDF-' + b'0' * 4096), 'grande.pdf')})
+    assert response.status_code == 413
+
+    with pytest.raises(RequestEntityTooLarge):
+        ingest_upload(FileStorage(io.BytesIO(b'%PDF-' + b'0' * 4096), 'grande.pdf'))
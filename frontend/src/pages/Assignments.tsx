@@ -13,7 +13,7 @@ import {
   Trash2,
   FileDown
 } from 'lucide-react';
-import { Assignment, AssignmentStatus } from '../types';
+import { Assignment, AssignmentCounts, AssignmentStatus } from '../types';
 import { useAuthStore } from '../stores/authStore';
 import { apiService } from '../services/api';
 
@@ -22,6 +22,9 @@ const Assignments: React.FC = () => {
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
   const [deletingId, setDeletingId] = useState<string | null>(null);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const [counts, setCounts] = useState<AssignmentCounts | null>(null);
   const [downloadingId, setDownloadingId] = useState<string | null>(null);
   
   const { setError: setAuthError, clearError } = useAuthStore();
@@ -35,8 +38,13 @@ const Assignments: React.FC = () => {
       setLoading(true);
       clearError();
       
-      const response = await apiService.getAssignments();
+      const [response, countsResponse] = await Promise.all([
+        apiService.getAssignments(),
+        apiService.getAssignmentCounts(),
+      ]);
       setAssignments(response.data || []);
+      setNextCursor(response.pagination?.next_cursor ?? null);
+      setCounts(countsResponse.data || null);
     } catch (err: any) {
       const errorMessage = err.response?.data?.error || 'Error al cargar rúbricas y soluciones';
       setError(errorMessage);
@@ -46,6 +54,24 @@ const Assignments: React.FC = () => {
     }
   };
 
+  const loadMoreAssignments = async () => {
+    if (!nextCursor) return;
+    try {
+      setLoadingMore(true);
+      const response = await apiService.getAssignments(nextCursor);
+      setAssignments(prev => [...prev, ...(response.data || [])]);
+      setNextCursor(response.pagination?.next_cursor ?? null);
+    } catch (err: any) {
+      const errorMessage = err.response?.data?.error || 'Error al cargar rúbricas y soluciones';
+      setError(errorMessage);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
+  const countByStatus = (status: AssignmentStatus) =>
+    counts?.by_status[status] ?? assignments.filter(a => a.status === status).length;
+
   const getStatusInfo = (status: AssignmentStatus) => {
     switch (status) {
       case AssignmentStatus.UPLOADED:
@@ -126,6 +152,8 @@ const Assignments: React.FC = () => {
       setDeletingId(assignmentId);
       await apiService.deleteAssignment(assignmentId);
       setAssignments(assignments.filter(a => a.id !== assignmentId));
+      const countsResponse = await apiService.getAssignmentCounts();
+      setCounts(countsResponse.data || null);
     } catch (err: any) {
       const errorMessage = err.response?.data?.error || 'Error al eliminar la asignación';
       setError(errorMessage);
@@ -194,7 +222,7 @@ const Assignments: React.FC = () => {
               Editar
             </Link>
             
-            {assignment.final_rubric && (
+            {assignment.has_final_rubric && (
               <button
                 onClick={() => handleDownloadRubric(assignment.id, assignment.title)}
                 disabled={downloadingId === `rubric-${assignment.id}`}
@@ -209,7 +237,7 @@ const Assignments: React.FC = () => {
               </button>
             )}
             
-            {assignment.final_solutions && (
+            {assignment.has_final_solutions && (
               <button
                 onClick={() => handleDownloadSolutions(assignment.id, assignment.title)}
                 disabled={downloadingId === `solutions-${assignment.id}`}
@@ -348,15 +376,15 @@ const Assignments: React.FC = () => {
                         Creada: {formatDate(assignment.created_at)}
                       </div>
                       
-                      {assignment.extracted_content && (
+                      {assignment.exercise_count !== undefined && (
                         <>
                           <div className="flex items-center text-sm text-gray-500">
                             <FileText className="h-4 w-4 mr-2" />
-                            {assignment.extracted_content.exercises.length} ejercicios
+                            {assignment.exercise_count} ejercicios
                           </div>
                           <div className="flex items-center text-sm text-gray-500">
                             <CheckCircle className="h-4 w-4 mr-2" />
-                            {assignment.extracted_content.total_points} puntos
+                            {assignment.total_points} puntos
                           </div>
                         </>
                       )}
@@ -383,6 +411,19 @@ const Assignments: React.FC = () => {
               </div>
             );
           })}
+
+          {nextCursor && (
+            <div className="text-center">
+              <button
+                onClick={loadMoreAssignments}
+                disabled={loadingMore}
+                className="inline-flex items-center px-4 py-2 border border-gray-300 text-sm font-medium rounded-md text-gray-700 bg-white hover:bg-gray-50 disabled:opacity-50"
+              >
+                {loadingMore && <Loader className="h-4 w-4 mr-2 animate-spin" />}
+                Cargar más
+              </button>
+            </div>
+          )}
         </div>
       )}
 
@@ -396,7 +437,7 @@ const Assignments: React.FC = () => {
               </div>
               <div className="ml-4">
                 <p className="text-sm font-medium text-gray-500">Total</p>
-                <p className="text-2xl font-semibold text-gray-900">{assignments.length}</p>
+                <p className="text-2xl font-semibold text-gray-900">{counts?.total ?? assignments.length}</p>
               </div>
             </div>
           </div>
@@ -409,7 +450,7 @@ const Assignments: React.FC = () => {
               <div className="ml-4">
                 <p className="text-sm font-medium text-gray-500">Finalizadas</p>
                 <p className="text-2xl font-semibold text-gray-900">
-                  {assignments.filter(a => a.status === AssignmentStatus.FINALIZED).length}
+                  {countByStatus(AssignmentStatus.FINALIZED)}
                 </p>
               </div>
             </div>
@@ -423,7 +464,7 @@ const Assignments: React.FC = () => {
               <div className="ml-4">
                 <p className="text-sm font-medium text-gray-500">En Edición</p>
                 <p className="text-2xl font-semibold text-gray-900">
-                  {assignments.filter(a => a.status === AssignmentStatus.READY_FOR_EDITING).length}
+                  {countByStatus(AssignmentStatus.READY_FOR_EDITING)}
                 </p>
               </div>
             </div>
@@ -437,7 +478,7 @@ const Assignments: React.FC = () => {
               <div className="ml-4">
                 <p className="text-sm font-medium text-gray-500">Procesando</p>
                 <p className="text-2xl font-semibold text-gray-900">
-                  {assignments.filter(a => a.status === AssignmentStatus.PROCESSING).length}
+                  {countByStatus(AssignmentStatus.PROCESSING)}
                 </p>
               </div>
             </div>
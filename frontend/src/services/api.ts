@@ -93,8 +93,15 @@ class ApiService {
   }
 
   // Métodos de asignaciones
-  async getAssignments(): Promise<ApiResponse> {
-    const response: AxiosResponse<ApiResponse> = await this.api.get('/api/assignments');
+  async getAssignments(cursor?: string | null): Promise<ApiResponse> {
+    const response: AxiosResponse<ApiResponse> = await this.api.get('/api/assignments', {
+      params: cursor ? { cursor } : undefined,
+    });
+    return response.data;
+  }
+
+  async getAssignmentCounts(): Promise<ApiResponse> {
+    const response: AxiosResponse<ApiResponse> = await this.api.get('/api/assignments/count');
     return response.data;
   }
 
@@ -55,10 +55,20 @@ export interface Assignment {
   ai_analysis?: AIAnalysis;
   final_solutions?: Solution[];
   final_rubric?: RubricData;
+  // Campos de resumen del listado paginado
+  total_points?: number;
+  exercise_count?: number;
+  has_final_solutions?: boolean;
+  has_final_rubric?: boolean;
   created_at: string;
   updated_at: string;
 }
 
+export interface AssignmentCounts {
+  total: number;
+  by_status: Partial<Record<AssignmentStatus, number>>;
+}
+
 export enum AssignmentStatus {
   UPLOADED = 'uploaded',
   PROCESSING = 'processing',
@@ -172,6 +182,12 @@ export interface ApiResponse<T = any> {
   message?: string;
   data?: T;
   error?: string;
+  pagination?: CursorPagination;
+}
+
+export interface CursorPagination {
+  next_cursor: string | null;
+  has_more: boolean;
 }
 
 export interface PaginatedResponse<T> {